@@ -1,7 +1,10 @@
 import os
+import re
+import asyncio
 import asyncpg
+from datetime import datetime
 from dotenv import load_dotenv
-from typing import Optional
+from typing import Optional, List, Tuple
 
 load_dotenv()
 
@@ -18,8 +21,21 @@ if not DATABASE_URL:
 
 print(f"Connecting to PostgreSQL at {DATABASE_URL}")
 
+# api_analytics is range-partitioned by month on created_at. Partitions for
+# the current month and this many months ahead are kept in place.
+ANALYTICS_PARTITION_MONTHS_AHEAD = int(os.getenv("ANALYTICS_PARTITION_MONTHS_AHEAD", "3"))
+# Months of raw api_analytics rows to keep; older partitions are dropped
+# whole. 0 keeps everything. The hourly/daily rollups are never dropped.
+ANALYTICS_RETENTION_MONTHS = int(os.getenv("ANALYTICS_RETENTION_MONTHS", "0"))
+# Seconds between partition maintenance runs
+ANALYTICS_PARTITION_MAINTENANCE_INTERVAL = 24 * 60 * 60
+# Bound of a monthly partition as printed by pg_get_expr(relpartbound). The
+# DEFAULT partition and the MINVALUE-bounded legacy partition do not match.
+ANALYTICS_PARTITION_BOUND_PATTERN = re.compile(r"^FOR VALUES FROM \('([^']+)'\) TO \('([^']+)'\)$")
+
 # Global connection pool
 _pool: Optional[asyncpg.Pool] = None
+_partition_maintenance_task: Optional[asyncio.Task] = None
 
 async def init_db():
     """Initialize the database connection pool."""
@@ -68,23 +84,111 @@ async def create_tables():
             )
         ''')
         
-        # Create api_analytics table
+        # Create api_analytics table (partitioned by month) and its upcoming partitions
+        await create_analytics_table(conn)
+        await create_analytics_partitions(conn)
+        # Marks calls answered from the verification result cache
+        await conn.execute('ALTER TABLE api_analytics ADD COLUMN IF NOT EXISTS cache_hit BOOLEAN NOT NULL DEFAULT FALSE')
+        
+        # Create the shared tier of the upstream result cache
         await conn.execute('''
-            CREATE TABLE IF NOT EXISTS api_analytics (
-                id SERIAL PRIMARY KEY,
-                user_id INTEGER REFERENCES users(id),
+            CREATE TABLE IF NOT EXISTS api_result_cache (
+                cache_key VARCHAR(64) PRIMARY KEY,
+                service VARCHAR(255) NOT NULL,
+                result JSONB,
+                error TEXT,
+                expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+            )
+        ''')
+        
+        # Create the table of upstream async verification jobs (DL, voter ID)
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS async_verification_jobs (
+                job_id VARCHAR(36) PRIMARY KEY,
+                kind VARCHAR(50) NOT NULL,
+                request_id VARCHAR(255) NOT NULL,
+                user_id INTEGER,
+                username VARCHAR(255),
+                user_role VARCHAR(50),
+                context JSONB,
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                result JSONB,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+            )
+        ''')
+        
+        # Create the tables of bulk verification batches and their subjects
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS verification_batches (
+                batch_id VARCHAR(36) PRIMARY KEY,
+                batch_type VARCHAR(50) NOT NULL,
+                user_id INTEGER,
                 username VARCHAR(255),
-                service VARCHAR(255),
-                endpoint VARCHAR(255),
-                method VARCHAR(10),
-                status_code INTEGER,
-                response_time FLOAT,
-                cost DECIMAL(10, 4) DEFAULT 0,
-                ip_address INET,
-                user_agent TEXT,
-                request_data JSONB,
-                response_data JSONB,
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+                user_role VARCHAR(50),
+                options JSONB,
+                total_items INTEGER NOT NULL,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS verification_batch_items (
+                batch_id VARCHAR(36) NOT NULL REFERENCES verification_batches(batch_id) ON DELETE CASCADE,
+                item_index INTEGER NOT NULL,
+                subject JSONB NOT NULL,
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                result JSONB,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                started_at TIMESTAMP WITH TIME ZONE,
+                finished_at TIMESTAMP WITH TIME ZONE,
+                PRIMARY KEY (batch_id, item_index)
+            )
+        ''')
+
+        # Create the outbound mail queue and the attachments of queued messages
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS mail_outbox (
+                message_id VARCHAR(36) PRIMARY KEY,
+                kind VARCHAR(50) NOT NULL,
+                user_id INTEGER,
+                subject TEXT NOT NULL,
+                recipients JSONB NOT NULL,
+                body TEXT NOT NULL,
+                html_body TEXT,
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                next_attempt_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP WITH TIME ZONE,
+                sent_at TIMESTAMP WITH TIME ZONE,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS mail_outbox_attachments (
+                message_id VARCHAR(36) NOT NULL REFERENCES mail_outbox(message_id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                filename VARCHAR(255) NOT NULL,
+                content_type VARCHAR(100) NOT NULL,
+                size BIGINT NOT NULL DEFAULT 0,
+                PRIMARY KEY (message_id, position)
+            )
+        ''')
+        # Attachment content moved to fixed-size chunks so neither the endpoint
+        # nor the sender holds a whole attachment in memory
+        await conn.execute('ALTER TABLE mail_outbox_attachments DROP COLUMN IF EXISTS content')
+        await conn.execute('ALTER TABLE mail_outbox_attachments ADD COLUMN IF NOT EXISTS size BIGINT NOT NULL DEFAULT 0')
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS mail_outbox_attachment_chunks (
+                message_id VARCHAR(36) NOT NULL REFERENCES mail_outbox(message_id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                content BYTEA NOT NULL,
+                PRIMARY KEY (message_id, position, chunk_index)
             )
         ''')
         
@@ -92,8 +196,23 @@ async def create_tables():
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)')
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_users_username ON users(username)')
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_analytics_user_id ON api_analytics(user_id)')
-        await conn.execute('CREATE INDEX IF NOT EXISTS idx_analytics_created_at ON api_analytics(created_at)')
+        # Backs keyset pagination on (created_at, id) as well as created_at range filters
+        await conn.execute('CREATE INDEX IF NOT EXISTS idx_analytics_created_at_id ON api_analytics(created_at DESC, id DESC)')
+        await conn.execute('DROP INDEX IF EXISTS idx_analytics_created_at')
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_analytics_service ON api_analytics(service)')
+        await conn.execute('CREATE INDEX IF NOT EXISTS idx_result_cache_expires_at ON api_result_cache(expires_at)')
+        # One job per user and upstream request; users sharing a request_id each own a job
+        await conn.execute('DROP INDEX IF EXISTS idx_async_jobs_kind_request')
+        await conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_async_jobs_kind_request_user ON async_verification_jobs(kind, request_id, (COALESCE(user_id, 0)))')
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_async_jobs_pending ON async_verification_jobs(expires_at) WHERE status = 'pending'")
+        # Workers claim unfinished items; keep that scan small as batches complete
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_batch_items_unfinished ON verification_batch_items(item_index, batch_id) WHERE status IN ('pending', 'running')")
+        await conn.execute('CREATE INDEX IF NOT EXISTS idx_batches_user_id ON verification_batches(user_id, created_at DESC)')
+        # The mail sender claims due, unsent messages
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_mail_outbox_due ON mail_outbox(next_attempt_at) WHERE status IN ('pending', 'sending')")
+
+        # Pre-aggregated analytics rollups
+        await create_analytics_rollup_tables(conn)
         
         # Add roleResources column if it doesn't exist (migration for existing tables)
         try:
@@ -113,4 +232,369 @@ async def create_tables():
         except Exception as e:
             print(f"Note: Old columns might already be removed: {e}")
         
-        print("Database tables created successfully!")
\ No newline at end of file
+        print("Database tables created successfully!")
+
+
+# Rollup tables hold api_analytics pre-aggregated per hour and per day. Key
+# columns are NOT NULL so ON CONFLICT can match them; missing values are
+# stored as 0 / '' and turned back into NULL when read. Buckets are computed
+# in the session time zone, the same way the usage queries bucket raw rows.
+# table -> (bucket column definition, bucket expression over api_analytics)
+ANALYTICS_ROLLUP_TABLES = {
+    "api_analytics_hourly": ("bucket TIMESTAMP WITH TIME ZONE", "date_trunc('hour', created_at)"),
+    "api_analytics_daily": ("bucket DATE", "DATE(created_at)"),
+}
+
+async def create_analytics_rollup_tables(conn):
+    """
+    Create the hourly/daily analytics rollup tables and backfill them once.
+
+    Args:
+        conn: Connection to run the DDL on
+    """
+    for table, (bucket_column, _) in ANALYTICS_ROLLUP_TABLES.items():
+        await conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                {bucket_column} NOT NULL,
+                user_id INTEGER NOT NULL DEFAULT 0,
+                username VARCHAR(255) NOT NULL DEFAULT '',
+                service VARCHAR(255) NOT NULL DEFAULT '',
+                endpoint VARCHAR(255) NOT NULL DEFAULT '',
+                status_code INTEGER NOT NULL DEFAULT 0,
+                profile_type VARCHAR(255) NOT NULL DEFAULT '',
+                calls BIGINT NOT NULL DEFAULT 0,
+                cost DECIMAL(14, 4) NOT NULL DEFAULT 0,
+                response_time_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+                PRIMARY KEY (bucket, user_id, username, service, endpoint, status_code, profile_type)
+            )
+        ''')
+
+    # Backfill from existing rows the first time the rollups are created.
+    # The lock keeps concurrent inserts (which update the rollups themselves)
+    # from being counted twice.
+    async with conn.transaction():
+        await conn.execute('LOCK TABLE api_analytics IN SHARE MODE')
+        if await conn.fetchval('SELECT EXISTS (SELECT 1 FROM api_analytics_hourly)'):
+            return
+        if not await conn.fetchval('SELECT EXISTS (SELECT 1 FROM api_analytics)'):
+            return
+        for table, (_, bucket_expression) in ANALYTICS_ROLLUP_TABLES.items():
+            await conn.execute(f'''
+                INSERT INTO {table} (
+                    bucket, user_id, username, service, endpoint, status_code,
+                    profile_type, calls, cost, response_time_sum
+                )
+                SELECT
+                    {bucket_expression},
+                    COALESCE(user_id, 0),
+                    COALESCE(username, ''),
+                    COALESCE(service, ''),
+                    COALESCE(endpoint, ''),
+                    COALESCE(status_code, 0),
+                    COALESCE(request_data->>'profileType', ''),
+                    COUNT(*),
+                    COALESCE(SUM(cost), 0),
+                    COALESCE(SUM(response_time), 0)
+                FROM api_analytics
+                GROUP BY 1, 2, 3, 4, 5, 6, 7
+            ''')
+        print("Backfilled analytics rollup tables")
+
+
+# api_analytics has no single-column primary key: a partitioned table's
+# unique constraints must include the partition key. id keeps its own
+# sequence so ids stay unique and ordered across partitions.
+ANALYTICS_TABLE_DDL = '''
+    CREATE TABLE api_analytics (
+        id INTEGER NOT NULL DEFAULT nextval('api_analytics_id_seq'),
+        user_id INTEGER REFERENCES users(id),
+        username VARCHAR(255),
+        service VARCHAR(255),
+        endpoint VARCHAR(255),
+        method VARCHAR(10),
+        status_code INTEGER,
+        response_time FLOAT,
+        cost DECIMAL(10, 4) DEFAULT 0,
+        ip_address INET,
+        user_agent TEXT,
+        request_data JSONB,
+        response_data JSONB,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at)
+'''
+
+async def create_analytics_table(conn):
+    """
+    Create the partitioned api_analytics table.
+
+    An existing unpartitioned api_analytics table is renamed to
+    api_analytics_legacy and attached as the partition holding everything up
+    to the end of its newest month, so existing rows stay queryable without
+    being copied. The retention policy never drops it; drop it by hand once
+    its rows are no longer needed.
+
+    Args:
+        conn: Connection to run the DDL on
+    """
+    relkind = await conn.fetchval("SELECT relkind::text FROM pg_class WHERE oid = to_regclass('api_analytics')")
+    if relkind == 'p':
+        return
+
+    async with conn.transaction():
+        await conn.execute('CREATE SEQUENCE IF NOT EXISTS api_analytics_id_seq')
+
+        legacy_upper_bound = None
+        if relkind == 'r':
+            print("Converting api_analytics to a partitioned table")
+            await conn.execute('DROP INDEX IF EXISTS idx_analytics_created_at')
+            await conn.execute('ALTER TABLE api_analytics RENAME TO api_analytics_legacy')
+            # Index names are schema-wide; free them up for the partitioned table
+            index_names = await conn.fetch('''
+                SELECT indexname FROM pg_indexes
+                WHERE schemaname = current_schema() AND tablename = 'api_analytics_legacy'
+            ''')
+            for row in index_names:
+                await conn.execute(f'ALTER INDEX "{row["indexname"]}" RENAME TO "{row["indexname"]}_legacy"')
+            # Range partitions cannot hold a NULL partition key
+            await conn.execute('UPDATE api_analytics_legacy SET created_at = NOW() WHERE created_at IS NULL')
+            await conn.execute('ALTER TABLE api_analytics_legacy ALTER COLUMN created_at SET NOT NULL')
+            # A partition cannot keep a primary key of its own; replace the
+            # one on id with the parent's (id, created_at) so ATTACH adopts it
+            legacy_primary_key = await conn.fetchval('''
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = 'api_analytics_legacy'::regclass AND contype = 'p'
+            ''')
+            if legacy_primary_key is not None:
+                await conn.execute(f'ALTER TABLE api_analytics_legacy DROP CONSTRAINT "{legacy_primary_key}"')
+            await conn.execute('ALTER TABLE api_analytics_legacy ADD CONSTRAINT api_analytics_legacy_pkey PRIMARY KEY (id, created_at)')
+            legacy_upper_bound = await conn.fetchval('''
+                SELECT GREATEST(
+                    date_trunc('month', NOW()),
+                    date_trunc('month', MAX(created_at))
+                ) + interval '1 month'
+                FROM api_analytics_legacy
+            ''')
+
+        await conn.execute(ANALYTICS_TABLE_DDL)
+        # Tie the sequence to the parent so dropping a partition never drops it
+        await conn.execute('ALTER SEQUENCE api_analytics_id_seq OWNED BY api_analytics.id')
+
+        if legacy_upper_bound is not None:
+            await conn.execute(f'''
+                ALTER TABLE api_analytics ATTACH PARTITION api_analytics_legacy
+                FOR VALUES FROM (MINVALUE) TO ('{legacy_upper_bound.isoformat()}')
+            ''')
+
+        # Catches rows dated before the oldest partition (or past the newest)
+        await conn.execute('CREATE TABLE api_analytics_default PARTITION OF api_analytics DEFAULT')
+
+    print("Created partitioned api_analytics table")
+
+
+async def _create_analytics_partition(conn, name: str, month_start: datetime, month_end: datetime):
+    """
+    Create one monthly partition, moving its rows out of the default partition.
+
+    PostgreSQL refuses to create a partition while the default partition
+    holds rows that belong in it, so those rows are set aside in a temporary
+    table and inserted again once the partition exists. Must run inside a
+    transaction.
+    """
+    # Keep inserts from routing new rows of this month to the default partition meanwhile
+    await conn.execute('LOCK TABLE api_analytics_default IN ACCESS EXCLUSIVE MODE')
+    has_default_rows = await conn.fetchval('''
+        SELECT EXISTS (
+            SELECT 1 FROM api_analytics_default WHERE created_at >= $1 AND created_at < $2
+        )
+    ''', month_start, month_end)
+
+    if has_default_rows:
+        await conn.execute('CREATE TEMP TABLE api_analytics_moved (LIKE api_analytics)')
+        await conn.execute('''
+            WITH moved AS (
+                DELETE FROM api_analytics_default
+                WHERE created_at >= $1 AND created_at < $2
+                RETURNING *
+            )
+            INSERT INTO api_analytics_moved SELECT * FROM moved
+        ''', month_start, month_end)
+
+    await conn.execute(f'''
+        CREATE TABLE {name} PARTITION OF api_analytics
+        FOR VALUES FROM ('{month_start.isoformat()}') TO ('{month_end.isoformat()}')
+    ''')
+
+    if has_default_rows:
+        moved = await conn.execute('INSERT INTO api_analytics SELECT * FROM api_analytics_moved')
+        await conn.execute('DROP TABLE api_analytics_moved')
+        print(f"Moved {moved.split()[-1]} analytics rows from the default partition to {name}")
+
+
+async def create_analytics_partitions(conn, months_ahead: int = ANALYTICS_PARTITION_MONTHS_AHEAD) -> List[str]:
+    """
+    Create monthly api_analytics partitions from the current month onwards.
+
+    Months already covered by another partition (e.g. api_analytics_legacy)
+    are skipped. Rows of a new month that landed in the default partition
+    (e.g. while maintenance was not running) are moved into it.
+
+    Args:
+        conn: Connection to run the DDL on
+        months_ahead: Number of months after the current one to create
+
+    Returns:
+        Names of the partitions that were created
+    """
+    months = await conn.fetch('''
+        SELECT
+            'api_analytics_' || to_char(month_start, '"y"YYYY"m"MM') AS name,
+            month_start,
+            month_start + interval '1 month' AS month_end
+        FROM generate_series(
+            date_trunc('month', NOW()),
+            date_trunc('month', NOW()) + make_interval(months => $1),
+            interval '1 month'
+        ) AS month_start
+    ''', months_ahead)
+
+    created = []
+    for month in months:
+        if await conn.fetchval('SELECT to_regclass($1) IS NOT NULL', month["name"]):
+            continue
+        try:
+            async with conn.transaction():
+                await _create_analytics_partition(conn, month["name"], month["month_start"], month["month_end"])
+            created.append(month["name"])
+        except asyncpg.exceptions.InvalidObjectDefinitionError as e:
+            # Overlaps a partition that already covers this month
+            print(f"Skipping analytics partition {month['name']}: {e}")
+        except asyncpg.exceptions.CheckViolationError as e:
+            # The default partition still holds rows of this month; retried on the next run
+            print(f"Could not create analytics partition {month['name']}: {e}")
+
+    if created:
+        print(f"Created analytics partitions: {', '.join(created)}")
+    return created
+
+
+def parse_analytics_partition_bound(bound: str) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Parse the range of a monthly api_analytics partition.
+
+    Args:
+        bound: Partition bound from pg_get_expr(relpartbound, oid)
+
+    Returns:
+        Tuple of (start, end) timestamps, or None for the DEFAULT partition
+        and any bound that is not a plain timestamp range (e.g. MINVALUE)
+    """
+    match = ANALYTICS_PARTITION_BOUND_PATTERN.match(bound or "")
+    if not match:
+        return None
+    try:
+        return datetime.fromisoformat(match.group(1)), datetime.fromisoformat(match.group(2))
+    except ValueError:
+        return None
+
+
+def select_expired_analytics_partitions(partitions: List[Tuple[str, str]], cutoff: datetime) -> List[str]:
+    """
+    Pick the monthly partitions whose rows all fall before the cutoff.
+
+    Args:
+        partitions: (name, bound) pairs of the api_analytics partitions
+        cutoff: Start of the oldest month to keep
+
+    Returns:
+        Names of the expired partitions, sorted
+    """
+    expired = []
+    for name, bound in partitions:
+        month = parse_analytics_partition_bound(bound)
+        if month is not None and month[1] <= cutoff:
+            expired.append(name)
+    return sorted(expired)
+
+
+async def drop_expired_analytics_partitions(conn, retention_months: int = ANALYTICS_RETENTION_MONTHS) -> List[str]:
+    """
+    Drop api_analytics partitions whose rows are all older than the retention window.
+
+    Whole partitions are dropped instead of deleting rows, so expiring data
+    costs no table scan and leaves no bloat behind. Only monthly partitions
+    are dropped; the default partition and the legacy partition (bounded
+    from MINVALUE) are always kept.
+
+    Args:
+        conn: Connection to run the DDL on
+        retention_months: Months of data to keep besides the current one; 0 disables retention
+
+    Returns:
+        Names of the partitions that were dropped
+    """
+    if retention_months <= 0:
+        return []
+
+    cutoff = await conn.fetchval(
+        "SELECT date_trunc('month', NOW()) - make_interval(months => $1)", retention_months
+    )
+    partitions = await conn.fetch('''
+        SELECT child.relname AS name, pg_get_expr(child.relpartbound, child.oid) AS bound
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = 'api_analytics'::regclass
+    ''')
+
+    dropped = []
+    for name in select_expired_analytics_partitions([(row["name"], row["bound"]) for row in partitions], cutoff):
+        await conn.execute(f'DROP TABLE "{name}"')
+        dropped.append(name)
+
+    if dropped:
+        print(f"Dropped expired analytics partitions: {', '.join(dropped)}")
+    return dropped
+
+
+async def maintain_analytics_partitions():
+    """Create upcoming api_analytics partitions and apply the retention policy."""
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        await create_analytics_partitions(conn)
+        await drop_expired_analytics_partitions(conn)
+
+
+async def _partition_maintenance_loop():
+    """Run partition maintenance periodically so long-running processes never run out of partitions."""
+    while True:
+        await asyncio.sleep(ANALYTICS_PARTITION_MAINTENANCE_INTERVAL)
+        try:
+            await maintain_analytics_partitions()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Analytics partition maintenance failed: {e}")
+
+
+async def start_analytics_partition_maintenance():
+    """Apply the retention policy now and schedule periodic partition maintenance (called on startup)."""
+    global _partition_maintenance_task
+    try:
+        # create_tables already created this month's partitions
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            await drop_expired_analytics_partitions(conn)
+    except Exception as e:
+        print(f"Analytics partition retention failed: {e}")
+
+    if _partition_maintenance_task is None or _partition_maintenance_task.done():
+        _partition_maintenance_task = asyncio.get_running_loop().create_task(_partition_maintenance_loop())
+
+
+async def stop_analytics_partition_maintenance():
+    """Stop periodic partition maintenance (called on shutdown)."""
+    global _partition_maintenance_task
+    task, _partition_maintenance_task = _partition_maintenance_task, None
+    if task is not None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
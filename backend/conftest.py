@@ -0,0 +1,84 @@
+"""
+Shared test scaffolding for the backend tests.
+
+Sets dummy configuration so the modules import without a .env file, and
+provides fixtures for capturing analytics rows and for running a local stub
+upstream HTTP server.
+"""
+
+import os
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+# Dummy configuration so the modules import without a .env file
+for _key in ("JWT_SECRET", "CLIENT_ID", "CLIENT_SECRET", "AUTH_SERVICE_CLIENT_ID",
+             "AUTH_SERVICE_CLIENT_SECRET", "INSTA_USER_KEY", "LEXIENT_BEARER_TOKEN", "NEWS_API_KEY"):
+    os.environ.setdefault(_key, "test")
+
+
+class RowSink:
+    """Stands in for the analytics writer and keeps every row it is given."""
+
+    def __init__(self):
+        self.rows = []
+
+    async def enqueue(self, log_data):
+        self.rows.append(log_data)
+        return True
+
+
+class StubServer(ThreadingHTTPServer):
+    """Local upstream served from a daemon thread on a free port."""
+
+    daemon_threads = True
+    request_queue_size = 64
+
+    @property
+    def host(self) -> str:
+        return f"127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}"
+
+
+def start_stub_server(handler) -> StubServer:
+    """Start a StubServer answering with `handler`; call shutdown() when done."""
+    server = StubServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def row_sink():
+    """Capture analytics rows instead of queueing them for the database."""
+    import utils.api_tracking as api_tracking
+
+    sink = RowSink()
+    originals = (api_tracking.analytics_writer, api_tracking.ENABLE_ANALYTICS_TRACKING)
+    api_tracking.analytics_writer = sink
+    api_tracking.ENABLE_ANALYTICS_TRACKING = True
+    try:
+        yield sink
+    finally:
+        api_tracking.analytics_writer, api_tracking.ENABLE_ANALYTICS_TRACKING = originals
+
+
+@pytest.fixture
+def stub_server():
+    """Factory that starts stub upstreams and shuts them all down after the test."""
+    servers = []
+
+    def _start(handler) -> StubServer:
+        server = start_stub_server(handler)
+        servers.append(server)
+        return server
+
+    try:
+        yield _start
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
@@ -35,12 +35,52 @@ app.include_router(mainRouter, prefix="/api")
 # Database connection management
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database connection pool on startup."""
-    from config.db import init_db
+    """Initialize database connection pool, analytics partition maintenance, upstream token refresh, the court case file index, the async job poller, the batch worker pool, the report templates, the PDF render workers and the outbound mail sender on startup."""
+    from config.db import init_db, start_analytics_partition_maintenance
+    from services.authService import auth_service
+    from routes.court_cases import FileStorageService
+    from utils.async_jobs import async_job_manager
+    from utils.verification_batches import batch_worker_pool
+    from services.pdfRenderPool import pdf_render_pool
+    from utils.template_engine import warm_templates
+    from services.mailQueue import mail_queue
     await init_db()
+    await start_analytics_partition_maintenance()
+    auth_service.start_background_refresh()
+    await FileStorageService.start_eviction()
+    # Resume polling jobs that were pending when the last process stopped
+    await async_job_manager.start()
+    # Pick up batch items queued before the restart
+    batch_worker_pool.start()
+    # Compile the report and email templates before the first request
+    warm_templates()
+    # Load fonts in the render workers before the first PDF request
+    await pdf_render_pool.start()
+    # Send emails queued before the restart
+    mail_queue.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Close database connection pool on shutdown."""
-    from config.db import close_db
+    """Stop background tasks, drain analytics, close upstream HTTP clients and database connection pool on shutdown."""
+    from utils.http_client import close_http_clients
+    from utils.analytics_writer import analytics_writer
+    from config.db import close_db, stop_analytics_partition_maintenance
+    from services.authService import auth_service
+    from routes.court_cases import FileStorageService
+    from utils.async_jobs import async_job_manager
+    from utils.verification_batches import batch_worker_pool
+    from services.pdfRenderPool import pdf_render_pool
+    from services.mailQueue import mail_queue
+    # Return in-flight batch items to the queue before the pool goes away
+    await batch_worker_pool.stop()
+    await async_job_manager.stop()
+    pdf_render_pool.stop()
+    # Return claimed emails to the queue and close the SMTP connections
+    await mail_queue.stop()
+    await auth_service.stop_background_refresh()
+    await stop_analytics_partition_maintenance()
+    await FileStorageService.stop_eviction()
+    await close_http_clients()
+    # Flush queued analytics rows before the pool goes away
+    await analytics_writer.close()
     await close_db()
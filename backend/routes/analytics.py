@@ -3,17 +3,16 @@ from typing import Optional
 from datetime import datetime, timedelta
 from bson import ObjectId
 from utils.dbCalls.analytics_db import (
-    get_analytics_total_usage,
-    get_analytics_daily_usage,
-    get_analytics_service_breakdown,
-    get_analytics_user_usage,
-    get_analytics_profile_type_counts,
-    get_analytics_top_endpoints,
+    get_analytics_dashboard,
     get_analytics_logs_paginated,
     count_analytics_logs,
     build_analytics_filter,
-    format_analytics_logs_for_response
+    format_analytics_logs_for_response,
+    encode_logs_cursor
 )
+from utils.analytics_writer import analytics_writer
+from utils.result_cache import result_cache
+from utils.upstream_resilience import upstream_resilience
 from utils.auth import get_authenticated_user
 from utils.permissions import has_verification_advanced_access
 import jwt
@@ -54,35 +53,17 @@ async def get_analytics(
     # Build filter
     filter_ = build_analytics_filter(start, end, userId, service, endpoint, profileType)
 
-    # Aggregations
-    total_usage = await get_analytics_total_usage(filter_)
-    daily_usage = await get_analytics_daily_usage(filter_)
-    service_breakdown = await get_analytics_service_breakdown(filter_)
-    user_usage = await get_analytics_user_usage(filter_, limit=10)
-    profile_type_counts = await get_analytics_profile_type_counts(filter_)
-    top_endpoints = await get_analytics_top_endpoints(filter_, limit=15)
+    # All dashboard facets from a single scan of the filtered range
+    analytics = await get_analytics_dashboard(filter_, user_limit=10, endpoint_limit=15)
 
     # Convert IDs to str for serialization
-    for item in user_usage:
-        if "id" in item and isinstance(item["id"], dict) and "userId" in item["id"]:
-            item["id"]["userId"] = str(item["id"]["userId"])
-
-    # Format response
-    analytics = {
-        "overview": total_usage[0] if total_usage else {
-            "totalCalls": 0,
-            "totalCost": 0,
-            "avgResponseTime": 0,
-        },
-        "dailyUsage": daily_usage,
-        "serviceBreakdown": service_breakdown,
-        "userUsage": user_usage,
-        "profileTypeCounts": profile_type_counts,
-        "topEndpoints": top_endpoints,
-        "timeRange": {
-            "startDate": start.isoformat(),
-            "endDate": end.isoformat(),
-        },
+    for item in analytics["userUsage"]:
+        if "_id" in item and isinstance(item["_id"], dict) and "userId" in item["_id"]:
+            item["_id"]["userId"] = str(item["_id"]["userId"])
+
+    analytics["timeRange"] = {
+        "startDate": start.isoformat(),
+        "endDate": end.isoformat(),
     }
 
     return analytics
@@ -98,6 +79,8 @@ async def get_analytics_logs(
     profileType: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    countMode: str = Query("exact", pattern="^(exact|estimated|none)$"),
 ):
     # Authenticate user - get JWT payload directly (stateless)
     user_doc = await get_authenticated_user(request)
@@ -121,23 +104,69 @@ async def get_analytics_logs(
     filter_ = build_analytics_filter(start, end, userId, service, endpoint, profileType)
 
     try:
-        # Get logs with pagination
-        logs_list = await get_analytics_logs_paginated(filter_, page, limit)
-        
+        # Get logs with pagination (keyset when a cursor is given)
+        try:
+            logs_list = await get_analytics_logs_paginated(filter_, page, limit, cursor=cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        # Cursor for the next page, if this one was full
+        next_cursor = encode_logs_cursor(logs_list[-1]) if len(logs_list) == limit else None
+
         # Format logs for response
         logs = format_analytics_logs_for_response(logs_list)
 
-        # Get total count for pagination
-        total_count = await count_analytics_logs(filter_)
+        # Get total count for pagination (exact, planner estimate, or skipped)
+        if countMode == "none":
+            total_count = None
+        else:
+            total_count = await count_analytics_logs(filter_, estimate=countMode == "estimated")
 
         return {
             "logs": logs,
             "pagination": {
-                "page": page,
+                "page": None if cursor else page,
                 "limit": limit,
                 "totalCount": total_count,
-                "totalPages": (total_count + limit - 1) // limit,  # Ceiling division
+                "totalPages": (total_count + limit - 1) // limit if total_count is not None else None,  # Ceiling division
+                "countMode": countMode,
+                "nextCursor": next_cursor,
             },
         }
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch API logs: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to fetch API logs: {str(e)}")
+
+@analyticsRouter.get("/writer-stats")
+async def get_analytics_writer_stats(request: Request):
+    # Authenticate user - get JWT payload directly (stateless)
+    user_doc = await get_authenticated_user(request)
+
+    # Check permissions using JWT permission bits
+    if not has_verification_advanced_access(user_doc):
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+
+    return analytics_writer.get_stats()
+
+@analyticsRouter.get("/result-cache-stats")
+async def get_result_cache_stats(request: Request):
+    # Authenticate user - get JWT payload directly (stateless)
+    user_doc = await get_authenticated_user(request)
+
+    # Check permissions using JWT permission bits
+    if not has_verification_advanced_access(user_doc):
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+
+    return result_cache.get_stats()
+
+@analyticsRouter.get("/upstream-stats")
+async def get_upstream_stats(request: Request):
+    # Authenticate user - get JWT payload directly (stateless)
+    user_doc = await get_authenticated_user(request)
+
+    # Check permissions using JWT permission bits
+    if not has_verification_advanced_access(user_doc):
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+
+    return upstream_resilience.get_stats()
@@ -0,0 +1,59 @@
+from fastapi import APIRouter, HTTPException, Request
+from typing import Optional
+from utils.async_jobs import async_job_manager
+from utils.auth import get_authenticated_user
+from utils.permissions import has_admin_access
+import hmac
+import os
+
+asyncJobsRouter = APIRouter()
+
+# Shared secret the upstream sends with webhook deliveries; webhooks are
+# disabled when it is not set
+ASYNC_JOB_WEBHOOK_SECRET = os.getenv("ASYNC_JOB_WEBHOOK_SECRET")
+
+@asyncJobsRouter.post("/webhook")
+async def async_job_webhook(request: Request, request_id: Optional[str] = None):
+    """Resolve a pending async job from an upstream result delivery"""
+    if not ASYNC_JOB_WEBHOOK_SECRET:
+        raise HTTPException(status_code=404, detail="Not found")
+    supplied = request.headers.get("x-webhook-secret", "")
+    if not hmac.compare_digest(supplied, ASYNC_JOB_WEBHOOK_SECRET):
+        raise HTTPException(status_code=401, detail="Invalid webhook secret")
+
+    try:
+        payload = await request.json()
+    except (ValueError, UnicodeDecodeError) as error:
+        raise HTTPException(status_code=400, detail=f"Invalid webhook payload: {error}")
+    entries = payload if isinstance(payload, list) else [payload]
+    request_id = request_id or next(
+        (entry.get("request_id") for entry in entries if isinstance(entry, dict) and entry.get("request_id")), None
+    )
+    if not request_id:
+        raise HTTPException(status_code=400, detail="request_id is required")
+
+    resolved = await async_job_manager.resolve_request(request_id, entries)
+    print(f"Async job webhook for request {request_id}: {'resolved' if resolved else 'ignored'}")
+    return {"requestId": request_id, "resolved": resolved}
+
+@asyncJobsRouter.get("/stats")
+async def get_async_job_stats(request: Request):
+    """Async job poller counters"""
+    user_doc = await get_authenticated_user(request)
+    if not has_admin_access(user_doc):
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    return async_job_manager.get_stats()
+
+@asyncJobsRouter.get("/{job_id}")
+async def get_async_job_status(request: Request, job_id: str):
+    """Status of an async verification job and, once completed, its result section"""
+    user_doc = await get_authenticated_user(request)
+
+    job = await async_job_manager.get_job(job_id)
+    # Other users' jobs are reported as missing rather than forbidden
+    if job is None or (job.user_id != str(user_doc.get("userId", "")) and not has_admin_access(user_doc)):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    response = job.to_dict()
+    response["result"] = async_job_manager.format_result(job)
+    return response
@@ -2,20 +2,22 @@ from bson import ObjectId
 from fastapi import APIRouter, HTTPException, Request, Query, Depends
 from pydantic import BaseModel, field_validator, ValidationError
 from typing import Optional, Dict, Any, List
-import requests
 import os
+import gzip
 import json
 import asyncio
 from datetime import datetime, timedelta
 from pathlib import Path
 import re
 from functools import reduce
+from rapidfuzz import fuzz, process
 
 # Import utilities
 from utils import (
     authenticate_request,
     get_authenticated_user,
 )
+from utils.http_client import request as upstream_request
 
 # Load environment variables
 try:
@@ -33,9 +35,13 @@ class Config:
     DISTRICT_COURT_API = "https://lexient.one/api/district-court/search"
     MAX_PAGES = 2
     RESULTS_PER_PAGE = 10
+    MAX_CONCURRENT_REQUESTS = 4  # in-flight page requests per court search
+    SPECULATIVE_PAGES = 1  # pages requested ahead of the last full page
     REQUEST_TIMEOUT = 30
     STORAGE_DIR = Path.cwd() / "data" / "court-cases"
     CACHE_DURATION = timedelta(hours=24)  # 24 hours
+    FILE_RETENTION_DAYS = 30
+    EVICTION_INTERVAL = 60 * 60  # seconds between old file cleanups
 
 CONFIG = Config()
 
@@ -267,10 +273,12 @@ class DateUtils:
             return False
 
 class StringUtils:
+    PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+
     @staticmethod
     def normalize_string(text: str) -> str:
         """Normalize string for comparison"""
-        return re.sub(r'[^\w\s]', '', text.lower()).replace(r'\s+', ' ').strip()
+        return StringUtils.PUNCTUATION_PATTERN.sub('', text.lower()).replace(r'\s+', ' ').strip()
 
     @staticmethod
     def calculate_name_similarity(name1: str, name2: str) -> float:
@@ -309,29 +317,127 @@ class StringUtils:
         return None
 
 # ===== FILE STORAGE SERVICE =====
+class CaseFileIndex:
+    """
+    In-memory index of stored case files.
+
+    Maps (normalized name, birth year) to the newest file for that profile and
+    keeps every file's save time, so lookups and eviction never touch the
+    directory. Built once from a directory scan and kept current on write.
+    """
+
+    def __init__(self):
+        # (normalized name, year part) -> file name of the newest entry
+        self.latest: Dict[tuple, str] = {}
+        # file name -> (key, saved at timestamp)
+        self.files: Dict[str, tuple] = {}
+        self.loaded = False
+        self.load_lock: Optional[asyncio.Lock] = None
+        self.eviction_task: Optional[asyncio.Task] = None
+
+    def add(self, file_name: str, key: tuple, saved_at: float):
+        """Record a stored file, making it the newest for its key if it is."""
+        self.files[file_name] = (key, saved_at)
+        current = self.latest.get(key)
+        if current is None or current == file_name or self.files[current][1] <= saved_at:
+            self.latest[key] = file_name
+
+    def remove(self, file_name: str):
+        """Forget a deleted file, falling back to the next newest for its key."""
+        entry = self.files.pop(file_name, None)
+        if entry is None:
+            return
+        key = entry[0]
+        if self.latest.get(key) == file_name:
+            remaining = [(saved_at, name) for name, (other_key, saved_at) in self.files.items() if other_key == key]
+            if remaining:
+                self.latest[key] = max(remaining)[1]
+            else:
+                del self.latest[key]
+
+CASE_FILE_INDEX = CaseFileIndex()
+
 class FileStorageService:
+    # name_year_date.json.gz (or .json for files written before compression)
+    FILE_NAME_PATTERN = re.compile(r'^(?P<name>.+)_(?P<year>\d{4}|unknown)_\d{4}-\d{2}-\d{2}\.json(?:\.gz)?$')
+
     @staticmethod
     def ensure_storage_directory():
         """Ensure storage directory exists"""
         CONFIG.STORAGE_DIR.mkdir(parents=True, exist_ok=True)
 
     @staticmethod
-    def generate_file_name(profile: ProfileData) -> str:
-        """Generate filename for storing case data"""
+    def get_profile_key(profile: ProfileData) -> Optional[tuple]:
+        """Get the (normalized name, birth year) index key for a profile"""
         name = ProfileUtils.extract_name(profile)
+        if not name:
+            return None
+
         birth_year = ProfileUtils.extract_birth_year(profile)
 
-        if not name:
-            raise ValueError("Cannot generate filename: missing name")
+        normalized_name = re.sub(r'[^a-z0-9]', '_', name.lower())
+        normalized_name = re.sub(r'_+', '_', normalized_name).strip('_')
 
         # Use birth year if available, otherwise use placeholder
         year_part = str(birth_year) if birth_year else "unknown"
+        return normalized_name, year_part
 
-        normalized_name = re.sub(r'[^a-z0-9]', '_', name.lower())
-        normalized_name = re.sub(r'_+', '_', normalized_name).strip('_')
+    @staticmethod
+    def generate_file_name(profile: ProfileData) -> str:
+        """Generate filename for storing case data"""
+        key = FileStorageService.get_profile_key(profile)
+        if not key:
+            raise ValueError("Cannot generate filename: missing name")
 
         timestamp = datetime.now().strftime('%Y-%m-%d')
-        return f"{normalized_name}_{year_part}_{timestamp}.json"
+        return f"{key[0]}_{key[1]}_{timestamp}.json.gz"
+
+    @staticmethod
+    def _scan_storage_directory() -> List[tuple]:
+        """List (file name, index key, modified time) for every stored case file"""
+        FileStorageService.ensure_storage_directory()
+        entries = []
+        for entry in os.scandir(CONFIG.STORAGE_DIR):
+            match = FileStorageService.FILE_NAME_PATTERN.match(entry.name)
+            if match and entry.is_file():
+                entries.append((entry.name, (match.group("name"), match.group("year")), entry.stat().st_mtime))
+        return entries
+
+    @staticmethod
+    async def load_index():
+        """Build the file index from the storage directory (once per process)"""
+        if CASE_FILE_INDEX.loaded:
+            return
+        if CASE_FILE_INDEX.load_lock is None:
+            CASE_FILE_INDEX.load_lock = asyncio.Lock()
+        async with CASE_FILE_INDEX.load_lock:
+            if CASE_FILE_INDEX.loaded:
+                return
+            try:
+                entries = await asyncio.to_thread(FileStorageService._scan_storage_directory)
+            except Exception as e:
+                print(f"Error indexing case files: {e}")
+                entries = []
+            for file_name, key, saved_at in entries:
+                CASE_FILE_INDEX.add(file_name, key, saved_at)
+            CASE_FILE_INDEX.loaded = True
+            print(f"Indexed {len(entries)} court case files")
+
+    @staticmethod
+    def _write_file(file_path: Path, data: Dict[str, Any]):
+        """Compress and write a case file, replacing any previous version atomically"""
+        payload = gzip.compress(json.dumps(data, ensure_ascii=False).encode('utf-8'), compresslevel=6)
+        temp_path = file_path.with_name(f".{file_path.name}.tmp")
+        temp_path.write_bytes(payload)
+        os.replace(temp_path, file_path)
+
+    @staticmethod
+    def _read_file(file_path: Path) -> Dict[str, Any]:
+        """Read a (possibly compressed) case file"""
+        raw = file_path.read_bytes()
+        if file_path.suffix == '.gz':
+            raw = gzip.decompress(raw)
+        return json.loads(raw)
 
     @staticmethod
     async def save_case_data(
@@ -342,17 +448,18 @@ class FileStorageService:
         invalid_cases: List[CourtCase],
         search_summary: Dict[str, Any]
     ) -> str:
-        """Save case data to JSON file"""
+        """Save case data to a compressed JSON file and index it"""
         try:
-            FileStorageService.ensure_storage_directory()
+            await FileStorageService.load_index()
 
             file_name = FileStorageService.generate_file_name(profile)
             file_path = CONFIG.STORAGE_DIR / file_name
+            saved_at = datetime.now().timestamp()
 
             data_to_store = StoredCaseData(
                 profile=profile,
                 searchParams=search_params,
-                timestamp=datetime.now().timestamp(),
+                timestamp=saved_at,
                 rawCases=raw_cases,
                 validCases=valid_cases,
                 invalidCases=invalid_cases,
@@ -360,8 +467,8 @@ class FileStorageService:
                 fileName=file_name
             )
 
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data_to_store.model_dump(), f, indent=2, ensure_ascii=False)
+            await asyncio.to_thread(FileStorageService._write_file, file_path, data_to_store.model_dump())
+            CASE_FILE_INDEX.add(file_name, FileStorageService.get_profile_key(profile), saved_at)
 
             print(f"Court case data saved to: {file_name}")
             return file_name
@@ -372,13 +479,17 @@ class FileStorageService:
 
     @staticmethod
     async def load_case_data(file_name: str) -> Optional[StoredCaseData]:
-        """Load case data from JSON file"""
+        """Load case data from an indexed file"""
         try:
-            file_path = CONFIG.STORAGE_DIR / file_name
+            await FileStorageService.load_index()
 
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data_dict = json.load(f)
+            # Only indexed files can be loaded, which also rules out paths
+            # outside the storage directory
+            if file_name not in CASE_FILE_INDEX.files:
+                print(f"No indexed case file named {file_name}")
+                return None
 
+            data_dict = await asyncio.to_thread(FileStorageService._read_file, CONFIG.STORAGE_DIR / file_name)
             data = StoredCaseData(**data_dict)
 
             # Check if data is still fresh
@@ -395,34 +506,23 @@ class FileStorageService:
 
     @staticmethod
     async def find_existing_file(profile: ProfileData) -> Optional[str]:
-        """Find existing file for profile"""
+        """Find the newest unexpired file for profile"""
         try:
-            FileStorageService.ensure_storage_directory()
-            files = list(CONFIG.STORAGE_DIR.glob("*.json"))
-
-            name = ProfileUtils.extract_name(profile)
-            birth_year = ProfileUtils.extract_birth_year(profile)
+            await FileStorageService.load_index()
 
-            if not name:
+            key = FileStorageService.get_profile_key(profile)
+            if not key:
                 return None
 
-            normalized_name = re.sub(r'[^a-z0-9]', '_', name.lower())
-            normalized_name = re.sub(r'_+', '_', normalized_name).strip('_')
-
-            # Use birth year if available, otherwise use placeholder
-            year_part = str(birth_year) if birth_year else "unknown"
-
-            # Look for files matching the user profile
-            matching_files = [
-                f.name for f in files
-                if f.name.startswith(f"{normalized_name}_{year_part}_") and f.name.endswith('.json')
-            ]
+            file_name = CASE_FILE_INDEX.latest.get(key)
+            if not file_name:
+                return None
 
-            if not matching_files:
+            saved_at = CASE_FILE_INDEX.files[file_name][1]
+            if datetime.now().timestamp() - saved_at > CONFIG.CACHE_DURATION.total_seconds():
                 return None
 
-            # Return the most recent file
-            return max(matching_files)
+            return file_name
 
         except Exception as e:
             print(f"Error finding existing files: {e}")
@@ -432,27 +532,30 @@ class FileStorageService:
     async def list_all_case_files() -> List[str]:
         """List all case files"""
         try:
-            FileStorageService.ensure_storage_directory()
-            files = list(CONFIG.STORAGE_DIR.glob("*.json"))
-            return [f.name for f in files]
+            await FileStorageService.load_index()
+            return list(CASE_FILE_INDEX.files)
         except Exception as e:
             print(f"Error listing case files: {e}")
             return []
 
     @staticmethod
-    async def delete_old_files(days_old: int = 30) -> int:
-        """Delete old files"""
+    async def delete_old_files(days_old: int = CONFIG.FILE_RETENTION_DAYS) -> int:
+        """Delete files saved more than days_old days ago"""
         try:
-            FileStorageService.ensure_storage_directory()
-            files = list(CONFIG.STORAGE_DIR.glob("*.json"))
-            cutoff_time = datetime.now() - timedelta(days=days_old)
+            await FileStorageService.load_index()
+            cutoff = (datetime.now() - timedelta(days=days_old)).timestamp()
+            expired = [name for name, (_, saved_at) in CASE_FILE_INDEX.files.items() if saved_at < cutoff]
 
             deleted_count = 0
-            for file_path in files:
-                if file_path.stat().st_mtime < cutoff_time.timestamp():
-                    file_path.unlink()
-                    deleted_count += 1
-                    print(f"Deleted old case file: {file_path.name}")
+            for file_name in expired:
+                try:
+                    await asyncio.to_thread((CONFIG.STORAGE_DIR / file_name).unlink, missing_ok=True)
+                except OSError as e:
+                    print(f"Could not delete case file {file_name}: {e}")
+                    continue
+                CASE_FILE_INDEX.remove(file_name)
+                deleted_count += 1
+                print(f"Deleted old case file: {file_name}")
 
             return deleted_count
 
@@ -460,6 +563,29 @@ class FileStorageService:
             print(f"Error deleting old files: {e}")
             return 0
 
+    @staticmethod
+    async def _eviction_loop():
+        """Periodically delete old case files"""
+        while True:
+            await FileStorageService.delete_old_files()
+            await asyncio.sleep(CONFIG.EVICTION_INTERVAL)
+
+    @staticmethod
+    async def start_eviction():
+        """Index stored files and start the periodic eviction task (called on startup)"""
+        await FileStorageService.load_index()
+        task = CASE_FILE_INDEX.eviction_task
+        if task is None or task.done():
+            CASE_FILE_INDEX.eviction_task = asyncio.get_running_loop().create_task(FileStorageService._eviction_loop())
+
+    @staticmethod
+    async def stop_eviction():
+        """Stop the periodic eviction task (called on shutdown)"""
+        task, CASE_FILE_INDEX.eviction_task = CASE_FILE_INDEX.eviction_task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
 # ===== COURT API SERVICE =====
 class CourtAPIService:
     @staticmethod
@@ -477,14 +603,15 @@ class CourtAPIService:
             print(f"Making API call to: {full_url}")
             print(f"Payload: {payload}")
 
-            response = requests.post(
+            response = await upstream_request(
+                "POST",
                 full_url,
                 json=payload,
                 headers=headers,
-                timeout=CONFIG.REQUEST_TIMEOUT
+                timeout=CONFIG.REQUEST_TIMEOUT * 1000
             )
 
-            if not response.ok:
+            if not response.is_success:
                 print(f"API call failed: {response.status_code} {response.text}")
                 return None
 
@@ -518,80 +645,110 @@ class CourtAPIService:
     @staticmethod
     async def search_high_court(profile: ProfileData, search_params: SearchParameters) -> List[CourtCase]:
         """Search high court cases"""
-        cases = []
+        return await CourtAPIService._search_court(CONFIG.HIGH_COURT_API, 'High Court', profile, search_params)
 
+    @staticmethod
+    async def search_district_court(profile: ProfileData, search_params: SearchParameters) -> List[CourtCase]:
+        """Search district court cases"""
+        return await CourtAPIService._search_court(CONFIG.DISTRICT_COURT_API, 'District Court', profile, search_params)
+
+    @staticmethod
+    async def _search_court(
+        url: str,
+        court: str,
+        profile: ProfileData,
+        search_params: SearchParameters
+    ) -> List[CourtCase]:
+        """
+        Run every search query against one court API concurrently.
+
+        Pages of all queries share a bounded number of in-flight requests.
+        Cases are returned in query order, then page order, exactly as a
+        sequential query-by-query, page-by-page search would return them.
+        """
         search_queries = CourtAPIService._generate_search_queries(profile, search_params)
+        semaphore = asyncio.Semaphore(CONFIG.MAX_CONCURRENT_REQUESTS)
 
-        for query in search_queries:
-            for page in range(1, CONFIG.MAX_PAGES + 1):
-                response = await CourtAPIService.make_api_call(CONFIG.HIGH_COURT_API, query, page)
-
-                if response and response.get('data'):
-                    try:
-                        enriched_cases = []
-                        for case_data in response['data']:
-                            if isinstance(case_data, dict):
-                                case_dict = dict(case_data)
-                                case_dict.update({
-                                    'court': 'High Court',
-                                    'location': StringUtils.extract_location_from_title(case_data.get('title', ''))
-                                })
-                                enriched_cases.append(CourtCase(**case_dict))
-                            else:
-                                print(f"Skipping invalid case data: {case_data}")
-
-                        cases.extend(enriched_cases)
-                        print(f"Added {len(enriched_cases)} cases from High Court page {page}")
-
-                    except Exception as e:
-                        print(f"Error processing High Court response: {e}")
-                        continue
+        async def fetch_page(query: Dict[str, Any], page: int) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                return await CourtAPIService.make_api_call(url, query, page)
 
-                # If we got fewer results than the limit, no more pages available
-                if not response or not response.get('data') or len(response['data']) < CONFIG.RESULTS_PER_PAGE:
-                    break
+        query_pages = await asyncio.gather(*[
+            CourtAPIService._fetch_query_pages(query, fetch_page) for query in search_queries
+        ])
 
-        print(f"Total High Court cases found: {len(cases)}")
+        cases = []
+        for pages in query_pages:
+            for page, page_data in pages:
+                try:
+                    enriched_cases = CourtAPIService._to_court_cases(page_data, court)
+                    cases.extend(enriched_cases)
+                    print(f"Added {len(enriched_cases)} cases from {court} page {page}")
+                except Exception as e:
+                    print(f"Error processing {court} response: {e}")
+
+        print(f"Total {court} cases found: {len(cases)}")
         return cases
 
     @staticmethod
-    async def search_district_court(profile: ProfileData, search_params: SearchParameters) -> List[CourtCase]:
-        """Search district court cases"""
-        cases = []
+    async def _fetch_query_pages(query: Dict[str, Any], fetch_page) -> List[tuple]:
+        """
+        Fetch the pages of one query, keeping SPECULATIVE_PAGES pages ahead.
 
-        search_queries = CourtAPIService._generate_search_queries(profile, search_params)
+        Later pages are requested before earlier ones come back. The first
+        short (or failed) page ends the query and cancels any later page
+        still in flight.
+
+        Returns:
+            List of (page, case data) in page order
+        """
+        tasks: Dict[int, asyncio.Task] = {}
+
+        def launch(page: int):
+            if page <= CONFIG.MAX_PAGES and page not in tasks:
+                tasks[page] = asyncio.create_task(fetch_page(query, page))
 
-        for query in search_queries:
-            for page in range(1, CONFIG.MAX_PAGES + 1):
-                response = await CourtAPIService.make_api_call(CONFIG.DISTRICT_COURT_API, query, page)
-
-                if response and response.get('data'):
-                    try:
-                        enriched_cases = []
-                        for case_data in response['data']:
-                            if isinstance(case_data, dict):
-                                case_dict = dict(case_data)
-                                case_dict.update({
-                                    'court': 'District Court',
-                                    'location': StringUtils.extract_location_from_title(case_data.get('title', ''))
-                                })
-                                enriched_cases.append(CourtCase(**case_dict))
-                            else:
-                                print(f"Skipping invalid case data: {case_data}")
-
-                        cases.extend(enriched_cases)
-                        print(f"Added {len(enriched_cases)} cases from District Court page {page}")
-
-                    except Exception as e:
-                        print(f"Error processing District Court response: {e}")
-                        continue
+        for page in range(1, 2 + CONFIG.SPECULATIVE_PAGES):
+            launch(page)
+
+        pages = []
+        try:
+            page = 1
+            while page in tasks:
+                response = await tasks[page]
+                page_data = response.get('data') if response else None
+                if page_data:
+                    pages.append((page, page_data))
 
                 # If we got fewer results than the limit, no more pages available
-                if not response or not response.get('data') or len(response['data']) < CONFIG.RESULTS_PER_PAGE:
+                if not page_data or len(page_data) < CONFIG.RESULTS_PER_PAGE:
                     break
 
-        print(f"Total District Court cases found: {len(cases)}")
-        return cases
+                page += 1
+                launch(page + CONFIG.SPECULATIVE_PAGES)
+        finally:
+            pending = [task for task in tasks.values() if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        return pages
+
+    @staticmethod
+    def _to_court_cases(page_data: List[Any], court: str) -> List[CourtCase]:
+        """Build CourtCase objects from one page of API results"""
+        enriched_cases = []
+        for case_data in page_data:
+            if isinstance(case_data, dict):
+                case_dict = dict(case_data)
+                case_dict.update({
+                    'court': court,
+                    'location': StringUtils.extract_location_from_title(case_data.get('title', ''))
+                })
+                enriched_cases.append(CourtCase(**case_dict))
+            else:
+                print(f"Skipping invalid case data: {case_data}")
+        return enriched_cases
 
     @staticmethod
     def _generate_search_queries(profile: ProfileData, search_params: SearchParameters) -> List[Dict[str, Any]]:
@@ -633,6 +790,17 @@ class CourtAPIService:
         return queries
 
 # ===== CASE ANALYSIS SERVICE =====
+class CaseScoringProfile:
+    """Profile fields used for relevance scoring, normalized once per search"""
+
+    def __init__(self, profile: ProfileData):
+        self.name = ProfileUtils.extract_name(profile)
+        self.normalized_name = StringUtils.normalize_string(self.name) if self.name else ""
+        self.name_words = self.normalized_name.split()
+        self.addresses = [address.lower() for address in ProfileUtils.extract_addresses(profile) if address]
+        self.birth_year = ProfileUtils.extract_birth_year(profile)
+        self.current_year = datetime.now().year
+
 class CaseAnalysisService:
     @staticmethod
     def analyze_cases(cases: List[CourtCase], profile: ProfileData) -> Dict[str, Any]:
@@ -641,16 +809,12 @@ class CaseAnalysisService:
         invalid_cases = []
         cases_removed_for_age = 0
 
-        birth_year = ProfileUtils.extract_birth_year(profile)
-
-        for case in cases:
-            analysis_result = CaseAnalysisService._analyze_case(case, profile, birth_year)
-
-            if analysis_result['isValid']:
-                valid_cases.append(analysis_result['case'])
+        for case in CaseAnalysisService._score_cases(cases, CaseScoringProfile(profile)):
+            if case.isValid:
+                valid_cases.append(case)
             else:
-                invalid_cases.append(analysis_result['case'])
-                if analysis_result['case'].filterReason and 'age' in analysis_result['case'].filterReason:
+                invalid_cases.append(case)
+                if case.filterReason and 'age' in case.filterReason:
                     cases_removed_for_age += 1
 
         # Sort valid cases by relevance score
@@ -673,60 +837,134 @@ class CaseAnalysisService:
         }
 
     @staticmethod
-    def _analyze_case(case: CourtCase, profile: ProfileData, birth_year: Optional[int]) -> Dict[str, Any]:
-        """Analyze individual case"""
-        enhanced_case = CourtCase(**case.model_dump())
-
-        # Calculate age at filing if birth year is available
-        if birth_year:
-            filing_date = DateUtils.parse_filing_date(case.filingDate)
-            enhanced_case.ageAtFiling = DateUtils.calculate_age(birth_year, filing_date)
+    def _score_cases(cases: List[CourtCase], scoring: CaseScoringProfile) -> List[CourtCase]:
+        """
+        Apply the age filter and relevance score to every case in one pass.
+
+        Returns copies of the cases with ageAtFiling, isValid, filterReason
+        and relevanceScore filled in, in input order.
+        """
+        # Filing dates repeat a lot across results; parse each one once
+        parsed_dates: Dict[str, datetime] = {}
+        filing_dates = []
+        for case in cases:
+            if case.filingDate not in parsed_dates:
+                parsed_dates[case.filingDate] = DateUtils.parse_filing_date(case.filingDate)
+            filing_dates.append(parsed_dates[case.filingDate])
+        ages = [
+            DateUtils.calculate_age(scoring.birth_year, filing_date) if scoring.birth_year else None
+            for filing_date in filing_dates
+        ]
 
-            # Check if person was adult when case was filed
-            is_adult_case = DateUtils.is_valid_adult_case(birth_year, case.filingDate)
+        # Only cases filed when the person was an adult get a relevance score
+        adult = [index for index, age in enumerate(ages) if age is None or age >= 18]
+        name_similarities = dict(zip(
+            adult,
+            CaseAnalysisService._name_similarities([cases[index] for index in adult], scoring)
+        ))
+
+        results = []
+        for index, case in enumerate(cases):
+            update: Dict[str, Any] = {}
+            if ages[index] is not None:
+                update['ageAtFiling'] = ages[index]
+
+            if index in name_similarities:
+                update['relevanceScore'] = CaseAnalysisService._calculate_relevance_score(
+                    case, scoring, name_similarities[index], filing_dates[index].year
+                )
+                update['isValid'] = True
+            else:
+                update['isValid'] = False
+                update['filterReason'] = f"Case filed when person was {ages[index]} years old (below 18)"
 
-            if not is_adult_case:
-                enhanced_case.isValid = False
-                enhanced_case.filterReason = f"Case filed when person was {enhanced_case.ageAtFiling} years old (below 18)"
-                return {"case": enhanced_case, "isValid": False}
+            # Fields are already validated; copy the case instead of re-validating it
+            results.append(case.model_copy(update=update))
 
-        # Calculate relevance score
-        enhanced_case.relevanceScore = CaseAnalysisService._calculate_relevance_score(case, profile)
-        enhanced_case.isValid = True
+        return results
 
-        return {"case": enhanced_case, "isValid": True}
+    @staticmethod
+    def _name_similarities(cases: List[CourtCase], scoring: CaseScoringProfile) -> List[float]:
+        """
+        Best of respondent and petitioner name similarity for every case.
+
+        Same measure as StringUtils.calculate_name_similarity: the share of
+        words matched (one word containing the other) out of the longer word
+        list. Instead of comparing word pairs case by case, every distinct
+        party word is matched against the profile's name words once, with a
+        single RapidFuzz cdist call; a partial_ratio of 100 means one word
+        contains the other.
+        """
+        if not scoring.name_words:
+            return [0.0] * len(cases)
+
+        strip_punctuation = StringUtils.PUNCTUATION_PATTERN.sub
+        parties = []
+        normalized_parties: Dict[str, tuple] = {}
+        vocabulary: Dict[str, int] = {}
+        for case in cases:
+            for names in (case.respondents, case.petitioners):
+                joined = ' '.join(names)
+                if joined not in normalized_parties:
+                    # Same as StringUtils.normalize_string, without the per-call lookups
+                    normalized = strip_punctuation('', joined.lower()).strip()
+                    words = normalized.split()
+                    for word in words:
+                        vocabulary.setdefault(word, len(vocabulary))
+                    normalized_parties[joined] = (normalized, words)
+                parties.append(normalized_parties[joined])
+
+        # Bit i of a word's mask is set if it matches the profile's i-th name word
+        word_masks = [0] * len(vocabulary)
+        if vocabulary:
+            matches = process.cdist(
+                scoring.name_words,
+                list(vocabulary),
+                scorer=fuzz.partial_ratio,
+                score_cutoff=100,
+                workers=-1,
+            )
+            for name_index, word_index in zip(*matches.nonzero()):
+                word_masks[word_index] |= 1 << int(name_index)
+
+        def similarity(normalized: str, words: List[str]) -> float:
+            if normalized == scoring.normalized_name:
+                return 1.0
+            total_words = max(len(scoring.name_words), len(words))
+            mask = 0
+            for word in words:
+                mask |= word_masks[vocabulary[word]]
+            return bin(mask).count('1') / total_words if total_words > 0 else 0.0
+
+        return [
+            max(similarity(*parties[2 * index]), similarity(*parties[2 * index + 1]))
+            for index in range(len(cases))
+        ]
 
     @staticmethod
-    def _calculate_relevance_score(case: CourtCase, profile: ProfileData) -> float:
+    def _calculate_relevance_score(
+        case: CourtCase,
+        scoring: CaseScoringProfile,
+        name_similarity: float,
+        filing_year: int
+    ) -> float:
         """Calculate relevance score for a case"""
         score = case.score or 0.0  # Base API score
 
-        name = ProfileUtils.extract_name(profile)
-        if not name:
+        if not scoring.name:
             return score
 
         # Name similarity bonus
-        respondent_names = ' '.join(case.respondents)
-        petitioner_names = ' '.join(case.petitioners)
-
-        respondent_similarity = StringUtils.calculate_name_similarity(name, respondent_names)
-        petitioner_similarity = StringUtils.calculate_name_similarity(name, petitioner_names)
-
-        score += max(respondent_similarity, petitioner_similarity) * 20
+        score += name_similarity * 20
 
         # Location relevance bonus
         if case.location:
-            addresses = ProfileUtils.extract_addresses(profile)
-
-            for address in addresses:
-                if address and address.lower() in case.location.lower():
-                    score += 10
-                    break
+            location = case.location.lower()
+            if any(address in location for address in scoring.addresses):
+                score += 10
 
         # Recent case bonus
-        filing_year = DateUtils.parse_filing_date(case.filingDate).year
-        current_year = datetime.now().year
-        year_diff = current_year - filing_year
+        year_diff = scoring.current_year - filing_year
 
         if year_diff <= 2:
             score += 5
@@ -872,9 +1110,6 @@ async def search_court_cases(
             analysis["summary"]
         )
 
-        # Clean up old files (async, don't wait for it)
-        asyncio.create_task(FileStorageService.delete_old_files(30))
-
         return APIResponse(
             success=True,
             data=analysis["validCases"],
@@ -918,7 +1153,7 @@ async def get_court_cases_info(
             return data
 
         if action == "cleanup":
-            deleted_count = await FileStorageService.delete_old_files(30)
+            deleted_count = await FileStorageService.delete_old_files()
             return {
                 "message": f"Cleaned up {deleted_count} old files",
                 "deletedCount": deleted_count
@@ -947,6 +1182,7 @@ async def get_court_cases_info(
             },
             "storage": {
                 "directory": str(CONFIG.STORAGE_DIR),
+                "indexedFiles": len(CASE_FILE_INDEX.files),
                 "supportedActions": ["files", "load", "cleanup"],
             },
             "profileSupport": {
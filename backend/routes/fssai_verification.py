@@ -2,8 +2,6 @@ from fastapi import APIRouter, HTTPException, Request, Depends
 from fastapi.responses import JSONResponse
 import jwt
 import os
-import requests
-import asyncio
 from datetime import datetime
 from typing import Dict, Any, Optional
 from bson import ObjectId
@@ -11,12 +9,14 @@ from utils.dbCalls.user_db import find_user_by_id
 from services.authService import auth_service
 from utils.auth import authenticate_request
 from utils.api_tracking import track_external_api_call
+from utils.http_client import fetch_with_timeout
 
 router = APIRouter()
 
 JWT_SECRET = os.getenv("JWT_SECRET")
 BASE_URL = "https://production.deepvue.tech/v1"
 ENABLE_ANALYTICS_TRACKING = os.getenv("ENABLE_ANALYTICS_TRACKING", "true").lower() == "true"
+FSSAI_API_TIMEOUT = 30000  # 30 second timeout (milliseconds)
 
 # Business verification services configuration
 BUSINESS_SERVICES = {
@@ -166,12 +166,7 @@ async def _verify_gst_basic(gstin_num: str):
         "x-api-key": os.getenv("CLIENT_SECRET", ""),
     }
 
-    def _make_request():
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        return response.json()
-
-    return await asyncio.to_thread(_make_request)
+    return await fetch_with_timeout(url, headers, timeout=FSSAI_API_TIMEOUT)
 
 async def _verify_fssai(fssai_num: str):
     access_token = await auth_service.get_access_token()
@@ -182,9 +177,4 @@ async def _verify_fssai(fssai_num: str):
         "x-api-key": os.getenv("CLIENT_SECRET", ""),
     }
 
-    def _make_request():
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        return response.json()
-
-    return await asyncio.to_thread(_make_request)
\ No newline at end of file
+    return await fetch_with_timeout(url, headers, timeout=FSSAI_API_TIMEOUT)
\ No newline at end of file
@@ -2,13 +2,12 @@ from fastapi import APIRouter, HTTPException, Request, Depends
 from fastapi.responses import JSONResponse
 import jwt
 import os
-import requests
-import asyncio
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional
 from bson import ObjectId
 from utils.dbCalls.user_db import find_user_by_id
 from utils.dbCalls.analytics_db import log_api_call
+from utils.http_client import request as upstream_request
 
 router = APIRouter()
 
@@ -22,6 +21,9 @@ if(not INSTA_USER_KEY):
     raise Exception("INSTA_USER_KEY is not configured")
 
 # API cost mapping for InstaFinancials
+INSTA_API_BASE = "https://instafinancials.com/api"
+INSTA_API_TIMEOUT = 30000  # 30 second timeout (milliseconds)
+
 INSTA_API_COSTS: Dict[str, float] = {
     "insta-summary": 10.0,
     "insta-basic": 5.0,
@@ -104,7 +106,7 @@ async def fetch_insta_financials(cin: str, service: str, user_id: str, username:
     )
 
 async def _make_insta_api_call(cin_number: str, service_type: str):
-    base_url = "https://instafinancials.com/api"
+    base_url = INSTA_API_BASE
 
     if not INSTA_USER_KEY:
         raise Exception("INSTA_USER_KEY is not configured")
@@ -118,20 +120,20 @@ async def _make_insta_api_call(cin_number: str, service_type: str):
 
     print(f"Making request to: {url}")
 
-    response = requests.get(url, headers={
+    response = await upstream_request("GET", url, headers={
         "user-key": INSTA_USER_KEY,
         "Content-Type": "application/json",
-    })
+    }, timeout=INSTA_API_TIMEOUT)
 
-    if not response.ok:
+    if not response.is_success:
         error_text = response.text
         print(f"InstaFinancials {service_type} failed:", {
             "status": response.status_code,
-            "status_text": response.reason,
+            "status_text": response.reason_phrase,
             "error_text": error_text,
         })
         raise Exception(
-            f"InstaFinancials {service_type} failed: {response.status_code} {response.reason} - {error_text}"
+            f"InstaFinancials {service_type} failed: {response.status_code} {response.reason_phrase} - {error_text}"
         )
 
     data = response.json()
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException, Request
+from services.mailQueue import mail_queue
+from utils.auth import get_authenticated_user
+from utils.permissions import has_admin_access
+from utils.dbCalls.mail_outbox_db import get_mail_status
+
+mailQueueRouter = APIRouter()
+
+@mailQueueRouter.get("/stats")
+async def get_mail_queue_stats(request: Request):
+    """Outbound mail sender and SMTP connection pool counters"""
+    user_doc = await get_authenticated_user(request)
+    if not has_admin_access(user_doc):
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    return mail_queue.get_stats()
+
+@mailQueueRouter.get("/{message_id}")
+async def get_queued_mail_status(request: Request, message_id: str):
+    """Delivery status of a queued email"""
+    user_doc = await get_authenticated_user(request)
+
+    message = await get_mail_status(message_id)
+    # Other users' messages are reported as missing rather than forbidden;
+    # messages queued without a user (e.g. /send-business-email) are open to
+    # anyone holding the id
+    owner = message.get("user_id") if message else None
+    if message is None or (
+        owner is not None and str(owner) != str(user_doc.get("userId", "")) and not has_admin_access(user_doc)
+    ):
+        raise HTTPException(status_code=404, detail="Message not found")
+
+    return {
+        "messageId": message_id,
+        "kind": message["kind"],
+        "status": message["status"],
+        "recipients": message["recipients"],
+        "attempts": message["attempts"],
+        "lastError": message["last_error"],
+        "nextAttemptAt": message["next_attempt_at"].isoformat() if message["status"] == "pending" and message.get("next_attempt_at") else None,
+        "sentAt": message["sent_at"].isoformat() if message.get("sent_at") else None,
+        "createdAt": message["created_at"].isoformat() if message.get("created_at") else None,
+    }
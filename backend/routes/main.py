@@ -8,6 +8,8 @@ from .analytics import analyticsRouter
 from .verification_advanced import verificationRouter
 from .verification_lite import verificationLiteRouter
 from .verification_mini import verificationMiniRouter
+from .async_jobs import asyncJobsRouter
+from .verification_batches import verificationBatchesRouter
 from .verification_business import router as verificationBusinessRouter
 from .fssai_verification import router as fssaiVerificationRouter
 from .insta_financials import router as instaFinancialsRouter
@@ -16,6 +18,7 @@ from .pdf_generation_puppeteer import router as puppeteerPdfRouter
 from .send_business_email import router as sendBusinessEmailRouter
 from .send_profile_email import router as sendProfileEmailRouter
 from .send_fssai_email import router as sendFssaiEmailRouter
+from .mail_queue import mailQueueRouter
 from .education_verification import router as educationVerificationRouter
 
 authMainRouter = APIRouter()
@@ -29,6 +32,8 @@ servicesMainRouter.include_router(analyticsRouter, prefix="/analytics", tags=["a
 servicesMainRouter.include_router(verificationRouter, prefix="", tags=["verification"])
 servicesMainRouter.include_router(verificationLiteRouter, prefix="", tags=["verification-lite"])
 servicesMainRouter.include_router(verificationMiniRouter, prefix="", tags=["verification-mini"])
+servicesMainRouter.include_router(asyncJobsRouter, prefix="/async-jobs", tags=["async-jobs"])
+servicesMainRouter.include_router(verificationBatchesRouter, prefix="/verification-batches", tags=["verification-batches"])
 servicesMainRouter.include_router(verificationBusinessRouter, prefix="", tags=["verification-business"])
 servicesMainRouter.include_router(fssaiVerificationRouter, prefix="/business-verification", tags=["business-verification"])
 servicesMainRouter.include_router(instaFinancialsRouter, prefix="/insta-financials", tags=["insta-financials"])
@@ -37,6 +42,7 @@ servicesMainRouter.include_router(puppeteerPdfRouter, prefix="", tags=["pdf-gene
 servicesMainRouter.include_router(sendBusinessEmailRouter, prefix="", tags=["send-business-email"])
 servicesMainRouter.include_router(sendProfileEmailRouter, prefix="", tags=["send-profile-email"])
 servicesMainRouter.include_router(sendFssaiEmailRouter, prefix="/send-fssai-email", tags=["send-fssai-email"])
+servicesMainRouter.include_router(mailQueueRouter, prefix="/mail", tags=["mail"])
 servicesMainRouter.include_router(educationVerificationRouter, prefix="", tags=["education-verification"])
 
 mainRouter = APIRouter()
@@ -82,6 +88,12 @@ mainRouter.include_router(verificationLiteRouter, prefix="", tags=["verification
 # Include mini verification routes
 mainRouter.include_router(verificationMiniRouter, prefix="", tags=["verification-mini"])
 
+# Include async verification job routes
+mainRouter.include_router(asyncJobsRouter, prefix="/async-jobs", tags=["async-jobs"])
+
+# Include bulk verification batch routes
+mainRouter.include_router(verificationBatchesRouter, prefix="/verification-batches", tags=["verification-batches"])
+
 # Include business verification routes
 mainRouter.include_router(verificationBusinessRouter, prefix="", tags=["verification-business"])
 
@@ -103,5 +115,8 @@ mainRouter.include_router(sendBusinessEmailRouter, prefix="", tags=["send-busine
 # Include send profile email routes
 mainRouter.include_router(sendProfileEmailRouter, prefix="", tags=["send-profile-email"])
 
+# Include queued email delivery status routes
+mainRouter.include_router(mailQueueRouter, prefix="/mail", tags=["mail"])
+
 # Export the main router for use in your main FastAPI app
 __all__ = ["mainRouter"]
\ No newline at end of file
@@ -1,95 +1,174 @@
-from fastapi import APIRouter, Query, HTTPException
-import requests
+from fastapi import APIRouter, Query, HTTPException, Request, Response
 import os
+import json
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from typing import Dict, Any, Tuple
+from utils.http_client import request as upstream_request
 
 newsRoute = APIRouter()
 
-@newsRoute.get("/")
-async def get_news(
-    endpoint: str = Query("everything", description="API endpoint"),
-    filter: str = Query("tech", description="Filter category"),
-    pageSize: str = Query("20", description="Page size"),
-    query: str = Query("", description="User search query")
-):
-    try:
-        api_key = os.getenv("NEWS_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="NewsAPI key is missing")
+NEWS_API_BASE = "https://newsapi.org/v2"
+NEWS_API_TIMEOUT = 10000  # 10 second timeout (milliseconds)
+
+# Seconds a cached news response is served without contacting NewsAPI
+NEWS_CACHE_TTL = int(os.getenv("NEWS_CACHE_TTL", "300"))
+# Seconds after that during which the stale response is still served while
+# it is refreshed in the background (and served if the refresh fails)
+NEWS_CACHE_STALE_SECONDS = int(os.getenv("NEWS_CACHE_STALE_SECONDS", "3600"))
+# Cached (endpoint, filter, query, pageSize) combinations
+NEWS_CACHE_MAX_ENTRIES = int(os.getenv("NEWS_CACHE_MAX_ENTRIES", "500"))
+
+# Filter presets for the 'everything' endpoint
+EVERYTHING_QUERIES = {
+    "tech": "technology OR tech news OR innovation",
+    "indian-law": "Supreme Court India OR High Court India OR Department of Justice India",
+    "govt-policies": "India government policy OR India regulation OR Indian ministry",
+    "cybersecurity": 'cybersecurity OR "cyber security" OR hacking OR "data breach"',
+    "ai": '"artificial intelligence" OR "machine learning" OR AI OR chatgpt',
+}
+
+# Filter presets for the 'top-headlines' endpoint
+HEADLINE_CATEGORIES = {
+    "tech": "technology",
+    "business": "business",
+    "health": "health",
+}
+
+class NewsCacheEntry:
+    """A NewsAPI response, encoded once and served to every matching request."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        self.fetched_at = time.time()
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+class NewsCache:
+    """
+    Stale-while-revalidate cache of NewsAPI responses.
+
+    Fresh entries are served as is. Stale ones are served while a single
+    background refresh runs; past the stale window a request waits for the
+    refresh. Concurrent requests for the same key share one refresh.
+    """
+
+    def __init__(
+        self,
+        ttl: int = NEWS_CACHE_TTL,
+        stale_seconds: int = NEWS_CACHE_STALE_SECONDS,
+        max_entries: int = NEWS_CACHE_MAX_ENTRIES
+    ):
+        self.ttl = ttl
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, NewsCacheEntry]" = OrderedDict()
+        self._refreshing: Dict[Tuple, asyncio.Task] = {}
+
+    async def get(self, key: Tuple, url: str, params: Dict[str, Any]) -> Tuple[NewsCacheEntry, str]:
+        """
+        Get the response for a key, fetching or refreshing it as needed.
+
+        Args:
+            key: (endpoint, filter, query, pageSize)
+            url: NewsAPI URL to fetch on a miss
+            params: Query parameters of the NewsAPI request
+
+        Returns:
+            Tuple of (entry, cache status: "HIT", "STALE" or "MISS")
+
+        Raises:
+            HTTPException: If NewsAPI fails and nothing usable is cached
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            if entry.age() < self.ttl:
+                return entry, "HIT"
+            if entry.age() < self.ttl + self.stale_seconds:
+                self._refresh(key, url, params)
+                return entry, "STALE"
+
+        try:
+            return await asyncio.shield(self._refresh(key, url, params)), "MISS"
+        except HTTPException:
+            # Serve an expired response rather than an error
+            if entry is not None:
+                return entry, "STALE"
+            raise
+
+    def _refresh(self, key: Tuple, url: str, params: Dict[str, Any]) -> asyncio.Task:
+        """Start (or join) the refresh of a key."""
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._fetch(key, url, params))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda done: self._forget_refresh(key, done))
+        return task
+
+    def _forget_refresh(self, key: Tuple, task: asyncio.Task):
+        if self._refreshing.get(key) is task:
+            del self._refreshing[key]
+        # Background refreshes have nobody waiting on them
+        if not task.cancelled() and task.exception() is not None:
+            print(f"News refresh failed for {key}: {task.exception()}")
+
+    async def _fetch(self, key: Tuple, url: str, params: Dict[str, Any]) -> NewsCacheEntry:
+        data = await fetch_news(url, params)
+        entry = NewsCacheEntry(json.dumps(data, separators=(",", ":")).encode())
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+
+# Shared by every request in this process
+news_cache = NewsCache()
+
+def build_news_request(endpoint: str, filter: str, pageSize: str, query: str, api_key: str) -> Tuple[str, Dict[str, Any]]:
+    """Translate the dashboard's endpoint/filter/query into a NewsAPI URL and parameters"""
+    params = {
+        "pageSize": pageSize,
+        "apiKey": api_key
+    }
 
-        params = {
-            "pageSize": pageSize,
-            "apiKey": api_key
-        }
-
-        if endpoint == "top-headlines":
-            # For top-headlines, we need category and country
-            if filter == "tech":
-                params["category"] = "technology"
-                params["country"] = "in"
-            elif filter == "business":
-                params["category"] = "business"
-                params["country"] = "in"
-            elif filter == "health":
-                params["category"] = "health"
-                params["country"] = "in"
-            else:
-                params["category"] = "general"
-                params["country"] = "in"
-
-            # If user has a search query, switch to 'everything' endpoint
-            if query:
-                return await fetch_everything(query, pageSize, api_key)
-        else:
-            # For 'everything' endpoint, construct query based on filter and user query
-            base_query = ""
-
-            if filter == "tech":
-                base_query = "technology OR tech news OR innovation"
-            elif filter == "indian-law":
-                base_query = "Supreme Court India OR High Court India OR Department of Justice India"
-            elif filter == "govt-policies":
-                base_query = "India government policy OR India regulation OR Indian ministry"
-            elif filter == "cybersecurity":
-                base_query = 'cybersecurity OR "cyber security" OR hacking OR "data breach"'
-            elif filter == "ai":
-                base_query = '"artificial intelligence" OR "machine learning" OR AI OR chatgpt'
-            else:
-                base_query = "technology"
-
-            # Combine the base query with user query if present
-            final_query = f"{query} {base_query}" if query else base_query
-
-            params["q"] = final_query
-            params["sortBy"] = "publishedAt"
-            params["language"] = "en"
-
-            # Set date range - last 30 days for fresh content
-            past_month = datetime.now() - timedelta(days=30)
-            params["from"] = past_month.strftime("%Y-%m-%d")
-
-        # Construct the URL and make the request
-        url = f"https://newsapi.org/v2/{endpoint}"
-        response = requests.get(url, params=params)
-
-        if not response.ok:
-            raise HTTPException(status_code=response.status_code, detail=f"News API responded with status: {response.status}")
-
-        data = response.json()
-        return data
+    if endpoint == "top-headlines":
+        # If user has a search query, switch to 'everything' endpoint
+        if query:
+            return everything_request(query, pageSize, api_key)
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch news: {str(e)}")
+        # For top-headlines, we need category and country
+        params["category"] = HEADLINE_CATEGORIES.get(filter, "general")
+        params["country"] = "in"
+    else:
+        # For 'everything' endpoint, construct query based on filter and user query
+        base_query = EVERYTHING_QUERIES.get(filter, "technology")
+
+        # Combine the base query with user query if present
+        params["q"] = f"{query} {base_query}" if query else base_query
+        params["sortBy"] = "publishedAt"
+        params["language"] = "en"
+
+        # Set date range - last 30 days for fresh content
+        past_month = datetime.now() - timedelta(days=30)
+        params["from"] = past_month.strftime("%Y-%m-%d")
 
-async def fetch_everything(query: str, pageSize: str, api_key: str):
+    return f"{NEWS_API_BASE}/{endpoint}", params
+
+def everything_request(query: str, pageSize: str, api_key: str) -> Tuple[str, Dict[str, Any]]:
     # Calculate the date for the last 30 days
     past_month = datetime.now() - timedelta(days=30)
     from_date = past_month.strftime("%Y-%m-%d")
 
-    url = "https://newsapi.org/v2/everything"
-    params = {
+    return f"{NEWS_API_BASE}/everything", {
         "q": query,
         "language": "en",
         "sortBy": "publishedAt",
@@ -98,9 +177,49 @@ async def fetch_everything(query: str, pageSize: str, api_key: str):
         "apiKey": api_key
     }
 
-    response = requests.get(url, params=params)
+async def fetch_news(url: str, params: Dict[str, Any]) -> Any:
+    try:
+        response = await upstream_request("GET", url, params=params, timeout=NEWS_API_TIMEOUT)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch news: {str(e)}")
+
+    if not response.is_success:
+        raise HTTPException(status_code=response.status_code, detail=f"News API responded with status: {response.status_code}")
 
-    if not response.ok:
-        raise HTTPException(status_code=response.status_code, detail=f"News API responded with status: {response.status}")
+    return response.json()
 
-    return response.json()
\ No newline at end of file
+def cache_headers(entry: NewsCacheEntry, cache_status: str) -> Dict[str, str]:
+    """Let browsers and nginx reuse the response for the rest of its freshness"""
+    max_age = max(0, int(news_cache.ttl - entry.age()))
+    return {
+        "ETag": entry.etag,
+        "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate={news_cache.stale_seconds}",
+        "X-Cache": cache_status,
+    }
+
+@newsRoute.get("/")
+async def get_news(
+    request: Request,
+    endpoint: str = Query("everything", description="API endpoint"),
+    filter: str = Query("tech", description="Filter category"),
+    pageSize: str = Query("20", description="Page size"),
+    query: str = Query("", description="User search query")
+):
+    try:
+        api_key = os.getenv("NEWS_API_KEY")
+        if not api_key:
+            raise HTTPException(status_code=500, detail="NewsAPI key is missing")
+
+        url, params = build_news_request(endpoint, filter, pageSize, query, api_key)
+        key = (endpoint, filter, query.strip().lower(), pageSize)
+        entry, cache_status = await news_cache.get(key, url, params)
+
+        headers = cache_headers(entry, cache_status)
+        if entry.etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch news: {str(e)}")
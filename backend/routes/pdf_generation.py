@@ -1,13 +1,18 @@
 from fileinput import filename
-from fastapi import APIRouter, HTTPException, Response
+from fastapi import APIRouter, HTTPException, Response, Request
 from pydantic import BaseModel, EmailStr
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from services.pdfService import PDFGenerationService
+from services.pdfRenderPool import pdf_render_pool
+from services.pdfCache import pdf_cache
 from utils.html_generator import htmlContent
 
 pdfRouter = APIRouter()
 
+# Bump whenever templates/reports/business_report.html changes so cached reports are not reused
+BUSINESS_REPORT_TEMPLATE_VERSION = "2"
+
 # ===== REQUEST MODELS =====
 class BusinessInfo(BaseModel):
     business_name: Optional[str] = None
@@ -72,17 +77,30 @@ class GeneratePDFRequest(BaseModel):
 
 # ===== MAIN ENDPOINT =====
 @pdfRouter.post("/generate-pdf")
-async def generate_pdf(request: GeneratePDFRequest):
+async def generate_pdf(request: GeneratePDFRequest, http_request: Request):
     """Generate PDF for business verification report"""
     try:
         business_name = request.businessName
         business_data = request.businessData.model_dump()  # Convert to dict for htmlContent function
-        
-        html_content = htmlContent(business_data, business_name)
-
-        # Generate PDF from HTML content
         filename = f"{business_name.replace(' ', '_')}_verification_report.pdf"
-        pdf_bytes = await PDFGenerationService.generate_pdf(html_content, filename)
+
+        # The same report is requested again for preview, download and email
+        cache_key = pdf_cache.make_key(
+            "business-report", BUSINESS_REPORT_TEMPLATE_VERSION, [business_name, business_data]
+        )
+        headers = {
+            "ETag": pdf_cache.etag(cache_key),
+            "Cache-Control": "private, no-cache",
+        }
+        if pdf_cache.is_not_modified(cache_key, http_request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+
+        async def render():
+            html_content = htmlContent(business_data, business_name)
+            # Generate PDF from HTML content
+            return await PDFGenerationService.generate_pdf(html_content, filename)
+
+        pdf_bytes, cache_status = await pdf_cache.get_or_render(cache_key, render)
 
         # Return PDF as response
         return Response(
@@ -90,10 +108,14 @@ async def generate_pdf(request: GeneratePDFRequest):
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f"attachment; filename={filename}",
-                "Content-Length": str(len(pdf_bytes))
+                "Content-Length": str(len(pdf_bytes)),
+                "X-Cache": cache_status,
+                **headers
             }
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"PDF generation failed: {str(e)}")
 
@@ -104,5 +126,7 @@ async def health_check():
         "status": "healthy",
         "service": "pdf-generation",
         "version": "1.0.0",
-        "supportedTypes": ["business-verification"]
+        "supportedTypes": ["business-verification"],
+        "renderPool": pdf_render_pool.get_stats(),
+        "cache": pdf_cache.get_stats()
     }
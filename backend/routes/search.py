@@ -1,9 +1,10 @@
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, field_validator
 from typing import Optional, Dict, Any, List, Union
-import requests
+import httpx
 import os
 from dotenv import load_dotenv
+from utils.http_client import request as upstream_request
 
 # Load environment variables
 try:
@@ -15,6 +16,7 @@ except Exception as e:
 
 # Configuration
 LEXIENT_API_BASE = 'https://lexient.one'
+LEXIENT_API_TIMEOUT = 30000  # 30 second timeout (milliseconds)
 
 # Get bearer token from environment
 BEARER_TOKEN = os.getenv('LEXIENT_BEARER_TOKEN')
@@ -197,9 +199,9 @@ async def call_lexient_api(endpoint: str, criteria: Dict[str, Any], page: int, l
     }
 
     try:
-        response = requests.post(url, json=criteria, headers=headers, timeout=30)
+        response = await upstream_request("POST", url, json=criteria, headers=headers, timeout=LEXIENT_API_TIMEOUT)
 
-        if not response.ok:
+        if not response.is_success:
             print(f"Lexient API error: {response.status_code} - {response.text}")
             raise Exception(f"Lexient API error: {response.status_code} - {response.text}")
 
@@ -208,10 +210,10 @@ async def call_lexient_api(endpoint: str, criteria: Dict[str, Any], page: int, l
         print(f'API response: {data}')
         return data
 
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         print("Lexient API request timed out")
         raise Exception("Lexient API request timed out")
-    except requests.exceptions.RequestException as e:
+    except httpx.RequestError as e:
         print(f"Lexient API request failed: {e}")
         raise Exception(f"Lexient API request failed: {e}")
 
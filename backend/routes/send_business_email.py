@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, EmailStr
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel, EmailStr, ValidationError
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from services.mailService import mail_service, EmailData
+from services.mailService import EmailData
+from services.mailQueue import mail_queue, MailQueueUnavailableError
 from utils.html_generator import htmlContent
+from utils.mail_attachments import read_email_request, email_attachment, close_attachments
 
 router = APIRouter()
 
@@ -66,34 +68,63 @@ class SendBusinessEmailRequest(BaseModel):
     email: EmailStr
     businessName: str
     businessData: BusinessData
+    # ETag of the report from /generate-pdf, attached from the PDF cache
+    pdfCacheKey: Optional[str] = None
 
 # ===== HELPER FUNCTIONS =====
 # Moved to utils/html_generator.py
 
 # ===== MAIN ENDPOINT =====
-@router.post("/send-business-email")
-async def send_business_email(request: SendBusinessEmailRequest):
-    """Send business verification report via email"""
+@router.post("/send-business-email", status_code=202)
+async def send_business_email(request: Request):
+    """
+    Queue business verification report email; delivery status is at statusUrl.
+
+    Accepts the SendBusinessEmailRequest fields as JSON, or multipart/form-data
+    with those fields as JSON in a "payload" field and the PDF in a "pdf" part.
+    """
+    attachments = []
     try:
-        email = request.email
-        business_name = request.businessName
-        business_data = request.businessData.model_dump()  # Convert to dict for htmlContent function       
+        fields, upload = await read_email_request(request)
+        try:
+            req = SendBusinessEmailRequest(**fields)
+        except (ValidationError, TypeError) as error:
+            raise HTTPException(status_code=400, detail=f"Invalid email request: {error}")
+
+        email = req.email
+        business_name = req.businessName
+        business_data = req.businessData.model_dump()  # Convert to dict for htmlContent function
+        attachment = email_attachment(
+            "business-verification-report.pdf", upload=upload, pdf_cache_key=req.pdfCacheKey
+        )
+        if attachment:
+            attachments.append(attachment)
+
         # Generate HTML content using the utility function
         html_content = htmlContent(business_data, business_name)
 
-        # Send email
+        # Queue email; it is sent in the background
         email_data = EmailData(
             subject=f"Business Verification Report for {business_name}",
             recipients=[email],
             body="Please find the business verification report attached.",
             html_body=html_content
         )
-        success = await mail_service.send_email(email_data)
+        message_id = await mail_queue.enqueue(email_data, kind="business-report", attachments=attachments)
 
-        if success:
-            return {"success": True, "message": "Email sent successfully"}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to send email")
+        return {
+            "success": True,
+            "message": "Email queued for delivery",
+            "messageId": message_id,
+            "statusUrl": f"/api/mail/{message_id}",
+            "attachmentIncluded": attachment is not None
+        }
 
+    except HTTPException:
+        raise
+    except MailQueueUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to send email")
+    finally:
+        close_attachments(attachments)
@@ -5,6 +5,7 @@ from bson import ObjectId
 from utils.dbCalls.user_db import find_user_by_id
 from utils.auth import authenticate_request
 from services.mailService import send_business_verification_email
+from services.mailQueue import MailQueueUnavailableError
 
 router = APIRouter()
 
@@ -44,22 +45,27 @@ async def send_fssai_email(request: Request, data: Dict[str, Any]):
             "fssai_info": fssai_info,
             "addresses": addresses,
             "user_name": user_doc.get("username", "Valued Customer"),
-            "user_email": user_doc.get("email", "")
+            "user_email": user_doc.get("email", ""),
+            "user_id": str(user_id)
         }
 
-        # Send the email
-        success = await send_business_verification_email(email_data)
+        # Queue the email; it is sent in the background
+        message_id = await send_business_verification_email(email_data)
 
-        if success:
-            return JSONResponse(content={
-                "message": "Business verification email sent successfully",
-                "recipient": recipient_email
+        if message_id:
+            return JSONResponse(status_code=202, content={
+                "message": "Business verification email queued for delivery",
+                "recipient": recipient_email,
+                "messageId": message_id,
+                "statusUrl": f"/api/mail/{message_id}"
             })
         else:
-            raise HTTPException(status_code=500, detail="Failed to send email")
+            raise HTTPException(status_code=500, detail="Failed to queue email")
 
     except HTTPException:
         raise
+    except MailQueueUnavailableError as error:
+        raise HTTPException(status_code=503, detail=str(error))
     except Exception as error:
         print(f"Send FSSAI email error: {error}")
         raise HTTPException(status_code=500, detail=f"Failed to send email: {str(error)}")
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, HTTPException, Request
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, ValidationError
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from services.mailService import mail_service, EmailData
+from services.mailService import EmailData
+from services.mailQueue import mail_queue, MailQueueUnavailableError
+from utils.template_engine import render_template
 from utils.auth import authenticate_request, get_authenticated_user
+from utils.mail_attachments import read_email_request, email_attachment, close_attachments
 import logging
-import base64
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -22,6 +24,8 @@ class SendProfileEmailRequest(BaseModel):
     name: str
     profileData: Dict[str, Any]
     pdfAttachment: Optional[PDFAttachment] = None
+    # ETag of the report from /generate-puppeteer-pdf, attached from the PDF cache
+    pdfCacheKey: Optional[str] = None
 
 # ===== HELPER FUNCTIONS =====
 def safe_get(obj: Any, path: str, default_value: Any = "Not Available") -> Any:
@@ -40,9 +44,15 @@ def safe_get(obj: Any, path: str, default_value: Any = "Not Available") -> Any:
         return default_value
 
 # ===== MAIN ENDPOINT =====
-@router.post("/send-profile-email")
-async def send_profile_email(request: Request, req: SendProfileEmailRequest):
-    """Send profile verification report via email"""
+@router.post("/send-profile-email", status_code=202)
+async def send_profile_email(request: Request):
+    """
+    Queue profile verification report email; delivery status is at statusUrl.
+
+    Accepts the SendProfileEmailRequest fields as JSON, or multipart/form-data
+    with those fields as JSON in a "payload" field and the PDF in a "pdf" part.
+    """
+    attachments = []
     try:
         # 🔑 Verify user is authenticated
         user = authenticate_request(request)
@@ -65,9 +75,25 @@ async def send_profile_email(request: Request, req: SendProfileEmailRequest):
 
         logger.info(f"📧 Sending email to: {user_email} ({user_username})")
 
+        fields, upload = await read_email_request(request)
+        try:
+            req = SendProfileEmailRequest(**fields)
+        except (ValidationError, TypeError) as error:
+            raise HTTPException(status_code=400, detail=f"Invalid email request: {error}")
+
         name = req.name
         profile_data = req.profileData
         pdf_attachment = req.pdfAttachment
+        attachment = email_attachment(
+            "verification-report.pdf",
+            upload=upload,
+            pdf_cache_key=req.pdfCacheKey,
+            base64_content=pdf_attachment.content if pdf_attachment else None,
+            filename=pdf_attachment.filename if pdf_attachment else None,
+            content_type=pdf_attachment.contentType if pdf_attachment else None,
+        )
+        if attachment:
+            attachments.append(attachment)
 
         # Extract key information for email summary
         personal_info = profile_data.get("personalInfo", {})
@@ -142,156 +168,29 @@ async def send_profile_email(request: Request, req: SendProfileEmailRequest):
         else:
             sections.append("⚖️ Legal Background Check - Completed")
 
-        # Generate HTML content
-        sections_html = "".join([f"<li>{section}</li>" for section in sections])
-
-        court_section_html = ""
-        if court_cases_found > 0:
-            court_section_html = """
-            <div class="court-section">
-              <h4>⚖️ Legal Background Information</h4>
-              <p>Legal background check completed as part of comprehensive verification. Detailed analysis available in the attached PDF report.</p>
-            </div>
-            """
-        else:
-            court_section_html = """
-            <div class="court-section">
-              <h4>⚖️ Legal Background Check</h4>
-              <p><strong>✅ Background Check Complete</strong></p>
-              <p>Legal background verification completed successfully as part of your comprehensive profile analysis.</p>
-            </div>
-            """
-
-        attachment_section_html = ""
-        if pdf_attachment:
-            filename = pdf_attachment.filename or "verification-report.pdf"
-            attachment_section_html = f"""
-            <div class="attachment-note">
-              <strong>📎 PDF Report Attached</strong><br>
-              Your detailed verification report is attached: <strong>{filename}</strong>
-              <br><br>
-              This comprehensive document includes:
-              <ul style="margin-top: 10px; margin-left: 20px;">
-                <li>Complete identity verification results</li>
-                <li>Legal background check analysis</li>
-                <li>Employment and credit history</li>
-                <li>Vehicle and license verification</li>
-                <li>Data source references</li>
-              </ul>
-            </div>
-            """
-        else:
-            attachment_section_html = f"""
-            <div class="attachment-note">
-              <strong>📄 Report Summary</strong><br>
-              Your verification covers {sections_found} categories with comprehensive background analysis including legal record verification.
-            </div>
-            """
+        profile_name = safe_get(personal_info, "fullName", safe_get(personal_info, "full_name", name))
+        generated_at = datetime.now().strftime('%m/%d/%Y, %I:%M:%S %p')
 
         # Enhanced HTML email
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-          <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>ARGUS Personal Verification Report</title>
-            <style>
-              * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-              body {{ font-family: 'Segoe UI', Arial, sans-serif; line-height: 1.6; color: #333; background-color: #f4f7fa; }}
-              .container {{ max-width: 600px; margin: 0 auto; background: white; }}
-              .header {{ background: linear-gradient(135deg, #2980b9 0%, #3498db 100%); color: white; padding: 30px; text-align: center; }}
-              .header h1 {{ font-size: 28px; font-weight: bold; margin-bottom: 5px; }}
-              .header .tm {{ font-size: 12px; vertical-align: super; }}
-              .content {{ padding: 30px; }}
-              .greeting {{ font-size: 18px; color: #2c3e50; margin-bottom: 20px; }}
-              .summary {{ background: #ecf0f1; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #3498db; }}
-              .summary h3 {{ color: #2980b9; margin-bottom: 15px; }}
-              .sections {{ margin: 20px 0; }}
-              .sections li {{ margin: 8px 0; padding: 8px; background: #f8f9fa; border-radius: 4px; list-style: none; font-size: 14px; }}
-              .court-section {{ background: #e3f2fd; border: 1px solid #2196f3; color: #0d47a1; padding: 15px; border-radius: 6px; margin: 20px 0; }}
-              .attachment-note {{ background: #e3f2fd; border: 1px solid #2196f3; color: #0d47a1; padding: 15px; border-radius: 6px; margin: 20px 0; }}
-              .footer {{ background: #34495e; color: white; padding: 20px; text-align: center; font-size: 13px; }}
-              .badge {{ display: inline-block; background: #27ae60; color: white; padding: 5px 12px; border-radius: 20px; font-size: 12px; font-weight: bold; margin: 10px 0; }}
-              .stats-grid {{ display: grid; grid-template-columns: 1fr 1fr; gap: 10px; margin: 15px 0; }}
-              .stat-item {{ text-align: center; padding: 10px; background: #f8f9fa; border-radius: 6px; }}
-              .stat-number {{ font-size: 20px; font-weight: bold; color: #2980b9; }}
-              .stat-label {{ font-size: 12px; color: #666; }}
-            </style>
-          </head>
-          <body>
-            <div class="container">
-              <div class="header">
-                <h1>ARGUS<span class="tm">™</span></h1>
-                <p>Background Verification Services</p>
-                <div class="badge">✓ REPORT READY</div>
-              </div>
-
-              <div class="content">
-                <div class="greeting">
-                  Dear {user_username},
-                </div>
-
-                <p>Your comprehensive background verification report for <strong>{name}</strong> has been successfully generated{" and is attached to this email" if pdf_attachment else ""}.</p>
-
-                <div class="summary">
-                  <h3>📋 Verification Summary</h3>
-                  <div class="stats-grid">
-                    <div class="stat-item">
-                      <div class="stat-number">{sections_found}</div>
-                      <div class="stat-label">Sections Verified</div>
-                    </div>
-                    <div class="stat-item">
-                      <div class="stat-number">✓</div>
-                      <div class="stat-label">Background Check</div>
-                    </div>
-                  </div>
-                  <p><strong>Profile Name:</strong> {safe_get(personal_info, "fullName", safe_get(personal_info, "full_name", name))}</p>
-                  <p><strong>Generated:</strong> {datetime.now().strftime('%m/%d/%Y, %I:%M:%S %p')}</p>
-                  <p><strong>Status:</strong> ✅ Verification Complete</p>
-                </div>
-
-                <h4>🔍 Verification Categories:</h4>
-                <ul class="sections">
-                  {sections_html}
-                </ul>
-
-                {court_section_html}
-
-                {attachment_section_html}
-
-                <h4>🔒 Important Notes</h4>
-                <ul style="margin-left: 20px; font-size: 14px;">
-                  <li>This report contains sensitive personal information</li>
-                  <li>Legal background check included in comprehensive analysis</li>
-                  <li>All data sourced from verified government databases</li>
-                  <li>Report generated on {datetime.now().strftime('%m/%d/%Y, %I:%M:%S %p')}</li>
-                </ul>
-
-                <p style="margin-top: 25px;">Thank you for using ARGUS for your verification needs.</p>
-
-                <p style="margin-top: 15px;">
-                  Best regards,<br>
-                  <strong>The ARGUS Team</strong>
-                </p>
-              </div>
-
-              <div class="footer">
-                <p><strong>ARGUS™ - Background Verification Services</strong></p>
-                <p>📧 {user_email} | 📅 {datetime.now().strftime('%m/%d/%Y, %I:%M:%S %p')}</p>
-                <p style="margin-top: 10px; font-size: 11px;">Automated verification report - Do not reply</p>
-              </div>
-            </div>
-          </body>
-        </html>
-        """
+        html_content = render_template(
+            "emails/profile_report.html",
+            user_username=user_username,
+            user_email=user_email,
+            name=name,
+            profile_name=profile_name,
+            generated_at=generated_at,
+            sections=sections,
+            sections_found=sections_found,
+            court_cases_found=court_cases_found,
+            attachment_filename=attachment[0] if attachment else None,
+        )
 
         # Enhanced text version
         sections_text = "\n".join([f"• {section.replace('👤', '').replace('📞', '').replace('💳', '').replace('💼', '').replace('🏢', '').replace('🚗', '').replace('🚙', '').replace('⚖️', '')}" for section in sections])
 
         attachment_text = ""
-        if pdf_attachment:
-            filename = pdf_attachment.filename or "verification-report.pdf"
+        if attachment:
+            filename = attachment[0]
             attachment_text = f"""PDF ATTACHMENT: {filename}
 This comprehensive document contains detailed verification results, court case analysis, and data source references."""
         else:
@@ -305,8 +204,8 @@ Your comprehensive background verification report for {name} has been successful
 
 VERIFICATION SUMMARY:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-• Profile Name: {safe_get(personal_info, "fullName", safe_get(personal_info, "full_name", name))}
-• Generated: {datetime.now().strftime('%m/%d/%Y, %I:%M:%S %p')}
+• Profile Name: {profile_name}
+• Generated: {generated_at}
 • Sections Verified: {sections_found}
 • Background Check: Complete
 • Status: Verification Complete
@@ -334,7 +233,7 @@ The ARGUS Team
 
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 ARGUS™ - Background Verification Services
-📧 {user_email} | 📅 {datetime.now().strftime('%m/%d/%Y, %I:%M:%S %p')}
+📧 {user_email} | 📅 {generated_at}
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"""
 
         # Prepare email data
@@ -345,26 +244,32 @@ ARGUS™ - Background Verification Services
             html_body=html_content
         )
 
-        # Send email
-        logger.info("📤 Sending email...")
-        success = await mail_service.send_email(email_data)
-
-        if success:
-            logger.info("✅ Email sent successfully")
-            return {
-                "success": True,
-                "message": "Report sent successfully to registered email",
-                "recipientEmail": user_email,
-                "recipientUsername": user_username,
-                "sectionsIncluded": sections_found,
-                "backgroundCheckComplete": True,
-                "attachmentIncluded": pdf_attachment is not None
-            }
-        else:
-            raise HTTPException(status_code=500, detail="Failed to send email")
+        # Queue email; it is sent in the background
+        logger.info("📤 Queueing email...")
+        message_id = await mail_queue.enqueue(
+            email_data,
+            kind="profile-report",
+            user_id=str(user_doc.get("userId", "")),
+            attachments=attachments
+        )
+
+        logger.info(f"✅ Email queued ({message_id})")
+        return {
+            "success": True,
+            "message": "Report queued for delivery to registered email",
+            "messageId": message_id,
+            "statusUrl": f"/api/mail/{message_id}",
+            "recipientEmail": user_email,
+            "recipientUsername": user_username,
+            "sectionsIncluded": sections_found,
+            "backgroundCheckComplete": True,
+            "attachmentIncluded": attachment is not None
+        }
 
     except HTTPException:
         raise
+    except MailQueueUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"❌ Error sending profile email: {e}")
         raise HTTPException(
@@ -375,3 +280,5 @@ ARGUS™ - Background Verification Services
                 "details": "Please check your SMTP configuration and try again."
             }
         )
+    finally:
+        close_attachments(attachments)
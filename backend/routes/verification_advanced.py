@@ -4,12 +4,13 @@ from datetime import datetime
 from utils.dbCalls.analytics_db import create_analytics_entry
 from services.authService import auth_service
 from utils.api_tracking import track_external_api_call
+from utils.http_client import fetch_with_timeout
+from utils.task_graph import run_api_call_graph, SkipTask
+from utils.verification_stream import get_stream_format, streaming_response, run_with_progress, SectionTracker
 from utils.auth import authenticate_request, get_authenticated_user
 from utils.permissions import has_verification_advanced_access
 import jwt
 import os
-import requests
-import asyncio
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -53,6 +54,21 @@ PRODUCTION_LIMITS = {
     "API_TIMEOUT": 8000,  # 8 second timeout for individual APIs
     "TOTAL_TIMEOUT": 25000,  # 25 second total timeout
     "MAX_GSTIN_CALLS": 2,  # Limit GSTIN verification calls
+    "ADDITIONAL_MIN_BUDGET": 6000,  # Employment history needs at least 6 seconds left to start
+}
+
+# Profile section -> API calls it is built from; a streamed section is sent
+# once all of its calls have finished (sections without calls are sent first)
+PROFILE_SECTION_SOURCES = {
+    "input": [],
+    "identityInfo": [],
+    "contactInfo": ["PAN Plus", "Mobile to Name", "Mobile Network Details"],
+    "personalInfo": ["PAN Plus", "PAN to Father Name"],
+    "employmentInfo": ["PAN to UAN", "UAN Employment History"],
+    "businessInfo": ["PAN MSME Check"],
+    "bankingInfo": [],
+    "creditInfo": ["Credit Report"],
+    "digitalInfo": [],
 }
 
 class VerificationRequest(BaseModel):
@@ -61,21 +77,6 @@ class VerificationRequest(BaseModel):
     aadhaar_number: Optional[str] = None
     pan_number: str
 
-async def fetch_with_timeout(url: str, headers: dict, timeout: int = PRODUCTION_LIMITS["API_TIMEOUT"]):
-    """Fetch with timeout protection using requests in a thread"""
-    def _sync_request():
-        print(f"fetch_with_timeout: making GET {url} with timeout={timeout}ms")
-        try:
-            response = requests.get(url, headers=headers, timeout=timeout / 1000)  # Convert ms to seconds
-            print(f"fetch_with_timeout: received status {response.status_code} for {url}")
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"fetch_with_timeout: request failed for {url}: {e}")
-            raise
-    
-    return await asyncio.to_thread(_sync_request)
-
 @verificationRouter.post("/verification-advanced")
 async def verification_advanced(request: Request, data: VerificationRequest):
     start_time = datetime.now()
@@ -142,159 +143,173 @@ async def verification_advanced(request: Request, data: VerificationRequest):
             },
         ]
 
-        # Execute priority APIs
-        print("Executing priority API calls...")
-        priority_results = await asyncio.gather(
-            *[api["call"]() for api in priority_api_calls],
-            return_exceptions=True
-        )
-
-        priority_responses = []
-        for i, result in enumerate(priority_results):
-            api = priority_api_calls[i]
-            if isinstance(result, Exception):
-                priority_responses.append({
-                    "name": api["name"],
-                    "endpoint": api["endpoint"],
-                    "error": str(result)
-                })
-            else:
-                priority_responses.append({
-                    "name": api["name"],
-                    "endpoint": api["endpoint"],
-                    "response": result
-                })
-
-        # Check remaining time for secondary calls
-        remaining_time = PRODUCTION_LIMITS["TOTAL_TIMEOUT"] - (datetime.now() - start_time).total_seconds() * 1000
-
-        secondary_responses = []
-        if remaining_time > 12000:  # At least 12 seconds remaining
-            print("Executing secondary API calls...")
-            secondary_results = await asyncio.gather(
-                *[api["call"]() for api in secondary_api_calls],
-                return_exceptions=True
-            )
+        async def _employment_history(deps):
+            uan_response = deps["PAN to UAN"]
+            uan_number = uan_response.get("data", {}).get("uan_number") if isinstance(uan_response, dict) else None
+            if not uan_number:
+                raise SkipTask("no UAN available")
+            return await fetch_uan_employment_history(uan_number, user_id, username, user_role)
 
-            for i, result in enumerate(secondary_results):
-                api = secondary_api_calls[i]
-                if isinstance(result, Exception):
-                    secondary_responses.append({
-                        "name": api["name"],
-                        "endpoint": api["endpoint"],
-                        "error": str(result)
-                    })
-                else:
-                    secondary_responses.append({
-                        "name": api["name"],
-                        "endpoint": api["endpoint"],
-                        "response": result
-                    })
-
-        # Check time for expensive calls
-        remaining_time2 = PRODUCTION_LIMITS["TOTAL_TIMEOUT"] - (datetime.now() - start_time).total_seconds() * 1000
-
-        expensive_responses = []
-        if remaining_time2 > 15000:  # At least 15 seconds for credit report
-            print("Executing expensive API calls...")
-            expensive_results = await asyncio.gather(
-                *[api["call"]() for api in expensive_api_calls],
-                return_exceptions=True
-            )
-
-            for i, result in enumerate(expensive_results):
-                api = expensive_api_calls[i]
-                if isinstance(result, Exception):
-                    expensive_responses.append({
-                        "name": api["name"],
-                        "endpoint": api["endpoint"],
-                        "error": str(result)
-                    })
-                else:
-                    expensive_responses.append({
-                        "name": api["name"],
-                        "endpoint": api["endpoint"],
-                        "response": result
-                    })
-
-        # Combine all responses
-        all_responses = priority_responses + secondary_responses + expensive_responses
-
-        # Process additional API calls if time permits
-        additional_api_calls = []
-        remaining_time3 = PRODUCTION_LIMITS["TOTAL_TIMEOUT"] - (datetime.now() - start_time).total_seconds() * 1000
-
-        if remaining_time3 > 8000:
-            # Extract UAN for employment history
-            uan_response = next((r for r in all_responses if r["name"] == "PAN to UAN"), None)
-            uan_number = uan_response.get("response", {}).get("uan_number") if uan_response else None
-
-            if uan_number:
-                additional_api_calls.append({
-                    "name": "UAN Employment History",
-                    "call": lambda: fetch_uan_employment_history(uan_number, user_id, username, user_role),
-                    "endpoint": "verification/epfo/uan-to-employment-history",
-                })
-
-            # Add PAN MSME Check
-            additional_api_calls.append({
+        additional_api_calls = [
+            {
+                "name": "UAN Employment History",
+                "call": _employment_history,
+                "endpoint": "verification/epfo/uan-to-employment-history",
+                "dependsOn": ["PAN to UAN"],
+                "minBudgetMs": PRODUCTION_LIMITS["ADDITIONAL_MIN_BUDGET"],
+            },
+            {
                 "name": "PAN MSME Check",
                 "call": lambda: fetch_pan_msme_check(data.pan_number, user_id, username, user_role),
                 "endpoint": "verification/pan-msme-check",
-            })
-
-        # Execute additional calls
-        additional_responses = []
-        if additional_api_calls and remaining_time3 > 6000:
-            additional_results = await asyncio.gather(
-                *[api["call"]() for api in additional_api_calls],
-                return_exceptions=True
-            )
-
-            for i, result in enumerate(additional_results):
-                api = additional_api_calls[i]
-                if isinstance(result, Exception):
-                    additional_responses.append({
-                        "name": api["name"],
-                        "endpoint": api["endpoint"],
-                        "error": str(result)
-                    })
-                else:
-                    additional_responses.append({
-                        "name": api["name"],
-                        "endpoint": api["endpoint"],
-                        "response": result
-                    })
-
-        # Process profile data
-        comprehensive_profile = process_profile_data({
-            "input": data.dict(),
-            "initial_responses": all_responses,
-            "additional_responses": additional_responses,
-        })
+            },
+        ]
 
-        processing_time = (datetime.now() - start_time).total_seconds() * 1000
-
-        # Add processing metadata
-        comprehensive_profile["processingInfo"] = {
-            "processingTimeMs": processing_time,
-            "priorityApisCalled": len(priority_responses),
-            "secondaryApisCalled": len(secondary_responses),
-            "expensiveApisCalled": len(expensive_responses),
-            "additionalApisCalled": len(additional_responses),
-            "totalApisCalled": len(all_responses) + len(additional_responses),
-            "productionOptimized": True,
-            "timeoutsPrevented": True,
+        api_groups = {
+            "priority": priority_api_calls,
+            "secondary": secondary_api_calls,
+            "expensive": expensive_api_calls,
+            "additional": additional_api_calls,
         }
 
-        print(f"Profile generation completed in {processing_time}ms with {len(all_responses) + len(additional_responses)} API calls")
+        stream_format = get_stream_format(request)
+        if stream_format:
+            print(f"Streaming advanced verification as {stream_format}")
+            return streaming_response(stream_format, stream_profile_sections(data, api_groups, start_time))
+
+        # Start every call as early as its inputs allow; only employment
+        # history waits (on PAN to UAN) and needs enough budget left once it can start
+        print("Executing API calls with streaming scheduler...")
+        responses, outcome = await run_api_call_graph(
+            [api for group in api_groups.values() for api in group],
+            deadline_ms=PRODUCTION_LIMITS["TOTAL_TIMEOUT"]
+        )
 
-        return comprehensive_profile
+        return build_comprehensive_profile(data, api_groups, responses, outcome, start_time)
 
     except Exception as error:
         print(f"Error in comprehensive profile generation: {error}")
         raise HTTPException(status_code=500, detail="Failed to generate comprehensive profile")
 
+def build_comprehensive_profile(data: VerificationRequest, api_groups: dict, responses: dict, outcome, start_time: datetime):
+    """Combine the API responses into the profile and add the processing metadata."""
+    priority_api_calls = api_groups["priority"]
+    secondary_api_calls = api_groups["secondary"]
+    expensive_api_calls = api_groups["expensive"]
+    additional_api_calls = api_groups["additional"]
+
+    priority_responses = [responses[api["name"]] for api in priority_api_calls if api["name"] in responses]
+    secondary_responses = [responses[api["name"]] for api in secondary_api_calls if api["name"] in responses]
+    expensive_responses = [responses[api["name"]] for api in expensive_api_calls if api["name"] in responses]
+    additional_responses = [responses[api["name"]] for api in additional_api_calls if api["name"] in responses]
+
+    # Combine all responses
+    all_responses = priority_responses + secondary_responses + expensive_responses
+
+    # Process profile data
+    comprehensive_profile = process_profile_data({
+        "input": data.dict(),
+        "initial_responses": all_responses,
+        "additional_responses": additional_responses,
+    })
+
+    processing_time = (datetime.now() - start_time).total_seconds() * 1000
+
+    # Add processing metadata
+    comprehensive_profile["processingInfo"] = {
+        "processingTimeMs": processing_time,
+        "priorityApisCalled": len(priority_responses),
+        "secondaryApisCalled": len(secondary_responses),
+        "expensiveApisCalled": len(expensive_responses),
+        "additionalApisCalled": len(additional_responses),
+        "totalApisCalled": len(all_responses) + len(additional_responses),
+        "skippedApis": list(outcome.skipped.keys()),
+        "timedOutApis": outcome.timed_out,
+        "productionOptimized": True,
+        "timeoutsPrevented": True,
+    }
+
+    print(f"Profile generation completed in {processing_time}ms with {len(all_responses) + len(additional_responses)} API calls")
+
+    return comprehensive_profile
+
+async def stream_profile_sections(data: VerificationRequest, api_groups: dict, start_time: datetime):
+    """
+    Run the API call graph, yielding profile sections as they become final.
+
+    Every call records its response as it finishes; the profile is rebuilt
+    from the responses so far and each section is emitted once all of its
+    source calls (PROFILE_SECTION_SOURCES) have finished. The full profile
+    is built as usual at the end, any section that still changed is
+    re-emitted, and processingInfo closes the stream.
+
+    Yields:
+        (event name, payload) pairs for streaming_response
+    """
+    api_calls = [api for group in api_groups.values() for api in group]
+    partial_responses = {}
+
+    def _record(api):
+        async def _call(*args):
+            entry = {"name": api["name"], "endpoint": api["endpoint"]}
+            try:
+                entry["response"] = await api["call"](*args)
+                return entry["response"]
+            except SkipTask:
+                raise
+            except Exception as error:
+                entry["error"] = str(error)
+                raise
+            finally:
+                if "response" in entry or "error" in entry:
+                    partial_responses[api["name"]] = entry
+        return {**api, "call": _call}
+
+    recorded_calls = [_record(api) for api in api_calls]
+    finished = set()
+    tracker = SectionTracker()
+
+    def _final_sections():
+        return [section for section, sources in PROFILE_SECTION_SOURCES.items() if finished.issuperset(sources)]
+
+    def _partial_profile():
+        partial_groups = {
+            group: [partial_responses[api["name"]] for api in calls if api["name"] in partial_responses]
+            for group, calls in api_groups.items()
+        }
+        return process_profile_data({
+            "input": data.dict(),
+            "initial_responses": partial_groups["priority"] + partial_groups["secondary"] + partial_groups["expensive"],
+            "additional_responses": partial_groups["additional"],
+        })
+
+    try:
+        # Sections that need no upstream call go out before anything is fetched
+        for section, section_value in tracker.changed(_partial_profile(), _final_sections()):
+            yield "section", {"section": section, "data": section_value}
+
+        async for kind, value in run_with_progress(
+            lambda on_complete: run_api_call_graph(
+                recorded_calls, deadline_ms=PRODUCTION_LIMITS["TOTAL_TIMEOUT"], on_complete=on_complete
+            )
+        ):
+            if kind == "complete":
+                finished.add(value)
+                for section, section_value in tracker.changed(_partial_profile(), _final_sections()):
+                    yield "section", {"section": section, "data": section_value}
+            else:
+                responses, outcome = value
+                profile = build_comprehensive_profile(data, api_groups, responses, outcome, start_time)
+                processing_info = profile.pop("processingInfo")
+                for section, section_value in tracker.changed(profile):
+                    yield "section", {"section": section, "data": section_value}
+                yield "metadata", {"section": "processingInfo", "data": processing_info}
+
+    except Exception as error:
+        print(f"Error in streamed profile generation: {error}")
+        yield "error", {"detail": "Failed to generate comprehensive profile"}
+
+
 def process_profile_data(data):
     """Process and combine API responses into comprehensive profile"""
     input_data = data["input"]
@@ -484,7 +499,7 @@ async def _fetch_pan_plus(pan_number: str):
         "Authorization": f"Bearer {access_token}",
         "x-api-key": CLIENT_SECRET,
     }
-    return fetch_with_timeout(url, headers)
+    return await fetch_with_timeout(url, headers)
 
 async def fetch_mobile_to_name(mobile_number: str, user_id: str, username: str, user_role: str):
     return await track_external_api_call(
@@ -499,7 +514,7 @@ async def _fetch_mobile_to_name(mobile_number: str):
         "Authorization": f"Bearer {access_token}",
         "x-api-key": CLIENT_SECRET,
     }
-    return fetch_with_timeout(url, headers)
+    return await fetch_with_timeout(url, headers)
 
 async def fetch_mobile_network_details(mobile_number: str, user_id: str, username: str, user_role: str):
     return await track_external_api_call(
@@ -574,7 +589,7 @@ async def _fetch_uan_employment_history(uan_number: str):
         "Authorization": f"Bearer {access_token}",
         "x-api-key": CLIENT_SECRET,
     }
-    return fetch_with_timeout(url, headers)
+    return await fetch_with_timeout(url, headers)
 
 async def fetch_pan_msme_check(pan_number: str, user_id: str, username: str, user_role: str):
     return await track_external_api_call(
@@ -589,4 +604,4 @@ async def _fetch_pan_msme_check(pan_number: str):
         "Authorization": f"Bearer {access_token}",
         "x-api-key": CLIENT_SECRET,
     }
-    return fetch_with_timeout(url, headers)
+    return await fetch_with_timeout(url, headers)
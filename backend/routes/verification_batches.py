@@ -0,0 +1,221 @@
+from fastapi import APIRouter, HTTPException, Request, Query
+from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, ValidationError
+from utils.auth import get_authenticated_user
+from utils.permissions import has_verification_mini_access, has_admin_access
+from utils.verification_batches import batch_worker_pool
+from utils.dbCalls.verification_batches_db import (
+    create_verification_batch,
+    get_verification_batch,
+    get_verification_batch_items,
+    BATCH_ITEM_STATUSES,
+)
+from routes.verification_mini import VerificationMiniRequest, run_mini_verification
+from routes.verification_business import GSTINAdvancedRequest, fetch_gstin_advanced
+import csv
+import io
+import os
+import uuid
+
+verificationBatchesRouter = APIRouter()
+
+# Largest number of subjects accepted in one batch
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "5000"))
+# Item page size of the status endpoint
+BATCH_ITEMS_PAGE_SIZE = 50
+BATCH_ITEMS_MAX_PAGE_SIZE = 500
+# Row errors reported when a submission is rejected
+MAX_REPORTED_ROW_ERRORS = 20
+
+class VerificationBatchRequest(BaseModel):
+    type: str
+    subjects: List[Dict[str, Any]]
+    verifications: Optional[List[str]] = None
+
+# =========================== Batch processors ===========================
+
+async def process_mini_subject(subject: dict, options: dict, user_id: str, username: str, user_role: str):
+    """Run the mini verifications selected for the batch on one subject"""
+    data = VerificationMiniRequest(**subject, verifications=options.get("verifications", []))
+    return await run_mini_verification(data, user_id, username, user_role)
+
+async def process_business_subject(subject: dict, options: dict, user_id: str, username: str, user_role: str):
+    """Run the GSTIN advanced verification on one subject"""
+    data = GSTINAdvancedRequest(service="gstin-advanced", gstin=subject["gstin"])
+    response = await fetch_gstin_advanced(data.gstin, user_id, username, user_role)
+    return {"status": "success", "data": response}
+
+batch_worker_pool.register_processor("mini", process_mini_subject)
+batch_worker_pool.register_processor("business", process_business_subject)
+
+# =========================== Submission helpers ===========================
+
+def parse_csv_subjects(body: bytes) -> List[Dict[str, Any]]:
+    """Read one subject per CSV row; the header row names the fields, empty cells are omitted"""
+    text = body.decode("utf-8-sig")
+    subjects = []
+    for row in csv.DictReader(io.StringIO(text)):
+        subject = {
+            key.strip(): value.strip()
+            for key, value in row.items()
+            if key and value is not None and value.strip()
+        }
+        if subject:
+            subjects.append(subject)
+    return subjects
+
+def validate_subjects(batch_type: str, subjects: List[Dict[str, Any]], verifications: List[str]) -> List[Dict[str, Any]]:
+    """
+    Validate every subject up front so a bad row is reported at submission.
+
+    Returns:
+        List of {"row", "error"} for invalid subjects (empty when all are valid)
+    """
+    errors = []
+    for index, subject in enumerate(subjects):
+        try:
+            if batch_type == "mini":
+                data = VerificationMiniRequest(**subject, verifications=verifications)
+                if not data.name or not data.dob or not data.mobile:
+                    raise ValueError("Name, Date of Birth, and Mobile number are required")
+            else:
+                GSTINAdvancedRequest(service="gstin-advanced", gstin=subject.get("gstin", ""))
+        except (ValidationError, ValueError, TypeError) as error:
+            errors.append({"row": index, "error": str(error).splitlines()[0] if isinstance(error, ValidationError) else str(error)})
+            if len(errors) >= MAX_REPORTED_ROW_ERRORS:
+                break
+    return errors
+
+def check_batch_access(user_doc: dict, batch_type: str):
+    if batch_type == "mini" and not has_verification_mini_access(user_doc):
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+
+# =========================== Endpoints ===========================
+
+@verificationBatchesRouter.post("", status_code=202)
+async def submit_verification_batch(
+    request: Request,
+    batch_type_param: Optional[str] = Query(None, alias="type"),
+    verifications: Optional[str] = Query(None),
+):
+    """
+    Submit many subjects for verification in the background.
+
+    Accepts either JSON ({"type", "verifications", "subjects": [...]}) or a
+    CSV body (Content-Type text/csv) with one subject per row and the batch
+    type and comma-separated verifications as query parameters.
+    """
+    user_doc = await get_authenticated_user(request)
+    user_id = str(user_doc.get("userId", ""))
+    username = user_doc.get("username", "Unknown")
+    user_role = user_doc.get("role", "user")
+
+    content_type = request.headers.get("content-type", "")
+    try:
+        if "csv" in content_type:
+            batch_type = batch_type_param
+            selected = [v.strip() for v in (verifications or "").split(",") if v.strip()]
+            subjects = parse_csv_subjects(await request.body())
+        else:
+            payload = VerificationBatchRequest(**(await request.json()))
+            batch_type = payload.type
+            selected = payload.verifications or []
+            subjects = payload.subjects
+    except (ValidationError, ValueError, UnicodeDecodeError) as error:
+        raise HTTPException(status_code=400, detail=f"Invalid batch submission: {error}")
+
+    if batch_type not in batch_worker_pool.batch_types:
+        raise HTTPException(status_code=400, detail=f"Unsupported batch type: {batch_type}")
+    check_batch_access(user_doc, batch_type)
+    if not subjects:
+        raise HTTPException(status_code=400, detail="No subjects to verify")
+    if len(subjects) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_ITEMS} subjects per batch")
+    if batch_type == "mini" and not selected:
+        raise HTTPException(status_code=400, detail="verifications are required for mini batches")
+
+    row_errors = validate_subjects(batch_type, subjects, selected)
+    if row_errors:
+        raise HTTPException(status_code=400, detail={"message": "Invalid subjects", "rowErrors": row_errors})
+
+    batch_id = str(uuid.uuid4())
+    try:
+        await create_verification_batch(
+            batch_id, batch_type, user_id, username, user_role, {"verifications": selected}, subjects
+        )
+    except Exception as error:
+        print(f"Error storing verification batch: {error}")
+        raise HTTPException(status_code=500, detail="Failed to store verification batch")
+
+    batch_worker_pool.notify()
+    print(f"Queued {batch_type} verification batch {batch_id} with {len(subjects)} subjects for {username}")
+
+    return {
+        "batchId": batch_id,
+        "type": batch_type,
+        "totalItems": len(subjects),
+        "statusUrl": f"/api/verification-batches/{batch_id}",
+    }
+
+@verificationBatchesRouter.get("/stats")
+async def get_verification_batch_pool_stats(request: Request):
+    """Worker pool counters for this process"""
+    user_doc = await get_authenticated_user(request)
+    if not has_admin_access(user_doc):
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    return batch_worker_pool.get_stats()
+
+@verificationBatchesRouter.get("/{batch_id}")
+async def get_verification_batch_status(
+    request: Request,
+    batch_id: str,
+    cursor: Optional[int] = Query(None, ge=0),
+    limit: int = Query(BATCH_ITEMS_PAGE_SIZE, ge=1, le=BATCH_ITEMS_MAX_PAGE_SIZE),
+    status: Optional[str] = Query(None),
+):
+    """Batch progress plus one page of items; pass nextCursor back as cursor for the next page"""
+    user_doc = await get_authenticated_user(request)
+
+    if status is not None and status not in BATCH_ITEM_STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(BATCH_ITEM_STATUSES)}")
+
+    batch = await get_verification_batch(batch_id)
+    # Other users' batches are reported as missing rather than forbidden
+    if batch is None or (str(batch["user_id"]) != str(user_doc.get("userId", "")) and not has_admin_access(user_doc)):
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    items = await get_verification_batch_items(batch_id, cursor, limit + 1, status)
+    has_more = len(items) > limit
+    items = items[:limit]
+
+    finished = batch["completed"] + batch["failed"]
+    return {
+        "batchId": batch_id,
+        "type": batch["batch_type"],
+        "verifications": (batch.get("options") or {}).get("verifications", []),
+        "status": "completed" if finished == batch["total_items"] else "processing",
+        "createdAt": batch["created_at"].isoformat() if batch.get("created_at") else None,
+        "lastFinishedAt": batch["last_finished_at"].isoformat() if batch.get("last_finished_at") else None,
+        "progress": {
+            "total": batch["total_items"],
+            "pending": batch["pending"],
+            "running": batch["running"],
+            "completed": batch["completed"],
+            "failed": batch["failed"],
+            "percent": round(finished * 100 / batch["total_items"], 1) if batch["total_items"] else 100.0,
+        },
+        "items": [
+            {
+                "index": item["item_index"],
+                "subject": item["subject"],
+                "status": item["status"],
+                "result": item["result"],
+                "error": item["error"],
+                "attempts": item["attempts"],
+                "finishedAt": item["finished_at"].isoformat() if item.get("finished_at") else None,
+            }
+            for item in items
+        ],
+        "nextCursor": items[-1]["item_index"] if has_more and items else None,
+        "hasMore": has_more,
+    }
@@ -4,7 +4,6 @@ from pydantic import BaseModel, Field
 from typing import Dict, Any, Optional
 import jwt
 import os
-import requests
 import asyncio
 from datetime import datetime
 from bson import ObjectId
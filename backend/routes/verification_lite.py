@@ -4,12 +4,12 @@ from datetime import datetime
 from bson import ObjectId
 from services.authService import auth_service
 from utils.api_tracking import track_external_api_call
+from utils.http_client import fetch_with_timeout
+from utils.task_graph import run_api_call_graph, SkipTask
 from utils.auth import authenticate_request, get_authenticated_user
 from utils.permissions import has_verification_lite_access
 import jwt
 import os
-import requests
-import asyncio
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -59,6 +59,7 @@ ENABLE_ANALYTICS_TRACKING = os.getenv("ENABLE_ANALYTICS_TRACKING", "true").lower
 PRODUCTION_LIMITS = {
     "API_TIMEOUT": 8000,  # 8 second timeout for individual APIs
     "TOTAL_TIMEOUT": 20000,  # 20 second total timeout
+    "CONDITIONAL_MIN_BUDGET": 4000,  # Employment history needs at least 4 seconds left to start
 }
 
 class VerificationLiteRequest(BaseModel):
@@ -67,15 +68,6 @@ class VerificationLiteRequest(BaseModel):
     aadhaar_number: Optional[str] = None
     pan_number: str
 
-async def fetch_with_timeout(url: str, headers: dict, timeout: int = PRODUCTION_LIMITS["API_TIMEOUT"]):
-    """Fetch with timeout protection using requests in a thread"""
-    def _sync_request():
-        response = requests.get(url, headers=headers, timeout=timeout / 1000)  # Convert ms to seconds
-        response.raise_for_status()
-        return response.json()
-
-    return await asyncio.to_thread(_sync_request)
-
 @verificationLiteRouter.post("/verification-lite")
 async def verification_lite(request: Request, data: VerificationLiteRequest):
     start_time = datetime.now()
@@ -155,130 +147,44 @@ async def verification_lite(request: Request, data: VerificationLiteRequest):
             },
         ]
 
-        # Execute priority APIs
-        print("Executing priority API calls for lite verification...")
-        priority_results = await asyncio.gather(
-            *[api["call"]() for api in priority_api_calls],
-            return_exceptions=True
+        async def _employment_history(deps):
+            uan_response = deps["PAN to UAN"]
+            uan_number = uan_response.get("data", {}).get("uan_number") if isinstance(uan_response, dict) else None
+            if not uan_number:
+                raise SkipTask("no UAN available")
+            return await fetch_uan_employment_history(uan_number, str(user_doc["userId"]), username, user_role)
+
+        conditional_api_calls = [
+            {
+                "name": "UAN Employment History",
+                "call": _employment_history,
+                "endpoint": "verification/epfo/uan-to-employment-history",
+                "dependsOn": ["PAN to UAN"],
+                "minBudgetMs": PRODUCTION_LIMITS["CONDITIONAL_MIN_BUDGET"],
+            },
+            {
+                "name": "PAN MSME Check",
+                "call": lambda: fetch_pan_msme_check(data.pan_number, str(user_doc["userId"]), username, user_role),
+                "endpoint": "verification/pan-msme-check",
+            },
+        ]
+
+        # Start every call as early as its inputs allow; only employment
+        # history waits (on PAN to UAN)
+        print("Executing API calls for lite verification with streaming scheduler...")
+        responses, outcome = await run_api_call_graph(
+            priority_api_calls + secondary_api_calls + additional_api_calls + conditional_api_calls,
+            deadline_ms=PRODUCTION_LIMITS["TOTAL_TIMEOUT"]
         )
 
-        priority_responses = []
-        for i, result in enumerate(priority_results):
-            api = priority_api_calls[i]
-            if isinstance(result, Exception):
-                priority_responses.append({
-                    "name": api["name"],
-                    "endpoint": api["endpoint"],
-                    "error": str(result)
-                })
-            else:
-                priority_responses.append({
-                    "name": api["name"],
-                    "endpoint": api["endpoint"],
-                    "response": result
-                })
-
-        # Check remaining time for secondary calls
-        remaining_time = PRODUCTION_LIMITS["TOTAL_TIMEOUT"] - (datetime.now() - start_time).total_seconds() * 1000
-
-        secondary_responses = []
-        if remaining_time > 10000:  # At least 10 seconds remaining for lite version
-            print("Executing secondary API calls for lite verification...")
-            secondary_results = await asyncio.gather(
-                *[api["call"]() for api in secondary_api_calls],
-                return_exceptions=True
-            )
-
-            for i, result in enumerate(secondary_results):
-                api = secondary_api_calls[i]
-                if isinstance(result, Exception):
-                    secondary_responses.append({
-                        "name": api["name"],
-                        "endpoint": api["endpoint"],
-                        "error": str(result)
-                    })
-                else:
-                    secondary_responses.append({
-                        "name": api["name"],
-                        "endpoint": api["endpoint"],
-                        "response": result
-                    })
-
-        # Check time for additional calls
-        remaining_time2 = PRODUCTION_LIMITS["TOTAL_TIMEOUT"] - (datetime.now() - start_time).total_seconds() * 1000
-
-        additional_responses = []
-        if remaining_time2 > 8000:  # At least 8 seconds remaining
-            print("Executing additional API calls for lite verification...")
-            additional_results = await asyncio.gather(
-                *[api["call"]() for api in additional_api_calls],
-                return_exceptions=True
-            )
-
-            for i, result in enumerate(additional_results):
-                api = additional_api_calls[i]
-                if isinstance(result, Exception):
-                    additional_responses.append({
-                        "name": api["name"],
-                        "endpoint": api["endpoint"],
-                        "error": str(result)
-                    })
-                else:
-                    additional_responses.append({
-                        "name": api["name"],
-                        "endpoint": api["endpoint"],
-                        "response": result
-                    })
+        priority_responses = [responses[api["name"]] for api in priority_api_calls if api["name"] in responses]
+        secondary_responses = [responses[api["name"]] for api in secondary_api_calls if api["name"] in responses]
+        additional_responses = [responses[api["name"]] for api in additional_api_calls if api["name"] in responses]
+        conditional_responses = [responses[api["name"]] for api in conditional_api_calls if api["name"] in responses]
 
         # Combine all responses
         all_responses = priority_responses + secondary_responses + additional_responses
 
-        # Process conditional additional API calls if time permits
-        conditional_api_calls = []
-        remaining_time3 = PRODUCTION_LIMITS["TOTAL_TIMEOUT"] - (datetime.now() - start_time).total_seconds() * 1000
-
-        if remaining_time3 > 6000:
-            # Extract UAN for employment history
-            uan_response = next((r for r in all_responses if r["name"] == "PAN to UAN"), None)
-            uan_number = uan_response.get("response", {}).get("data", {}).get("uan_number") if uan_response else None
-
-            if uan_number:
-                conditional_api_calls.append({
-                    "name": "UAN Employment History",
-                    "call": lambda: fetch_uan_employment_history(uan_number, str(user_doc["userId"]), username, user_role),
-                    "endpoint": "verification/epfo/uan-to-employment-history",
-                })
-
-            # Add PAN MSME Check
-            conditional_api_calls.append({
-                "name": "PAN MSME Check",
-                "call": lambda: fetch_pan_msme_check(data.pan_number, str(user_doc["userId"]), username, user_role),
-                "endpoint": "verification/pan-msme-check",
-            })
-
-        # Execute conditional calls
-        conditional_responses = []
-        if conditional_api_calls and remaining_time3 > 4000:
-            conditional_results = await asyncio.gather(
-                *[api["call"]() for api in conditional_api_calls],
-                return_exceptions=True
-            )
-
-            for i, result in enumerate(conditional_results):
-                api = conditional_api_calls[i]
-                if isinstance(result, Exception):
-                    conditional_responses.append({
-                        "name": api["name"],
-                        "endpoint": api["endpoint"],
-                        "error": str(result)
-                    })
-                else:
-                    conditional_responses.append({
-                        "name": api["name"],
-                        "endpoint": api["endpoint"],
-                        "response": result
-                    })
-
         # Process comprehensive profile
         comprehensive_profile = process_lite_profile_data({
             "input": {
@@ -301,6 +207,8 @@ async def verification_lite(request: Request, data: VerificationLiteRequest):
             "additionalApisCalled": len(additional_responses),
             "conditionalApisCalled": len(conditional_responses),
             "totalApisCalled": len(all_responses) + len(conditional_responses),
+            "skippedApis": list(outcome.skipped.keys()),
+            "timedOutApis": outcome.timed_out,
             "productionOptimized": True,
             "timeoutsPrevented": True,
         }
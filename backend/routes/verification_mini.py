@@ -5,11 +5,14 @@ from bson import ObjectId
 from utils.dbCalls.analytics_db import create_analytics_entry
 from services.authService import auth_service
 from utils.api_tracking import track_external_api_call
+from utils.http_client import fetch_with_timeout, post_with_timeout
+from utils.task_graph import TaskGraph
+from utils.verification_stream import get_stream_format, streaming_response, run_with_progress, SectionTracker
+from utils.async_jobs import async_job_manager
 from utils.auth import authenticate_request, get_authenticated_user
 from utils.permissions import has_verification_mini_access
 import jwt
 import os
-import requests
 import asyncio
 from pydantic import BaseModel, ConfigDict
 from dotenv import load_dotenv
@@ -58,10 +61,13 @@ ENABLE_ANALYTICS_TRACKING = os.getenv("ENABLE_ANALYTICS_TRACKING", "true").lower
 # Production limits for mini verification
 PRODUCTION_LIMITS = {
     "API_TIMEOUT": 8000,  # 8 second timeout for individual APIs
-    "POLLING_TIMEOUT": 20000,  # 20 second total timeout for polling
-    "MAX_POLLING_ATTEMPTS": 10,
+    "POLLING_TIMEOUT": 20000,  # 20 seconds to wait for an async job before giving up on it
+    "TOTAL_TIMEOUT": 30000,  # 30 second deadline for the whole verification graph
 }
 
+# Verification types that produce a UAN usable for employment history
+UAN_SOURCE_VERIFICATIONS = ["pan-to-uan", "aadhaar-to-uan", "mobile-to-uan"]
+
 # API cost mapping for mini verification
 API_COSTS = {
     "verification/aadhaar": 1.5,
@@ -108,24 +114,8 @@ class VerificationMiniRequest(BaseModel):
     bankAccount: Optional[str] = None
     ifscCode: Optional[str] = None
     verifications: List[str]
-
-async def fetch_with_timeout(url: str, headers: dict, timeout: int = PRODUCTION_LIMITS["API_TIMEOUT"]):
-    """Fetch with timeout protection using requests in a thread"""
-    def _sync_request():
-        response = requests.get(url, headers=headers, timeout=timeout / 1000)  # Convert ms to seconds
-        response.raise_for_status()
-        return response.json()
-
-    return await asyncio.to_thread(_sync_request)
-
-async def post_with_timeout(url: str, headers: dict, data: dict = None, timeout: int = PRODUCTION_LIMITS["API_TIMEOUT"]):
-    """POST with timeout protection using requests in a thread"""
-    def _sync_post():
-        response = requests.post(url, headers=headers, json=data, timeout=timeout / 1000)
-        response.raise_for_status()
-        return response.json()
-
-    return await asyncio.to_thread(_sync_post)
+    # Return job handles for DL / voter ID checks instead of waiting for them
+    asyncJobs: bool = False
 
 def format_date_string(date_str: str) -> str:
     """Format date string to YYYY-MM-DD"""
@@ -179,245 +169,15 @@ async def verification_mini(request: Request, data: VerificationMiniRequest):
                 detail="Name, Date of Birth, and Mobile number are required"
             )
 
-        # Format DOB as YYYY-MM-DD for API requests
-        formatted_dob = format_date_string(data.dob)
-
-        # Verification results tracking
-        verification_results = {
-            "personalInfo": {
-                "name": data.name,
-                "dob": formatted_dob,
-                "mobile": data.mobile,
-                "fatherName": data.fatherName,
-                "aadhaar": data.aadhaar_number,
-                "pan": data.pan_number,
-                "dl": data.dl_number,
-                "rcNumber": data.rc_number,
-                "epicNumber": data.epic_Number,
-                "fileNumber": data.file_number,
-                "upi": data.upi,
-                "bankAccount": data.bankAccount,
-                "ifscCode": data.ifscCode,
-            },
-        }
+        stream_format = get_stream_format(request)
+        if stream_format:
+            print(f"Streaming mini verification as {stream_format}")
+            verification_results, graph, uan_sources = prepare_mini_verification(data, user_id, username, user_role)
+            return streaming_response(stream_format, stream_verification_sections(
+                graph, uan_sources, data, verification_results, start_time
+            ))
 
-        # Process mobile to PAN first if selected - this can provide PAN information if it's missing
-        if "mobile-to-pan" in data.verifications:
-            try:
-                await process_mobile_to_pan_verification(
-                    data.mobile,
-                    str(user_doc["userId"]),
-                    username,
-                    user_role,
-                    verification_results
-                )
-
-                # If PAN verification is also selected and PAN wasn't provided but found via mobile
-                if ("pan" in data.verifications and
-                    not data.pan_number and
-                    verification_results.get("mobileToPANVerification", {}).get("panNumber")):
-                    # Use the PAN obtained from mobile verification
-                    verification_results["personalInfo"]["pan"] = verification_results["mobileToPANVerification"]["panNumber"]
-            except Exception as error:
-                print(f"Mobile to PAN verification error: {error}")
-                verification_results["mobileToPANVerification"] = {
-                    "mobileNumber": data.mobile,
-                    "verificationStatus": "failed",
-                    "verifiedAt": datetime.now().isoformat(),
-                }
-
-        # Process verifications based on selected options
-        for verification_type in data.verifications:
-            try:
-                if verification_type == "aadhaar" and data.aadhaar_number:
-                    await process_aadhaar_verification(
-                        data.aadhaar_number,
-                        str(user_doc["userId"]),
-                        username,
-                        user_role,
-                        verification_results
-                    )
-
-                elif verification_type == "pan":
-                    # Use either provided PAN or one obtained from mobile-to-pan
-                    pan_to_verify = data.pan_number or verification_results["personalInfo"].get("pan")
-                    if pan_to_verify:
-                        await process_pan_verification(
-                            pan_to_verify,
-                            str(user_doc["userId"]),
-                            username,
-                            user_role,
-                            verification_results
-                        )
-
-                elif verification_type == "dl" and data.dl_number and formatted_dob:
-                    await process_dl_verification(
-                        data.dl_number,
-                        formatted_dob,
-                        str(user_doc["userId"]),
-                        username,
-                        user_role,
-                        verification_results
-                    )
-
-                elif verification_type == "rc-advanced" and data.rc_number:
-                    await process_rc_advanced_verification(
-                        data.rc_number,
-                        str(user_doc["userId"]),
-                        username,
-                        user_role,
-                        verification_results
-                    )
-
-                elif verification_type == "rc-challan" and data.rc_number:
-                    await process_rc_challan_verification(
-                        data.rc_number,
-                        str(user_doc["userId"]),
-                        username,
-                        user_role,
-                        verification_results
-                    )
-
-                elif verification_type == "pan-to-uan":
-                    # Use either provided PAN or one obtained from mobile-to-pan
-                    pan_for_uan = data.pan_number or verification_results["personalInfo"].get("pan")
-                    if pan_for_uan:
-                        uan_result = await process_pan_to_uan_verification(
-                            pan_for_uan,
-                            str(user_doc["userId"]),
-                            username,
-                            user_role,
-                            verification_results
-                        )
-
-                        # If employment history is also selected, we can use the UAN we just found
-                        if ("employment-history" in data.verifications and
-                            uan_result and
-                            uan_result.get("verificationStatus") == "verified"):
-                            await process_employment_history_verification(
-                                uan_result["uanNumber"],
-                                str(user_doc["userId"]),
-                                username,
-                                user_role,
-                                verification_results
-                            )
-
-                elif verification_type == "aadhaar-to-uan" and data.aadhaar_number:
-                    uan_result = await process_aadhaar_to_uan_verification(
-                        data.aadhaar_number,
-                        str(user_doc["userId"]),
-                        username,
-                        user_role,
-                        verification_results
-                    )
-
-                    # If employment history is also selected, we can use the UAN we just found
-                    if ("employment-history" in data.verifications and
-                        uan_result and
-                        uan_result.get("verificationStatus") == "verified"):
-                        await process_employment_history_verification(
-                            uan_result["uanNumber"],
-                            str(user_doc["userId"]),
-                            username,
-                            user_role,
-                            verification_results
-                        )
-
-                elif verification_type == "mobile-to-uan":
-                    mobile_for_uan = data.mobile or verification_results["personalInfo"].get("mobile")
-                    if mobile_for_uan:
-                        uan_result = await process_mobile_to_uan_verification(
-                            mobile_for_uan,
-                            str(user_doc["userId"]),
-                            username,
-                            user_role,
-                            verification_results
-                        )
-
-                        # If employment history is also selected, we can use the UAN we just found
-                        if ("employment-history" in data.verifications and
-                            uan_result and
-                            uan_result.get("verificationStatus") == "verified"):
-                            await process_employment_history_verification(
-                                uan_result["uanNumber"],
-                                str(user_doc["userId"]),
-                                username,
-                                user_role,
-                                verification_results
-                            )
-
-                elif verification_type == "mnrl":
-                    mobile_for_mnrl = data.mobile or verification_results["personalInfo"].get("mobile")
-                    if mobile_for_mnrl:
-                        await process_mnrl_verification(
-                            mobile_for_mnrl,
-                            str(user_doc["userId"]),
-                            username,
-                            user_role,
-                            verification_results
-                        )
-
-                elif verification_type == "voter-id":
-                    epic_number = data.epic_Number or verification_results.get("voterIdVerification", {}).get("epic_Number")
-                    if epic_number:
-                        await process_voter_id_verification(
-                            epic_number,
-                            str(user_doc["userId"]),
-                            username,
-                            user_role,
-                            verification_results
-                        )
-
-                elif verification_type == "passport":
-                    file_number = data.file_number or verification_results.get("passportVerification", {}).get("fileNumber")
-                    if file_number and formatted_dob:
-                        await process_passport_verification(
-                            file_number,
-                            formatted_dob,
-                            str(user_doc["userId"]),
-                            username,
-                            user_role,
-                            verification_results
-                        )
-
-                elif verification_type == "bankAccount" and data.bankAccount and data.ifscCode:
-                    await process_bank_account_verification(
-                        data.bankAccount,
-                        data.ifscCode,
-                        str(user_doc["userId"]),
-                        username,
-                        user_role,
-                        verification_results
-                    )
-
-                elif verification_type == "upi" and data.upi and data.name:
-                    await process_upi_verification(
-                        data.upi,
-                        data.name,
-                        str(user_doc["userId"]),
-                        username,
-                        user_role,
-                        verification_results
-                    )
-
-                # Skip these as they're handled above
-                elif verification_type in ["mobile-to-pan", "employment-history"]:
-                    continue
-
-            except Exception as error:
-                print(f"Error processing verification type {verification_type}: {error}")
-                # Continue with other verifications
-
-        # Add metadata
-        processing_time = (datetime.now() - start_time).total_seconds() * 1000
-        verification_results["metadata"] = {
-            "profileType": "mini",
-            "totalVerificationsRequested": len(data.verifications),
-            "processingTimeMs": processing_time,
-            "generatedAt": datetime.now().isoformat(),
-        }
-
-        print(f"Mini verification completed in {processing_time}ms for {len(data.verifications)} verification types")
+        verification_results = await run_mini_verification(data, user_id, username, user_role, start_time)
 
         return verification_results
 
@@ -425,6 +185,244 @@ async def verification_mini(request: Request, data: VerificationMiniRequest):
         print(f"Error in mini verification: {error}")
         raise HTTPException(status_code=500, detail="Failed to perform mini verification")
 
+def prepare_mini_verification(
+    data: VerificationMiniRequest,
+    user_id: str,
+    username: str,
+    user_role: str
+):
+    """
+    Set up the response skeleton and the dependency graph for one subject.
+
+    Returns:
+        Tuple of (verification_results, TaskGraph, UAN source node names)
+    """
+    # Format DOB as YYYY-MM-DD for API requests
+    formatted_dob = format_date_string(data.dob)
+
+    # Verification results tracking
+    verification_results = {
+        "personalInfo": {
+            "name": data.name,
+            "dob": formatted_dob,
+            "mobile": data.mobile,
+            "fatherName": data.fatherName,
+            "aadhaar": data.aadhaar_number,
+            "pan": data.pan_number,
+            "dl": data.dl_number,
+            "rcNumber": data.rc_number,
+            "epicNumber": data.epic_Number,
+            "fileNumber": data.file_number,
+            "upi": data.upi,
+            "bankAccount": data.bankAccount,
+            "ifscCode": data.ifscCode,
+        },
+    }
+
+    # Run all selected checks as a dependency graph: independent checks start
+    # immediately, dependent ones as soon as their inputs resolve
+    graph, uan_sources = build_verification_graph(
+        data,
+        formatted_dob,
+        user_id,
+        username,
+        user_role,
+        verification_results
+    )
+    return verification_results, graph, uan_sources
+
+async def run_mini_verification(
+    data: VerificationMiniRequest,
+    user_id: str,
+    username: str,
+    user_role: str,
+    start_time: Optional[datetime] = None
+) -> dict:
+    """
+    Run the selected mini verifications for one subject.
+
+    Used by the endpoint and by batch workers; the caller is responsible for
+    authentication and permission checks.
+
+    Returns:
+        The verification results, including the metadata block
+    """
+    start_time = start_time or datetime.now()
+    verification_results, graph, uan_sources = prepare_mini_verification(data, user_id, username, user_role)
+    outcome = await graph.run(deadline_ms=PRODUCTION_LIMITS["TOTAL_TIMEOUT"])
+    complete_verification_results(outcome, uan_sources, data, verification_results, start_time)
+    return verification_results
+
+def complete_verification_results(
+    outcome,
+    uan_sources: List[str],
+    data: VerificationMiniRequest,
+    verification_results: dict,
+    start_time: datetime
+):
+    """Log graph failures, settle the UAN section and add the metadata block."""
+    for verification_type, error in outcome.errors.items():
+        print(f"Error processing verification type {verification_type}: {error}")
+    if outcome.timed_out:
+        print(f"Mini verification deadline reached, cancelled: {outcome.timed_out}")
+
+    finalize_uan_results(outcome, uan_sources, verification_results)
+
+    # Add metadata
+    processing_time = (datetime.now() - start_time).total_seconds() * 1000
+    verification_results["metadata"] = {
+        "profileType": "mini",
+        "totalVerificationsRequested": len(data.verifications),
+        "processingTimeMs": processing_time,
+        "timedOutVerifications": outcome.timed_out,
+        "generatedAt": datetime.now().isoformat(),
+    }
+
+    print(f"Mini verification completed in {processing_time}ms for {len(data.verifications)} verification types")
+
+async def stream_verification_sections(
+    graph: TaskGraph,
+    uan_sources: List[str],
+    data: VerificationMiniRequest,
+    verification_results: dict,
+    start_time: datetime
+):
+    """
+    Run the verification graph, yielding sections as checks complete.
+
+    Each check writes its own section of verification_results, so after every
+    completed node the changed sections are emitted. Once the graph is done
+    the UAN section is settled, any section that changed is re-emitted, and
+    the metadata block closes the stream.
+
+    Yields:
+        (event name, payload) pairs for streaming_response
+    """
+    tracker = SectionTracker()
+    try:
+        # personalInfo is known up front, so the client gets a first byte immediately
+        for section, value in tracker.changed(verification_results):
+            yield "section", {"section": section, "data": value}
+
+        async for kind, value in run_with_progress(
+            lambda on_complete: graph.run(deadline_ms=PRODUCTION_LIMITS["TOTAL_TIMEOUT"], on_complete=on_complete)
+        ):
+            if kind == "result":
+                complete_verification_results(value, uan_sources, data, verification_results, start_time)
+            sections = {k: v for k, v in verification_results.items() if k != "metadata"}
+            for section, section_value in tracker.changed(sections):
+                yield "section", {"section": section, "data": section_value}
+
+        yield "metadata", {"section": "metadata", "data": verification_results["metadata"]}
+
+    except Exception as error:
+        print(f"Error in streamed mini verification: {error}")
+        yield "error", {"detail": "Failed to perform mini verification"}
+
+def build_verification_graph(
+    data: VerificationMiniRequest,
+    formatted_dob: str,
+    user_id: str,
+    username: str,
+    user_role: str,
+    verification_results: dict
+):
+    """
+    Build the dependency graph for the selected mini verifications.
+
+    Independent checks have no dependencies. PAN and PAN-to-UAN wait for
+    mobile-to-PAN only when no PAN was supplied, and employment history waits
+    for the selected UAN lookups.
+
+    Returns:
+        Tuple of (TaskGraph, UAN source node names in request order)
+    """
+    selected = list(dict.fromkeys(data.verifications))
+    graph = TaskGraph()
+
+    # verification type -> (has required input, coroutine factory)
+    independent_checks = {
+        "mobile-to-pan": (data.mobile, lambda: process_mobile_to_pan_verification(
+            data.mobile, user_id, username, user_role, verification_results)),
+        "aadhaar": (data.aadhaar_number, lambda: process_aadhaar_verification(
+            data.aadhaar_number, user_id, username, user_role, verification_results)),
+        "dl": (data.dl_number and formatted_dob, lambda: process_dl_verification(
+            data.dl_number, formatted_dob, user_id, username, user_role, verification_results, data.asyncJobs)),
+        "rc-advanced": (data.rc_number, lambda: process_rc_advanced_verification(
+            data.rc_number, user_id, username, user_role, verification_results)),
+        "rc-challan": (data.rc_number, lambda: process_rc_challan_verification(
+            data.rc_number, user_id, username, user_role, verification_results)),
+        "aadhaar-to-uan": (data.aadhaar_number, lambda: process_aadhaar_to_uan_verification(
+            data.aadhaar_number, user_id, username, user_role, verification_results)),
+        "mobile-to-uan": (data.mobile, lambda: process_mobile_to_uan_verification(
+            data.mobile, user_id, username, user_role, verification_results)),
+        "mnrl": (data.mobile, lambda: process_mnrl_verification(
+            data.mobile, user_id, username, user_role, verification_results)),
+        "voter-id": (data.epic_Number, lambda: process_voter_id_verification(
+            data.epic_Number, user_id, username, user_role, verification_results, data.asyncJobs)),
+        "passport": (data.file_number and formatted_dob, lambda: process_passport_verification(
+            data.file_number, formatted_dob, user_id, username, user_role, verification_results)),
+        "bankAccount": (data.bankAccount and data.ifscCode, lambda: process_bank_account_verification(
+            data.bankAccount, data.ifscCode, user_id, username, user_role, verification_results)),
+        "upi": (data.upi and data.name, lambda: process_upi_verification(
+            data.upi, data.name, user_id, username, user_role, verification_results)),
+    }
+
+    for verification_type in selected:
+        if verification_type in independent_checks:
+            has_input, start_check = independent_checks[verification_type]
+            if has_input:
+                graph.add(verification_type, lambda deps, start_check=start_check: start_check())
+
+    # PAN-based checks use the supplied PAN, or the one found via mobile-to-PAN
+    pan_dependencies = ["mobile-to-pan"] if "mobile-to-pan" in graph and not data.pan_number else []
+
+    async def _run_pan_check(process_function):
+        pan_number = data.pan_number or verification_results["personalInfo"].get("pan")
+        if pan_number:
+            return await process_function(pan_number, user_id, username, user_role, verification_results)
+        return None
+
+    if "pan" in selected:
+        graph.add("pan", lambda deps: _run_pan_check(process_pan_verification), pan_dependencies)
+    if "pan-to-uan" in selected:
+        graph.add("pan-to-uan", lambda deps: _run_pan_check(process_pan_to_uan_verification), pan_dependencies)
+
+    # Employment history uses the last verified UAN in request order
+    uan_sources = [t for t in selected if t in UAN_SOURCE_VERIFICATIONS and t in graph]
+
+    async def _run_employment_history(deps):
+        verified = [
+            deps[source] for source in uan_sources
+            if isinstance(deps[source], dict) and deps[source].get("verificationStatus") == "verified"
+        ]
+        if verified:
+            await process_employment_history_verification(
+                verified[-1]["uanNumber"], user_id, username, user_role, verification_results
+            )
+
+    if "employment-history" in selected and uan_sources:
+        graph.add("employment-history", _run_employment_history, uan_sources)
+
+    return graph, uan_sources
+
+def finalize_uan_results(outcome, uan_sources: List[str], verification_results: dict):
+    """
+    Make the UAN section independent of completion order.
+
+    The UAN lookups run concurrently and each writes uanVerification, so
+    re-apply them in request order: the last lookup wins the section and the
+    first verified UAN fills personalInfo, matching the sequential behaviour.
+    """
+    uan_results = [outcome.get(source) for source in uan_sources if outcome.get(source)]
+    if not uan_results:
+        return
+
+    verification_results["uanVerification"] = uan_results[-1]
+    first_verified = next((r for r in uan_results if r.get("verificationStatus") == "verified"), None)
+    if first_verified:
+        verification_results["personalInfo"]["uanNumber"] = first_verified["uanNumber"]
+
 # =========================== Verification Processing Functions ===========================
 
 async def process_aadhaar_verification(
@@ -495,9 +493,10 @@ async def process_dl_verification(
     user_id: str,
     username: str,
     user_role: str,
-    verification_results: dict
+    verification_results: dict,
+    defer: bool = False
 ):
-    """Process Driving License verification"""
+    """Process Driving License verification (as a job handle if defer is set)"""
     try:
         # Step 1: Initiate DL verification
         dl_init_result = await initiate_dl_verification(
@@ -509,31 +508,16 @@ async def process_dl_verification(
         )
         request_id = dl_init_result["request_id"]
 
-        # Step 2: Poll for DL verification result
-        dl_result = await poll_dl_verification(
-            request_id,
-            user_id,
-            username,
-            user_role
+        # Step 2: Hand the request to the async job poller
+        job = await async_job_manager.submit(
+            "dl", request_id, user_id, username, user_role, context={"dl_number": dl_number}
         )
+        if defer:
+            verification_results["dlVerification"] = pending_job_section(job, {"dlNumber": dl_number})
+            return
 
-        # Extract source output
-        source_output = dl_result[0].get("result", {}).get("source_output", {})
-
-        verification_results["dlVerification"] = {
-            "dlNumber": dl_number,
-            "name": source_output.get("name"),
-            "relativeName": source_output.get("relatives_name"),
-            "address": source_output.get("address"),
-            "issuingRto": source_output.get("issuing_rto_name"),
-            "dateOfIssue": source_output.get("date_of_issue"),
-            "validFrom": source_output.get("nt_validity_from"),
-            "validTo": source_output.get("nt_validity_to"),
-            "covDetails": source_output.get("cov_details", []),
-            "verificationStatus": "verified" if source_output.get("status") == "id_found" else "not_found",
-            "verifiedAt": datetime.now().isoformat(),
-            "requestId": request_id,
-        }
+        dl_result = await wait_for_job(job)
+        verification_results["dlVerification"] = format_dl_verification(dl_number, request_id, dl_result)
     except Exception as error:
         print(f"DL verification error: {error}")
         verification_results["dlVerification"] = {
@@ -542,6 +526,26 @@ async def process_dl_verification(
             "verifiedAt": datetime.now().isoformat(),
         }
 
+def format_dl_verification(dl_number: str, request_id: str, dl_result) -> dict:
+    """Build the dlVerification section from a completed DL job result"""
+    # Extract source output
+    source_output = dl_result[0].get("result", {}).get("source_output", {})
+
+    return {
+        "dlNumber": dl_number,
+        "name": source_output.get("name"),
+        "relativeName": source_output.get("relatives_name"),
+        "address": source_output.get("address"),
+        "issuingRto": source_output.get("issuing_rto_name"),
+        "dateOfIssue": source_output.get("date_of_issue"),
+        "validFrom": source_output.get("nt_validity_from"),
+        "validTo": source_output.get("nt_validity_to"),
+        "covDetails": source_output.get("cov_details", []),
+        "verificationStatus": "verified" if source_output.get("status") == "id_found" else "not_found",
+        "verifiedAt": datetime.now().isoformat(),
+        "requestId": request_id,
+    }
+
 async def process_rc_advanced_verification(
     rc_number: str,
     user_id: str,
@@ -948,9 +952,10 @@ async def process_voter_id_verification(
     user_id: str,
     username: str,
     user_role: str,
-    verification_results: dict
+    verification_results: dict,
+    defer: bool = False
 ):
-    """Process Voter ID verification"""
+    """Process Voter ID verification (as a job handle if defer is set)"""
     try:
         # Step 1: Initiate Voter ID verification
         voterid_init_result = await initiate_voter_id_verification(
@@ -961,40 +966,16 @@ async def process_voter_id_verification(
         )
         request_id = voterid_init_result["request_id"]
 
-        # Step 2: Poll for Voter ID verification result
-        voterid_result = await poll_voter_id_verification(
-            request_id,
-            user_id,
-            username,
-            user_role
+        # Step 2: Hand the request to the async job poller
+        job = await async_job_manager.submit(
+            "voter-id", request_id, user_id, username, user_role, context={"epic_number": epic_number}
         )
+        if defer:
+            verification_results["voterIdVerification"] = pending_job_section(job, {"epic_Number": epic_number})
+            return
 
-        # Extract source output
-        source_output = voterid_result[0].get("result", {}).get("source_output", {})
-
-        verification_results["voterIdVerification"] = {
-            "epic_Number": epic_number,
-            "ac_no": source_output.get("ac_no"),
-            "dob": source_output.get("date_of_birth"),
-            "district": source_output.get("district"),
-            "gender": source_output.get("gender"),
-            "house_no": source_output.get("house_no"),
-            "id_number": source_output.get("id_number"),
-            "last_update": source_output.get("last_update"),
-            "name_on_card": source_output.get("name_on_card"),
-            "part_no": source_output.get("part_no"),
-            "ps_lat_long": source_output.get("ps_lat_long"),
-            "ps_name": source_output.get("ps_name"),
-            "rln_name": source_output.get("rln_name"),
-            "section_no": source_output.get("section_no"),
-            "source": source_output.get("source"),
-            "st_code": source_output.get("st_code"),
-            "state": source_output.get("state"),
-            "status": source_output.get("status"),
-            "verificationStatus": "verified" if source_output.get("status") == "id_found" else "not_found",
-            "verifiedAt": datetime.now().isoformat(),
-            "requestId": request_id,
-        }
+        voterid_result = await wait_for_job(job)
+        verification_results["voterIdVerification"] = format_voter_id_verification(epic_number, request_id, voterid_result)
     except Exception as error:
         print(f"Voter ID verification error: {error}")
         verification_results["voterIdVerification"] = {
@@ -1003,6 +984,52 @@ async def process_voter_id_verification(
             "verifiedAt": datetime.now().isoformat(),
         }
 
+def format_voter_id_verification(epic_number: str, request_id: str, voterid_result) -> dict:
+    """Build the voterIdVerification section from a completed voter ID job result"""
+    # Extract source output
+    source_output = voterid_result[0].get("result", {}).get("source_output", {})
+
+    return {
+        "epic_Number": epic_number,
+        "ac_no": source_output.get("ac_no"),
+        "dob": source_output.get("date_of_birth"),
+        "district": source_output.get("district"),
+        "gender": source_output.get("gender"),
+        "house_no": source_output.get("house_no"),
+        "id_number": source_output.get("id_number"),
+        "last_update": source_output.get("last_update"),
+        "name_on_card": source_output.get("name_on_card"),
+        "part_no": source_output.get("part_no"),
+        "ps_lat_long": source_output.get("ps_lat_long"),
+        "ps_name": source_output.get("ps_name"),
+        "rln_name": source_output.get("rln_name"),
+        "section_no": source_output.get("section_no"),
+        "source": source_output.get("source"),
+        "st_code": source_output.get("st_code"),
+        "state": source_output.get("state"),
+        "status": source_output.get("status"),
+        "verificationStatus": "verified" if source_output.get("status") == "id_found" else "not_found",
+        "verifiedAt": datetime.now().isoformat(),
+        "requestId": request_id,
+    }
+
+def pending_job_section(job, identifiers: dict) -> dict:
+    """Section returned in place of a result when the client asked for job handles"""
+    return {
+        **identifiers,
+        "verificationStatus": "pending",
+        "jobId": job.job_id,
+        "requestId": job.request_id,
+        "statusUrl": f"/api/async-jobs/{job.job_id}",
+    }
+
+async def wait_for_job(job):
+    """Wait for an async job within the polling budget"""
+    try:
+        return await async_job_manager.wait(job.job_id, timeout=PRODUCTION_LIMITS["POLLING_TIMEOUT"] / 1000)
+    except asyncio.TimeoutError:
+        raise Exception(f"{job.kind} verification polling timed out (job {job.job_id} is still running)")
+
 async def process_passport_verification(
     file_number: str,
     dob: str,
@@ -1177,38 +1204,15 @@ async def _initiate_dl_verification(dl_number: str, dob: str):
     }
     return await post_with_timeout(url, headers)
 
-async def poll_dl_verification(
-    request_id: str,
-    user_id: str,
-    username: str,
-    user_role: str,
-    max_attempts: int = PRODUCTION_LIMITS["MAX_POLLING_ATTEMPTS"]
-):
-    """Poll Driving License verification result"""
-    return await track_external_api_call(
-        user_id, username, user_role, "verification/get-driving-license",
-        _poll_dl_verification, request_id, max_attempts
-    )
-
-async def _poll_dl_verification(request_id: str, max_attempts: int):
+async def _fetch_dl_verification_status(request_id: str):
+    """Poll the Driving License verification result once"""
     access_token = await auth_service.get_access_token()
     url = f"{BASE_URL}/verification/get-driving-license?request_id={request_id}"
     headers = {
         "Authorization": f"Bearer {access_token}",
         "x-api-key": CLIENT_SECRET,
     }
-
-    for attempt in range(max_attempts):
-        response = await fetch_with_timeout(url, headers)
-
-        # Check if verification is completed
-        if response and len(response) > 0 and response[0].get("status") == "completed":
-            return response
-
-        # Wait for 2 seconds before next attempt
-        await asyncio.sleep(2)
-
-    raise Exception("DL verification polling timed out")
+    return await fetch_with_timeout(url, headers)
 
 async def verify_rc_advanced(
     rc_number: str,
@@ -1288,7 +1292,7 @@ async def _verify_pan_to_uan(pan_number: str):
     data = {"pan_number": pan_number}
 
     try:
-        return await post_with_timeout(url, headers, data)
+        return await post_with_timeout(url, headers, data, coalesce=True)
     except Exception as e:
         if "404" in str(e):
             # Return a no-data response instead of throwing an error
@@ -1322,7 +1326,7 @@ async def _verify_aadhaar_to_uan(aadhaar_number: str):
     data = {"aadhaar_number": aadhaar_number}
 
     try:
-        return await post_with_timeout(url, headers, data)
+        return await post_with_timeout(url, headers, data, coalesce=True)
     except Exception as e:
         if "404" in str(e):
             # Return a no-data response instead of throwing an error
@@ -1469,7 +1473,7 @@ async def _verify_mobile_to_pan(mobile_number: str):
     data = {"mobile_number": mobile_number}
 
     try:
-        return await post_with_timeout(url, headers, data)
+        return await post_with_timeout(url, headers, data, coalesce=True)
     except Exception as e:
         if "404" in str(e):
             # Return a no-data response instead of throwing an error
@@ -1542,38 +1546,25 @@ async def _initiate_voter_id_verification(epic_number: str):
     }
     return await post_with_timeout(url, headers)
 
-async def poll_voter_id_verification(
-    request_id: str,
-    user_id: str,
-    username: str,
-    user_role: str,
-    max_attempts: int = PRODUCTION_LIMITS["MAX_POLLING_ATTEMPTS"]
-):
-    """Poll Voter ID verification result"""
-    return await track_external_api_call(
-        user_id, username, user_role, "verification/get-voter-id",
-        _poll_voter_id_verification, request_id, max_attempts
-    )
-
-async def _poll_voter_id_verification(request_id: str, max_attempts: int):
+async def _fetch_voter_id_verification_status(request_id: str):
+    """Poll the Voter ID verification result once"""
     access_token = await get_access_token()
     url = f"{BASE_URL}/verification/get-voter-id?request_id={request_id}"
     headers = {
         "Authorization": f"Bearer {access_token}",
         "x-api-key": CLIENT_SECRET,
     }
+    return await fetch_with_timeout(url, headers)
 
-    for attempt in range(max_attempts):
-        response = await fetch_with_timeout(url, headers)
-
-        # Check if verification is completed
-        if response and len(response) > 0 and response[0].get("status") == "completed":
-            return response
-
-        # Wait for 2 seconds before next attempt
-        await asyncio.sleep(2)
-
-    raise Exception("Voter ID verification polling timed out")
+# DL and voter ID results are collected by the shared async job poller
+async_job_manager.register_kind(
+    "dl", "verification/get-driving-license", _fetch_dl_verification_status,
+    format_result=lambda job: format_dl_verification(job.context.get("dl_number"), job.request_id, job.result)
+)
+async_job_manager.register_kind(
+    "voter-id", "verification/get-voter-id", _fetch_voter_id_verification_status,
+    format_result=lambda job: format_voter_id_verification(job.context.get("epic_number"), job.request_id, job.result)
+)
 
 async def verify_passport(
     file_number: str,
@@ -1,25 +1,79 @@
 import os
 import time
+import asyncio
 from dotenv import load_dotenv
-import requests
-from typing import Optional
-from datetime import datetime, timedelta
+import httpx
+from typing import Optional, Dict
+from datetime import datetime
+from urllib.parse import urlsplit
 
 load_dotenv()
+
+AUTHORIZE_URL = "https://production.deepvue.tech/v1/authorize"
+AUTHORIZE_TIMEOUT = 10000  # milliseconds
+# Refresh the token this many seconds before it expires
+TOKEN_REFRESH_MARGIN = int(os.getenv("TOKEN_REFRESH_MARGIN", "300"))
+# Delay before the background refresher retries after a failed refresh
+TOKEN_REFRESH_RETRY_DELAY = 30
+
 class AuthService:
     def __init__(self):
         self.access_token: Optional[str] = None
         self.token_expiry: Optional[float] = None
+        self.refresh_at: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._background_task: Optional[asyncio.Task] = None
 
     async def get_access_token(self) -> str:
         """
-        Get a valid access token, either from cache or by requesting a new one
+        Get a valid access token, either from cache or by requesting a new one.
+
+        A token close to expiry is still returned immediately while a refresh
+        runs in the background. Concurrent callers share a single refresh.
+        """
+        if self.is_token_valid():
+            if self._needs_refresh():
+                self._start_refresh()
+            return self.access_token
+
+        return await self.refresh_token()
+
+    async def refresh_token(self, stale_token: Optional[str] = None) -> str:
+        """
+        Obtain a new token, joining a refresh that is already in flight.
+
+        Args:
+            stale_token: Token the caller saw rejected. If another caller has
+                already replaced it, the current token is returned without
+                refreshing again.
+
+        Returns:
+            A fresh access token
         """
-        # Check if we have a valid token
-        if self.access_token and self.token_expiry and time.time() < self.token_expiry:
+        if stale_token is not None and self.access_token != stale_token and self.is_token_valid():
             return self.access_token
 
-        # Request new token
+        # Shield so a cancelled caller does not abort the refresh for the others
+        return await asyncio.shield(self._start_refresh())
+
+    def _start_refresh(self) -> asyncio.Task:
+        """Start a token refresh unless one is already running on this loop."""
+        loop = asyncio.get_running_loop()
+        task = self._refresh_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            task = loop.create_task(self._request_token())
+            task.add_done_callback(self._on_refresh_done)
+            self._refresh_task = task
+        return task
+
+    @staticmethod
+    def _on_refresh_done(task: asyncio.Task):
+        # Background refreshes have no awaiting caller; log their failures here
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Access token refresh failed: {task.exception()}")
+
+    async def _request_token(self) -> str:
+        """Request a new access token from the authorization endpoint."""
         try:
             # Get credentials from environment variables
             client_id = os.getenv("CLIENT_ID")
@@ -35,23 +89,23 @@ class AuthService:
             }
 
             # Make the request to get access token
-            response = requests.post(
-                "https://production.deepvue.tech/v1/authorize",
+            response = await upstream_request(
+                "POST",
+                AUTHORIZE_URL,
                 data=data,
                 headers={
                     "Content-Type": "application/x-www-form-urlencoded"
-                }
+                },
+                timeout=AUTHORIZE_TIMEOUT
             )
 
             response.raise_for_status()  # Raise an exception for bad status codes
 
             print("Authorization response received:", response.status_code)
-            print("Response content:", response.text)
-            
+
             # Extract token and expiry information
             response_data = response.json()
             access_token = response_data.get("access_token")
-            token_type = response_data.get("token_type", "Bearer")
             expiry = response_data.get("expiry")
 
             if not access_token:
@@ -61,19 +115,22 @@ class AuthService:
             # If expiry is provided in seconds from now, use it
             # Otherwise default to 24 hours from now
             if expiry and isinstance(expiry, (int, float)):
-                expiry_time = time.time() + expiry
+                lifetime = expiry
             else:
                 # Default to 24 hours if no clear expiry
-                expiry_time = time.time() + (24 * 60 * 60)
+                lifetime = 24 * 60 * 60
+            now = time.time()
+            expiry_time = now + lifetime
 
-            # Store token and expiry
+            # Store token and expiry; short-lived tokens refresh at half-life
             self.access_token = access_token
             self.token_expiry = expiry_time
+            self.refresh_at = expiry_time - min(TOKEN_REFRESH_MARGIN, lifetime / 2)
 
             print(f"Successfully obtained new access token, expires at: {datetime.fromtimestamp(expiry_time)}")
             return access_token
 
-        except requests.RequestException as error:
+        except httpx.HTTPError as error:
             print(f"HTTP request failed: {error}")
             raise Exception("Unable to obtain access token - HTTP request failed")
         except ValueError as error:
@@ -83,6 +140,55 @@ class AuthService:
             print(f"Unexpected error getting access token: {error}")
             raise Exception("Unable to obtain access token")
 
+    async def handle_unauthorized(self, headers: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+        """
+        Refresh the token after an upstream 401 and return headers for one retry.
+
+        Args:
+            headers: Headers of the rejected request
+
+        Returns:
+            Headers with a fresh bearer token, or None if the request did not
+            carry one (e.g. the authorize call itself)
+        """
+        authorization = (headers or {}).get("Authorization", "")
+        if not authorization.startswith("Bearer "):
+            return None
+
+        print("Upstream rejected access token, refreshing")
+        token = await self.refresh_token(stale_token=authorization[len("Bearer "):])
+        return {**headers, "Authorization": f"Bearer {token}"}
+
+    def _needs_refresh(self) -> bool:
+        """Check if the token is missing or inside its refresh window."""
+        return self.refresh_at is None or time.time() >= self.refresh_at
+
+    async def _refresh_loop(self):
+        """Keep the token fresh so requests never wait on a refresh."""
+        while True:
+            try:
+                if not self.is_token_valid() or self._needs_refresh():
+                    await self.refresh_token()
+                delay = max(self.refresh_at - time.time(), 1)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                print(f"Background token refresh failed: {error}")
+                delay = TOKEN_REFRESH_RETRY_DELAY
+            await asyncio.sleep(delay)
+
+    def start_background_refresh(self):
+        """Start the proactive refresh task (called on application startup)."""
+        if self._background_task is None or self._background_task.done():
+            self._background_task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def stop_background_refresh(self):
+        """Stop the proactive refresh task (called on application shutdown)."""
+        task, self._background_task = self._background_task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
     def is_token_valid(self) -> bool:
         """
         Check if the current token is still valid
@@ -99,7 +205,15 @@ class AuthService:
         """
         self.access_token = None
         self.token_expiry = None
+        self.refresh_at = None
 
 
 # Create a singleton instance
 auth_service = AuthService()
+
+# Imported after the singleton exists: importing the utils package pulls in
+# modules that import auth_service from here
+from utils.http_client import request as upstream_request, register_unauthorized_handler  # noqa: E402
+
+# Retry deepvue 401s once with a refreshed token
+register_unauthorized_handler(urlsplit(AUTHORIZE_URL).netloc, auth_service.handle_unauthorized)
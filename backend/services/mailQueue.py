@@ -0,0 +1,588 @@
+"""
+Durable outbound mail queue and its background sender.
+
+Email endpoints no longer talk to the SMTP server inside the request: the
+message (and its attachments) is stored in the mail_outbox table and the
+endpoint answers 202 with a message id that can be looked up later.
+
+A sender task in each process claims due messages from Postgres (SKIP
+LOCKED, so several processes can share the queue), up to MAIL_SEND_BATCH_SIZE
+at a time, and sends them over at most MAIL_SMTP_CONNECTIONS pooled SMTP
+connections. A connection is kept open between batches and reused for up to
+MAIL_SMTP_MAX_MESSAGES_PER_CONNECTION messages, instead of a new SSL session
+and login per email.
+
+A failed send is retried with exponential backoff up to MAIL_MAX_ATTEMPTS
+times; messages the server rejects permanently (5xx) fail at once. Messages
+left "sending" by a process that died are reclaimed after
+MAIL_SEND_LEASE_SECONDS; on a clean shutdown they are released at once.
+
+Attachments are never held whole in memory: they are stored in chunks, the
+MIME message is written chunk by chunk (base64-encoded) to a spool file
+that moves to disk past MAIL_SPOOL_MEMORY_BYTES, and the SMTP DATA is
+streamed from that file.
+"""
+
+import os
+import time
+import uuid
+import base64
+import random
+import asyncio
+import logging
+import tempfile
+from email.message import EmailMessage
+from email.generator import BytesGenerator
+from email.policy import SMTP
+from email.utils import formataddr, formatdate
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, List, Optional, Set, Tuple
+
+import aiosmtplib
+
+from services.mailService import MailConfig, EmailData
+from utils.dbCalls.mail_outbox_db import (
+    enqueue_mail,
+    claim_mail,
+    get_mail_attachments,
+    read_mail_attachment_chunk,
+    mark_mail_sent,
+    mark_mail_retry,
+    mark_mail_failed,
+    release_mail,
+)
+
+logger = logging.getLogger(__name__)
+
+# SMTP connections kept open by this process
+MAIL_SMTP_CONNECTIONS = int(os.getenv("MAIL_SMTP_CONNECTIONS", "2"))
+# Messages sent over one connection before it is replaced
+MAIL_SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("MAIL_SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+# Seconds an unused connection is kept open (servers drop idle sessions)
+MAIL_SMTP_IDLE_SECONDS = int(os.getenv("MAIL_SMTP_IDLE_SECONDS", "60"))
+# Timeout of one SMTP command (seconds)
+MAIL_SMTP_TIMEOUT = int(os.getenv("MAIL_SMTP_TIMEOUT", "30"))
+# Messages claimed per batch
+MAIL_SEND_BATCH_SIZE = int(os.getenv("MAIL_SEND_BATCH_SIZE", "20"))
+# How often an idle sender checks for due messages (milliseconds)
+MAIL_POLL_INTERVAL_MS = int(os.getenv("MAIL_POLL_INTERVAL_MS", "5000"))
+# Seconds after which a message being sent is considered abandoned
+MAIL_SEND_LEASE_SECONDS = int(os.getenv("MAIL_SEND_LEASE_SECONDS", "300"))
+# Send attempts before a message is failed
+MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", "5"))
+# Delay before the first retry; doubled for every further attempt (seconds)
+MAIL_RETRY_BASE_SECONDS = int(os.getenv("MAIL_RETRY_BASE_SECONDS", "30"))
+# Longest delay between two attempts (seconds)
+MAIL_RETRY_MAX_SECONDS = int(os.getenv("MAIL_RETRY_MAX_SECONDS", "3600"))
+# Bytes of a MIME message kept in memory before its spool file moves to disk
+MAIL_SPOOL_MEMORY_BYTES = int(os.getenv("MAIL_SPOOL_MEMORY_BYTES", str(1024 * 1024)))
+# Bytes written to the SMTP connection before waiting for it to drain
+MAIL_DATA_CHUNK_BYTES = 64 * 1024
+# Attachment bytes per base64 line (76 characters, the MIME maximum)
+BASE64_LINE_BYTES = 57
+
+# Errors that mean the connection is unusable, rather than the message
+CONNECTION_ERRORS = (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError, OSError, asyncio.TimeoutError)
+
+
+class MailQueueUnavailableError(Exception):
+    """Raised when a message is queued but mailing is not configured."""
+
+
+async def connect_smtp() -> aiosmtplib.SMTP:
+    """Open and authenticate a connection to the configured SMTP server."""
+    client = aiosmtplib.SMTP(
+        hostname=MailConfig.SMTP_SERVER,
+        port=MailConfig.SMTP_PORT,
+        use_tls=MailConfig.SMTP_USE_SSL,
+        start_tls=MailConfig.SMTP_USE_TLS,
+        timeout=MAIL_SMTP_TIMEOUT,
+    )
+    await client.connect()
+    if MailConfig.SMTP_USERNAME and MailConfig.SMTP_PASSWORD:
+        await client.login(MailConfig.SMTP_USERNAME, MailConfig.SMTP_PASSWORD)
+    return client
+
+
+class PooledSMTPConnection:
+    """An open SMTP session and how much it has been used."""
+
+    def __init__(self, client: Any):
+        self.client = client
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """Keeps up to `size` authenticated SMTP sessions open for reuse."""
+
+    def __init__(
+        self,
+        size: int = MAIL_SMTP_CONNECTIONS,
+        max_messages: int = MAIL_SMTP_MAX_MESSAGES_PER_CONNECTION,
+        idle_seconds: int = MAIL_SMTP_IDLE_SECONDS,
+        connect: Callable[[], Awaitable[Any]] = connect_smtp
+    ):
+        self.size = size
+        self.max_messages = max_messages
+        self.idle_seconds = idle_seconds
+        self.connect = connect
+        self._idle: List[PooledSMTPConnection] = []
+        self._slots = asyncio.Semaphore(size)
+        self.stats: Dict[str, int] = {
+            "connects": 0,
+            "reuses": 0,
+            "closed": 0,
+        }
+
+    async def acquire(self) -> PooledSMTPConnection:
+        """Get an open connection, reusing an idle one when it is still fresh."""
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                connection = self._idle.pop()
+                if time.monotonic() - connection.last_used < self.idle_seconds and connection.client.is_connected:
+                    self.stats["reuses"] += 1
+                    return connection
+                await self._close(connection)
+            connection = PooledSMTPConnection(await self.connect())
+            self.stats["connects"] += 1
+            return connection
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, connection: PooledSMTPConnection, broken: bool = False):
+        """Return a connection; broken or worn-out ones are closed."""
+        try:
+            connection.last_used = time.monotonic()
+            if broken or connection.messages_sent >= self.max_messages or not connection.client.is_connected:
+                await self._close(connection)
+            else:
+                self._idle.append(connection)
+        finally:
+            self._slots.release()
+
+    async def _close(self, connection: PooledSMTPConnection):
+        self.stats["closed"] += 1
+        try:
+            if connection.client.is_connected:
+                await connection.client.quit()
+        except Exception:
+            connection.client.close()
+
+    async def close(self):
+        """Close every idle connection."""
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await self._close(connection)
+
+
+def build_body(message: Dict[str, Any]) -> EmailMessage:
+    """
+    Build a queued email without its attachments.
+
+    Args:
+        message: Claimed mail_outbox row
+
+    Returns:
+        Plain-text message with an HTML alternative
+    """
+    email = EmailMessage(policy=SMTP)
+    email["Subject"] = message["subject"]
+    email["From"] = formataddr((MailConfig.FROM_NAME, MailConfig.FROM_EMAIL or ""))
+    email["To"] = ", ".join(message["recipients"])
+    email["Date"] = formatdate(localtime=True)
+    # The queue id in the Message-ID ties a delivered email back to its row
+    domain = (MailConfig.FROM_EMAIL or "localhost").rsplit("@", 1)[-1]
+    email["Message-ID"] = f"<{message['message_id']}@{domain}>"
+    email.set_content(message["body"])
+    if message.get("html_body"):
+        email.add_alternative(message["html_body"], subtype="html")
+    return email
+
+
+async def spool_message(message: Dict[str, Any], attachments: List[Dict[str, Any]], spool: BinaryIO):
+    """
+    Write the MIME message of a queued email to a file, streaming the attachments.
+
+    The headers and bodies come from the email library; each attachment is
+    read back one stored chunk at a time and base64-encoded straight into
+    the file, so memory use does not depend on attachment size.
+
+    Args:
+        message: Claimed mail_outbox row
+        attachments: Its attachments from get_mail_attachments
+        spool: Binary file the message is written to, with CRLF line endings
+    """
+    email = build_body(message)
+    generator = BytesGenerator(spool, policy=SMTP)
+    if not attachments:
+        generator.flatten(email)
+        return
+
+    email.make_mixed()
+    body = email.get_payload()[0]
+    boundary = f"==============={uuid.uuid4().hex}==".encode()
+    email.set_boundary(boundary.decode())
+    for name, value in email.items():
+        spool.write(SMTP.fold_binary(name, value))
+    spool.write(b"\r\n--" + boundary + b"\r\n")
+    generator.flatten(body)
+
+    for attachment in attachments:
+        part = EmailMessage(policy=SMTP)
+        part["Content-Type"] = attachment["content_type"]
+        part["Content-Transfer-Encoding"] = "base64"
+        part.add_header("Content-Disposition", "attachment", filename=attachment["filename"])
+        spool.write(b"\r\n--" + boundary + b"\r\n")
+        for name, value in part.items():
+            spool.write(SMTP.fold_binary(name, value))
+        spool.write(b"\r\n")
+
+        # Encode whole lines only; carry the remainder over to the next chunk
+        pending = b""
+        chunk_index = 0
+        while True:
+            chunk = await read_mail_attachment_chunk(message["message_id"], attachment["position"], chunk_index)
+            if chunk is None:
+                break
+            chunk_index += 1
+            pending += bytes(chunk)
+            whole = len(pending) - len(pending) % BASE64_LINE_BYTES
+            if whole:
+                spool.write(base64.encodebytes(pending[:whole]).replace(b"\n", b"\r\n"))
+                pending = pending[whole:]
+        if pending:
+            spool.write(base64.encodebytes(pending).replace(b"\n", b"\r\n"))
+
+    spool.write(b"\r\n--" + boundary + b"--\r\n")
+
+
+async def _write_data(client: Any, data: bytes, last: bool = False) -> Optional[aiosmtplib.SMTPResponse]:
+    """
+    Write part of a message's DATA stage on an SMTP connection.
+
+    aiosmtplib has no public API for streaming DATA, so this goes through
+    its SMTPProtocol (write, _drain_helper and read_response) as found in
+    aiosmtplib 3.0.2, the version pinned in requirements.txt. Nothing else
+    touches the protocol; re-check this function when upgrading aiosmtplib.
+
+    Args:
+        client: Connected aiosmtplib.SMTP client, after a 354 reply to DATA
+        data: Dot-stuffed message bytes
+        last: True if data ends with the terminating "." line
+
+    Returns:
+        The server's reply to the message if last, else None once the
+        transport has drained
+    """
+    protocol = client.protocol
+    if protocol is None:
+        raise aiosmtplib.SMTPServerDisconnected("Connection lost")
+    protocol.write(data)
+    if last:
+        return await protocol.read_response(timeout=client.timeout)
+    await protocol._drain_helper()
+    return None
+
+
+async def send_spooled(client: Any, sender: str, recipients: List[str], spool: BinaryIO):
+    """
+    Send a spooled MIME message over an open SMTP connection.
+
+    aiosmtplib only sends a message passed as one bytes object, so the DATA
+    stage is written with _write_data instead: one chunk at a time, dot-
+    stuffed per RFC 5321, waiting for the transport to drain in between.
+
+    Args:
+        client: Connected aiosmtplib.SMTP client
+        sender: Envelope sender
+        recipients: Envelope recipients
+        spool: File holding the message from spool_message, at its start
+
+    Raises:
+        aiosmtplib.SMTPException: If the server refuses the message or the connection fails
+    """
+    try:
+        await client.mail(sender)
+        refused = []
+        for recipient in recipients:
+            try:
+                await client.rcpt(recipient)
+            except aiosmtplib.SMTPRecipientRefused as e:
+                refused.append(e)
+        if len(refused) == len(recipients):
+            raise aiosmtplib.SMTPRecipientsRefused(refused)
+        response = await client.execute_command(b"DATA")
+        if response.code != 354:
+            raise aiosmtplib.SMTPDataError(response.code, response.message)
+    except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused):
+        # Leave the connection ready for the next message
+        await client.rset()
+        raise
+
+    buffer = []
+    buffered = 0
+    line = b"\r\n"
+    for line in spool:
+        buffer.append(b"." + line if line.startswith(b".") else line)
+        buffered += len(line)
+        if buffered >= MAIL_DATA_CHUNK_BYTES:
+            await _write_data(client, b"".join(buffer))
+            buffer, buffered = [], 0
+    if not line.endswith(b"\r\n"):
+        buffer.append(b"\r\n")
+    buffer.append(b".\r\n")
+    response = await _write_data(client, b"".join(buffer), last=True)
+    if response.code != 250:
+        raise aiosmtplib.SMTPDataError(response.code, response.message)
+
+
+def is_permanent_failure(error: Exception) -> bool:
+    """True if the server rejected the message itself, so retrying cannot help."""
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(error, aiosmtplib.SMTPAuthenticationError):
+        return False  # a configuration problem; the message is fine
+    return isinstance(error, aiosmtplib.SMTPResponseException) and 500 <= error.code < 600
+
+
+class MailQueue:
+    """Stores outbound mail in Postgres and sends it in the background over pooled connections."""
+
+    def __init__(
+        self,
+        batch_size: int = MAIL_SEND_BATCH_SIZE,
+        poll_interval_ms: int = MAIL_POLL_INTERVAL_MS,
+        lease_seconds: int = MAIL_SEND_LEASE_SECONDS,
+        max_attempts: int = MAIL_MAX_ATTEMPTS,
+        retry_base_seconds: int = MAIL_RETRY_BASE_SECONDS,
+        retry_max_seconds: int = MAIL_RETRY_MAX_SECONDS,
+        smtp_pool: Optional[SMTPConnectionPool] = None,
+        enabled: Optional[bool] = None
+    ):
+        self.batch_size = batch_size
+        self.poll_interval_ms = poll_interval_ms
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.smtp_pool = smtp_pool or SMTPConnectionPool()
+        # None: on when mailing is enabled and SMTP credentials are configured
+        self._enabled = enabled
+        self._claimed: Set[str] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._sender: Optional[asyncio.Task] = None
+        self.stats: Dict[str, int] = {
+            "queued": 0,
+            "sent": 0,
+            "retried": 0,
+            "failed": 0,
+            "released": 0,
+            "batches": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        if self._enabled is not None:
+            return self._enabled
+        return MailConfig.ENABLE_MAILING and bool(MailConfig.SMTP_USERNAME and MailConfig.SMTP_PASSWORD)
+
+    async def enqueue(
+        self,
+        email_data: EmailData,
+        kind: str,
+        user_id: Optional[str] = None,
+        attachments: Optional[List[Tuple[str, str, BinaryIO]]] = None
+    ) -> str:
+        """
+        Store a message for delivery.
+
+        Args:
+            email_data: Subject, recipients and bodies
+            kind: What the message is (e.g. "profile-report")
+            user_id: ID of the requesting user (for status lookups)
+            attachments: (filename, content_type, file) tuples; the files are copied in chunks
+
+        Returns:
+            Message id
+
+        Raises:
+            MailQueueUnavailableError: If mailing is not configured
+        """
+        if not self.enabled:
+            raise MailQueueUnavailableError("Mail service is not configured")
+
+        message_id = str(uuid.uuid4())
+        await enqueue_mail(
+            message_id,
+            kind,
+            user_id,
+            email_data.subject,
+            [str(recipient) for recipient in email_data.recipients],
+            email_data.body,
+            email_data.html_body,
+            attachments,
+        )
+        self.stats["queued"] += 1
+        self.notify()
+        logger.info(f"Queued {kind} email {message_id} for {len(email_data.recipients)} recipients")
+        return message_id
+
+    def start(self):
+        """Start the sender on the running loop if it is not already running."""
+        if not self.enabled:
+            logger.warning("Mail queue sender not started: mailing is disabled or SMTP credentials are missing")
+            return
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._sender = None
+        if self._sender is None or self._sender.done():
+            self._sender = loop.create_task(self._run(), name="mail-sender")
+
+    def notify(self):
+        """Wake the sender after a message was stored."""
+        self.start()
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def stop(self):
+        """Stop sending, return claimed messages to the queue and close the SMTP connections."""
+        sender, self._sender = self._sender, None
+        if sender is not None and not sender.done():
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+        claimed = list(self._claimed)
+        self._claimed.clear()
+        try:
+            await release_mail(claimed)
+            self.stats["released"] += len(claimed)
+        except Exception as e:
+            logger.error(f"Error releasing {len(claimed)} queued emails: {e}")
+        await self.smtp_pool.close()
+
+    async def _run(self):
+        """Sender loop: send due messages in batches, then wait for more."""
+        while True:
+            claimed = []
+            try:
+                claimed = await claim_mail(self.batch_size, self.lease_seconds)
+            except Exception as e:
+                logger.error(f"Error claiming queued emails: {e}")
+
+            if claimed:
+                await self.send_batch(claimed)
+                if len(claimed) == self.batch_size:
+                    continue  # more are probably due
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval_ms / 1000)
+            except asyncio.TimeoutError:
+                pass
+
+    async def send_batch(self, messages: List[Dict[str, Any]]):
+        """Send claimed messages, spread over the pooled connections."""
+        self.stats["batches"] += 1
+        self._claimed.update(message["message_id"] for message in messages)
+        groups = [messages[index::self.smtp_pool.size] for index in range(min(self.smtp_pool.size, len(messages)))]
+        results = await asyncio.gather(*[self._send_group(group) for group in groups])
+
+        sent = [message_id for group_sent in results for message_id in group_sent]
+        try:
+            await mark_mail_sent(sent)
+        except Exception as e:
+            # The lease expires and these are sent again; better twice than never
+            logger.error(f"Error recording {len(sent)} sent emails: {e}")
+        self.stats["sent"] += len(sent)
+        self._claimed.difference_update(sent)
+
+    async def _send_group(self, messages: List[Dict[str, Any]]) -> List[str]:
+        """Send messages one after another over one connection; returns the ids sent."""
+        sent = []
+        connection = None
+        broken = False
+        try:
+            for position, message in enumerate(messages):
+                message_id = message["message_id"]
+                try:
+                    if connection is None:
+                        connection = await self.smtp_pool.acquire()
+                    attachments = await get_mail_attachments(message_id)
+                    with tempfile.SpooledTemporaryFile(max_size=MAIL_SPOOL_MEMORY_BYTES) as spool:
+                        await spool_message(message, attachments, spool)
+                        spool.seek(0)
+                        await send_spooled(
+                            connection.client, MailConfig.FROM_EMAIL or "", message["recipients"], spool
+                        )
+                    connection.messages_sent += 1
+                    sent.append(message_id)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    await self._record_failure(message, e)
+                    if isinstance(e, CONNECTION_ERRORS):
+                        # Leave the rest for the next batch without counting an attempt
+                        broken = True
+                        rest = [later["message_id"] for later in messages[position + 1:]]
+                        await self._release(rest)
+                        break
+        finally:
+            if connection is not None:
+                await self.smtp_pool.release(connection, broken=broken)
+        return sent
+
+    async def _record_failure(self, message: Dict[str, Any], error: Exception):
+        message_id = message["message_id"]
+        description = f"{type(error).__name__}: {error}"
+        self._claimed.discard(message_id)
+        try:
+            if is_permanent_failure(error) or message["attempts"] >= self.max_attempts:
+                self.stats["failed"] += 1
+                logger.error(f"Giving up on email {message_id} after {message['attempts']} attempts: {description}")
+                await mark_mail_failed(message_id, description)
+            else:
+                delay = self.retry_delay(message["attempts"])
+                self.stats["retried"] += 1
+                logger.warning(f"Email {message_id} attempt {message['attempts']} failed, retrying in {delay:.0f}s: {description}")
+                await mark_mail_retry(message_id, description, delay)
+        except Exception as e:
+            # The lease expires and the message is retried
+            logger.error(f"Error recording failure of email {message_id}: {e}")
+
+    async def _release(self, message_ids: List[str]):
+        if not message_ids:
+            return
+        self._claimed.difference_update(message_ids)
+        try:
+            await release_mail(message_ids)
+            self.stats["released"] += len(message_ids)
+        except Exception as e:
+            logger.error(f"Error releasing {len(message_ids)} queued emails: {e}")
+
+    def retry_delay(self, attempts: int) -> float:
+        """Exponential backoff with jitter, so retries of many messages spread out."""
+        delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** max(attempts - 1, 0))
+        return delay * random.uniform(0.8, 1.2)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get sender counters.
+
+        Returns:
+            Dictionary of queued/sent/retried/failed/released counts, messages
+            being sent and the SMTP connection counters
+        """
+        return {
+            **self.stats,
+            "sending": len(self._claimed),
+            "enabled": self.enabled,
+            "smtp": {**self.smtp_pool.stats, "idle": len(self.smtp_pool._idle), "size": self.smtp_pool.size},
+        }
+
+
+# Shared by every email endpoint in this process
+mail_queue = MailQueue()
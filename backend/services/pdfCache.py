@@ -0,0 +1,294 @@
+"""
+Content-addressed cache of rendered PDF reports.
+
+The frontend asks for the same report several times in a row (preview,
+download, email attachment), so rendered PDFs are cached under a hash of
+the template name, its version and the normalized request data. The same
+inputs always map to the same key, which doubles as a weak ETag (the key
+names the report's inputs, not its exact bytes, which vary between renders
+e.g. by generation time): a client holding a report can revalidate it
+without the PDF being rendered or even looked up.
+
+PDFs are kept in an in-process LRU bounded by total bytes and, when
+PDF_CACHE_DIR is set, in an on-disk tier shared by all workers on the host.
+Concurrent requests for the same report share one render.
+"""
+
+import io
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, BinaryIO, Dict, Optional, Tuple
+
+# Bytes of PDF kept in the in-process LRU
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Seconds a rendered report is reused (reports carry their generation date)
+PDF_CACHE_TTL = int(os.getenv("PDF_CACHE_TTL", str(24 * 60 * 60)))
+# Directory of the on-disk tier (disabled when empty)
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "")
+# Bytes of PDF kept on disk; the oldest files are removed first
+PDF_CACHE_DISK_MAX_BYTES = int(os.getenv("PDF_CACHE_DISK_MAX_BYTES", str(1024 * 1024 * 1024)))
+# Seconds between scans that trim the on-disk tier
+PDF_CACHE_DISK_PRUNE_INTERVAL = 60
+
+KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+def _normalize(value: Any) -> Any:
+    """Drop None fields so an omitted field and an explicit null hash the same."""
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items() if item is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+
+class PDFCache:
+    """Byte-bounded LRU of rendered PDFs with an optional on-disk tier."""
+
+    def __init__(
+        self,
+        max_bytes: int = PDF_CACHE_MAX_BYTES,
+        ttl: int = PDF_CACHE_TTL,
+        cache_dir: str = PDF_CACHE_DIR,
+        disk_max_bytes: int = PDF_CACHE_DISK_MAX_BYTES
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self.disk_max_bytes = disk_max_bytes
+        # key -> (created_at, pdf_bytes)
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._rendering: Dict[str, asyncio.Task] = {}
+        self._last_disk_prune = 0.0
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "diskHits": 0,
+            "misses": 0,
+            "joined": 0,
+            "evictions": 0,
+        }
+
+    @staticmethod
+    def make_key(template: str, version: str, data: Any) -> str:
+        """
+        Build the content address of a report.
+
+        Args:
+            template: Report template name
+            version: Template version; bump it whenever the template output changes
+            data: Request data the report is rendered from
+
+        Returns:
+            Hex digest key
+        """
+        payload = json.dumps(
+            [template, version, _normalize(data)],
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def etag(key: str) -> str:
+        return f'W/"{key}"'
+
+    def is_not_modified(self, key: str, if_none_match: Optional[str]) -> bool:
+        """True if the client already holds the report for this key (weak comparison)."""
+        return bool(if_none_match) and (f'"{key}"' in if_none_match or if_none_match.strip() == "*")
+
+    async def get_or_render(self, key: str, render: Callable[[], Awaitable[bytes]]) -> Tuple[bytes, str]:
+        """
+        Get a cached PDF or render and cache it.
+
+        Args:
+            key: Key from make_key
+            render: Async function producing the PDF on a miss
+
+        Returns:
+            Tuple of (PDF bytes, cache status: "HIT" or "MISS")
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            if time.time() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1], "HIT"
+            self._remove(key)
+
+        task = self._rendering.get(key)
+        if task is not None:
+            self.stats["joined"] += 1
+        else:
+            task = asyncio.get_running_loop().create_task(self._load(key, render))
+            self._rendering[key] = task
+            task.add_done_callback(lambda done: self._forget_render(key, done))
+        # Shield so a client that disconnects does not cancel the render for
+        # the others waiting on it
+        return await asyncio.shield(task)
+
+    def open(self, reference: str) -> Optional[BinaryIO]:
+        """
+        Open a cached report for reading, e.g. to attach it to an email.
+
+        A report in the LRU is read from the cached bytes without a copy; one
+        that is only on disk is read from its file.
+
+        Args:
+            reference: Cache key or the ETag sent with the report
+
+        Returns:
+            Binary file positioned at the start, or None if the report is not cached
+        """
+        key = reference.strip().removeprefix("W/").strip('"')
+        if not KEY_PATTERN.fullmatch(key):
+            return None
+
+        entry = self._entries.get(key)
+        if entry is not None and time.time() - entry[0] < self.ttl:
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return io.BytesIO(entry[1])
+
+        if self.cache_dir:
+            path = self._path(key)
+            try:
+                if time.time() - os.path.getmtime(path) < self.ttl:
+                    stream = open(path, "rb")
+                    self.stats["diskHits"] += 1
+                    return stream
+            except OSError:
+                pass
+        return None
+
+    def _forget_render(self, key: str, task: asyncio.Task):
+        if self._rendering.get(key) is task:
+            del self._rendering[key]
+        # Every caller may have disconnected; don't warn about an exception
+        # nobody was left to see
+        if not task.cancelled():
+            task.exception()
+
+    async def _load(self, key: str, render: Callable[[], Awaitable[bytes]]) -> Tuple[bytes, str]:
+        """Read the report from disk, or render it and store it in both tiers."""
+        if self.cache_dir:
+            found = await asyncio.to_thread(self._read_disk, key)
+            if found is not None:
+                self.stats["diskHits"] += 1
+                self._put(key, *found)
+                return found[1], "HIT"
+
+        self.stats["misses"] += 1
+        pdf_bytes = await render()
+        created_at = time.time()
+        self._put(key, created_at, pdf_bytes)
+        if self.cache_dir:
+            try:
+                await asyncio.to_thread(self._write_disk, key, pdf_bytes)
+            except OSError as e:
+                print(f"Error writing PDF cache file: {e}")
+        return pdf_bytes, "MISS"
+
+    def _put(self, key: str, created_at: float, pdf_bytes: bytes):
+        """Insert into the LRU, evicting the least recently used reports."""
+        if len(pdf_bytes) > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (created_at, pdf_bytes)
+        self._bytes += len(pdf_bytes)
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pdf")
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, bytes]]:
+        path = self._path(key)
+        try:
+            created_at = os.path.getmtime(path)
+            if time.time() - created_at >= self.ttl:
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                return created_at, f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"Error reading PDF cache file: {e}")
+            return None
+
+    def _write_disk(self, key: str, pdf_bytes: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so other workers never read a partial file
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(pdf_bytes)
+        os.replace(temp_path, path)
+
+        if time.time() - self._last_disk_prune >= PDF_CACHE_DISK_PRUNE_INTERVAL:
+            self._last_disk_prune = time.time()
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """Delete expired files, then the oldest ones until the tier fits its budget."""
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if not name.endswith(".pdf"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        now = time.time()
+        for mtime, size, path in files:
+            if total <= self.disk_max_bytes and now - mtime < self.ttl:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        """Drop every in-process entry."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary of hit/miss/eviction counts, the number of cached
+            reports and their total size
+        """
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "maxBytes": self.max_bytes,
+            "diskEnabled": bool(self.cache_dir),
+        }
+
+
+# Shared by the PDF endpoints in this process
+pdf_cache = PDFCache()
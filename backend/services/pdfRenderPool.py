@@ -0,0 +1,226 @@
+"""
+Process pool that renders PDFs with WeasyPrint off the event loop.
+
+A WeasyPrint render is CPU-bound and takes up to several seconds, so it
+runs in worker processes rather than on the event loop. Each worker loads
+WeasyPrint, the font configuration and the base stylesheet once when it
+starts (and renders a tiny document to warm the font caches), then reuses
+them for every job.
+
+At most PDF_RENDER_WORKERS renders run at once and PDF_RENDER_QUEUE_SIZE
+more may wait; further requests are rejected immediately with
+PDFRenderBusyError instead of piling up. A render that exceeds
+PDF_RENDER_TIMEOUT_MS fails with asyncio.TimeoutError and its worker
+processes are replaced, since a running render cannot be interrupted.
+"""
+
+import os
+import time
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+# Worker processes (renders at once)
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Renders allowed to wait for a free worker before new ones are rejected
+PDF_RENDER_QUEUE_SIZE = int(os.getenv("PDF_RENDER_QUEUE_SIZE", "16"))
+# Longest one render may take (milliseconds)
+PDF_RENDER_TIMEOUT_MS = int(os.getenv("PDF_RENDER_TIMEOUT_MS", "60000"))
+# Renders after which a worker process is replaced (bounds memory growth)
+PDF_RENDER_MAX_TASKS_PER_WORKER = int(os.getenv("PDF_RENDER_MAX_TASKS_PER_WORKER", "200"))
+# "spawn" keeps the workers free of the parent's threads and sockets
+PDF_RENDER_START_METHOD = os.getenv("PDF_RENDER_START_METHOD", "spawn")
+
+# Stylesheet applied to every document
+BASE_STYLESHEET = """
+    @page {
+        size: A4;
+        margin: 0.5in;
+    }
+    body {
+        font-family: Arial, sans-serif;
+    }
+"""
+
+# Loaded once per worker process by _init_worker
+_font_config = None
+_base_css = None
+
+
+class PDFRenderBusyError(Exception):
+    """Raised when the render queue is full."""
+
+
+def _init_worker():
+    """Load WeasyPrint, fonts and the base stylesheet in a new worker process."""
+    global _font_config, _base_css
+    from weasyprint import HTML, CSS
+    from weasyprint.text.fonts import FontConfiguration
+
+    _font_config = FontConfiguration()
+    _base_css = CSS(string=BASE_STYLESHEET, font_config=_font_config)
+    # Warm fontconfig/pango caches so the first real render is not slower
+    HTML(string="<p>warm-up</p>").write_pdf(stylesheets=[_base_css], font_config=_font_config)
+
+
+def render_pdf(html_content: str) -> bytes:
+    """Render HTML to PDF bytes in a worker process."""
+    from weasyprint import HTML
+
+    return HTML(string=html_content).write_pdf(stylesheets=[_base_css], font_config=_font_config)
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+class PDFRenderPool:
+    """Bounded, admission-controlled process pool for PDF renders."""
+
+    def __init__(
+        self,
+        workers: int = PDF_RENDER_WORKERS,
+        queue_size: int = PDF_RENDER_QUEUE_SIZE,
+        timeout_ms: int = PDF_RENDER_TIMEOUT_MS,
+        max_tasks_per_worker: int = PDF_RENDER_MAX_TASKS_PER_WORKER,
+        initializer: Optional[Callable[[], None]] = _init_worker,
+        render: Callable[[str], bytes] = render_pdf
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout_ms = timeout_ms
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.initializer = initializer
+        self.render = render
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._warm_executor: Optional[ProcessPoolExecutor] = None
+        # Renders are handed to the executor only when a worker is free, so
+        # the timeout covers rendering rather than waiting in line
+        self._slots = asyncio.Semaphore(workers)
+        self._starting = asyncio.Lock()
+        self._in_flight = 0
+        self.stats: Dict[str, int] = {
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "timeouts": 0,
+            "restarts": 0,
+            "renderMs": 0,
+        }
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(PDF_RENDER_START_METHOD),
+                initializer=self.initializer,
+                max_tasks_per_child=self.max_tasks_per_worker or None,
+            )
+        return self._executor
+
+    async def start(self):
+        """Start the worker processes so they are warm before the first request."""
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.gather(*[loop.run_in_executor(executor, _ping) for _ in range(self.workers)])
+        except Exception as e:
+            # Renders will report the error; the API itself keeps running
+            print(f"PDF render workers failed to start: {e}")
+        self._warm_executor = executor
+
+    async def _ensure_started(self):
+        """Start fresh workers (first use, after a restart) outside any render's timeout."""
+        async with self._starting:
+            if self._executor is None or self._warm_executor is not self._executor:
+                await self.start()
+
+    def stop(self):
+        """Stop the worker processes, abandoning queued renders."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _restart(self, executor: ProcessPoolExecutor):
+        """Kill the workers of an executor (e.g. one stuck in a render) and start fresh."""
+        if self._executor is not executor:
+            return  # already replaced
+        self._executor = None
+        self.stats["restarts"] += 1
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def render_pdf(self, html_content: str) -> bytes:
+        """
+        Render HTML to PDF in a worker process.
+
+        Args:
+            html_content: Complete HTML document
+
+        Returns:
+            PDF bytes
+
+        Raises:
+            PDFRenderBusyError: If all workers are busy and the queue is full
+            asyncio.TimeoutError: If the render takes longer than timeout_ms
+        """
+        if self._in_flight >= self.workers + self.queue_size:
+            self.stats["rejected"] += 1
+            raise PDFRenderBusyError(
+                f"PDF renderer is busy ({self._in_flight} renders in progress or queued)"
+            )
+
+        self._in_flight += 1
+        try:
+            async with self._slots:
+                # A render whose pool was broken by another job's restart is
+                # retried once on the new pool
+                for attempt in range(2):
+                    await self._ensure_started()
+                    executor = self._get_executor()
+                    start = time.perf_counter()
+                    future = asyncio.get_running_loop().run_in_executor(executor, self.render, html_content)
+                    try:
+                        pdf_bytes = await asyncio.wait_for(future, timeout=self.timeout_ms / 1000)
+                        break
+                    except asyncio.TimeoutError:
+                        self.stats["timeouts"] += 1
+                        print(f"PDF render timed out after {self.timeout_ms}ms; restarting render workers")
+                        self._restart(executor)
+                        raise
+                    except BrokenProcessPool:
+                        self._restart(executor)
+                        if attempt:
+                            raise
+        except BaseException:
+            self.stats["failed"] += 1
+            raise
+        finally:
+            self._in_flight -= 1
+
+        self.stats["completed"] += 1
+        self.stats["renderMs"] += int((time.perf_counter() - start) * 1000)
+        return pdf_bytes
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool counters.
+
+        Returns:
+            Dictionary of completed/failed/rejected/timeout/restart counts,
+            renders in progress or queued and the average render time
+        """
+        return {
+            **self.stats,
+            "inFlight": self._in_flight,
+            "workers": self.workers,
+            "queueSize": self.queue_size,
+            "avgRenderMs": round(self.stats["renderMs"] / self.stats["completed"]) if self.stats["completed"] else None,
+        }
+
+
+# Shared by every PDF endpoint in this process
+pdf_render_pool = PDFRenderPool()
@@ -1,35 +1,31 @@
+import asyncio
 from fastapi import HTTPException
-from weasyprint import HTML, CSS
-from weasyprint.text.fonts import FontConfiguration
+from services.pdfRenderPool import pdf_render_pool, PDFRenderBusyError
+
+# Seconds clients are asked to wait before retrying when the renderer is busy
+PDF_BUSY_RETRY_AFTER = 5
 
 
 class PDFGenerationService:
     @staticmethod
     async def generate_pdf(html_content: str, filename: str) -> bytes:
-        """Generate PDF from HTML content using weasyprint"""
+        """Generate PDF from HTML content using weasyprint (rendered in the PDF worker pool)"""
         try:
-            # Create font configuration
-            font_config = FontConfiguration()
-
-            # Create HTML object
-            html_doc = HTML(string=html_content)
-
-            # Generate PDF with custom CSS for better rendering
-            css = CSS(string="""
-                @page {
-                    size: A4;
-                    margin: 0.5in;
-                }
-                body {
-                    font-family: Arial, sans-serif;
-                }
-            """)
-
-            # Generate PDF
-            pdf_bytes = html_doc.write_pdf(stylesheets=[css], font_config=font_config)
-
-            return pdf_bytes
+            return await pdf_render_pool.render_pdf(html_content)
 
+        except PDFRenderBusyError as error:
+            print(f"PDF Generation rejected for {filename}: {error}")
+            raise HTTPException(
+                status_code=503,
+                detail="PDF generation is busy, please retry shortly",
+                headers={"Retry-After": str(PDF_BUSY_RETRY_AFTER)}
+            )
+        except asyncio.TimeoutError:
+            print(f"PDF Generation timed out for {filename}")
+            raise HTTPException(
+                status_code=504,
+                detail="PDF generation timed out"
+            )
         except ImportError:
             raise HTTPException(
                 status_code=500,
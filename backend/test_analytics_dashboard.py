@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Benchmark the analytics dashboard query paths on a seeded table.
+
+Seeds ANALYTICS_BENCH_ROWS rows (default 1M) into an api_analytics table in
+a scratch schema, then times the dashboard four ways:
+
+- sequential: the six per-facet aggregate queries awaited one after another
+  (the old /analytics path)
+- concurrent: the same six queries on separate pool connections
+- raw scan: get_analytics_dashboard forced onto raw api_analytics rows
+- single-scan: get_analytics_dashboard (one GROUPING SETS query over the
+  hourly/daily rollups plus raw rows for partial hours)
+
+and checks that the rollup-backed facets match the raw-table ones.
+
+Opt-in: the benchmark is skipped unless ANALYTICS_BENCH_DATABASE_URL names a
+PostgreSQL database to seed, so a plain pytest run never writes to the
+database the app is configured with. The seeded schema is kept between runs
+so the insert only happens once; drop it with
+    DROP SCHEMA analytics_bench CASCADE
+"""
+
+import os
+import time
+import asyncio
+import statistics
+from datetime import datetime, timedelta
+
+import asyncpg
+import pytest
+
+BENCH_SCHEMA = "analytics_bench"
+BENCH_DATABASE_URL = os.getenv("ANALYTICS_BENCH_DATABASE_URL")
+BENCH_ROWS = int(os.getenv("ANALYTICS_BENCH_ROWS", "1000000"))
+BENCH_DAYS = 90
+BENCH_REPEATS = int(os.getenv("ANALYTICS_BENCH_REPEATS", "3"))
+
+SEED_SQL = f"""
+INSERT INTO {BENCH_SCHEMA}.api_analytics (
+    user_id, username, service, endpoint, method, status_code,
+    response_time, cost, request_data, created_at
+)
+SELECT
+    u,
+    'user_' || u,
+    'service/' || (g % 40),
+    'service/' || (g % 40) || '/endpoint-' || (g % 3),
+    'GET',
+    CASE WHEN g % 50 = 0 THEN 500 ELSE 200 END,
+    random() * 2000,
+    (g % 30) + 0.5,
+    jsonb_build_object('profileType', (ARRAY['mini', 'lite', 'advanced', 'business'])[1 + g % 4]),
+    NOW() - (random() * interval '{BENCH_DAYS} days')
+FROM (
+    SELECT g, 1 + (g::bigint * 7919) % 200 AS u
+    FROM generate_series(1, $1) AS g
+) s
+"""
+
+
+async def _seed(conn: asyncpg.Connection):
+    """Create and fill the scratch tables unless they already hold enough rows."""
+    from config.db import create_analytics_rollup_tables
+
+    await conn.execute(f"CREATE SCHEMA IF NOT EXISTS {BENCH_SCHEMA}")
+    await conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {BENCH_SCHEMA}.api_analytics (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER,
+            username VARCHAR(255),
+            service VARCHAR(255),
+            endpoint VARCHAR(255),
+            method VARCHAR(10),
+            status_code INTEGER,
+            response_time FLOAT,
+            cost DECIMAL(10, 4) DEFAULT 0,
+            ip_address INET,
+            user_agent TEXT,
+            request_data JSONB,
+            response_data JSONB,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        )
+    """)
+    existing = await conn.fetchval(f"SELECT COUNT(*) FROM {BENCH_SCHEMA}.api_analytics")
+    if existing >= BENCH_ROWS:
+        print(f"Using existing {existing:,} seeded rows")
+        await create_analytics_rollup_tables(conn)
+        return
+
+    print(f"Seeding {BENCH_ROWS - existing:,} rows (one-off)...")
+    start = time.perf_counter()
+    await conn.execute(SEED_SQL, BENCH_ROWS - existing, timeout=None)
+    await conn.execute(f"CREATE INDEX IF NOT EXISTS idx_bench_created_at ON {BENCH_SCHEMA}.api_analytics(created_at)")
+    await conn.execute(f"CREATE INDEX IF NOT EXISTS idx_bench_service ON {BENCH_SCHEMA}.api_analytics(service)")
+    await conn.execute(f"CREATE INDEX IF NOT EXISTS idx_bench_user_id ON {BENCH_SCHEMA}.api_analytics(user_id)")
+    # Rebuild the rollups from scratch for the new rows
+    await conn.execute(f"DROP TABLE IF EXISTS {BENCH_SCHEMA}.api_analytics_hourly, {BENCH_SCHEMA}.api_analytics_daily")
+    await create_analytics_rollup_tables(conn)
+    await conn.execute(f"ANALYZE {BENCH_SCHEMA}.api_analytics")
+    await conn.execute(f"ANALYZE {BENCH_SCHEMA}.api_analytics_hourly")
+    await conn.execute(f"ANALYZE {BENCH_SCHEMA}.api_analytics_daily")
+    print(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+
+async def _time(label: str, make_call):
+    """Run make_call BENCH_REPEATS times and report the median wall time."""
+    timings = []
+    result = None
+    for _ in range(BENCH_REPEATS):
+        start = time.perf_counter()
+        result = await make_call()
+        timings.append(time.perf_counter() - start)
+    median = statistics.median(timings)
+    print(f"{label:12s} median={median * 1000:9.1f}ms  runs={[round(t * 1000) for t in timings]}")
+    return median, result
+
+
+async def run_benchmark(database_url: str):
+    import utils.dbCalls.analytics_db as analytics_db
+
+    try:
+        admin_conn = await asyncpg.connect(database_url, server_settings={"search_path": BENCH_SCHEMA})
+    except Exception as e:
+        print(f"❌ PostgreSQL not reachable, skipping benchmark: {e}")
+        return None
+
+    try:
+        await _seed(admin_conn)
+    finally:
+        await admin_conn.close()
+
+    # Point the analytics queries at the scratch schema
+    pool = await asyncpg.create_pool(
+        database_url,
+        min_size=6,
+        max_size=6,
+        server_settings={"search_path": BENCH_SCHEMA},
+    )
+
+    async def _bench_pool():
+        return pool
+
+    end = datetime.now().replace(hour=23, minute=59, second=59, microsecond=999999)
+    filter_ = analytics_db.build_analytics_filter(end - timedelta(days=30, hours=5, minutes=17), end)
+    # Every seeded row is a GET; filtering on method forces the raw-table path
+    raw_filter = {**filter_, "method": "GET"}
+
+    async def _sequential():
+        return [
+            await analytics_db.get_analytics_total_usage(filter_),
+            await analytics_db.get_analytics_daily_usage(filter_),
+            await analytics_db.get_analytics_service_breakdown(filter_),
+            await analytics_db.get_analytics_user_usage(filter_, limit=10),
+            await analytics_db.get_analytics_profile_type_counts(filter_),
+            await analytics_db.get_analytics_top_endpoints(filter_, limit=15),
+        ]
+
+    async def _concurrent():
+        return await asyncio.gather(
+            analytics_db.get_analytics_total_usage(filter_),
+            analytics_db.get_analytics_daily_usage(filter_),
+            analytics_db.get_analytics_service_breakdown(filter_),
+            analytics_db.get_analytics_user_usage(filter_, limit=10),
+            analytics_db.get_analytics_profile_type_counts(filter_),
+            analytics_db.get_analytics_top_endpoints(filter_, limit=15),
+        )
+
+    async def _raw_scan():
+        return await analytics_db.get_analytics_dashboard(raw_filter, user_limit=10, endpoint_limit=15)
+
+    async def _single_scan():
+        return await analytics_db.get_analytics_dashboard(filter_, user_limit=10, endpoint_limit=15)
+
+    saved_get_db_pool = analytics_db.get_db_pool
+    analytics_db.get_db_pool = _bench_pool
+    try:
+        sequential, facets = await _time("sequential", _sequential)
+        concurrent, _ = await _time("concurrent", _concurrent)
+        raw_scan, raw_dashboard = await _time("raw scan", _raw_scan)
+        single_scan, dashboard = await _time("single-scan", _single_scan)
+    finally:
+        analytics_db.get_db_pool = saved_get_db_pool
+        await pool.close()
+
+    return {
+        "sequential": sequential,
+        "concurrent": concurrent,
+        "rawScan": raw_scan,
+        "singleScan": single_scan,
+        "facets": facets,
+        "rawDashboard": raw_dashboard,
+        "dashboard": dashboard,
+    }
+
+
+def _rounded(dashboard):
+    """Dashboard with floats rounded (and ties ordered) so rollup and raw results compare equal."""
+    if isinstance(dashboard, dict):
+        return {key: _rounded(value) for key, value in dashboard.items()}
+    if isinstance(dashboard, list):
+        return sorted((_rounded(value) for value in dashboard), key=repr)
+    if isinstance(dashboard, float):
+        return round(dashboard, 2)
+    return dashboard
+
+
+def _check_facets_match(facets, dashboard):
+    """Compare the single-scan result with the per-facet queries."""
+    total, daily, services, users, profiles, endpoints = facets
+
+    assert dashboard["overview"]["totalCalls"] == total[0]["totalcalls"]
+    assert {d["_id"]: d["calls"] for d in dashboard["dailyUsage"]} == {d["_id"]: d["calls"] for d in daily}
+    assert {s["_id"]: s["calls"] for s in dashboard["serviceBreakdown"]} == {s["_id"]: s["calls"] for s in services}
+    assert {p["_id"]: p["count"] for p in dashboard["profileTypeCounts"]} == {p["_id"]: p["count"] for p in profiles}
+    assert [round(u["cost"], 2) for u in dashboard["userUsage"]] == [round(float(u["cost"]), 2) for u in users]
+    assert [e["calls"] for e in dashboard["topEndpoints"]] == [e["calls"] for e in endpoints]
+
+
+def test_analytics_dashboard_single_scan():
+    """The single-scan dashboard returns the same facets, faster than six sequential scans."""
+    if not BENCH_DATABASE_URL:
+        pytest.skip("set ANALYTICS_BENCH_DATABASE_URL to run the dashboard benchmark")
+    results = asyncio.run(run_benchmark(BENCH_DATABASE_URL))
+    if results is None:
+        pytest.skip("PostgreSQL not reachable")
+
+    _check_facets_match(results["facets"], results["dashboard"])
+    assert _rounded(results["dashboard"]) == _rounded(results["rawDashboard"])
+    print(f"single-scan is {results['sequential'] / results['singleScan']:.1f}x faster than sequential, "
+          f"{results['concurrent'] / results['singleScan']:.1f}x vs concurrent, "
+          f"{results['rawScan'] / results['singleScan']:.1f}x vs raw scan")
+    assert results["singleScan"] < results["sequential"]
+    assert results["singleScan"] < results["rawScan"]
+
+
+if __name__ == "__main__":
+    import sys
+    print("📊 Analytics dashboard benchmark")
+    print("=" * 60)
+    sys.exit(pytest.main([__file__, "-q", "-s", "-rs"]))
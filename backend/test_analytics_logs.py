@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Test keyset pagination and count modes of /analytics/logs without a database.
+
+The connection pool is replaced by an in-memory table that answers the
+queries get_analytics_logs_paginated and count_analytics_logs send: the
+created_at range, the (created_at, id) keyset condition and LIMIT/OFFSET
+for pages, COUNT(*) for exact counts and an EXPLAIN (FORMAT JSON) plan for
+estimates. The route handler is called directly with authentication
+stubbed out.
+"""
+
+import json
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import routes.analytics as analytics_route
+import utils.dbCalls.analytics_db as analytics_db
+from utils.dbCalls.analytics_db import encode_logs_cursor, decode_logs_cursor
+
+ESTIMATED_ROWS = 4242
+
+
+class FakeConnection:
+    """Serves the log queries from a list of rows, newest first like the SQL."""
+
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=lambda row: (row["created_at"], row["id"]), reverse=True)
+        self.queries = []
+
+    def _matching(self, query, args):
+        rows = self.rows
+        if "created_at >=" in query:
+            start, end = args[0], args[1]
+            rows = [row for row in rows if start <= row["created_at"] <= end]
+        if "(created_at, id) <" in query:
+            cursor = (args[-4], args[-3])  # followed by LIMIT and OFFSET
+            rows = [row for row in rows if (row["created_at"], row["id"]) < cursor]
+        return rows
+
+    async def fetch(self, query, *args):
+        self.queries.append(query)
+        limit, offset = args[-2], args[-1]
+        return self._matching(query, args)[offset:offset + limit]
+
+    async def fetchval(self, query, *args):
+        self.queries.append(query)
+        if query.startswith("EXPLAIN (FORMAT JSON)"):
+            # asyncpg returns the json column as text
+            return json.dumps([{"Plan": {"Node Type": "Index Only Scan", "Plan Rows": ESTIMATED_ROWS}}])
+        return len(self._matching(query, args))
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def acquire(self):
+        pool = self
+
+        class _Acquire:
+            async def __aenter__(self):
+                return pool.conn
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Acquire()
+
+
+def _rows(count: int):
+    """Log rows in groups of three sharing one created_at, so pages split ties."""
+    base = datetime.now().replace(microsecond=0) - timedelta(hours=1)
+    return [
+        {"id": i, "user_id": 7, "username": "tester", "service": "verification/panbasic",
+         "endpoint": "verification/panbasic", "method": "GET", "status_code": 200, "response_time": 1.0,
+         "cost": 1.5, "ip_address": None, "user_agent": None, "request_data": None, "response_data": None,
+         "created_at": base - timedelta(seconds=i // 3), "cache_hit": False}
+        for i in range(1, count + 1)
+    ]
+
+
+@pytest.fixture
+def log_table():
+    """Replace the pool with an in-memory table and stub out authentication."""
+    conn = FakeConnection(_rows(10))
+    saved = (analytics_db.get_db_pool, analytics_route.get_authenticated_user,
+             analytics_route.has_verification_advanced_access)
+
+    async def _pool():
+        return FakePool(conn)
+
+    async def _fake_user(request):
+        return {"userId": 1, "username": "admin", "role": "admin"}
+
+    analytics_db.get_db_pool = _pool
+    analytics_route.get_authenticated_user = _fake_user
+    analytics_route.has_verification_advanced_access = lambda user: True
+    try:
+        yield conn
+    finally:
+        (analytics_db.get_db_pool, analytics_route.get_authenticated_user,
+         analytics_route.has_verification_advanced_access) = saved
+
+
+def _get_logs(**params):
+    request = Request({"type": "http", "method": "GET", "path": "/analytics/logs", "query_string": b"", "headers": []})
+    query = dict(startDate=None, endDate=None, userId=None, service=None, endpoint=None, profileType=None,
+                 page=1, limit=100, cursor=None, countMode="exact")
+    query.update(params)
+    return asyncio.run(analytics_route.get_analytics_logs(request, **query))
+
+
+def test_cursor_round_trip():
+    """A cursor decodes to the created_at and id it was built from; ties differ only by id."""
+    created_at = datetime(2024, 3, 1, 12, 30, 15, 123456)
+    first = encode_logs_cursor({"created_at": created_at, "id": 41})
+    second = encode_logs_cursor({"created_at": created_at, "id": 42})
+
+    assert decode_logs_cursor(first) == (created_at, 41)
+    assert decode_logs_cursor(second) == (created_at, 42)
+    assert first != second
+    assert "=" not in first and "/" not in first and "+" not in first
+
+    for malformed in ("not-a-cursor", "", "e30", encode_logs_cursor({"created_at": created_at, "id": 1})[:-3]):
+        with pytest.raises(ValueError):
+            decode_logs_cursor(malformed)
+
+
+def test_cursor_pages_cover_every_row_once(log_table):
+    """Paging by cursor returns every row once, in order, even across created_at ties."""
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        response = _get_logs(limit=4, cursor=cursor, countMode="none")
+        pages += 1
+        seen += [log["timestamp"] for log in response["logs"]]
+        cursor = response["pagination"]["nextCursor"]
+        if cursor is None:
+            break
+        assert len(response["logs"]) == 4
+        # Cursor pages have no page number
+        assert response["pagination"]["page"] == (1 if pages == 1 else None)
+
+    expected = [row["created_at"] for row in log_table.rows]
+    assert pages == 3
+    assert seen == expected
+    # The last page held the remaining 2 rows, so it carried no cursor
+    assert len(response["logs"]) == 2
+
+
+def test_next_cursor_only_on_full_page(log_table):
+    """A page shorter than the limit is the last one."""
+    full = _get_logs(limit=10, countMode="none")
+    short = _get_logs(limit=20, countMode="none")
+
+    # A full page still gets a cursor, which then leads to an empty page
+    assert full["pagination"]["nextCursor"] is not None
+    assert short["pagination"]["nextCursor"] is None
+    empty = _get_logs(limit=10, cursor=full["pagination"]["nextCursor"], countMode="none")
+    assert empty["logs"] == [] and empty["pagination"]["nextCursor"] is None
+
+
+def test_malformed_cursor_is_rejected(log_table):
+    """A cursor that does not decode is a 400, not a 500 or an empty page."""
+    with pytest.raises(HTTPException) as error:
+        _get_logs(cursor="garbage!!")
+    assert error.value.status_code == 400
+    assert not log_table.queries
+
+
+def test_count_modes(log_table):
+    """exact counts rows, estimated reads the plan's row estimate, none skips counting."""
+    exact = _get_logs(limit=4, countMode="exact")["pagination"]
+    estimated = _get_logs(limit=4, countMode="estimated")["pagination"]
+    queries_before = len(log_table.queries)
+    skipped = _get_logs(limit=4, countMode="none")["pagination"]
+
+    assert exact["totalCount"] == 10 and exact["totalPages"] == 3
+    assert estimated["totalCount"] == ESTIMATED_ROWS and estimated["totalPages"] == (ESTIMATED_ROWS + 3) // 4
+    assert estimated["countMode"] == "estimated"
+    assert skipped["totalCount"] is None and skipped["totalPages"] is None
+    # Only the page query ran for countMode=none
+    assert len(log_table.queries) == queries_before + 1
+    assert any(query.startswith("EXPLAIN (FORMAT JSON) SELECT 1 FROM api_analytics") for query in log_table.queries)
+
+
+def test_estimate_accepts_decoded_plan(log_table):
+    """The plan may arrive already decoded when a json codec is registered."""
+    async def _decoded(query, *args):
+        return [{"Plan": {"Plan Rows": 17}}]
+
+    log_table.fetchval = _decoded
+    assert asyncio.run(analytics_db.count_analytics_logs({}, estimate=True)) == 17
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
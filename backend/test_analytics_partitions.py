@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Test monthly api_analytics partitioning and the retention policy.
+
+The bound parsing and cutoff selection behind drop_expired_analytics_partitions
+are checked on the strings pg_get_expr prints for each kind of partition.
+The DB-backed tests run the startup schema setup on a pre-partitioning
+api_analytics table in a scratch schema, move rows out of the default
+partition as their month is created, and apply retention; they are skipped
+when PostgreSQL is not reachable (DATABASE_URL / DB_* as in config/db.py,
+or ANALYTICS_TEST_DATABASE_URL).
+"""
+
+import os
+import asyncio
+from datetime import datetime, timezone
+
+import asyncpg
+import pytest
+
+import config.db as db
+from config.db import (
+    ANALYTICS_PARTITION_MONTHS_AHEAD,
+    DATABASE_URL,
+    create_analytics_table,
+    create_analytics_partitions,
+    drop_expired_analytics_partitions,
+    parse_analytics_partition_bound,
+    select_expired_analytics_partitions,
+)
+
+TEST_SCHEMA = "analytics_partition_test"
+
+UTC = timezone.utc
+PARTITIONS = [
+    ("api_analytics_default", "DEFAULT"),
+    ("api_analytics_legacy", "FOR VALUES FROM (MINVALUE) TO ('2024-03-01 00:00:00+00')"),
+    ("api_analytics_y2024m03", "FOR VALUES FROM ('2024-03-01 00:00:00+00') TO ('2024-04-01 00:00:00+00')"),
+    ("api_analytics_y2024m04", "FOR VALUES FROM ('2024-04-01 00:00:00+00') TO ('2024-05-01 00:00:00+00')"),
+    ("api_analytics_y2024m05", "FOR VALUES FROM ('2024-05-01 00:00:00+05:30') TO ('2024-06-01 00:00:00+05:30')"),
+]
+
+
+def test_partition_bounds_are_parsed():
+    """Monthly bounds parse to their range; DEFAULT, MINVALUE and MAXVALUE bounds do not."""
+    assert parse_analytics_partition_bound(PARTITIONS[2][1]) == (
+        datetime(2024, 3, 1, tzinfo=UTC), datetime(2024, 4, 1, tzinfo=UTC)
+    )
+    start, end = parse_analytics_partition_bound(PARTITIONS[4][1])
+    assert end.utcoffset().total_seconds() == 5.5 * 3600
+
+    for bound in ("DEFAULT", PARTITIONS[1][1], None, "",
+                  "FOR VALUES FROM ('2024-06-01 00:00:00+00') TO (MAXVALUE)",
+                  "FOR VALUES FROM ('not a date') TO ('2024-06-01 00:00:00+00')"):
+        assert parse_analytics_partition_bound(bound) is None
+
+
+def test_only_months_before_the_cutoff_expire():
+    """A month expires once it ends at or before the cutoff; default and legacy never do."""
+    def expired(cutoff):
+        return select_expired_analytics_partitions(PARTITIONS, cutoff)
+
+    assert expired(datetime(2024, 3, 1, tzinfo=UTC)) == []
+    # A month ending exactly at the cutoff is expired; one ending a second after is not
+    assert expired(datetime(2024, 4, 1, tzinfo=UTC)) == ["api_analytics_y2024m03"]
+    assert expired(datetime(2024, 3, 31, 23, 59, 59, tzinfo=UTC)) == []
+    assert expired(datetime(2024, 5, 1, tzinfo=UTC)) == ["api_analytics_y2024m03", "api_analytics_y2024m04"]
+    # Far in the future every month has expired, but default and legacy stay
+    assert expired(datetime(2030, 1, 1, tzinfo=UTC)) == [
+        "api_analytics_y2024m03", "api_analytics_y2024m04", "api_analytics_y2024m05"
+    ]
+
+
+async def _reset_schema(conn: asyncpg.Connection):
+    await conn.execute(f"DROP SCHEMA IF EXISTS {TEST_SCHEMA} CASCADE")
+    await conn.execute(f"CREATE SCHEMA {TEST_SCHEMA}")
+    await conn.execute("CREATE TABLE users (id SERIAL PRIMARY KEY)")
+
+
+async def _partition_names(conn: asyncpg.Connection):
+    return [row["relname"] for row in await conn.fetch("""
+        SELECT child.relname FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = 'api_analytics'::regclass
+        ORDER BY child.relname
+    """)]
+
+
+# api_analytics as created before partitioning, with its indexes
+BASELINE_SCHEMA = [
+    """
+    CREATE TABLE users (
+        id SERIAL PRIMARY KEY,
+        username VARCHAR(255) UNIQUE NOT NULL,
+        email VARCHAR(255) UNIQUE NOT NULL,
+        password VARCHAR(255) NOT NULL,
+        role_resources INTEGER DEFAULT 0 CHECK (role_resources >= 0 AND role_resources <= 4095),
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    )
+    """,
+    """
+    CREATE TABLE api_analytics (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER REFERENCES users(id),
+        username VARCHAR(255),
+        service VARCHAR(255),
+        endpoint VARCHAR(255),
+        method VARCHAR(10),
+        status_code INTEGER,
+        response_time FLOAT,
+        cost DECIMAL(10, 4) DEFAULT 0,
+        ip_address INET,
+        user_agent TEXT,
+        request_data JSONB,
+        response_data JSONB,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    )
+    """,
+    "CREATE INDEX idx_users_email ON users(email)",
+    "CREATE INDEX idx_users_username ON users(username)",
+    "CREATE INDEX idx_analytics_user_id ON api_analytics(user_id)",
+    "CREATE INDEX idx_analytics_created_at ON api_analytics(created_at)",
+    "CREATE INDEX idx_analytics_service ON api_analytics(service)",
+]
+
+
+async def _convert_baseline_table(conn: asyncpg.Connection):
+    """Start the app's schema setup on a pre-partitioning database, twice; the legacy rows stay."""
+    await conn.execute(f"DROP SCHEMA IF EXISTS {TEST_SCHEMA} CASCADE")
+    await conn.execute(f"CREATE SCHEMA {TEST_SCHEMA}")
+    for statement in BASELINE_SCHEMA:
+        await conn.execute(statement)
+    await conn.execute("INSERT INTO users (username, email, password) VALUES ('legacy', 'legacy@example.com', 'x')")
+    await conn.execute("""
+        INSERT INTO api_analytics (user_id, service, created_at)
+        VALUES (1, 'legacy', NOW() - interval '3 years'), (1, 'legacy', NULL)
+    """)
+
+    # create_tables() runs on the shared pool, as init_db() does at startup
+    saved_pool = db._pool
+    db._pool = await asyncpg.create_pool(_database_url(), min_size=1, max_size=1,
+                                         server_settings={"search_path": TEST_SCHEMA})
+    try:
+        await db.create_tables()
+        # A restart finds the table already partitioned
+        await db.create_tables()
+    finally:
+        await db._pool.close()
+        db._pool = saved_pool
+
+    partitions = await _partition_names(conn)
+    await conn.execute("INSERT INTO api_analytics (user_id, service) VALUES (1, 'recent')")
+    rows = await conn.fetch("SELECT id, service, tableoid::regclass::text AS part FROM api_analytics ORDER BY id")
+    primary_keys = await conn.fetch("""
+        SELECT conrelid::regclass::text AS relation, pg_get_constraintdef(oid) AS definition
+        FROM pg_constraint WHERE contype = 'p' AND conrelid IN ('api_analytics'::regclass, 'api_analytics_legacy'::regclass)
+        ORDER BY 1
+    """)
+    dropped = await drop_expired_analytics_partitions(conn, retention_months=1)
+    return partitions, rows, primary_keys, dropped
+
+
+async def _default_rows_move_to_new_months(conn: asyncpg.Connection):
+    """Rows that went to the default partition before their month existed move when it is created."""
+    await _reset_schema(conn)
+    await create_analytics_table(conn)
+    await conn.execute("""
+        INSERT INTO api_analytics (service, created_at)
+        VALUES ('now', NOW()), ('next month', NOW() + interval '1 month'), ('far future', NOW() + interval '5 years')
+    """)
+    created = await create_analytics_partitions(conn, months_ahead=2)
+    rows = await conn.fetch("SELECT id, service, tableoid::regclass::text AS part FROM api_analytics ORDER BY id")
+    return created, rows
+
+
+async def _expire_months(conn: asyncpg.Connection):
+    """Create a fresh partitioned table with an old month and apply retention."""
+    await _reset_schema(conn)
+    await create_analytics_table(conn)
+    created = await create_analytics_partitions(conn, months_ahead=2)
+    await conn.execute("""
+        CREATE TABLE api_analytics_y1999m01 PARTITION OF api_analytics
+        FOR VALUES FROM ('1999-01-01') TO ('1999-02-01')
+    """)
+    await conn.execute("""
+        INSERT INTO api_analytics (service, created_at)
+        VALUES ('expired', '1999-01-15'), ('orphan', '1990-06-01'), ('recent', NOW())
+    """)
+    # Retention off leaves everything alone
+    untouched = await drop_expired_analytics_partitions(conn, retention_months=0)
+    dropped = await drop_expired_analytics_partitions(conn, retention_months=1)
+    services = [row["service"] for row in await conn.fetch("SELECT service FROM api_analytics ORDER BY id")]
+    return created, untouched, dropped, await _partition_names(conn), services
+
+
+def _database_url() -> str:
+    return os.getenv("ANALYTICS_TEST_DATABASE_URL", DATABASE_URL)
+
+
+def _run_against_postgres(scenario):
+    """Run a scenario in the scratch schema; skip the test without a database."""
+    async def _run():
+        try:
+            conn = await asyncpg.connect(_database_url(), server_settings={"search_path": TEST_SCHEMA})
+        except Exception as e:
+            return e
+        try:
+            return await scenario(conn)
+        finally:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {TEST_SCHEMA} CASCADE")
+            await conn.close()
+
+    result = asyncio.run(_run())
+    if isinstance(result, Exception):
+        pytest.skip(f"PostgreSQL not reachable: {result}")
+    return result
+
+
+def test_baseline_table_is_converted_and_kept():
+    """Startup converts the old table; its rows stay in api_analytics_legacy, which retention never drops."""
+    partitions, rows, primary_keys, dropped = _run_against_postgres(_convert_baseline_table)
+
+    assert "api_analytics_default" in partitions and "api_analytics_legacy" in partitions
+    assert len(partitions) == 2 + ANALYTICS_PARTITION_MONTHS_AHEAD
+    assert [row["service"] for row in rows] == ["legacy", "legacy", "recent"]
+    assert [row["part"] for row in rows[:2]] == ["api_analytics_legacy"] * 2
+    # New ids continue after the legacy ones
+    assert rows[2]["id"] > rows[1]["id"]
+    assert [(row["relation"], row["definition"]) for row in primary_keys] == [
+        ("api_analytics", "PRIMARY KEY (id, created_at)"),
+        ("api_analytics_legacy", "PRIMARY KEY (id, created_at)"),
+    ]
+    assert dropped == []
+
+
+def test_default_rows_move_into_created_partitions():
+    """Creating a month whose rows sit in the default partition moves them instead of failing."""
+    created, rows = _run_against_postgres(_default_rows_move_to_new_months)
+
+    assert len(created) == 3
+    parts = {row["service"]: row["part"] for row in rows}
+    assert parts["now"] == created[0]
+    assert parts["next month"] == created[1]
+    assert parts["far future"] == "api_analytics_default"
+    assert [row["id"] for row in rows] == [1, 2, 3]
+
+
+def test_retention_drops_only_expired_months():
+    """Months past the retention window are dropped; the default partition and its rows stay."""
+    created, untouched, dropped, partitions, services = _run_against_postgres(_expire_months)
+
+    assert len(created) == 3
+    assert untouched == []
+    assert dropped == ["api_analytics_y1999m01"]
+    assert partitions == sorted(["api_analytics_default"] + created)
+    assert services == ["orphan", "recent"]
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main([__file__, "-q", "-s", "-rs"]))
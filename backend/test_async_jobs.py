@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Test the async job subsystem used for DL and voter ID verification.
+
+Upstream polls are fakes that complete after a set number of polls, so the
+test can check backoff, the shared concurrency cap, webhook resolution,
+expiry, one analytics row per job, separate jobs for users sharing a
+request_id, resuming persisted jobs (with the job table replaced by an
+in-memory dict) and the job-handle flow of /verification-mini.
+"""
+
+import json
+import time
+import asyncio
+
+import httpx
+import pytest
+from starlette.requests import Request
+
+import utils.async_jobs as async_jobs
+from utils.async_jobs import AsyncJobManager, AsyncJobError, JOB_COMPLETED, JOB_EXPIRED, JOB_FAILED
+
+
+def _completed(request_id: str):
+    return [{"request_id": request_id, "status": "completed",
+             "result": {"source_output": {"status": "id_found", "name": "RAVI KUMAR"}}}]
+
+
+class FakeUpstream:
+    """Reports a request as in progress until it has been polled `polls_needed` times."""
+
+    def __init__(self, polls_needed: int = 3, fail_with: int = None):
+        self.polls_needed = polls_needed
+        self.fail_with = fail_with
+        self.polls = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request_id: str):
+        self.polls.setdefault(request_id, []).append(time.monotonic())
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.in_flight -= 1
+        if self.fail_with:
+            request = httpx.Request("GET", "https://upstream.test/verification/get-driving-license")
+            raise httpx.HTTPStatusError("error", request=request, response=httpx.Response(self.fail_with, request=request))
+        if self.polls_needed and len(self.polls[request_id]) >= self.polls_needed:
+            return _completed(request_id)
+        return [{"request_id": request_id, "status": "in_progress"}]
+
+
+def _manager(upstream, **overrides):
+    settings = dict(persist=False, initial_delay_ms=20, max_delay_ms=200, backoff_factor=2.0,
+                    timeout_ms=3000, max_concurrent_polls=3)
+    settings.update(overrides)
+    manager = AsyncJobManager(**settings)
+    manager.register_kind("dl", "verification/get-driving-license", upstream)
+    return manager
+
+
+def test_jobs_share_one_poller_with_backoff(row_sink):
+    """Many jobs are polled by one poller within the concurrency cap, backing off between polls."""
+    upstream = FakeUpstream(polls_needed=4)
+
+    async def _run():
+        manager = _manager(upstream)
+        jobs = [await manager.submit("dl", f"req-{i}", str(i), f"user-{i}", "user") for i in range(20)]
+        duplicate = await manager.submit("dl", "req-0", "0", "user-0", "user")
+        results = await asyncio.gather(*[manager.wait(job.job_id, timeout=5) for job in jobs])
+        await asyncio.sleep(0.05)  # let the tracked calls log their rows
+        stats = manager.get_stats()
+        await manager.stop()
+        return jobs, duplicate, results, stats
+
+    jobs, duplicate, results, stats = asyncio.run(_run())
+
+    gaps = [b - a for a, b in zip(upstream.polls["req-0"], upstream.polls["req-0"][1:])]
+    print(f"stats: {stats}, max in flight {upstream.max_in_flight}, req-0 gaps {[round(g, 3) for g in gaps]}")
+
+    assert duplicate.job_id == jobs[0].job_id
+    assert all(result == _completed(f"req-{i}") for i, result in enumerate(results))
+    assert all(len(polls) == 4 for polls in upstream.polls.values())
+    assert upstream.max_in_flight <= 3
+    # Each gap is roughly double the previous one
+    assert gaps[0] < gaps[1] < gaps[2]
+    assert stats["completed"] == 20 and stats["pending"] == 0
+    # One analytics row per job, not per poll
+    assert len(row_sink.rows) == 20
+    assert all(row["service"] == "verification/get-driving-license" and row["statusCode"] == 200
+               for row in row_sink.rows)
+
+
+def test_users_sharing_a_request_id_each_own_a_job(row_sink):
+    """A request_id submitted by two users gives each a job they can fetch and a tracked call."""
+    import routes.async_jobs as async_jobs_route
+    from fastapi import HTTPException
+
+    upstream = FakeUpstream(polls_needed=0)  # resolved by the webhook below
+    saved = (async_jobs_route.async_job_manager, async_jobs_route.get_authenticated_user)
+
+    def _as_user(user_id: str) -> Request:
+        return Request({"type": "http", "method": "GET", "path": "/async-jobs", "query_string": b"",
+                        "headers": [(b"x-user", user_id.encode())]})
+
+    async def _fake_user(request):
+        return {"userId": int(request.headers["x-user"]), "username": "user", "role": "user"}
+
+    async def _run():
+        manager = _manager(upstream, initial_delay_ms=500)
+        async_jobs_route.async_job_manager = manager
+        async_jobs_route.get_authenticated_user = _fake_user
+        first = await manager.submit("dl", "req-shared", "1", "user-1", "user")
+        second = await manager.submit("dl", "req-shared", "2", "user-2", "user")
+        again = await manager.submit("dl", "req-shared", "2", "user-2", "user")
+        views = [await async_jobs_route.get_async_job_status(_as_user(user_id), job.job_id)
+                 for user_id, job in (("1", first), ("2", second))]
+        try:
+            await async_jobs_route.get_async_job_status(_as_user("2"), first.job_id)
+            other_user_status = 200
+        except HTTPException as e:
+            other_user_status = e.status_code
+        resolved = await manager.resolve_request("req-shared", _completed("req-shared"))
+        results = [await manager.wait(job.job_id, timeout=1) for job in (first, second)]
+        await asyncio.sleep(0.05)  # let the tracked calls log their rows
+        await manager.stop()
+        return first, second, again, views, other_user_status, resolved, results
+
+    try:
+        first, second, again, views, other_user_status, resolved, results = asyncio.run(_run())
+    finally:
+        async_jobs_route.async_job_manager, async_jobs_route.get_authenticated_user = saved
+
+    assert first.job_id != second.job_id and again.job_id == second.job_id
+    assert [view["jobId"] for view in views] == [first.job_id, second.job_id]
+    assert other_user_status == 404
+    assert resolved and results == [_completed("req-shared")] * 2
+    assert sorted(row["userId"] for row in row_sink.rows) == [1, 2]
+
+
+def test_webhook_resolves_job_before_next_poll():
+    """A webhook delivery finishes the job immediately and stops polling it."""
+    upstream = FakeUpstream(polls_needed=0)  # never completes by polling
+
+    async def _run():
+        manager = _manager(upstream, initial_delay_ms=500)
+        job = await manager.submit("dl", "req-hook")
+        waiter = asyncio.ensure_future(manager.wait(job.job_id, timeout=2))
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        resolved = await manager.resolve_request("req-hook", _completed("req-hook"))
+        result = await waiter
+        elapsed = time.perf_counter() - start
+        ignored = await manager.resolve_request("req-unknown", _completed("req-unknown"))
+        await manager.stop()
+        return resolved, result, elapsed, ignored
+
+    resolved, result, elapsed, ignored = asyncio.run(_run())
+    assert resolved and not ignored
+    assert result == _completed("req-hook")
+    assert elapsed < 0.1
+    assert "req-hook" not in upstream.polls
+
+
+def test_webhook_rejects_malformed_payload():
+    """A webhook body that is not JSON is a 400, not a 500; a valid one still resolves."""
+    import routes.async_jobs as async_jobs_route
+    from fastapi import HTTPException
+
+    def _delivery(body: bytes) -> Request:
+        async def _receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+        return Request({"type": "http", "method": "POST", "path": "/async-jobs/webhook", "query_string": b"",
+                        "headers": [(b"x-webhook-secret", b"hook-secret"),
+                                    (b"content-type", b"application/json")]}, _receive)
+
+    saved = async_jobs_route.ASYNC_JOB_WEBHOOK_SECRET
+    async_jobs_route.ASYNC_JOB_WEBHOOK_SECRET = "hook-secret"
+
+    async def _run():
+        statuses = []
+        for body in (b"{not json", b"\xff\xfe", b""):
+            try:
+                await async_jobs_route.async_job_webhook(_delivery(body))
+            except HTTPException as e:
+                statuses.append(e.status_code)
+        accepted = await async_jobs_route.async_job_webhook(_delivery(json.dumps(_completed("req-none")).encode()))
+        return statuses, accepted
+
+    try:
+        statuses, accepted = asyncio.run(_run())
+    finally:
+        async_jobs_route.ASYNC_JOB_WEBHOOK_SECRET = saved
+
+    assert statuses == [400, 400, 400]
+    assert accepted == {"requestId": "req-none", "resolved": False}
+
+
+def test_jobs_expire_or_fail():
+    """Jobs that never complete expire; permanent upstream errors fail the job at once."""
+    never = FakeUpstream(polls_needed=0)
+    broken = FakeUpstream(fail_with=422)
+
+    async def _run():
+        manager = _manager(never, timeout_ms=300)
+        manager.register_kind("voter-id", "verification/get-voter-id", broken)
+        slow = await manager.submit("dl", "req-slow")
+        bad = await manager.submit("voter-id", "req-bad")
+        errors = []
+        for job in (slow, bad):
+            try:
+                await manager.wait(job.job_id, timeout=2)
+            except AsyncJobError as e:
+                errors.append(str(e))
+        # A short wait times out while the job keeps running
+        pending = await manager.submit("dl", "req-pending")
+        try:
+            await manager.wait(pending.job_id, timeout=0.05)
+            timed_out = False
+        except asyncio.TimeoutError:
+            timed_out = True
+        still_pending = not pending.done
+        await manager.stop()
+        return slow, bad, errors, timed_out, still_pending
+
+    slow, bad, errors, timed_out, still_pending = asyncio.run(_run())
+    assert slow.status == JOB_EXPIRED
+    assert bad.status == JOB_FAILED and len(broken.polls["req-bad"]) == 1
+    assert len(errors) == 2
+    assert timed_out and still_pending
+
+
+def test_pending_jobs_survive_restart():
+    """A job persisted by one manager is resumed and finished by the next one."""
+    table = {}
+
+    async def _insert(job_id, kind, request_id, user_id, username, user_role, context, expires_at):
+        table[job_id] = {"job_id": job_id, "kind": kind, "request_id": request_id, "user_id": user_id,
+                         "username": username, "user_role": user_role, "context": context,
+                         "status": "pending", "result": None, "error": None, "attempts": 0,
+                         "created_at": None, "updated_at": None, "expires_at": expires_at}
+        return job_id
+
+    async def _update(job_id, status, attempts, result=None, error=None):
+        table[job_id].update(status=status, attempts=attempts, result=result, error=error, updated_at=expires)
+
+    async def _pending():
+        return [row for row in table.values() if row["status"] == "pending"]
+
+    async def _get(job_id):
+        return table.get(job_id)
+
+    async def _purge(retention_seconds):
+        return 0
+
+    from datetime import datetime, timezone
+    expires = datetime.now(timezone.utc)
+    fakes = {"insert_async_job": _insert, "update_async_job": _update,
+             "get_pending_async_jobs": _pending, "get_async_job": _get, "delete_finished_async_jobs": _purge}
+    originals = {name: getattr(async_jobs, name) for name in fakes}
+    for name, fake in fakes.items():
+        setattr(async_jobs, name, fake)
+
+    upstream = FakeUpstream(polls_needed=2)
+
+    async def _run():
+        first = _manager(upstream, persist=True, initial_delay_ms=1000)
+        job = await first.submit("dl", "req-restart", "7", "user-7", "user", context={"dl_number": "DL01"})
+        await first.stop()  # "restart" before the first poll
+
+        second = _manager(upstream, persist=True)
+        await second.start()
+        result = await second.wait(job.job_id, timeout=2)
+        await second.stop()
+
+        # A third process can still report the finished job from the table
+        third = _manager(upstream, persist=True)
+        loaded = await third.get_job(job.job_id)
+        return job, second.get_stats(), result, loaded
+
+    try:
+        job, stats, result, loaded = asyncio.run(_run())
+    finally:
+        for name, original in originals.items():
+            setattr(async_jobs, name, original)
+
+    assert stats["resumed"] == 1
+    assert result == _completed("req-restart")
+    assert table[job.job_id]["status"] == JOB_COMPLETED
+    assert loaded.status == JOB_COMPLETED and loaded.context == {"dl_number": "DL01"}
+    assert loaded.result == _completed("req-restart")
+
+
+def test_verification_mini_returns_job_handles():
+    """With asyncJobs set, DL comes back as a pending handle that resolves via /async-jobs/{id}."""
+    import routes.verification_mini as verification_mini
+    import routes.async_jobs as async_jobs_route
+    from routes.verification_mini import VerificationMiniRequest
+
+    manager = async_jobs.async_job_manager
+    upstream = FakeUpstream(polls_needed=2)
+    saved = (manager.persist, manager.initial_delay_ms, manager._kinds["dl"].poll,
+             verification_mini.get_authenticated_user, verification_mini.has_verification_mini_access,
+             verification_mini.initiate_dl_verification, async_jobs_route.get_authenticated_user)
+
+    async def _fake_user(request):
+        return {"userId": 7, "username": "tester", "role": "user"}
+
+    async def _initiate(*args):
+        return {"request_id": "req-mini"}
+
+    manager.persist = False
+    manager.initial_delay_ms = 20
+    manager._kinds["dl"].poll = upstream
+    verification_mini.get_authenticated_user = _fake_user
+    verification_mini.has_verification_mini_access = lambda user: True
+    verification_mini.initiate_dl_verification = _initiate
+    async_jobs_route.get_authenticated_user = _fake_user
+
+    request = Request({"type": "http", "method": "POST", "path": "/", "query_string": b"", "headers": []})
+    data = VerificationMiniRequest(name="Ravi Kumar", dob="1985-04-12", mobile="9999999999",
+                                   dl_number="DL01", verifications=["dl"], asyncJobs=True)
+
+    async def _run():
+        start = time.perf_counter()
+        response = await verification_mini.verification_mini(request, data)
+        elapsed = time.perf_counter() - start
+        job_id = response["dlVerification"]["jobId"]
+        first = await async_jobs_route.get_async_job_status(request, job_id)
+        await manager.wait(job_id, timeout=2)
+        final = await async_jobs_route.get_async_job_status(request, job_id)
+        await manager.stop()
+        return response, elapsed, first, final
+
+    try:
+        response, elapsed, first, final = asyncio.run(_run())
+    finally:
+        (manager.persist, manager.initial_delay_ms, manager._kinds["dl"].poll,
+         verification_mini.get_authenticated_user, verification_mini.has_verification_mini_access,
+         verification_mini.initiate_dl_verification, async_jobs_route.get_authenticated_user) = saved
+
+    assert response["dlVerification"]["verificationStatus"] == "pending"
+    assert elapsed < 0.1
+    assert first["status"] == "pending" and first["result"] is None
+    assert final["status"] == "completed"
+    assert final["result"]["dlNumber"] == "DL01"
+    assert final["result"]["verificationStatus"] == "verified"
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark the court case relevance scoring.
+
+Scores 1k and 10k synthetic cases with CaseAnalysisService.analyze_cases and
+with the previous per-case implementation (rebuild each case, re-extract the
+profile, pairwise word loop) and checks both give identical results. Run
+the file directly to also benchmark the two (best of several repeats).
+"""
+
+import time
+import random
+from datetime import datetime
+
+from routes.court_cases import (
+    CaseAnalysisService,
+    CourtCase,
+    DateUtils,
+    PersonalInfo,
+    ProfileData,
+    ProfileUtils,
+    StringUtils,
+)
+
+PROFILE = ProfileData(
+    personalInfo=PersonalInfo(full_name="Ravi Kumar Sharma", dob="1985-04-12"),
+    addresses=["Pune", "Andheri East, Mumbai", "Sector 21, Noida"],
+    contactInfo={"permanent_address": "Jaipur"},
+)
+
+FIRST_NAMES = ["Ravi", "Ravindra", "Kumar", "Sunita", "Amit", "Priya", "Rakesh", "Kumari", "Sharma", "Verma"]
+PLACES = ["Pune", "Mumbai", "Delhi", "Jaipur", "Noida", "Nagpur", "Chennai"]
+
+
+def _synthetic_cases(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    cases = []
+    for index in range(count):
+        respondents = [
+            " ".join(rng.sample(FIRST_NAMES, rng.randint(1, 3))) + rng.choice(["", ".", " & Ors."])
+            for _ in range(rng.randint(1, 3))
+        ]
+        place = rng.choice(PLACES)
+        cases.append(CourtCase(
+            score=round(rng.random() * 10, 2),
+            cnr=f"CNR{index:06d}",
+            title=f"State of {place} vs {respondents[0]}",
+            petitioners=[f"State of {place}"],
+            respondents=respondents,
+            filingDate=f"{rng.randint(1990, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            stage=rng.choice(["Pending", "Disposed"]),
+            court=rng.choice(["High Court", "District Court"]),
+            location=rng.choice([place, f"{place} District", None]),
+        ))
+    return cases
+
+
+# ----- previous implementation, kept as the reference -----
+
+def _reference_relevance_score(case: CourtCase, profile: ProfileData) -> float:
+    score = case.score or 0.0
+    name = ProfileUtils.extract_name(profile)
+    if not name:
+        return score
+    respondent_similarity = StringUtils.calculate_name_similarity(name, ' '.join(case.respondents))
+    petitioner_similarity = StringUtils.calculate_name_similarity(name, ' '.join(case.petitioners))
+    score += max(respondent_similarity, petitioner_similarity) * 20
+    if case.location:
+        for address in ProfileUtils.extract_addresses(profile):
+            if address and address.lower() in case.location.lower():
+                score += 10
+                break
+    year_diff = datetime.now().year - DateUtils.parse_filing_date(case.filingDate).year
+    if year_diff <= 2:
+        score += 5
+    elif year_diff <= 5:
+        score += 3
+    elif year_diff <= 10:
+        score += 1
+    if case.court == 'High Court':
+        score += 2
+    return round(score * 100) / 100
+
+
+def _reference_analyze(cases, profile):
+    birth_year = ProfileUtils.extract_birth_year(profile)
+    valid, invalid = [], []
+    for case in cases:
+        enhanced = CourtCase(**case.model_dump())
+        if birth_year:
+            enhanced.ageAtFiling = DateUtils.calculate_age(birth_year, DateUtils.parse_filing_date(case.filingDate))
+            if not DateUtils.is_valid_adult_case(birth_year, case.filingDate):
+                enhanced.isValid = False
+                enhanced.filterReason = f"Case filed when person was {enhanced.ageAtFiling} years old (below 18)"
+                invalid.append(enhanced)
+                continue
+        enhanced.relevanceScore = _reference_relevance_score(case, profile)
+        enhanced.isValid = True
+        valid.append(enhanced)
+    valid.sort(key=lambda c: c.relevanceScore or 0, reverse=True)
+    return valid, invalid
+
+
+def _best_time(func, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(count: int, repeats: int = 5):
+    """Print the best-of-`repeats` time of both implementations on `count` cases."""
+    cases = _synthetic_cases(count)
+    reference_time = _best_time(lambda: _reference_analyze(cases, PROFILE), repeats)
+    batch_time = _best_time(lambda: CaseAnalysisService.analyze_cases(cases, PROFILE), repeats)
+    print(f"{count:>6} cases: reference {reference_time * 1000:8.1f}ms, "
+          f"batch {batch_time * 1000:8.1f}ms ({reference_time / batch_time:.1f}x)")
+
+
+def test_batch_scoring_matches_reference():
+    """Batch scoring gives exactly the previous scores, filter reasons and order."""
+    for count in (1000, 10000):
+        cases = _synthetic_cases(count)
+        reference_valid, reference_invalid = _reference_analyze(cases, PROFILE)
+        analysis = CaseAnalysisService.analyze_cases(cases, PROFILE)
+        assert [c.model_dump() for c in analysis["validCases"]] == [c.model_dump() for c in reference_valid]
+        assert [c.model_dump() for c in analysis["invalidCases"]] == [c.model_dump() for c in reference_invalid]
+
+
+if __name__ == "__main__":
+    import sys
+    print("Case scoring micro-benchmark")
+    print("=" * 60)
+    try:
+        test_batch_scoring_matches_reference()
+    except AssertionError as e:
+        print(f"\n✗ Batch scoring differs from the per-case scores {e}")
+        sys.exit(1)
+    for count in (1000, 10000):
+        benchmark(count)
+    print("\n✓ Batch scoring matches the per-case scores")
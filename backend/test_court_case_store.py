@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test the indexed court case file store on a scratch directory.
+
+Seeds a directory with many case files (including uncompressed files from
+before compression), then checks that lookups are served from the in-memory
+index, that saves are compressed and become the newest entry, and that
+eviction removes old files from disk and from the index.
+"""
+
+import os
+import json
+import time
+import asyncio
+import tempfile
+from pathlib import Path
+
+import routes.court_cases as court_cases
+from routes.court_cases import (
+    FileStorageService,
+    CaseFileIndex,
+    ProfileData,
+    PersonalInfo,
+    SearchParameters,
+    CourtCase,
+)
+
+SEEDED_PROFILES = 2000
+
+
+def _profile(name: str, dob: str = "1985-04-12") -> ProfileData:
+    return ProfileData(personalInfo=PersonalInfo(full_name=name, dob=dob))
+
+
+def _case(cnr: str) -> CourtCase:
+    return CourtCase(
+        score=1.0, cnr=cnr, title="State vs Ravi Kumar", petitioners=["State"],
+        respondents=["Ravi Kumar"], filingDate="2015-01-01", stage="Disposed",
+    )
+
+
+def _stored(file_name: str, profile: ProfileData, timestamp: float) -> dict:
+    return {
+        "profile": profile.model_dump(),
+        "searchParams": SearchParameters().model_dump(),
+        "timestamp": timestamp,
+        "rawCases": [],
+        "validCases": [],
+        "invalidCases": [],
+        "searchSummary": {},
+        "fileName": file_name,
+    }
+
+
+def _seed(directory: Path):
+    """Write legacy uncompressed files: many unrelated profiles plus old/new ones for Ravi Kumar."""
+    now = time.time()
+    for i in range(SEEDED_PROFILES):
+        name = f"person_{i}_1990_2024-01-01.json"
+        (directory / name).write_text(json.dumps(_stored(name, _profile(f"Person {i}", "1990-01-01"), now)))
+
+    old_name = "ravi_kumar_1985_2020-01-01.json"
+    (directory / old_name).write_text(json.dumps(_stored(old_name, _profile("Ravi Kumar"), now - 40 * 86400)))
+    os.utime(directory / old_name, (now - 40 * 86400, now - 40 * 86400))
+
+    recent_name = "ravi_kumar_1985_2024-06-01.json"
+    (directory / recent_name).write_text(json.dumps(_stored(recent_name, _profile("Ravi Kumar"), now - 3600)))
+    os.utime(directory / recent_name, (now - 3600, now - 3600))
+    return old_name, recent_name
+
+
+async def _run(directory: Path):
+    old_name, recent_name = _seed(directory)
+    ravi = _profile("Ravi  KUMAR")
+    results = {}
+
+    await FileStorageService.load_index()
+    results["indexed"] = len(court_cases.CASE_FILE_INDEX.files)
+
+    # Lookups come from the index: time many of them
+    start = time.perf_counter()
+    for _ in range(1000):
+        found = await FileStorageService.find_existing_file(ravi)
+    results["lookupSeconds"] = (time.perf_counter() - start)
+    results["found"] = found
+    results["loadedLegacy"] = (await FileStorageService.load_case_data(found)) is not None
+
+    # A fresh save is compressed and becomes the newest entry
+    saved_name = await FileStorageService.save_case_data(
+        ravi, SearchParameters(), [_case("CNR1")], [_case("CNR1")], [], {"highCourtCases": 1}
+    )
+    results["savedName"] = saved_name
+    results["foundAfterSave"] = await FileStorageService.find_existing_file(ravi)
+    loaded = await FileStorageService.load_case_data(saved_name)
+    results["savedCases"] = [case.cnr for case in loaded.validCases]
+    results["gzipMagic"] = (directory / saved_name).read_bytes()[:2] == b"\x1f\x8b"
+
+    # Files outside the index cannot be loaded
+    results["traversal"] = await FileStorageService.load_case_data("../../etc/passwd")
+
+    # Eviction removes the 40-day-old file from disk and index only
+    results["deleted"] = await FileStorageService.delete_old_files(30)
+    results["oldOnDisk"] = (directory / old_name).exists()
+    results["oldIndexed"] = old_name in court_cases.CASE_FILE_INDEX.files
+    results["recentOnDisk"] = (directory / recent_name).exists()
+    return results
+
+
+def test_court_case_store_is_indexed(monkeypatch):
+    """Lookups use the index, saves are compressed, and eviction keeps index and disk in sync."""
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        monkeypatch.setattr(court_cases.CONFIG, "STORAGE_DIR", directory)
+        monkeypatch.setattr(court_cases, "CASE_FILE_INDEX", CaseFileIndex())
+        results = asyncio.run(_run(directory))
+
+    print(json.dumps(results, indent=2, default=str))
+    assert results["indexed"] == SEEDED_PROFILES + 2
+    assert results["found"] == "ravi_kumar_1985_2024-06-01.json"
+    assert results["loadedLegacy"]
+    assert results["savedName"].endswith(".json.gz")
+    assert results["foundAfterSave"] == results["savedName"]
+    assert results["savedCases"] == ["CNR1"]
+    assert results["gzipMagic"]
+    assert results["traversal"] is None
+    assert results["deleted"] == 1
+    assert not results["oldOnDisk"]
+    assert not results["oldIndexed"]
+    assert results["recentOnDisk"]
+    # 1000 lookups against 2000 files should take well under a second
+    assert results["lookupSeconds"] < 0.5
+
+
+if __name__ == "__main__":
+    import sys
+    import pytest
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test the concurrent query x page fan-out of court case searches.
+
+CourtAPIService.make_api_call is replaced by a fake Lexient API with a fixed
+latency and a known number of results per address, so the test can check
+that the search runs concurrently within the limit, stops (and cancels
+speculative requests) after a short page, and returns cases in the same
+order as a sequential search.
+"""
+
+import time
+import asyncio
+
+import routes.court_cases as court_cases
+from routes.court_cases import CourtAPIService, ProfileData, PersonalInfo, SearchParameters
+
+LATENCY = 0.1  # seconds per fake API call
+MAX_PAGES = 4
+PER_PAGE = 10
+# Results available per address: full pages, a short page, none, one exactly full page
+RESULTS_BY_ADDRESS = {"Pune": 35, "Nagpur": 4, "Nashik": 0, "Thane": 10}
+
+
+class FakeLexient:
+    def __init__(self):
+        self.calls = []
+        self.cancelled = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, url, payload, page=1):
+        self.calls.append((payload["address"], page))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(LATENCY)
+        except asyncio.CancelledError:
+            self.cancelled.append((payload["address"], page))
+            raise
+        finally:
+            self.in_flight -= 1
+
+        total = RESULTS_BY_ADDRESS[payload["address"]]
+        start = (page - 1) * PER_PAGE
+        return {"data": [
+            {
+                "score": 1.0,
+                "cnr": f"{payload['address']}-{index}",
+                "title": f"State vs Ravi Kumar ({payload['address']})",
+                "petitioners": ["State"],
+                "respondents": ["Ravi Kumar"],
+                "filingDate": "2015-01-01",
+                "stage": "Pending",
+            }
+            for index in range(start, min(start + PER_PAGE, total))
+        ]}
+
+
+def _expected_cnrs():
+    """Cases in query order, then page order (the sequential order)."""
+    cnrs = []
+    for address, total in RESULTS_BY_ADDRESS.items():
+        cnrs += [f"{address}-{index}" for index in range(min(total, MAX_PAGES * PER_PAGE))]
+    return cnrs
+
+
+def test_court_search_fans_out_with_deterministic_order():
+    """Queries and pages run concurrently within the limit; results keep sequential order."""
+    fake = FakeLexient()
+    original_call = CourtAPIService.__dict__["make_api_call"]
+    original_limits = (court_cases.CONFIG.MAX_PAGES, court_cases.CONFIG.RESULTS_PER_PAGE,
+                       court_cases.CONFIG.MAX_CONCURRENT_REQUESTS)
+    CourtAPIService.make_api_call = staticmethod(fake)
+    court_cases.CONFIG.MAX_PAGES = MAX_PAGES
+    court_cases.CONFIG.RESULTS_PER_PAGE = PER_PAGE
+    court_cases.CONFIG.MAX_CONCURRENT_REQUESTS = 4
+
+    profile = ProfileData(personalInfo=PersonalInfo(full_name="Ravi Kumar"), addresses=list(RESULTS_BY_ADDRESS))
+
+    try:
+        start = time.perf_counter()
+        cases = asyncio.run(CourtAPIService.search_high_court(profile, SearchParameters()))
+        elapsed = time.perf_counter() - start
+    finally:
+        CourtAPIService.make_api_call = original_call
+        (court_cases.CONFIG.MAX_PAGES, court_cases.CONFIG.RESULTS_PER_PAGE,
+         court_cases.CONFIG.MAX_CONCURRENT_REQUESTS) = original_limits
+
+    # A sequential search makes one call per page up to and including the first short page
+    sequential_calls = sum(min(total // PER_PAGE + 1, MAX_PAGES) for total in RESULTS_BY_ADDRESS.values())
+    print(f"{len(fake.calls)} calls ({len(fake.cancelled)} cancelled), max in flight {fake.max_in_flight}, "
+          f"{elapsed:.2f}s vs ~{sequential_calls * LATENCY:.2f}s sequential")
+
+    assert [case.cnr for case in cases] == _expected_cnrs()
+    assert all(case.court == "High Court" for case in cases)
+    assert fake.max_in_flight <= 4
+    # Pune needs pages 1-4 (page 4 is short); nothing beyond MAX_PAGES is ever requested
+    assert ("Pune", 4) in fake.calls and all(page <= MAX_PAGES for _, page in fake.calls)
+    # Thane's second page is empty, so its speculative third page is never started or is cancelled
+    assert ("Thane", 3) not in fake.calls or ("Thane", 3) in fake.cancelled
+    assert elapsed < sequential_calls * LATENCY * 0.75
+
+
+if __name__ == "__main__":
+    import sys
+    import pytest
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
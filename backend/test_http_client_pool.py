@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test the per-host client pool in utils.http_client.
+
+Starts two local stub upstreams that answer slowly and record how many
+requests they are serving at once and from which client connections, then
+sends concurrent requests to both. Each host must get one reused client,
+its in-flight requests must stay within the host's concurrency cap over a
+handful of keep-alive connections, and close_http_clients must close every
+client so the next request starts a fresh one.
+"""
+
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import utils.http_client as http_client
+
+UPSTREAM_DELAY = 0.1  # seconds per stubbed request
+CONCURRENT_CALLS = 12
+
+
+def _counting_handler():
+    """Handler class with its own counters, so each stub is measured separately."""
+
+    class CountingHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        lock = threading.Lock()
+        in_flight = 0
+        max_in_flight = 0
+        connections = set()
+
+        def do_GET(self):
+            cls = type(self)
+            with cls.lock:
+                cls.in_flight += 1
+                cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+                cls.connections.add(self.client_address[1])
+            time.sleep(UPSTREAM_DELAY)
+            with cls.lock:
+                cls.in_flight -= 1
+            body = json.dumps({"path": self.path}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return CountingHandler
+
+
+@pytest.fixture
+def capped_hosts(stub_server):
+    """Two stub upstreams with in-flight caps of 3 and 5."""
+    servers = [stub_server(_counting_handler()), stub_server(_counting_handler())]
+    limits = dict(zip((server.host for server in servers), (3, 5)))
+    http_client.HOST_CONCURRENCY_LIMITS.update(limits)
+    try:
+        yield servers, limits
+    finally:
+        for host in limits:
+            http_client.HOST_CONCURRENCY_LIMITS.pop(host, None)
+
+
+async def _burst(server):
+    # Distinct, uncoalesced requests so every one reaches the stub
+    return await asyncio.gather(*[
+        http_client.request("GET", f"{server.base_url}/item", params={"i": i}, coalesce=False)
+        for i in range(CONCURRENT_CALLS)
+    ])
+
+
+def test_clients_are_reused_per_host_and_capped(capped_hosts):
+    """One client per host, in-flight requests within each host's cap, connections kept alive."""
+    servers, limits = capped_hosts
+
+    async def _run():
+        first, second = servers
+        start = time.perf_counter()
+        responses = await asyncio.gather(_burst(first), _burst(second))
+        elapsed = time.perf_counter() - start
+        clients = {host: http_client._clients[host][1] for host in limits}
+        # A later burst reuses the same clients
+        await asyncio.gather(_burst(first), _burst(second))
+        reused = all(http_client._clients[host][1] is clients[host] for host in limits)
+        await http_client.close_http_clients()
+        return responses, elapsed, clients, reused
+
+    responses, elapsed, clients, reused = asyncio.run(_run())
+
+    print(f"max in flight {[server.RequestHandlerClass.max_in_flight for server in servers]}, "
+          f"connections {[len(server.RequestHandlerClass.connections) for server in servers]}, "
+          f"first bursts took {elapsed:.2f}s")
+    assert all(response.status_code == 200 for burst in responses for response in burst)
+    assert reused
+    assert clients[servers[0].host] is not clients[servers[1].host]
+    for server in servers:
+        limit = limits[server.host]
+        handler = server.RequestHandlerClass
+        assert handler.max_in_flight == limit
+        # Two bursts of 12 went over no more connections than the cap allows at once
+        assert len(handler.connections) <= limit
+    # The slower host (cap 3) needs four rounds of UPSTREAM_DELAY
+    assert elapsed >= 4 * UPSTREAM_DELAY
+
+
+def test_close_http_clients_closes_every_client(capped_hosts):
+    """Closing drops and closes every pooled client; the next request opens a new one."""
+    servers, limits = capped_hosts
+
+    async def _run():
+        for server in servers:
+            await http_client.request("GET", f"{server.base_url}/warm", coalesce=False)
+        clients = [http_client._clients[host][1] for host in limits]
+        await http_client.close_http_clients()
+        after_close = dict(http_client._clients)
+        await http_client.request("GET", f"{servers[0].base_url}/again", coalesce=False)
+        replacement = http_client._clients[servers[0].host][1]
+        await http_client.close_http_clients()
+        return clients, after_close, replacement
+
+    clients, after_close, replacement = asyncio.run(_run())
+
+    assert all(client.is_closed for client in clients)
+    assert after_close == {}
+    assert replacement not in clients and replacement.is_closed
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,635 @@
+#!/usr/bin/env python3
+"""
+Test the outbound mail queue without a database.
+
+The mail_outbox table is replaced by an in-memory store with the same
+claim / sent / retry / release semantics, and the SMTP server by a fake
+client that counts connections. The test checks that a burst of emails is
+sent over a bounded number of reused connections, that transient failures
+are retried with backoff while 5xx rejections fail at once, that a dropped
+connection returns the rest of its messages to the queue, that the MIME
+message carries the HTML body and attachments, and that the send endpoints
+answer 202 with a message id whose status can be looked up.
+
+Attachments are stored in chunks and the message is streamed to the server
+from a spool file; a 16 MB attachment is sent with a few MB of peak Python
+memory, and the endpoints take the PDF as a multipart upload or as a
+reference to a cached report. The streamed DATA stage is also sent to a
+real local SMTP server (aiosmtpd, skipped if not installed) to check it
+against aiosmtplib's actual protocol.
+"""
+
+import os
+import json
+import time
+import asyncio
+import socket
+import hashlib
+import tempfile
+import tracemalloc
+from datetime import datetime, timezone, timedelta
+from email import message_from_bytes
+from email.policy import default as default_policy
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import aiosmtplib
+
+import services.mailQueue as mail_queue_module
+import routes.mail_queue as mail_queue_route
+import routes.send_business_email as send_business_email_route
+import utils.mail_attachments as mail_attachments
+from services.mailQueue import MailQueue, SMTPConnectionPool, spool_message, send_spooled, is_permanent_failure
+from services.mailService import EmailData
+from services.pdfCache import PDFCache
+
+SEND_LATENCY = 0.005
+OUTBOX_CHUNK_BYTES = 256 * 1024
+LARGE_ATTACHMENT_BYTES = 16 * 1024 * 1024
+
+
+class InMemoryOutbox:
+    """Stands in for mail_outbox / mail_outbox_attachments."""
+
+    def __init__(self):
+        self.messages = {}
+        self.attachments = {}
+
+    async def enqueue_mail(self, message_id, kind, user_id, subject, recipients, body, html_body=None, attachments=None):
+        now = datetime.now(timezone.utc)
+        self.messages[message_id] = {"message_id": message_id, "kind": kind,
+                                     "user_id": int(user_id) if user_id and str(user_id).isdigit() else None,
+                                     "subject": subject, "recipients": recipients, "body": body,
+                                     "html_body": html_body, "status": "pending", "attempts": 0,
+                                     "last_error": None, "next_attempt_at": now, "sent_at": None,
+                                     "created_at": now, "retry_delay": None}
+        self.attachments[message_id] = []
+        for position, (filename, content_type, stream) in enumerate(attachments or []):
+            chunks = list(iter(lambda: stream.read(OUTBOX_CHUNK_BYTES), b""))
+            self.attachments[message_id].append({"position": position, "filename": filename,
+                                                 "content_type": content_type,
+                                                 "size": sum(len(chunk) for chunk in chunks), "chunks": chunks})
+
+    async def claim_mail(self, limit, lease_seconds):
+        now = datetime.now(timezone.utc)
+        due = sorted(
+            (message for message in self.messages.values()
+             if message["status"] == "pending" and message["next_attempt_at"] <= now),
+            key=lambda message: message["created_at"]
+        )[:limit]
+        for message in due:
+            message.update(status="sending", attempts=message["attempts"] + 1)
+        return [dict(message) for message in due]
+
+    async def get_mail_attachments(self, message_id):
+        return [{key: value for key, value in attachment.items() if key != "chunks"}
+                for attachment in self.attachments.get(message_id, [])]
+
+    async def read_mail_attachment_chunk(self, message_id, position, chunk_index):
+        chunks = self.attachments[message_id][position]["chunks"]
+        return chunks[chunk_index] if chunk_index < len(chunks) else None
+
+    async def mark_mail_sent(self, message_ids):
+        for message_id in message_ids:
+            self.messages[message_id].update(status="sent", sent_at=datetime.now(timezone.utc), last_error=None)
+            self.attachments.pop(message_id, None)
+
+    async def mark_mail_retry(self, message_id, error, delay_seconds):
+        self.messages[message_id].update(
+            status="pending", last_error=error, retry_delay=delay_seconds,
+            next_attempt_at=datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
+        )
+
+    async def mark_mail_failed(self, message_id, error):
+        self.messages[message_id].update(status="failed", last_error=error)
+        self.attachments.pop(message_id, None)
+
+    async def release_mail(self, message_ids):
+        for message_id in message_ids:
+            message = self.messages[message_id]
+            if message["status"] == "sending":
+                message.update(status="pending", attempts=max(message["attempts"] - 1, 0))
+
+    async def get_mail_status(self, message_id):
+        return self.messages.get(message_id)
+
+    def by_status(self, status):
+        return [message for message in self.messages.values() if message["status"] == status]
+
+
+class FakeSMTPServer:
+    """Hands out fake SMTP clients and records what they deliver."""
+
+    def __init__(self, fail=None):
+        # fail(subject, client) -> exception to raise for that message, or None
+        self.fail = fail or (lambda subject, client: None)
+        self.connects = 0
+        self.delivered = []
+        self.open = 0
+        self.max_open = 0
+        self.drains = 0
+
+    async def connect(self):
+        self.connects += 1
+        return FakeSMTPClient(self)
+
+
+class FakeSMTPClient:
+    """Speaks the parts of aiosmtplib.SMTP that send_spooled uses; DATA goes to a temp file."""
+
+    timeout = 30
+
+    def __init__(self, server):
+        self.server = server
+        self.is_connected = True
+        self.sent = 0
+        self.protocol = self
+        self.recipients = []
+        self.data = None
+
+    async def mail(self, sender):
+        self.recipients = []
+
+    async def rcpt(self, recipient):
+        if recipient.startswith("refused"):
+            raise aiosmtplib.SMTPRecipientRefused(550, "No such user", recipient)
+        self.recipients.append(recipient)
+
+    async def rset(self):
+        self.recipients = []
+
+    async def execute_command(self, *args):
+        assert args == (b"DATA",)
+        self.data = tempfile.TemporaryFile()
+        return aiosmtplib.SMTPResponse(354, "Start mail input")
+
+    def write(self, data):
+        if not self.is_connected:
+            raise aiosmtplib.SMTPServerDisconnected("Connection lost")
+        self.data.write(data)
+
+    async def _drain_helper(self):
+        self.server.drains += 1
+        await asyncio.sleep(0)
+
+    async def read_response(self, timeout=None):
+        server = self.server
+        server.open += 1
+        server.max_open = max(server.max_open, server.open)
+        try:
+            await asyncio.sleep(SEND_LATENCY)
+            self.data.seek(0)
+            headers = b"".join(iter(lambda: _header_line(self.data), b""))
+            subject = message_from_bytes(headers)["Subject"]
+            error = server.fail(subject, self)
+            if error is not None:
+                if isinstance(error, aiosmtplib.SMTPServerDisconnected):
+                    self.is_connected = False
+                raise error
+            self.sent += 1
+            server.delivered.append({"Subject": subject, "recipients": self.recipients, "data": self.data})
+            return aiosmtplib.SMTPResponse(250, "Queued")
+        finally:
+            server.open -= 1
+
+    async def quit(self):
+        self.is_connected = False
+
+    def close(self):
+        self.is_connected = False
+
+
+def _header_line(stream):
+    line = stream.readline()
+    return b"" if line in (b"\r\n", b"") else line
+
+
+def _received(delivered):
+    """Undo the DATA transparency and parse a delivered message."""
+    stream = delivered["data"]
+    stream.seek(0)
+    lines = stream.read().split(b"\r\n")
+    assert lines[-2:] == [b".", b""], "DATA not terminated"
+    body = b"\r\n".join(line[1:] if line.startswith(b".") else line for line in lines[:-2])
+    return message_from_bytes(body, policy=default_policy)
+
+
+NAMES = ["enqueue_mail", "claim_mail", "get_mail_attachments", "read_mail_attachment_chunk", "mark_mail_sent",
+         "mark_mail_retry", "mark_mail_failed", "release_mail"]
+
+
+def _install(store):
+    originals = {name: getattr(mail_queue_module, name) for name in NAMES}
+    for name in NAMES:
+        setattr(mail_queue_module, name, getattr(store, name))
+    return originals
+
+
+def _uninstall(originals):
+    for name, value in originals.items():
+        setattr(mail_queue_module, name, value)
+
+
+def _queue(server, connections=2, **kwargs):
+    pool = SMTPConnectionPool(size=connections, max_messages=100, idle_seconds=60, connect=server.connect)
+    return MailQueue(poll_interval_ms=20, smtp_pool=pool, enabled=True, **kwargs)
+
+
+def _email(index):
+    return EmailData(subject=f"Report {index}", recipients=[f"user{index}@example.com"],
+                     body=f"Report {index}", html_body=f"<p>Report {index}</p>")
+
+
+async def _wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for the sender"
+        await asyncio.sleep(0.01)
+
+
+def test_burst_is_sent_over_reused_connections():
+    """60 queued emails go out over two connections that are kept open between batches."""
+    store = InMemoryOutbox()
+    server = FakeSMTPServer()
+    originals = _install(store)
+
+    async def _run():
+        queue = _queue(server, batch_size=20)
+        start = time.perf_counter()
+        ids = [await queue.enqueue(_email(index), kind="test") for index in range(60)]
+        await _wait_until(lambda: len(store.by_status("sent")) == 60)
+        elapsed = time.perf_counter() - start
+        stats = queue.get_stats()
+        await queue.stop()
+        return ids, elapsed, stats
+
+    try:
+        ids, elapsed, stats = asyncio.run(_run())
+    finally:
+        _uninstall(originals)
+
+    print(f"60 emails in {elapsed:.2f}s over {server.connects} connections "
+          f"(sequential ~{60 * SEND_LATENCY:.2f}s), stats {stats}")
+    assert len(set(ids)) == 60
+    assert server.connects == 2
+    assert server.max_open == 2
+    assert stats["sent"] == 60 and stats["smtp"]["reuses"] > 0
+    assert sorted(message["Subject"] for message in server.delivered) == sorted(f"Report {i}" for i in range(60))
+
+
+def test_transient_failures_retry_and_rejections_fail():
+    """A 4xx is retried with growing delays up to the attempt limit; a 5xx fails at once."""
+    store = InMemoryOutbox()
+    server = FakeSMTPServer(fail=lambda subject, client: {
+        "Report 0": aiosmtplib.SMTPResponseException(451, "Try again later"),
+        "Report 2": aiosmtplib.SMTPResponseException(550, "Mailbox unavailable"),
+    }.get(subject))
+    originals = _install(store)
+
+    async def _run():
+        queue = _queue(server, max_attempts=3, retry_base_seconds=30, retry_max_seconds=3600)
+        for index in range(4):
+            recipient = "refused@example.com" if index == 1 else f"u{index}@example.com"
+            await store.enqueue_mail(f"m{index}", "test", None, f"Report {index}", [recipient], "body")
+        delays = []
+        for _ in range(3):
+            await queue.send_batch(await store.claim_mail(10, 300))
+            delays.append(store.messages["m0"]["retry_delay"])
+            store.messages["m0"]["next_attempt_at"] = datetime.now(timezone.utc)
+        stats = queue.get_stats()
+        await queue.stop()
+        return delays, stats
+
+    try:
+        delays, stats = asyncio.run(_run())
+    finally:
+        _uninstall(originals)
+
+    assert store.messages["m3"]["status"] == "sent"
+    assert store.messages["m1"]["status"] == "failed" and store.messages["m1"]["attempts"] == 1
+    assert "SMTPRecipientsRefused" in store.messages["m1"]["last_error"]
+    assert store.messages["m2"]["status"] == "failed" and "550" in store.messages["m2"]["last_error"]
+    assert store.messages["m0"]["status"] == "failed" and store.messages["m0"]["attempts"] == 3
+    assert 24 <= delays[0] <= 36 and 48 <= delays[1] <= 72
+    assert stats["retried"] == 2 and stats["failed"] == 3
+    assert is_permanent_failure(aiosmtplib.SMTPResponseException(554, "Rejected"))
+    assert not is_permanent_failure(aiosmtplib.SMTPAuthenticationError(535, "Bad credentials"))
+    assert not is_permanent_failure(aiosmtplib.SMTPServerDisconnected("gone"))
+
+
+def test_dropped_connection_releases_the_rest_of_its_messages():
+    """When the server hangs up, the remaining messages go back to the queue without an attempt counted."""
+    store = InMemoryOutbox()
+    server = FakeSMTPServer(fail=lambda subject, client: (
+        aiosmtplib.SMTPServerDisconnected("Connection lost") if client.sent == 2 and server.connects == 1 else None
+    ))
+    originals = _install(store)
+
+    async def _run():
+        queue = _queue(server, connections=1)
+        for index in range(6):
+            await store.enqueue_mail(f"m{index}", "test", None, f"Report {index}", [f"u{index}@example.com"], "body")
+        await queue.send_batch(await store.claim_mail(10, 300))
+        after_drop = {message_id: dict(message) for message_id, message in store.messages.items()}
+        store.messages["m2"]["next_attempt_at"] = datetime.now(timezone.utc)
+        await queue.send_batch(await store.claim_mail(10, 300))
+        await queue.stop()
+        return after_drop
+
+    try:
+        after_drop = asyncio.run(_run())
+    finally:
+        _uninstall(originals)
+
+    assert [after_drop[f"m{i}"]["status"] for i in range(6)] == ["sent", "sent", "pending", "pending", "pending", "pending"]
+    assert after_drop["m2"]["attempts"] == 1 and after_drop["m2"]["retry_delay"] is not None
+    assert [after_drop[f"m{i}"]["attempts"] for i in range(3, 6)] == [0, 0, 0]
+    assert server.connects == 2
+    assert len(store.by_status("sent")) == 6
+
+
+def test_streamed_message_has_html_and_attachment():
+    """The streamed message has a text part, an HTML alternative, the attachment and the queue id."""
+    store = InMemoryOutbox()
+    server = FakeSMTPServer()
+    originals = _install(store)
+    pdf = b"%PDF-1.4 fake report\n" + bytes(range(256)) * 1000
+    message = {"message_id": "abc-123", "subject": "Report", "recipients": ["a@example.com", "b@example.com"],
+               "body": "Plain text\n.leading dot\n", "html_body": "<p>HTML</p>"}
+
+    async def _run():
+        await store.enqueue_mail("abc-123", "test", None, "Report", message["recipients"], message["body"],
+                                 message["html_body"], [("report.pdf", "application/pdf", _bytes_file(pdf))])
+        client = await server.connect()
+        with tempfile.SpooledTemporaryFile(max_size=1024) as spool:
+            await spool_message(message, await store.get_mail_attachments("abc-123"), spool)
+            spool.seek(0)
+            await send_spooled(client, "sender@example.com", message["recipients"], spool)
+
+    try:
+        asyncio.run(_run())
+    finally:
+        _uninstall(originals)
+
+    assert len(store.attachments["abc-123"][0]["chunks"]) == 1
+    assert server.delivered[0]["recipients"] == ["a@example.com", "b@example.com"]
+    parsed = _received(server.delivered[0])
+    assert parsed["To"] == "a@example.com, b@example.com"
+    assert parsed["Message-ID"].startswith("<abc-123@")
+    types = [part.get_content_type() for part in parsed.walk()]
+    assert types[0] == "multipart/mixed"
+    assert "text/plain" in types and "text/html" in types and "application/pdf" in types
+    text = next(part for part in parsed.walk() if part.get_content_type() == "text/plain")
+    assert text.get_content().replace("\r\n", "\n") == "Plain text\n.leading dot\n"
+    attachment = next(part for part in parsed.walk() if part.get_content_type() == "application/pdf")
+    assert attachment.get_filename() == "report.pdf"
+    assert attachment.get_payload(decode=True) == pdf
+
+
+def test_large_attachment_is_sent_with_bounded_memory():
+    """A 16 MB attachment streams from the outbox to the server without being held in memory."""
+    store = InMemoryOutbox()
+    server = FakeSMTPServer()
+    originals = _install(store)
+    pdf = os.urandom(LARGE_ATTACHMENT_BYTES)
+    digest = hashlib.sha256(pdf).hexdigest()
+
+    async def _run():
+        queue = _queue(server, connections=1)
+        await store.enqueue_mail("big", "test", None, "Big report", ["u@example.com"], "body", None,
+                                 [("big.pdf", "application/pdf", _bytes_file(pdf))])
+        claimed = await store.claim_mail(10, 300)
+        tracemalloc.start()
+        try:
+            await queue.send_batch(claimed)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        await queue.stop()
+        return peak
+
+    try:
+        peak = asyncio.run(_run())
+    finally:
+        _uninstall(originals)
+
+    print(f"{LARGE_ATTACHMENT_BYTES // (1024 * 1024)} MB attachment sent with {peak / (1024 * 1024):.1f} MB "
+          f"peak traced memory, {server.drains} drains")
+    assert store.messages["big"]["status"] == "sent"
+    assert peak < LARGE_ATTACHMENT_BYTES / 4
+    assert server.drains > 100
+    attachment = next(part for part in _received(server.delivered[0]).walk()
+                      if part.get_content_type() == "application/pdf")
+    assert hashlib.sha256(attachment.get_payload(decode=True)).hexdigest() == digest
+
+
+def test_stop_releases_claimed_messages():
+    """Messages being sent at shutdown go back to the queue for the next process."""
+    store = InMemoryOutbox()
+    server = FakeSMTPServer()
+    originals = _install(store)
+
+    async def _hang():
+        await asyncio.sleep(10)
+
+    server.connect = _hang
+
+    async def _run():
+        queue = _queue(server)
+        for index in range(4):
+            await queue.enqueue(_email(index), kind="test")
+        await _wait_until(lambda: len(store.by_status("sending")) == 4)
+        await queue.stop()
+
+    try:
+        asyncio.run(_run())
+    finally:
+        _uninstall(originals)
+
+    assert len(store.by_status("pending")) == 4
+    assert all(message["attempts"] == 0 for message in store.messages.values())
+
+
+def _bytes_file(data):
+    stream = tempfile.SpooledTemporaryFile()
+    stream.write(data)
+    stream.seek(0)
+    return stream
+
+
+def _request(body: bytes, content_type: str) -> Request:
+    async def _receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+    return Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/send-business-email",
+        "query_string": b"",
+        "headers": [(b"content-type", content_type.encode())],
+    }, _receive)
+
+
+def _multipart(payload: dict, filename: str, pdf: bytes):
+    boundary = "test-boundary"
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"payload\"\r\n\r\n{json.dumps(payload)}\r\n"
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"pdf\"; filename=\"{filename}\"\r\n"
+        f"Content-Type: application/pdf\r\n\r\n"
+    ).encode() + pdf + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def test_send_endpoint_attaches_uploads_and_cached_reports():
+    """The business email endpoint takes a multipart upload or a cached report and reports delivery status."""
+    store = InMemoryOutbox()
+    server = FakeSMTPServer()
+    originals = _install(store)
+    queue = _queue(server)
+    cache = PDFCache(max_bytes=1024 * 1024, cache_dir="")
+    cached_pdf = b"%PDF-1.4 cached business report"
+    cache_key = cache.make_key("business-report", "2", {"businessName": "Acme"})
+    cache._put(cache_key, time.time(), cached_pdf)
+    uploaded_pdf = b"%PDF-1.4 uploaded business report"
+    payload = {"email": "owner@example.com", "businessName": "Acme", "businessData": {}}
+
+    async def _fake_user(request):
+        return {"userId": 7, "role": "user"}
+
+    saved = (send_business_email_route.mail_queue, mail_queue_route.get_mail_status,
+             mail_queue_route.get_authenticated_user, mail_attachments.pdf_cache)
+    send_business_email_route.mail_queue = queue
+    mail_queue_route.get_mail_status = store.get_mail_status
+    mail_queue_route.get_authenticated_user = _fake_user
+    mail_attachments.pdf_cache = cache
+
+    async def _run():
+        uploaded = await send_business_email_route.send_business_email(
+            _request(*_multipart(payload, "acme.pdf", uploaded_pdf))
+        )
+        cached = await send_business_email_route.send_business_email(_request(
+            json.dumps({**payload, "pdfCacheKey": cache.etag(cache_key)}).encode(), "application/json"
+        ))
+        try:
+            await send_business_email_route.send_business_email(_request(
+                json.dumps({**payload, "pdfCacheKey": "0" * 64}).encode(), "application/json"
+            ))
+            missing = None
+        except HTTPException as e:
+            missing = e.status_code
+        await _wait_until(lambda: len(store.by_status("sent")) == 2)
+        status = await mail_queue_route.get_queued_mail_status(None, uploaded["messageId"])
+        await queue.stop()
+        return uploaded, cached, missing, status
+
+    try:
+        uploaded, cached, missing, status = asyncio.run(_run())
+    finally:
+        _uninstall(originals)
+        (send_business_email_route.mail_queue, mail_queue_route.get_mail_status,
+         mail_queue_route.get_authenticated_user, mail_attachments.pdf_cache) = saved
+
+    assert uploaded["statusUrl"] == f"/api/mail/{uploaded['messageId']}"
+    assert uploaded["attachmentIncluded"] and cached["attachmentIncluded"]
+    assert missing == 404
+    assert status["status"] == "sent" and status["attempts"] == 1
+    assert status["recipients"] == ["owner@example.com"] and status["sentAt"]
+    attachments = {}
+    for delivered in server.delivered:
+        assert delivered["Subject"] == "Business Verification Report for Acme"
+        part = next(part for part in _received(delivered).walk() if part.get_content_type() == "application/pdf")
+        attachments[part.get_filename()] = part.get_payload(decode=True)
+    assert attachments == {"acme.pdf": uploaded_pdf, "business-verification-report.pdf": cached_pdf}
+
+
+class RecordingHandler:
+    """aiosmtpd handler that keeps delivered messages and refuses some recipients and subjects."""
+
+    def __init__(self):
+        self.delivered = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("refused"):
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        message = message_from_bytes(envelope.original_content, policy=default_policy)
+        if message["Subject"] == "Rejected":
+            return "554 Message rejected"
+        self.delivered.append({"peer": session.peer, "recipients": list(envelope.rcpt_tos),
+                               "content": envelope.original_content, "message": message})
+        return "250 Queued"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_streamed_data_against_a_real_smtp_server():
+    """send_spooled delivers to aiosmtpd over one connection: large, dot-stuffed, refused and rejected mail."""
+    controller_module = pytest.importorskip("aiosmtpd.controller")
+    handler = RecordingHandler()
+    controller = controller_module.Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    store = InMemoryOutbox()
+    originals = _install(store)
+    pdf = os.urandom(3 * 1024 * 1024)
+    body = "First line\n.leading dot\n..two dots\n.\nlast\n"
+
+    async def _send(client, message_id, subject, recipients, attachments=()):
+        message = {"message_id": message_id, "subject": subject, "recipients": recipients,
+                   "body": body, "html_body": "<p>HTML</p>"}
+        await store.enqueue_mail(message_id, "test", None, subject, recipients, body, "<p>HTML</p>",
+                                 [("report.pdf", "application/pdf", _bytes_file(data)) for data in attachments])
+        with tempfile.SpooledTemporaryFile(max_size=1024) as spool:
+            await spool_message(message, await store.get_mail_attachments(message_id), spool)
+            spool.seek(0)
+            await send_spooled(client, "sender@example.com", recipients, spool)
+
+    async def _run():
+        client = aiosmtplib.SMTP(hostname=controller.hostname, port=controller.port, timeout=10)
+        await client.connect()
+        errors = {}
+        try:
+            await _send(client, "large", "Large", ["a@example.com", "refused@example.com"], [pdf])
+            for message_id, subject, recipients in (("nobody", "Nobody", ["refused@example.com"]),
+                                                    ("rejected", "Rejected", ["a@example.com"])):
+                try:
+                    await _send(client, message_id, subject, recipients)
+                except aiosmtplib.SMTPException as e:
+                    errors[message_id] = e
+            # The connection is still usable after both failures
+            await _send(client, "small", "Small", ["b@example.com"])
+        finally:
+            await client.quit()
+        return errors
+
+    try:
+        errors = asyncio.run(_run())
+    finally:
+        _uninstall(originals)
+        controller.stop()
+
+    assert [item["message"]["Subject"] for item in handler.delivered] == ["Large", "Small"]
+    assert len({item["peer"] for item in handler.delivered}) == 1
+    assert handler.delivered[0]["recipients"] == ["a@example.com"]
+    assert isinstance(errors["nobody"], aiosmtplib.SMTPRecipientsRefused) and is_permanent_failure(errors["nobody"])
+    assert isinstance(errors["rejected"], aiosmtplib.SMTPDataError) and errors["rejected"].code == 554
+    for item in handler.delivered:
+        message = item["message"]
+        text = next(part for part in message.walk() if part.get_content_type() == "text/plain")
+        # The server undid the dot-stuffing, so lines starting with "." arrive intact
+        assert text.get_content().replace("\r\n", "\n") == body
+    attachment = next(part for part in handler.delivered[0]["message"].walk()
+                      if part.get_content_type() == "application/pdf")
+    assert attachment.get_payload(decode=True) == pdf
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test the stale-while-revalidate cache in front of NewsAPI.
+
+Starts a local stub NewsAPI that answers slowly and numbers its responses,
+then calls the /news handler directly. Concurrent dashboard loads must
+share one upstream request, repeat loads must be served from the cache
+with an ETag (and a 304 when the browser already has it), stale entries
+must be served immediately while refreshed in the background, and a failing
+NewsAPI must not take down a cached preset.
+"""
+
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import routes.news as news
+from routes.news import NewsCache
+
+UPSTREAM_DELAY = 0.2  # seconds per stubbed NewsAPI request
+
+
+class StubState:
+    hits = 0
+    failing = False
+    lock = threading.Lock()
+
+
+class StubNewsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        with StubState.lock:
+            StubState.hits += 1
+            hit = StubState.hits
+        time.sleep(UPSTREAM_DELAY)
+        if StubState.failing:
+            status, body = 503, b'{"status":"error"}'
+        else:
+            status, body = 200, json.dumps({"status": "ok", "articles": [{"title": f"story {hit}"}]}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _request(if_none_match: str = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/news/", "query_string": b"", "headers": headers})
+
+
+async def _load(filter: str = "tech", if_none_match: str = None):
+    start = time.perf_counter()
+    response = await news.get_news(_request(if_none_match), endpoint="everything", filter=filter, pageSize="20", query="")
+    return response, time.perf_counter() - start
+
+
+def _title(response) -> str:
+    return json.loads(response.body)["articles"][0]["title"]
+
+
+@pytest.fixture
+def news_upstream(stub_server):
+    """Point /news at a stub NewsAPI with a short-lived cache."""
+    server = stub_server(StubNewsHandler)
+    saved = (news.NEWS_API_BASE, news.news_cache)
+    news.NEWS_API_BASE = server.base_url
+    news.news_cache = NewsCache(ttl=0.3, stale_seconds=0.6)
+    StubState.hits, StubState.failing = 0, False
+    try:
+        yield server
+    finally:
+        news.NEWS_API_BASE, news.news_cache = saved
+        StubState.failing = False
+
+
+def _serve(test):
+    async def _run():
+        from utils.http_client import close_http_clients
+        try:
+            return await test()
+        finally:
+            await close_http_clients()
+
+    return asyncio.run(_run())
+
+
+def test_dashboard_loads_share_one_upstream_call(news_upstream):
+    """Concurrent and repeat loads of a preset reach NewsAPI once and carry an ETag."""
+    async def _test():
+        first = await asyncio.gather(*[_load() for _ in range(20)])
+        repeat, repeat_time = await _load()
+        etag = repeat.headers["etag"]
+        not_modified, _ = await _load(if_none_match=etag)
+        other, _ = await _load(filter="ai")
+        return first, repeat, repeat_time, not_modified, other, StubState.hits
+
+    first, repeat, repeat_time, not_modified, other, hits = _serve(_test)
+
+    print(f"20 concurrent loads + repeat -> {hits} upstream calls; repeat served in {repeat_time * 1000:.2f}ms")
+    assert all(response.status_code == 200 and _title(response) == "story 1" for response, _ in first)
+    assert {response.headers["etag"] for response, _ in first} == {repeat.headers["etag"]}
+    assert repeat.headers["x-cache"] == "HIT" and repeat_time < 0.01
+    assert repeat.headers["cache-control"].startswith("public, max-age=")
+    assert "stale-while-revalidate=" in repeat.headers["cache-control"]
+    assert not_modified.status_code == 304 and not_modified.body == b""
+    assert _title(other) == "story 2"
+    assert hits == 2
+
+
+def test_stale_entries_are_served_while_refreshing(news_upstream):
+    """Past its TTL an entry is served at once and replaced by a background refresh."""
+    async def _test():
+        await _load()
+        await asyncio.sleep(0.35)
+        stale, stale_time = await _load()
+        await asyncio.sleep(UPSTREAM_DELAY + 0.1)
+        refreshed, _ = await _load()
+        return stale, stale_time, refreshed, StubState.hits
+
+    stale, stale_time, refreshed, hits = _serve(_test)
+
+    assert stale.headers["x-cache"] == "STALE" and _title(stale) == "story 1"
+    assert stale_time < UPSTREAM_DELAY / 2
+    assert refreshed.headers["x-cache"] == "HIT" and _title(refreshed) == "story 2"
+    assert refreshed.headers["etag"] != stale.headers["etag"]
+    assert hits == 2
+
+
+def test_cached_preset_survives_newsapi_outage(news_upstream):
+    """When NewsAPI fails, an expired entry is served instead of an error; uncached presets fail."""
+    async def _test():
+        await _load()
+        StubState.failing = True
+        await asyncio.sleep(1.0)  # past TTL + stale window
+        fallback, _ = await _load()
+        try:
+            await _load(filter="ai")
+            error = None
+        except HTTPException as e:
+            error = e.status_code
+        return fallback, error
+
+    fallback, error = _serve(_test)
+
+    assert fallback.status_code == 200 and _title(fallback) == "story 1"
+    assert fallback.headers["x-cache"] == "STALE"
+    assert error == 503
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Regression benchmark: upstream calls must not block the event loop.
+
+Starts a local stub upstream that sleeps before answering, then fires
+concurrent requests through the GSTIN, InstaFinancials, NewsAPI, Lexient
+search and court-case paths. Every call in a batch asks for a different
+identifier, so none of them is coalesced with another and each one reaches
+the stub. Total latency for the concurrent batch should stay close to a
+single call, not the sum of all calls.
+"""
+
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+UPSTREAM_DELAY = 0.5  # seconds per stubbed upstream call
+CONCURRENT_CALLS = 10
+# Concurrent batch may take at most this multiple of a single call
+MAX_SLOWDOWN = 2.0
+
+
+class SlowUpstreamHandler(BaseHTTPRequestHandler):
+    """Answers every GET/POST with a small JSON body after UPSTREAM_DELAY."""
+
+    protocol_version = "HTTP/1.1"
+    lock = threading.Lock()
+    hits = 0
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        with SlowUpstreamHandler.lock:
+            SlowUpstreamHandler.hits += 1
+        time.sleep(UPSTREAM_DELAY)
+        body = json.dumps({"data": [], "status": "ok"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+def point_callers_at(base_url: str, monkeypatch):
+    """Redirect every upstream caller under test to the stub server; returns call factories taking an index."""
+    import utils.gstin_verification as gstin_verification
+    import routes.insta_financials as insta_financials
+    import routes.news as news
+    import routes.search as search
+    import routes.court_cases as court_cases
+    from services.authService import auth_service
+
+    async def _fake_token():
+        return "test-token"
+
+    monkeypatch.setattr(auth_service, "get_access_token", _fake_token)
+    monkeypatch.setattr(gstin_verification, "BASE_URL", base_url)
+    monkeypatch.setattr(insta_financials, "INSTA_API_BASE", base_url)
+    monkeypatch.setattr(news, "NEWS_API_BASE", base_url)
+    monkeypatch.setattr(search, "LEXIENT_API_BASE", base_url)
+    monkeypatch.setattr(court_cases.CONFIG, "HIGH_COURT_API", f"{base_url}/api/high-court/search")
+
+    return {
+        "gstin": lambda i: gstin_verification.verify_gstin_advanced(f"27AAAAA{i:04d}A1Z5"),
+        "insta-financials": lambda i: insta_financials._make_insta_api_call(f"U00000MH2000PTC{i:06d}", "insta-summary"),
+        "news": lambda i: news.fetch_news(*news.build_news_request("everything", "tech", "20", f"topic-{i}", "test")),
+        "lexient-search": lambda i: search.call_lexient_api("/api/high-court/search", {"name": f"test-{i}"}, 1, 10),
+        "court-cases": lambda i: court_cases.CourtAPIService.make_api_call(
+            court_cases.CONFIG.HIGH_COURT_API, {"name": f"test-{i}"}
+        ),
+    }
+
+
+async def _measure(make_call, count: int, first: int = 0):
+    """Run `count` distinct calls concurrently; return (elapsed seconds, max event-loop lag)."""
+    max_lag = 0.0
+    done = asyncio.Event()
+
+    async def _ticker():
+        nonlocal max_lag
+        while not done.is_set():
+            before = time.perf_counter()
+            await asyncio.sleep(0.01)
+            max_lag = max(max_lag, time.perf_counter() - before - 0.01)
+
+    ticker = asyncio.create_task(_ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*[make_call(first + i) for i in range(count)])
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticker
+    return elapsed, max_lag
+
+
+async def run_benchmark(calls):
+    from utils.http_client import close_http_clients
+
+    results = {}
+    try:
+        for name, make_call in calls.items():
+            hits_before = SlowUpstreamHandler.hits
+            single, _ = await _measure(make_call, 1)
+            batch, lag = await _measure(make_call, CONCURRENT_CALLS, first=1)
+            results[name] = {"single": single, "batch": batch, "maxLoopLag": lag,
+                             "upstreamHits": SlowUpstreamHandler.hits - hits_before}
+            print(f"{name:18s} single={single * 1000:7.1f}ms  "
+                  f"{CONCURRENT_CALLS}x concurrent={batch * 1000:7.1f}ms  "
+                  f"max loop lag={lag * 1000:6.1f}ms")
+    finally:
+        await close_http_clients()
+    return results
+
+
+def test_upstream_calls_do_not_block_event_loop(stub_server, row_sink, monkeypatch):
+    """Concurrent upstream calls should overlap instead of running back to back."""
+    calls = point_callers_at(stub_server(SlowUpstreamHandler).base_url, monkeypatch)
+    results = asyncio.run(run_benchmark(calls))
+    for name, result in results.items():
+        # Every call went upstream; none was answered by another in-flight request
+        assert result["upstreamHits"] == 1 + CONCURRENT_CALLS, f"{name}: {result['upstreamHits']} upstream hits"
+        assert result["batch"] < result["single"] * MAX_SLOWDOWN, (
+            f"{name}: {CONCURRENT_CALLS} concurrent calls took {result['batch']:.2f}s "
+            f"vs {result['single']:.2f}s for one call"
+        )
+        assert result["maxLoopLag"] < UPSTREAM_DELAY / 2, (
+            f"{name}: event loop was blocked for {result['maxLoopLag']:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
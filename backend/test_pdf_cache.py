@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Test the content-addressed PDF report cache.
+
+PDFGenerationService.generate_pdf is replaced by a fake that takes a fixed
+time and counts renders, so the test can check that repeat and concurrent
+requests for the same report render once, that key order and null fields
+do not change the address, that ETags revalidate without rendering, that
+the in-process tier is bounded by bytes, that the on-disk tier is shared
+between cache instances (workers) and that a cached report can be opened
+by its ETag to attach it to an email.
+"""
+
+import os
+import time
+import asyncio
+import tempfile
+
+from starlette.requests import Request
+
+from services.pdfService import PDFGenerationService
+from services.pdfCache import PDFCache
+import routes.pdf_generation as pdf_generation
+import routes.pdf_generation_puppeteer as pdf_generation_puppeteer
+
+RENDER_TIME = 0.2
+
+
+class FakeRenderer:
+    def __init__(self):
+        self.renders = 0
+
+    async def __call__(self, html_content: str, filename: str) -> bytes:
+        self.renders += 1
+        await asyncio.sleep(RENDER_TIME)
+        return b"%PDF-fake " + filename.encode() + b" " + str(self.renders).encode()
+
+
+def _request(if_none_match: str = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "POST", "path": "/", "query_string": b"", "headers": headers})
+
+
+PROFILE = {
+    "profileData": {
+        "personalInfo": {"fullName": "Ravi Kumar", "panNumber": "ABCDE1234F", "dob": None},
+        "contactInfo": {"mobileNumber": "9999999999"},
+        "formInputs": {"name": "Ravi Kumar"},
+    },
+    "courtCaseData": {"cases": [], "casesFound": 0},
+}
+
+BUSINESS_DATA = {
+    "businessInfo": {"gstin": "27AAAAA0000A1Z5", "legal_name": "Acme Traders"},
+    "contactInfo": {"principal": {"address": "Mumbai"}},
+    "jurisdictionInfo": {},
+    "financialInfo": {},
+    "creditAssessment": {"score": 72, "label": "Good"},
+    "promoters": [],
+    "filingStatus": [],
+}
+
+# Same report: keys in another order and a null field left out
+PROFILE_REORDERED = {
+    "courtCaseData": {"casesFound": 0, "cases": []},
+    "profileData": {
+        "formInputs": {"name": "Ravi Kumar"},
+        "contactInfo": {"mobileNumber": "9999999999"},
+        "personalInfo": {"panNumber": "ABCDE1234F", "fullName": "Ravi Kumar"},
+    },
+}
+
+
+def _with_fakes(test, cache: PDFCache = None):
+    renderer = FakeRenderer()
+    saved = (PDFGenerationService.generate_pdf, pdf_generation.pdf_cache, pdf_generation_puppeteer.pdf_cache)
+    cache = cache or PDFCache()
+    PDFGenerationService.generate_pdf = staticmethod(renderer)
+    pdf_generation.pdf_cache = pdf_generation_puppeteer.pdf_cache = cache
+    try:
+        return asyncio.run(test()), renderer, cache
+    finally:
+        (PDFGenerationService.generate_pdf, pdf_generation.pdf_cache, pdf_generation_puppeteer.pdf_cache) = saved
+
+
+def test_repeat_requests_render_once():
+    """Preview, download and concurrent requests of one report share a single render."""
+    async def _test():
+        first = await pdf_generation_puppeteer.generate_puppeteer_pdf(PROFILE, _request())
+        start = time.perf_counter()
+        repeat = await pdf_generation_puppeteer.generate_puppeteer_pdf(PROFILE_REORDERED, _request())
+        repeat_time = time.perf_counter() - start
+        other = dict(PROFILE, courtCaseData={"cases": [], "casesFound": 1})
+        concurrent = await asyncio.gather(*[
+            pdf_generation_puppeteer.generate_puppeteer_pdf(other, _request()) for _ in range(5)
+        ])
+        return first, repeat, repeat_time, concurrent
+
+    (first, repeat, repeat_time, concurrent), renderer, cache = _with_fakes(_test)
+
+    print(f"repeat report served in {repeat_time * 1000:.2f}ms; {renderer.renders} renders; {cache.get_stats()}")
+    assert first.headers["x-cache"] == "MISS" and repeat.headers["x-cache"] == "HIT"
+    assert repeat.body == first.body and repeat.headers["etag"] == first.headers["etag"]
+    assert repeat_time < 0.01
+    assert len({response.body for response in concurrent}) == 1
+    assert concurrent[0].headers["etag"] != first.headers["etag"]
+    assert renderer.renders == 2
+    assert cache.get_stats()["joined"] == 4
+
+
+def test_etag_revalidates_without_rendering():
+    """A client presenting the report's ETag gets a 304, even after the PDF was evicted."""
+    async def _test():
+        data = pdf_generation.GeneratePDFRequest(businessName="Acme Traders", businessData=BUSINESS_DATA)
+        first = await pdf_generation.generate_pdf(data, _request())
+        pdf_generation.pdf_cache.clear()
+        revalidated = await pdf_generation.generate_pdf(data, _request(first.headers["etag"]))
+        # Weak comparison: the strong form of the same tag matches too
+        strong = await pdf_generation.generate_pdf(data, _request(first.headers["etag"].removeprefix("W/")))
+        changed = pdf_generation.GeneratePDFRequest(businessName="Acme Traders Pvt", businessData=BUSINESS_DATA)
+        stale = await pdf_generation.generate_pdf(changed, _request(first.headers["etag"]))
+        return first, revalidated, strong, stale
+
+    (first, revalidated, strong, stale), renderer, _ = _with_fakes(_test)
+
+    assert first.status_code == 200 and first.headers["cache-control"] == "private, no-cache"
+    assert first.headers["etag"].startswith('W/"')
+    assert revalidated.status_code == 304 and revalidated.body == b""
+    assert revalidated.headers["etag"] == first.headers["etag"]
+    assert strong.status_code == 304
+    assert stale.status_code == 200 and stale.headers["etag"] != first.headers["etag"]
+    assert renderer.renders == 2
+
+
+def test_memory_tier_is_bounded_by_bytes():
+    """The least recently used reports are evicted once the byte budget is exceeded."""
+    cache = PDFCache(max_bytes=100)
+
+    async def _test():
+        async def render_50():
+            return b"x" * 50
+        for key in ("a", "b"):
+            await cache.get_or_render(key, render_50)
+        await cache.get_or_render("a", render_50)  # "a" is now most recently used
+        await cache.get_or_render("c", render_50)  # evicts "b"
+        return [key for key in ("a", "b", "c") if key in cache._entries]
+
+    kept = asyncio.run(_test())
+    assert kept == ["a", "c"]
+    assert cache.get_stats()["bytes"] == 100 and cache.get_stats()["evictions"] == 1
+
+
+def test_disk_tier_is_shared_between_workers():
+    """A report rendered by one worker is read from disk by another; expired files are re-rendered."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        async def _test():
+            first = await pdf_generation_puppeteer.generate_puppeteer_pdf(PROFILE, _request())
+            # Another worker process: empty memory tier, same directory
+            pdf_generation_puppeteer.pdf_cache = PDFCache(cache_dir=cache_dir)
+            second = await pdf_generation_puppeteer.generate_puppeteer_pdf(PROFILE, _request())
+            files = [name for _, _, names in os.walk(cache_dir) for name in names]
+            # An email endpoint attaches the report by its ETag, read from disk
+            with PDFCache(cache_dir=cache_dir).open(second.headers["etag"]) as stream:
+                attached = stream.read()
+            traversal = PDFCache(cache_dir=cache_dir).open("../../etc/passwd")
+            # Age the file past the TTL
+            path = pdf_generation_puppeteer.pdf_cache._path(pdf_generation_puppeteer.pdf_cache.make_key(
+                "profile-report", pdf_generation_puppeteer.PROFILE_REPORT_TEMPLATE_VERSION, PROFILE))
+            old = time.time() - pdf_generation_puppeteer.pdf_cache.ttl - 1
+            os.utime(path, (old, old))
+            pdf_generation_puppeteer.pdf_cache = PDFCache(cache_dir=cache_dir)
+            third = await pdf_generation_puppeteer.generate_puppeteer_pdf(PROFILE, _request())
+            return first, second, files, third, attached, traversal
+
+        (first, second, files, third, attached, traversal), renderer, _ = _with_fakes(_test, PDFCache(cache_dir=cache_dir))
+
+    assert second.headers["x-cache"] == "HIT" and second.body == first.body
+    assert len(files) == 1 and files[0].endswith(".pdf")
+    assert attached == first.body and traversal is None
+    assert third.headers["x-cache"] == "MISS" and third.body != first.body
+    assert renderer.renders == 2
+
+
+if __name__ == "__main__":
+    import sys
+    print("PDF cache tests")
+    print("=" * 60)
+    try:
+        test_repeat_requests_render_once()
+        test_etag_revalidates_without_rendering()
+        test_memory_tier_is_bounded_by_bytes()
+        test_disk_tier_is_shared_between_workers()
+        print("\n✓ Repeat reports are served from the cache")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n✗ Assertion failed {e}")
+        sys.exit(1)
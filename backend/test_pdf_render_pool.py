@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test the PDF render worker pool.
+
+WeasyPrint is replaced by render functions defined here that sleep for the
+time given in the "HTML", so the test can check that renders run in worker
+processes without blocking the event loop, that each worker is initialized
+once, that a full queue rejects new renders at once (503 from the service),
+and that a stuck render times out and its workers are replaced.
+"""
+
+import os
+import time
+import asyncio
+
+from fastapi import HTTPException
+
+import services.pdfService as pdf_service
+from services.pdfRenderPool import PDFRenderPool, PDFRenderBusyError
+
+# Set in each worker process by _fake_init
+_initialized = 0
+
+
+def _fake_init():
+    global _initialized
+    _initialized += 1
+
+
+def _fake_render(html_content: str) -> bytes:
+    """'Render' by sleeping for the seconds given in the document."""
+    time.sleep(float(html_content))
+    return f"%PDF-fake pid={os.getpid()} init={_initialized}".encode()
+
+
+def _pool(**overrides) -> PDFRenderPool:
+    settings = dict(workers=2, queue_size=4, timeout_ms=5000, initializer=_fake_init, render=_fake_render)
+    settings.update(overrides)
+    return PDFRenderPool(**settings)
+
+
+def test_renders_run_off_the_event_loop():
+    """Concurrent renders run in parallel workers while the event loop stays responsive."""
+    async def _run():
+        pool = _pool()
+        await pool.start()
+        max_lag = 0.0
+        done = asyncio.Event()
+
+        async def _ticker():
+            nonlocal max_lag
+            while not done.is_set():
+                before = time.perf_counter()
+                await asyncio.sleep(0.01)
+                max_lag = max(max_lag, time.perf_counter() - before - 0.01)
+
+        ticker = asyncio.create_task(_ticker())
+        start = time.perf_counter()
+        results = await asyncio.gather(*[pool.render_pdf("0.3") for _ in range(4)])
+        elapsed = time.perf_counter() - start
+        done.set()
+        await ticker
+        stats = pool.get_stats()
+        pool.stop()
+        return results, elapsed, max_lag, stats
+
+    results, elapsed, max_lag, stats = asyncio.run(_run())
+
+    print(f"4 renders of 0.3s on 2 workers in {elapsed:.2f}s, max loop lag {max_lag * 1000:.1f}ms, stats {stats}")
+    assert all(result.startswith(b"%PDF-fake") for result in results)
+    # Two workers, each initialized exactly once
+    assert len({result.split()[1] for result in results}) == 2
+    assert all(result.endswith(b"init=1") for result in results)
+    assert 0.55 <= elapsed < 1.0
+    assert max_lag < 0.05
+    assert stats["completed"] == 4 and stats["inFlight"] == 0
+
+
+def test_full_queue_rejects_new_renders():
+    """Renders beyond workers + queue are refused at once; the service answers 503."""
+    saved = pdf_service.pdf_render_pool
+
+    async def _run():
+        pool = _pool(workers=1, queue_size=1)
+        pdf_service.pdf_render_pool = pool
+        await pool.start()
+        accepted = [asyncio.ensure_future(pool.render_pdf("0.3")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        start = time.perf_counter()
+        try:
+            await pool.render_pdf("0.3")
+            rejected = False
+        except PDFRenderBusyError:
+            rejected = True
+        rejected_in = time.perf_counter() - start
+        try:
+            await pdf_service.PDFGenerationService.generate_pdf("0.3", "report.pdf")
+            http_error = None
+        except HTTPException as e:
+            http_error = e
+        results = await asyncio.gather(*accepted)
+        stats = pool.get_stats()
+        pool.stop()
+        return rejected, rejected_in, http_error, results, stats
+
+    try:
+        rejected, rejected_in, http_error, results, stats = asyncio.run(_run())
+    finally:
+        pdf_service.pdf_render_pool = saved
+
+    assert rejected and rejected_in < 0.01
+    assert http_error.status_code == 503 and http_error.headers["Retry-After"]
+    assert len(results) == 2
+    assert stats["rejected"] == 2 and stats["completed"] == 2
+
+
+def test_stuck_render_times_out_and_workers_are_replaced():
+    """A render past the timeout fails fast; the next render gets a fresh worker."""
+    async def _run():
+        pool = _pool(workers=1, timeout_ms=300)
+        await pool.start()
+        first_pid = (await pool.render_pdf("0")).split()[1]
+        start = time.perf_counter()
+        try:
+            await pool.render_pdf("30")
+            timed_out = False
+        except asyncio.TimeoutError:
+            timed_out = True
+        elapsed = time.perf_counter() - start
+        after = await pool.render_pdf("0")
+        stats = pool.get_stats()
+        pool.stop()
+        return first_pid, timed_out, elapsed, after, stats
+
+    first_pid, timed_out, elapsed, after, stats = asyncio.run(_run())
+
+    assert timed_out and elapsed < 1.0
+    assert after.startswith(b"%PDF-fake") and after.split()[1] != first_pid
+    assert stats["timeouts"] == 1 and stats["restarts"] == 1
+    assert stats["completed"] == 2 and stats["failed"] == 1
+
+
+if __name__ == "__main__":
+    import sys
+    print("PDF render pool tests")
+    print("=" * 60)
+    try:
+        test_renders_run_off_the_event_loop()
+        test_full_queue_rejects_new_renders()
+        test_stuck_render_times_out_and_workers_are_replaced()
+        print("\n✓ PDFs render in bounded worker processes")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n✗ Assertion failed {e}")
+        sys.exit(1)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test that identical concurrent upstream requests are sent once.
+
+Starts a local stub that answers slowly and counts requests per path, then
+fires concurrent identical tracked calls from different users through the
+GET and POST helpers. Each lookup must be hit once, while every caller still
+gets its own analytics row with only one of them charged. POSTs that start
+an async job are not shared, so each caller gets its own upstream request.
+"""
+
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+UPSTREAM_DELAY = 0.2  # seconds per stubbed request
+CONCURRENT_CALLS = 10
+
+
+class StubState:
+    hits = {}
+    lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _answer(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        with StubState.lock:
+            key = (self.command, self.path.split("?")[0])
+            StubState.hits[key] = StubState.hits.get(key, 0) + 1
+        time.sleep(UPSTREAM_DELAY)
+        body = json.dumps({"data": {"path": self.path}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _answer
+    do_POST = _answer
+
+    def log_message(self, format, *args):
+        pass
+
+
+async def _run(base_url: str):
+    from utils.api_tracking import track_external_api_call
+    from utils.http_client import fetch_with_timeout, post_with_timeout, close_http_clients
+
+    async def _get(pan_number: str, order: int):
+        # Same parameters in a different order are the same request
+        query = f"pan_number={pan_number}&mode=full" if order % 2 else f"mode=full&pan_number={pan_number}"
+        return await fetch_with_timeout(f"{base_url}/verification/epfo/pan-to-uan?{query}", {"x-api-key": "k"})
+
+    async def _post(pan_number: str):
+        return await post_with_timeout(f"{base_url}/verification/epfo/pan-to-uan", {"x-api-key": "k"},
+                                       {"pan_number": pan_number}, coalesce=True)
+
+    async def _initiate(dl_number: str):
+        return await post_with_timeout(f"{base_url}/verification/post-driving-license?dl_number={dl_number}",
+                                       {"x-api-key": "k"})
+
+    try:
+        get_results = await asyncio.gather(*[
+            track_external_api_call(str(100 + i), f"user-{i}", "user", "verification/epfo/pan-to-uan",
+                                    _get, "ABCDE1234F", i)
+            for i in range(CONCURRENT_CALLS)
+        ])
+        post_results = await asyncio.gather(*[
+            track_external_api_call(str(200 + i), f"user-{i}", "user", "mobile-intelligence/mobile-to-pan",
+                                    _post, "ABCDE1234F")
+            for i in range(CONCURRENT_CALLS)
+        ])
+        # Job initiation is not idempotent: every caller starts its own job
+        await asyncio.gather(*[
+            track_external_api_call(str(300 + i), f"user-{i}", "user", "verification/post-driving-license",
+                                    _initiate, "DL0420110149646")
+            for i in range(CONCURRENT_CALLS)
+        ])
+        # A later identical request is sent again
+        await _get("ABCDE1234F", 0)
+    finally:
+        await close_http_clients()
+    return get_results, post_results
+
+
+def test_identical_requests_share_one_upstream_call(stub_server, row_sink):
+    """Concurrent identical GET and POST lookups hit the upstream once; each caller is still logged."""
+    import utils.api_tracking as api_tracking
+
+    StubState.hits = {}
+    server = stub_server(StubHandler)
+    # Measure coalescing on its own, not the result cache
+    saved = api_tracking.RESULT_CACHE_ENABLED
+    api_tracking.RESULT_CACHE_ENABLED = False
+    try:
+        get_results, post_results = asyncio.run(_run(server.base_url))
+    finally:
+        api_tracking.RESULT_CACHE_ENABLED = saved
+    rows = row_sink.rows
+
+    print(f"upstream hits: {StubState.hits}, analytics rows: {len(rows)}")
+    assert StubState.hits == {
+        ("GET", "/verification/epfo/pan-to-uan"): 2,
+        ("POST", "/verification/epfo/pan-to-uan"): 1,
+        ("POST", "/verification/post-driving-license"): CONCURRENT_CALLS,
+    }
+    assert all(result == get_results[0] for result in get_results)
+    assert all(result == post_results[0] for result in post_results)
+
+    for service, first_user in (("verification/epfo/pan-to-uan", 100), ("mobile-intelligence/mobile-to-pan", 200)):
+        service_rows = [row for row in rows if row["service"] == service]
+        assert sorted(row["userId"] for row in service_rows) == list(range(first_user, first_user + CONCURRENT_CALLS))
+        assert sum(1 for row in service_rows if row["cost"] > 0) == 1
+        assert sum(1 for row in service_rows if row["cacheHit"]) == CONCURRENT_CALLS - 1
+    initiations = [row for row in rows if row["service"] == "verification/post-driving-license"]
+    assert len(initiations) == CONCURRENT_CALLS
+    assert all(row["cost"] > 0 and not row["cacheHit"] for row in initiations)
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
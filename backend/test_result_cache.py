@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test the upstream result cache in track_external_api_call without a database.
+
+Analytics rows are captured instead of queued, and the upstream is a counting
+stub, so the test checks that repeat lookups skip the upstream, are logged
+with cost 0 and the cache flag, that upstream error responses and NO_DATA
+replies are cached only briefly, and that different upstream calls logged
+under one service name keep separate entries.
+"""
+
+import time
+import asyncio
+
+import httpx
+import pytest
+
+import utils.api_tracking as api_tracking
+from utils.api_tracking import track_external_api_call
+from utils.result_cache import ResultCache, CachedUpstreamError
+
+
+class UpstreamStub:
+    """Counts calls; identifiers starting with BAD get an upstream 422."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, pan_number: str):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if pan_number.strip().upper().startswith("BAD"):
+            request = httpx.Request("GET", "https://upstream.test/verification/panbasic")
+            response = httpx.Response(422, request=request)
+            raise httpx.HTTPStatusError("Invalid PAN", request=request, response=response)
+        return {"data": {"pan_number": pan_number.upper(), "full_name": "TEST USER"}}
+
+
+async def _lookup(upstream, pan_number: str, user_id: str = "1"):
+    return await track_external_api_call(
+        user_id, f"user-{user_id}", "user", "verification/panbasic", upstream, pan_number
+    )
+
+
+@pytest.fixture
+def use_cache(row_sink):
+    """Install a fresh in-memory result cache; returns a factory taking the negative TTL."""
+    originals = (api_tracking.result_cache, api_tracking.RESULT_CACHE_ENABLED)
+    api_tracking.RESULT_CACHE_ENABLED = True
+
+    def _install(negative_ttl: int = 60):
+        api_tracking.result_cache = ResultCache(max_entries=100, db_enabled=False, negative_ttl=negative_ttl)
+        return api_tracking.result_cache
+
+    try:
+        yield _install
+    finally:
+        api_tracking.result_cache, api_tracking.RESULT_CACHE_ENABLED = originals
+
+
+def test_repeat_lookup_is_served_from_cache(use_cache, row_sink):
+    """A repeat lookup (any case/spacing) skips the upstream and is logged at cost 0."""
+    cache = use_cache()
+    upstream = UpstreamStub()
+
+    async def _run():
+        first = await _lookup(upstream, "abcde1234f", user_id="1")
+        first["data"]["full_name"] = "MUTATED BY CALLER"
+        start = time.perf_counter()
+        second = await _lookup(upstream, " ABCDE1234F ", user_id="2")
+        return first, second, time.perf_counter() - start
+
+    first, second, hit_time = asyncio.run(_run())
+    print(f"cache stats: {cache.get_stats()}, hit took {hit_time * 1000:.2f}ms")
+
+    assert upstream.calls == 1
+    assert second["data"]["full_name"] == "TEST USER"
+    assert [row["cacheHit"] for row in row_sink.rows] == [False, True]
+    assert row_sink.rows[0]["cost"] > 0
+    assert row_sink.rows[1]["cost"] == 0
+    # The hit is attributed to the caller who made it
+    assert row_sink.rows[1]["userId"] == 2
+
+
+def test_upstream_errors_are_cached_briefly(use_cache, row_sink):
+    """An upstream error response is cached for the negative TTL, then retried."""
+    cache = use_cache(negative_ttl=1)
+    upstream = UpstreamStub()
+
+    async def _run():
+        errors = []
+        for _ in range(2):
+            try:
+                await _lookup(upstream, "BAD0000000")
+            except Exception as e:
+                errors.append(e)
+        await asyncio.sleep(1.1)
+        try:
+            await _lookup(upstream, "BAD0000000")
+        except Exception as e:
+            errors.append(e)
+        return errors
+
+    errors = asyncio.run(_run())
+    print(f"negative cache stats: {cache.get_stats()}")
+
+    assert len(errors) == 3
+    assert isinstance(errors[1], CachedUpstreamError)
+    assert upstream.calls == 2
+    assert [row["statusCode"] for row in row_sink.rows] == [500, 500, 500]
+    assert [row["cacheHit"] for row in row_sink.rows] == [False, True, False]
+
+
+def test_uncacheable_services_always_call_upstream(use_cache):
+    """Services without a TTL (e.g. async job polling) are never cached."""
+    cache = use_cache()
+    upstream = UpstreamStub()
+
+    async def _run():
+        for _ in range(3):
+            await track_external_api_call("1", "user-1", "user", "verification/get-driving-license", upstream, "req-1")
+
+    asyncio.run(_run())
+    assert upstream.calls == 3
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_upstream_variants_of_a_service_do_not_share_entries(use_cache):
+    """Two routes logging the same service through different upstream calls keep separate entries."""
+    cache = use_cache()
+    calls = []
+
+    async def _history_v1(uan_number: str):
+        calls.append("v1")
+        return {"sub_code": "SUCCESS", "data": {"version": 1}}
+
+    async def _history_v2(uan_number: str):
+        calls.append("v2")
+        return {"sub_code": "SUCCESS", "data": {"employment_history": [], "version": 2}}
+
+    async def _run():
+        results = []
+        for api_function in (_history_v1, _history_v2, _history_v1, _history_v2):
+            results.append(await track_external_api_call(
+                "1", "user-1", "user", "verification/epfo/uan-to-employment-history", api_function, "101804454784"
+            ))
+        return results
+
+    results = asyncio.run(_run())
+    assert calls == ["v1", "v2"]
+    assert [result["data"]["version"] for result in results] == [1, 2, 1, 2]
+    assert cache.get_stats()["entries"] == 2
+
+
+def test_no_data_replies_are_cached_briefly(use_cache):
+    """A reply whose sub_code is not SUCCESS is kept for the negative TTL, not the service TTL."""
+    cache = use_cache(negative_ttl=1)
+    calls = []
+
+    async def _pan_to_uan(pan_number: str):
+        calls.append(pan_number)
+        if pan_number == "NODATA0000":
+            # As the routes synthesize for an upstream 404
+            return {"sub_code": "NO_DATA", "message": "No UAN found", "data": {"uan_number": None}}
+        return {"sub_code": "SUCCESS", "data": {"uan_number": "101804454784"}}
+
+    async def _lookup_uan(pan_number: str):
+        return await track_external_api_call(
+            "1", "user-1", "user", "verification/epfo/pan-to-uan", _pan_to_uan, pan_number
+        )
+
+    async def _run():
+        first = await _lookup_uan("NODATA0000")
+        await _lookup_uan("NODATA0000")
+        await _lookup_uan("LPMPS8050J")
+        expiries = sorted(entry[0] - time.time() for entry in cache._entries.values())
+        await asyncio.sleep(1.1)
+        await _lookup_uan("NODATA0000")
+        await _lookup_uan("LPMPS8050J")
+        return first, expiries
+
+    first, expiries = asyncio.run(_run())
+    assert first["sub_code"] == "NO_DATA"
+    # NO_DATA went upstream again once its short entry expired; the found PAN did not
+    assert calls == ["NODATA0000", "LPMPS8050J", "NODATA0000"]
+    assert expiries[0] <= 1 and expiries[1] > 11 * 60 * 60
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
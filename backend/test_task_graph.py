@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Test the dependency-graph executor behind the verification endpoints.
+
+Nodes are small coroutines that sleep and record when they start, so the
+test can check dependency ordering, that the wall time follows the critical
+path, deadline cancellation, budget-aware admission, graph validation and
+that cancelling a run also cancels the nodes it started.
+"""
+
+import time
+import asyncio
+
+import pytest
+
+from utils.task_graph import TaskGraph, SkipTask
+
+
+class Recorder:
+    """Builds sleeping nodes and records when each one starts and finishes."""
+
+    def __init__(self):
+        self.started = {}
+        self.finished = {}
+        self.cancelled = []
+        self.origin = time.perf_counter()
+
+    def node(self, name: str, delay: float, result=None):
+        async def _run(deps):
+            self.started[name] = time.perf_counter() - self.origin
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.cancelled.append(name)
+                raise
+            self.finished[name] = time.perf_counter() - self.origin
+            return result if result is not None else {"node": name, "deps": sorted(deps)}
+        return _run
+
+
+def test_nodes_start_after_their_dependencies():
+    """Each node starts once its dependencies finish and receives their results."""
+    recorder = Recorder()
+    graph = TaskGraph()
+    graph.add("pan", recorder.node("pan", 0.05))
+    graph.add("gstin", recorder.node("gstin", 0.02))
+    graph.add("uan", recorder.node("uan", 0.02), depends_on=["pan"])
+    graph.add("employment", recorder.node("employment", 0.01), depends_on=["uan", "gstin"])
+
+    outcome = asyncio.run(graph.run())
+
+    assert set(outcome.results) == {"pan", "gstin", "uan", "employment"}
+    assert not outcome.errors and not outcome.timed_out and not outcome.skipped
+    assert recorder.started["uan"] >= recorder.finished["pan"]
+    assert recorder.started["employment"] >= max(recorder.finished["uan"], recorder.finished["gstin"])
+    # Independent roots start together
+    assert abs(recorder.started["pan"] - recorder.started["gstin"]) < 0.01
+    assert outcome.get("employment") == {"node": "employment", "deps": ["gstin", "uan"]}
+
+
+def test_failed_dependency_is_passed_as_exception():
+    """A dependency that raised reaches its dependents as the exception instance."""
+    async def _fails(deps):
+        raise RuntimeError("upstream down")
+
+    async def _falls_back(deps):
+        return "fallback" if isinstance(deps["primary"], RuntimeError) else "primary"
+
+    graph = TaskGraph()
+    graph.add("primary", _fails)
+    graph.add("secondary", _falls_back, depends_on=["primary"])
+
+    outcome = asyncio.run(graph.run())
+    assert isinstance(outcome.errors["primary"], RuntimeError)
+    assert outcome.get("secondary") == "fallback"
+
+
+def test_wall_time_follows_critical_path():
+    """Total time approaches the longest chain, not the sum of all nodes."""
+    recorder = Recorder()
+    graph = TaskGraph()
+    for i in range(8):
+        graph.add(f"leaf-{i}", recorder.node(f"leaf-{i}", 0.1))
+    graph.add("chain-1", recorder.node("chain-1", 0.1))
+    graph.add("chain-2", recorder.node("chain-2", 0.1), depends_on=["chain-1"])
+
+    start = time.perf_counter()
+    outcome = asyncio.run(graph.run())
+    elapsed = time.perf_counter() - start
+
+    print(f"10 nodes of 100ms, critical path 200ms: {elapsed * 1000:.1f}ms")
+    assert len(outcome.results) == 10
+    assert 0.2 <= elapsed < 0.35
+
+
+def test_deadline_cancels_unfinished_nodes():
+    """Nodes still running at the deadline are cancelled and reported as timed out."""
+    recorder = Recorder()
+    completed = []
+    graph = TaskGraph()
+    graph.add("fast", recorder.node("fast", 0.01))
+    graph.add("slow", recorder.node("slow", 1.0))
+    graph.add("after-slow", recorder.node("after-slow", 0.01), depends_on=["slow"])
+
+    start = time.perf_counter()
+    outcome = asyncio.run(graph.run(deadline_ms=100, on_complete=completed.append))
+    elapsed = time.perf_counter() - start
+
+    assert "fast" in outcome.results
+    assert sorted(outcome.timed_out) == ["after-slow", "slow"]
+    assert recorder.cancelled == ["slow"]
+    assert elapsed < 0.3
+    assert sorted(completed) == ["after-slow", "fast", "slow"]
+
+
+def test_min_budget_skips_late_nodes():
+    """A node needing more budget than remains is skipped; a node raising SkipTask is too."""
+    recorder = Recorder()
+
+    async def _nothing_to_do(deps):
+        raise SkipTask("no UAN found")
+
+    graph = TaskGraph()
+    graph.add("lookup", recorder.node("lookup", 0.08))
+    graph.add("expensive", recorder.node("expensive", 0.01), depends_on=["lookup"], min_budget_ms=100)
+    graph.add("cheap", recorder.node("cheap", 0.01), depends_on=["lookup"], min_budget_ms=20)
+    graph.add("optional", _nothing_to_do)
+
+    outcome = asyncio.run(graph.run(deadline_ms=150))
+
+    assert "expensive" in outcome.skipped and "insufficient budget" in outcome.skipped["expensive"]
+    assert outcome.skipped["optional"] == "no UAN found"
+    assert "expensive" not in recorder.started
+    assert set(outcome.results) == {"lookup", "cheap"}
+
+
+def test_invalid_graphs_are_rejected():
+    """Unknown dependencies, cycles and duplicate names raise ValueError before anything runs."""
+    recorder = Recorder()
+
+    unknown = TaskGraph().add("a", recorder.node("a", 0), depends_on=["missing"])
+    with pytest.raises(ValueError, match="unknown node"):
+        asyncio.run(unknown.run())
+
+    cycle = TaskGraph()
+    cycle.add("a", recorder.node("a", 0), depends_on=["c"])
+    cycle.add("b", recorder.node("b", 0), depends_on=["a"])
+    cycle.add("c", recorder.node("c", 0), depends_on=["b"])
+    with pytest.raises(ValueError, match="cycle"):
+        asyncio.run(cycle.run())
+
+    with pytest.raises(ValueError, match="Duplicate"):
+        TaskGraph().add("a", recorder.node("a", 0)).add("a", recorder.node("a", 0))
+
+    assert not recorder.started
+
+
+def test_cancelling_the_run_cancels_its_nodes():
+    """Cancelling run() (e.g. a client closing a stream) stops every node it started."""
+    recorder = Recorder()
+    graph = TaskGraph()
+    graph.add("root", recorder.node("root", 1.0))
+    graph.add("sibling", recorder.node("sibling", 1.0))
+    graph.add("child", recorder.node("child", 1.0), depends_on=["root"])
+
+    async def _run():
+        run_task = asyncio.create_task(graph.run(deadline_ms=5000))
+        await asyncio.sleep(0.05)
+        run_task.cancel()
+        try:
+            await run_task
+            cancelled = False
+        except asyncio.CancelledError:
+            cancelled = True
+        # Nothing from the graph is left behind on the loop
+        leftover = [task for task in asyncio.all_tasks()
+                    if task is not asyncio.current_task() and not task.done()]
+        return cancelled, leftover
+
+    cancelled, leftover = asyncio.run(_run())
+    assert cancelled
+    assert leftover == []
+    assert sorted(recorder.cancelled) == ["root", "sibling"]
+    assert not recorder.finished
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test and benchmark the Jinja2 report and email templates.
+
+Checks that every template compiles once and is served from the
+environment cache afterwards, that provider data is HTML-escaped, that the
+shared row macros behave the same as the old string helpers (empty values
+left out, booleans as Yes/No), that streaming yields the same document as
+a full render, and times the profile report for a subject with hundreds of
+court cases and challans.
+"""
+
+import time
+
+import routes.pdf_generation_puppeteer as pdf_generation_puppeteer
+from utils.html_generator import htmlContent
+from utils.template_engine import template_env, warm_templates, render_template, stream_template
+
+CASES = 500
+CHALLANS = 300
+PARTIES = 200  # petitioners and respondents of the best matching case
+
+
+def _large_profile() -> dict:
+    cases = [
+        {
+            "id": f"CNR-{index:06d}",
+            "confidence": (index * 37) % 1000 / 10,
+            "petitioners": [f"Petitioner {index}-{party}" for party in range(PARTIES)],
+            "respondents": [f"Respondent {index}-{party}" for party in range(PARTIES)],
+            "acts": ["Indian Penal Code", "Motor Vehicles Act", "Negotiable Instruments Act"],
+            "sections": "138, 279, 304A",
+        }
+        for index in range(CASES)
+    ]
+    challans = [
+        {
+            "challanNumber": f"MH01{index:08d}",
+            "challanPlace": "Mumbai",
+            "challanDate": "2024-05-01",
+            "amount": 500 + index,
+            "challanStatus": "Pending" if index % 3 else "Disposed",
+        }
+        for index in range(CHALLANS)
+    ]
+    return {
+        "profileData": {
+            "personalInfo": {"fullName": "Ravi Kumar", "panNumber": "ABCDE1234F", "gender": "M"},
+            "contactInfo": {"mobileNumber": "9999999999", "networkOperator": "Jio"},
+            "employmentInfo": {"employmentHistory": [{"employer": "Acme"}]},
+            "creditInfo": {"creditScore": 742, "panKRAAgency": "CVL"},
+            "vehicleInfo": {"rc_number": "MH01AB1234", "challanDetails": challans},
+        },
+        "courtCaseData": {"cases": cases, "casesFound": CASES},
+    }
+
+
+def test_templates_compile_once():
+    """warm_templates compiles everything; later lookups reuse the compiled template."""
+    count = warm_templates()
+    assert count >= 5
+    template = template_env.get_template("reports/profile_report.html")
+    assert template_env.get_template("reports/profile_report.html") is template
+    assert not template_env.auto_reload
+
+
+def test_values_are_escaped_and_rows_formatted():
+    """Provider data cannot inject markup; empty rows are left out and booleans read Yes/No."""
+    profile = _large_profile()
+    case = profile["courtCaseData"]["cases"][0]
+    case["confidence"] = 100
+    case["petitioners"] = ["<script>alert(1)</script>"]
+    html = render_template(
+        "reports/profile_report.html", **pdf_generation_puppeteer.profile_report_context(profile)
+    )
+    assert "<script>alert(1)</script>" not in html
+    assert "&lt;script&gt;alert(1)&lt;/script&gt;" in html
+    assert "Highest Match: 100.0%" in html
+    assert f"{CASES - 1} more cases found" in html
+
+    business = htmlContent({
+        "businessInfo": {"legal_name": "Acme & Sons", "gstin_status": True, "pan_number": "", "taxpayer_type": None},
+        "creditAssessment": {"score": 85, "label": "Excellent", "positiveFactors": ["On-time filings"]},
+        "filingStatus": [[{"return_type": "GSTR1", "date_of_filing": "2024-02-11T00:00:00Z", "status": "Filed"}]],
+    }, "Acme & Sons")
+    assert "Acme &amp; Sons" in business and "Acme & Sons" not in business
+    assert ">Yes</td>" in business
+    assert "PAN Number" not in business and "Taxpayer Type" not in business
+    assert "score-high" in business and "02/11/2024" in business
+    # Sections without rows are left out entirely
+    assert "Contact Information" not in business
+
+
+def test_email_bodies_render():
+    """The emails share the row and list macros with the reports."""
+    html = render_template(
+        "emails/business_verification.html",
+        user_name="Ravi",
+        gst_info={"gstin": "27AAAAA0000A1Z5", "sts": "Active", "nba": ["Retail"], "trustAssessment": {"score": 80}},
+        fssai_info={},
+        business_data={"businessName": "Acme"},
+        addresses=[{"addr": {"bnm": "Tower A", "pncd": "400001"}, "ntr": "Office"}],
+    )
+    assert "<tr><td>GSTIN</td><td>27AAAAA0000A1Z5</td></tr>" in html
+    assert "<tr><td>Trade Name</td><td>N/A</td></tr>" in html
+    assert 'class="status-active"' in html and "<li>Retail</li>" in html
+    assert "80/100" in html and "Address 1" in html and "FSSAI" not in html
+
+    html = render_template(
+        "emails/profile_report.html",
+        user_username="Ravi", user_email="ravi@example.com", name="Ravi Kumar", profile_name="Ravi Kumar",
+        generated_at="01/02/2025, 03:04:05 AM", sections=["👤 Personal Information - Verified"],
+        sections_found=1, court_cases_found=0, attachment_filename="report.pdf",
+    )
+    assert "<li>👤 Personal Information - Verified</li>" in html
+    assert "<strong>report.pdf</strong>" in html and "and is attached to this email" in html
+
+
+def test_stream_matches_render():
+    """Streaming yields the same document in pieces, starting before the end is rendered."""
+    context = pdf_generation_puppeteer.profile_report_context(_large_profile())
+    rendered = render_template("reports/profile_report.html", **context)
+    chunks = list(stream_template("reports/profile_report.html", **context))
+    assert "".join(chunks) == rendered
+    assert len(chunks) > 1 and chunks[0].lstrip().startswith("<!DOCTYPE html>")
+
+
+def test_large_profile_render_benchmark():
+    """A profile with hundreds of court cases and challans renders in a few milliseconds."""
+    profile = _large_profile()
+    warm_templates()
+    runs = 50
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        html = render_template(
+            "reports/profile_report.html", **pdf_generation_puppeteer.profile_report_context(profile)
+        )
+    render_ms = (time.perf_counter() - start) * 1000 / runs
+
+    start = time.perf_counter()
+    first_chunk = next(stream_template(
+        "reports/profile_report.html", **pdf_generation_puppeteer.profile_report_context(profile)
+    ))
+    first_chunk_ms = (time.perf_counter() - start) * 1000
+
+    print(
+        f"profile report ({CASES} cases, {CHALLANS} challans, {PARTIES * 2} parties): "
+        f"{len(html)} chars in {render_ms:.2f}ms per render, first streamed chunk in {first_chunk_ms:.2f}ms"
+    )
+    assert html.count('class="party-item"') == PARTIES * 2
+    assert first_chunk
+    assert render_ms < 50
+
+
+if __name__ == "__main__":
+    import sys
+    print("Template rendering tests")
+    print("=" * 60)
+    try:
+        test_templates_compile_once()
+        test_values_are_escaped_and_rows_formatted()
+        test_email_bodies_render()
+        test_stream_matches_render()
+        test_large_profile_render_benchmark()
+        print("\n✓ Reports and emails render from compiled templates")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n✗ Assertion failed {e}")
+        sys.exit(1)
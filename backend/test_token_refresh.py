@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Regression test: deepvue access token refresh is single-flight.
+
+Starts a local stub that serves /v1/authorize (slowly, counting calls) and a
+protected /probe endpoint that answers 401 for any token other than the
+latest one. Concurrent callers must share one refresh, and a rejected token
+must be refreshed once and the request retried once.
+"""
+
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+AUTHORIZE_DELAY = 0.2  # seconds per stubbed authorize call
+CONCURRENT_CALLS = 20
+
+
+class StubState:
+    authorize_calls = 0
+    probe_calls = 0
+    current_token = None
+    lock = threading.Lock()
+
+
+class StubAuthHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        time.sleep(AUTHORIZE_DELAY)
+        with StubState.lock:
+            StubState.authorize_calls += 1
+            StubState.current_token = f"token-{StubState.authorize_calls}"
+            token = StubState.current_token
+        self._send(200, {"access_token": token, "token_type": "Bearer", "expiry": 3600})
+
+    def do_GET(self):
+        with StubState.lock:
+            StubState.probe_calls += 1
+            expected = f"Bearer {StubState.current_token}"
+        if self.headers.get("Authorization") != expected:
+            self._send(401, {"detail": "invalid token"})
+        else:
+            self._send(200, {"data": "ok"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _reset_stub():
+    StubState.authorize_calls = 0
+    StubState.probe_calls = 0
+    StubState.current_token = None
+
+
+async def _run_checks(base_url: str, host: str):
+    import services.authService as auth_module
+    from services.authService import AuthService
+    from utils.http_client import fetch_with_timeout, register_unauthorized_handler, close_http_clients
+
+    auth_module.AUTHORIZE_URL = f"{base_url}/v1/authorize"
+    results = {}
+    try:
+        # 1. Cold start: concurrent callers share one authorize call
+        _reset_stub()
+        service = AuthService()
+        tokens = await asyncio.gather(*[service.get_access_token() for _ in range(CONCURRENT_CALLS)])
+        results["cold_start"] = {"authorizeCalls": StubState.authorize_calls, "distinctTokens": len(set(tokens))}
+
+        # 2. Token rotated upstream: concurrent 401s trigger one refresh and one retry each
+        register_unauthorized_handler(host, service.handle_unauthorized)
+        StubState.current_token = "rotated"
+        StubState.authorize_calls = 0
+        StubState.probe_calls = 0
+
+        async def _probe():
+            token = await service.get_access_token()
+            return await fetch_with_timeout(f"{base_url}/probe", {"Authorization": f"Bearer {token}"})
+
+        responses = await asyncio.gather(*[_probe() for _ in range(CONCURRENT_CALLS)])
+        results["unauthorized_retry"] = {
+            "authorizeCalls": StubState.authorize_calls,
+            "probeCalls": StubState.probe_calls,
+            "allSucceeded": all(r == {"data": "ok"} for r in responses),
+        }
+
+        # 3. Token in its refresh window is served immediately, refreshed in background
+        service.refresh_at = time.time() - 1
+        calls_before = StubState.authorize_calls
+        start = time.perf_counter()
+        token = await service.get_access_token()
+        elapsed = time.perf_counter() - start
+        stale_token = token
+        await service._refresh_task
+        results["proactive"] = {
+            "elapsed": elapsed,
+            "authorizeCalls": StubState.authorize_calls - calls_before,
+            "rotated": service.access_token != stale_token,
+        }
+    finally:
+        await close_http_clients()
+    return results
+
+
+def test_token_refresh_is_single_flight(stub_server):
+    """Concurrent callers and concurrent 401s must not stampede the authorize endpoint."""
+    server = stub_server(StubAuthHandler)
+    results = asyncio.run(_run_checks(server.base_url, server.host))
+
+    print(json.dumps(results, indent=2))
+    assert results["cold_start"]["authorizeCalls"] == 1
+    assert results["cold_start"]["distinctTokens"] == 1
+    assert results["unauthorized_retry"]["authorizeCalls"] == 1
+    assert results["unauthorized_retry"]["allSucceeded"]
+    # Each caller is rejected at most once and retried at most once
+    assert results["unauthorized_retry"]["probeCalls"] <= 2 * CONCURRENT_CALLS
+    assert results["proactive"]["elapsed"] < AUTHORIZE_DELAY / 2
+    assert results["proactive"]["authorizeCalls"] == 1
+    assert results["proactive"]["rotated"]
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Test per-upstream rate limits and circuit breakers.
+
+Starts a local stub upstream whose health can be switched between OK,
+failing (503) and hanging, and sends requests through utils.http_client
+with a fresh UpstreamResilience registry. Checks that a failing endpoint's
+circuit opens and fails fast, that half-open probes close or reopen it,
+that other endpoints are unaffected, that token buckets pace requests, and
+that Lexient search falls back to mock data without waiting out a timeout
+once its circuit is open.
+"""
+
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler
+
+import httpx
+import pytest
+
+import utils.http_client as http_client
+from utils.upstream_resilience import (
+    UpstreamResilience,
+    CircuitOpenError,
+    RateLimitedError,
+    get_endpoint_key,
+    CIRCUIT_CLOSED,
+    CIRCUIT_OPEN,
+)
+
+
+class StubState:
+    mode = "ok"  # "ok", "fail" or "hang"
+    hits = {}
+    lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _answer(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        path = self.path.split("?")[0]
+        with StubState.lock:
+            StubState.hits[path] = StubState.hits.get(path, 0) + 1
+        mode = StubState.mode if path != "/healthy" else "ok"
+        if mode == "hang":
+            time.sleep(1.0)
+        status = 503 if mode == "fail" else 200
+        body = json.dumps({"data": [], "path": path}).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass  # the client gave up
+
+    do_GET = _answer
+    do_POST = _answer
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _use_registry(registry):
+    original = http_client.upstream_resilience
+    http_client.upstream_resilience = registry
+    return original
+
+
+def test_endpoint_keys_collapse_ids():
+    """IDs in the path share one endpoint; API versions do not count as IDs."""
+    insta = "https://instafinancials.com/api/InstaSummary/v1/json/CompanyCIN/{cin}"
+    assert get_endpoint_key(insta.format(cin="U72200KA2009PTC049889")) == \
+        get_endpoint_key(insta.format(cin="L17110MH1973PLC019786"))
+    assert get_endpoint_key("https://production.deepvue.tech/v1/verification/pan-plus?pan_number=ABCDE1234F") == \
+        ("production.deepvue.tech", "production.deepvue.tech/v1/verification/pan-plus")
+
+
+def test_circuit_opens_fails_fast_and_recovers(stub_server):
+    """Consecutive failures open the circuit; a probe after the cooldown closes it again."""
+    base = stub_server(StubHandler).base_url
+    registry = UpstreamResilience(failure_threshold=3, open_seconds=0.3)
+    original = _use_registry(registry)
+    StubState.mode, StubState.hits = "fail", {}
+
+    async def _run():
+        statuses = [(await http_client.request("GET", f"{base}/down", timeout=1000)).status_code for _ in range(3)]
+
+        start = time.perf_counter()
+        rejected = 0
+        for _ in range(20):
+            try:
+                await http_client.request("GET", f"{base}/down", timeout=1000)
+            except CircuitOpenError as e:
+                assert isinstance(e, httpx.RequestError) and e.retry_after > 0
+                rejected += 1
+        fail_fast = time.perf_counter() - start
+        healthy = (await http_client.request("GET", f"{base}/healthy", timeout=1000)).status_code
+        open_state = registry.get_stats()["endpoints"][get_endpoint_key(f"{base}/down")[1]]
+
+        # Cooldown passes while still failing: the probe fails and reopens
+        await asyncio.sleep(0.35)
+        probe = (await http_client.request("GET", f"{base}/down", timeout=1000)).status_code
+        try:
+            await http_client.request("GET", f"{base}/down", timeout=1000)
+            reopened = False
+        except CircuitOpenError:
+            reopened = True
+
+        # Upstream recovers: the next probe closes the circuit
+        StubState.mode = "ok"
+        await asyncio.sleep(0.35)
+        recovered = [(await http_client.request("GET", f"{base}/down", timeout=1000)).status_code for _ in range(3)]
+        await http_client.close_http_clients()
+        return statuses, rejected, fail_fast, healthy, open_state, probe, reopened, recovered
+
+    try:
+        statuses, rejected, fail_fast, healthy, open_state, probe, reopened, recovered = asyncio.run(_run())
+    finally:
+        _use_registry(original)
+        StubState.mode = "ok"
+
+    stats = registry.get_stats()["endpoints"][get_endpoint_key(f"{base}/down")[1]]
+    print(f"20 rejected calls in {fail_fast * 1000:.1f}ms; final stats {stats}")
+    assert statuses == [503, 503, 503]
+    assert rejected == 20 and fail_fast < 0.05
+    assert healthy == 200
+    assert open_state["state"] == CIRCUIT_OPEN and open_state["rejected"] == 20
+    assert probe == 503 and reopened
+    assert recovered == [200, 200, 200]
+    # 3 failures + 1 failed probe + 3 successes reached the stub
+    assert StubState.hits["/down"] == 7
+    assert stats["state"] == CIRCUIT_CLOSED and stats["opened"] == 2
+
+
+def test_token_bucket_paces_requests(stub_server):
+    """A burst beyond the bucket waits for tokens; waits beyond the limit fail immediately."""
+    base = stub_server(StubHandler).base_url
+    host = base.split("//")[1]
+    registry = UpstreamResilience(max_wait_ms=1000)
+    registry.host_limits[host] = (20.0, 2)
+    original = _use_registry(registry)
+    StubState.mode = "ok"
+
+    async def _run():
+        start = time.perf_counter()
+        paced = await asyncio.gather(*[
+            http_client.request("GET", f"{base}/paced", params={"i": i}, timeout=1000) for i in range(10)
+        ])
+        elapsed = time.perf_counter() - start
+
+        # 40 more calls would need 2 seconds of tokens; the ones past 1s are refused
+        outcomes = await asyncio.gather(*[
+            http_client.request("GET", f"{base}/paced", params={"j": i}, timeout=1000) for i in range(40)
+        ], return_exceptions=True)
+        await http_client.close_http_clients()
+        return paced, elapsed, outcomes
+
+    try:
+        paced, elapsed, outcomes = asyncio.run(_run())
+    finally:
+        _use_registry(original)
+
+    limited = sum(isinstance(outcome, RateLimitedError) for outcome in outcomes)
+    print(f"10 calls at 20/s burst 2 took {elapsed:.2f}s; {limited}/40 refused")
+    assert all(response.status_code == 200 for response in paced)
+    # 8 calls beyond the burst at 20/s
+    assert 0.35 <= elapsed < 0.8
+    assert 15 <= limited <= 25
+    assert registry.get_stats()["endpoints"][get_endpoint_key(f"{base}/paced")[1]]["rate_limited"] == limited
+
+
+def test_search_falls_back_fast_when_lexient_is_down(stub_server):
+    """Once Lexient's circuit is open, search returns mock data without waiting for a timeout."""
+    import routes.search as search
+    from routes.search import SearchRequest
+
+    base = stub_server(StubHandler).base_url
+    registry = UpstreamResilience(failure_threshold=2, open_seconds=60)
+    original = _use_registry(registry)
+    saved = (search.LEXIENT_API_BASE, search.LEXIENT_API_TIMEOUT)
+    search.LEXIENT_API_BASE, search.LEXIENT_API_TIMEOUT = base, 200
+    StubState.mode = "hang"
+
+    async def _search():
+        start = time.perf_counter()
+        response = await search.search_court_cases(SearchRequest(courtType="high-court", name="Ravi"), page=1, limit=10)
+        return response, time.perf_counter() - start
+
+    async def _run():
+        timed_out = [await _search() for _ in range(2)]
+        fast = await _search()
+        await http_client.close_http_clients()
+        return timed_out, fast
+
+    try:
+        timed_out, (response, elapsed) = asyncio.run(_run())
+    finally:
+        _use_registry(original)
+        search.LEXIENT_API_BASE, search.LEXIENT_API_TIMEOUT = saved
+        StubState.mode = "ok"
+
+    print(f"timed out after {[round(t, 2) for _, t in timed_out]}s, then fell back in {elapsed * 1000:.1f}ms")
+    assert all(result.fallbackMode and took >= 0.2 for result, took in timed_out)
+    assert response.fallbackMode and "circuit open" in response.apiError
+    assert elapsed < 0.05
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
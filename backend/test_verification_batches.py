@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Test bulk verification batches without a database.
+
+The batch tables are replaced by an in-memory store with the same claim /
+finish / release semantics, and the verification itself by a fake
+processor with a fixed latency. The test checks that the worker pool keeps
+a bounded number of items in flight, processes every item exactly once,
+releases in-flight items on shutdown, and that the submission and paginated
+status endpoints validate a CSV upload and report progress page by page.
+"""
+
+import time
+import asyncio
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import utils.verification_batches as verification_batches
+import routes.verification_batches as batches_route
+from utils.verification_batches import BatchWorkerPool
+
+ITEM_LATENCY = 0.05
+
+
+class InMemoryBatchStore:
+    """Stands in for verification_batches / verification_batch_items."""
+
+    def __init__(self):
+        self.batches = {}
+        self.items = {}
+
+    async def create_verification_batch(self, batch_id, batch_type, user_id, username, user_role, options, subjects):
+        self.batches[batch_id] = {"batch_id": batch_id, "batch_type": batch_type, "user_id": int(user_id),
+                                  "username": username, "user_role": user_role, "options": options,
+                                  "total_items": len(subjects), "created_at": datetime.now(timezone.utc)}
+        for index, subject in enumerate(subjects):
+            self.items[(batch_id, index)] = {"batch_id": batch_id, "item_index": index, "subject": subject,
+                                             "status": "pending", "result": None, "error": None, "attempts": 0,
+                                             "started_at": None, "finished_at": None}
+        return len(subjects)
+
+    async def claim_batch_items(self, limit, lease_seconds):
+        claimable = sorted(
+            (item for item in self.items.values() if item["status"] == "pending"),
+            key=lambda item: (item["item_index"], self.batches[item["batch_id"]]["created_at"])
+        )[:limit]
+        claimed = []
+        for item in claimable:
+            item.update(status="running", attempts=item["attempts"] + 1)
+            batch = self.batches[item["batch_id"]]
+            claimed.append({**item, "batch_type": batch["batch_type"], "user_id": batch["user_id"],
+                            "username": batch["username"], "user_role": batch["user_role"],
+                            "options": batch["options"]})
+        return claimed
+
+    async def finish_batch_item(self, batch_id, item_index, status, result=None, error=None):
+        self.items[(batch_id, item_index)].update(status=status, result=result, error=error,
+                                                  finished_at=datetime.now(timezone.utc))
+
+    async def release_batch_items(self, items):
+        for key in items:
+            if self.items[key]["status"] == "running":
+                self.items[key]["status"] = "pending"
+
+    async def get_verification_batch(self, batch_id):
+        if batch_id not in self.batches:
+            return None
+        items = [item for item in self.items.values() if item["batch_id"] == batch_id]
+        counts = {status: sum(1 for item in items if item["status"] == status)
+                  for status in ("pending", "running", "completed", "failed")}
+        return {**self.batches[batch_id], **counts, "last_finished_at": None}
+
+    async def get_verification_batch_items(self, batch_id, after_index=None, limit=50, status=None):
+        items = sorted(
+            (item for item in self.items.values() if item["batch_id"] == batch_id
+             and (after_index is None or item["item_index"] > after_index)
+             and (status is None or item["status"] == status)),
+            key=lambda item: item["item_index"]
+        )
+        return items[:limit]
+
+
+class FakeVerifier:
+    def __init__(self):
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, subject, options, user_id, username, user_role):
+        self.calls.append(subject["id"])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(ITEM_LATENCY)
+        finally:
+            self.in_flight -= 1
+        if subject["id"].startswith("bad"):
+            raise ValueError("upstream rejected subject")
+        return {"verified": subject["id"], "checks": options["verifications"], "by": username}
+
+
+def _install(store):
+    names = ["claim_batch_items", "finish_batch_item", "release_batch_items"]
+    route_names = ["create_verification_batch", "get_verification_batch", "get_verification_batch_items"]
+    originals = ({name: getattr(verification_batches, name) for name in names},
+                 {name: getattr(batches_route, name) for name in route_names})
+    for name in names:
+        setattr(verification_batches, name, getattr(store, name))
+    for name in route_names:
+        setattr(batches_route, name, getattr(store, name))
+    return originals
+
+
+def _uninstall(originals):
+    pool_originals, route_originals = originals
+    for name, value in pool_originals.items():
+        setattr(verification_batches, name, value)
+    for name, value in route_originals.items():
+        setattr(batches_route, name, value)
+
+
+def test_worker_pool_is_bounded_and_processes_every_item():
+    """Items are processed concurrently up to the worker count, each exactly once."""
+    store = InMemoryBatchStore()
+    verifier = FakeVerifier()
+    originals = _install(store)
+
+    async def _run():
+        pool = BatchWorkerPool(workers=4, poll_interval_ms=50)
+        pool.register_processor("test", verifier)
+        subjects = [{"id": f"ok-{i}"} for i in range(38)] + [{"id": "bad-1"}, {"id": "bad-2"}]
+        await store.create_verification_batch("b1", "test", "1", "tester", "user", {"verifications": ["pan"]}, subjects)
+        start = time.perf_counter()
+        pool.notify()
+        while any(item["status"] in ("pending", "running") for item in store.items.values()):
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        stats = pool.get_stats()
+        await pool.stop()
+        return elapsed, stats
+
+    try:
+        elapsed, stats = asyncio.run(_run())
+    finally:
+        _uninstall(originals)
+
+    print(f"40 items in {elapsed:.2f}s (sequential ~{40 * ITEM_LATENCY:.2f}s), "
+          f"max in flight {verifier.max_in_flight}, stats {stats}")
+    assert verifier.max_in_flight == 4
+    assert sorted(verifier.calls) == sorted(item["subject"]["id"] for item in store.items.values())
+    assert stats["completed"] == 38 and stats["failed"] == 2
+    assert store.items[("b1", 0)]["result"] == {"verified": "ok-0", "checks": ["pan"], "by": "tester"}
+    assert store.items[("b1", 38)]["error"] == "upstream rejected subject"
+    assert elapsed < 40 * ITEM_LATENCY / 2
+
+
+def test_shutdown_releases_in_flight_items():
+    """Stopping the pool puts running items back in the queue for the next process."""
+    store = InMemoryBatchStore()
+    originals = _install(store)
+
+    async def _slow(subject, options, user_id, username, user_role):
+        await asyncio.sleep(10)
+
+    async def _run():
+        pool = BatchWorkerPool(workers=2, poll_interval_ms=50)
+        pool.register_processor("test", _slow)
+        await store.create_verification_batch("b2", "test", "1", "tester", "user", {}, [{"id": str(i)} for i in range(5)])
+        pool.notify()
+        await asyncio.sleep(0.1)
+        running = sum(1 for item in store.items.values() if item["status"] == "running")
+        await pool.stop()
+        return running
+
+    try:
+        running = asyncio.run(_run())
+    finally:
+        _uninstall(originals)
+
+    assert running == 2
+    assert all(item["status"] == "pending" for item in store.items.values())
+
+
+def _request(body: bytes, content_type: str, query: str = "") -> Request:
+    async def _receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+    return Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/verification-batches",
+        "query_string": query.encode(),
+        "headers": [(b"content-type", content_type.encode())],
+    }, _receive)
+
+
+def test_submit_csv_and_page_through_status():
+    """A CSV batch is validated, queued, processed and paged through the status endpoint."""
+    store = InMemoryBatchStore()
+    originals = _install(store)
+    verifier = FakeVerifier()
+
+    async def _fake_user(request):
+        return {"userId": 1, "username": "tester", "role": "user"}
+
+    saved = (batches_route.get_authenticated_user, batches_route.has_verification_mini_access,
+             batches_route.batch_worker_pool)
+    batches_route.get_authenticated_user = _fake_user
+    batches_route.has_verification_mini_access = lambda user: True
+    pool = BatchWorkerPool(workers=3, poll_interval_ms=50)
+    pool.register_processor("mini", lambda subject, *args: verifier({"id": subject["name"]}, *args))
+    batches_route.batch_worker_pool = pool
+
+    csv_body = "name,dob,mobile,pan_number\n" + "".join(
+        f"Person {i},1990-01-01,99999000{i:02d},ABCDE12{i:02d}F\n" for i in range(12)
+    )
+
+    async def _run():
+        # A row without a mobile number rejects the whole submission
+        try:
+            await batches_route.submit_verification_batch(
+                _request(b"name,dob\nRavi,1990-01-01\n", "text/csv"), batch_type_param="mini", verifications="pan"
+            )
+            rejected = None
+        except HTTPException as e:
+            rejected = e.detail
+
+        submitted = await batches_route.submit_verification_batch(
+            _request(csv_body.encode(), "text/csv"), batch_type_param="mini", verifications="pan,mnrl"
+        )
+        batch_id = submitted["batchId"]
+        first = await batches_route.get_verification_batch_status(
+            _request(b"", "application/json"), batch_id, cursor=None, limit=5, status=None
+        )
+        while any(item["status"] in ("pending", "running") for item in store.items.values()):
+            await asyncio.sleep(0.01)
+
+        pages, cursor = [], None
+        while True:
+            page = await batches_route.get_verification_batch_status(
+                _request(b"", "application/json"), batch_id, cursor=cursor, limit=5, status=None
+            )
+            pages.append(page)
+            if not page["hasMore"]:
+                break
+            cursor = page["nextCursor"]
+        await pool.stop()
+        return rejected, submitted, first, pages
+
+    try:
+        rejected, submitted, first, pages = asyncio.run(_run())
+    finally:
+        _uninstall(originals)
+        (batches_route.get_authenticated_user, batches_route.has_verification_mini_access,
+         batches_route.batch_worker_pool) = saved
+
+    assert rejected["rowErrors"][0]["row"] == 0
+    assert submitted["totalItems"] == 12
+    assert first["progress"]["total"] == 12 and first["status"] == "processing"
+    assert [len(page["items"]) for page in pages] == [5, 5, 2]
+    assert [item["index"] for page in pages for item in page["items"]] == list(range(12))
+    final = pages[-1]
+    assert final["status"] == "completed" and final["progress"]["completed"] == 12
+    assert final["verifications"] == ["pan", "mnrl"]
+    assert pages[0]["items"][0]["result"]["checks"] == ["pan", "mnrl"]
+
+
+if __name__ == "__main__":
+    import sys
+    import pytest
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test how /verification-advanced and /verification-lite schedule their calls.
+
+Every upstream lookup is replaced with a fake that sleeps and records when
+it starts and finishes, and authentication is stubbed out. The tests check
+that independent calls overlap, that UAN employment history waits for PAN to
+UAN and receives its UAN, and that it is skipped when there is no UAN or
+not enough of the deadline left.
+"""
+
+import time
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+import routes.verification_advanced as verification_advanced
+import routes.verification_lite as verification_lite
+
+UAN = "101804454784"
+STEP = 0.1  # seconds per faked upstream call
+
+# Module -> (request model, handler, access check, lookups besides PAN to UAN and employment history)
+ROUTES = {
+    "advanced": (verification_advanced, "VerificationRequest", "verification_advanced",
+                 "has_verification_advanced_access",
+                 ["fetch_pan_plus", "fetch_mobile_to_name", "fetch_mobile_network_details",
+                  "fetch_pan_to_father_name", "fetch_credit_score", "fetch_pan_msme_check"]),
+    "lite": (verification_lite, "VerificationLiteRequest", "verification_lite",
+             "has_verification_lite_access",
+             ["fetch_pan_plus", "fetch_mobile_to_name", "fetch_mobile_network_details",
+              "fetch_pan_to_father_name", "fetch_pan_kra_status", "fetch_mobile_to_digital_age",
+              "fetch_mobile_to_multiple_upi", "fetch_pan_msme_check"]),
+}
+
+
+class Timeline:
+    """Builds fake lookups and records when each one starts and finishes."""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.started = {}
+        self.finished = {}
+        self.args = {}
+
+    def fake(self, name: str, delay: float, payload: dict):
+        async def _call(*args):
+            self.started[name] = time.perf_counter() - self.origin
+            self.args[name] = args
+            await asyncio.sleep(delay)
+            self.finished[name] = time.perf_counter() - self.origin
+            return payload
+        return _call
+
+
+async def _fake_user(request):
+    return {"userId": 1, "username": "tester", "role": "user"}
+
+
+def _run_route(route: str, monkeypatch, uan_number=UAN, pan_to_uan_delay=2 * STEP):
+    """Call the route with every lookup faked; returns (profile, timeline, elapsed seconds)."""
+    module, model, handler, access_check, lookups = ROUTES[route]
+    timeline = Timeline()
+    monkeypatch.setattr(module, "get_authenticated_user", _fake_user)
+    monkeypatch.setattr(module, access_check, lambda user: True)
+    for lookup in lookups:
+        monkeypatch.setattr(module, lookup, timeline.fake(lookup, STEP, {"sub_code": "SUCCESS", "data": {}}))
+    monkeypatch.setattr(module, "fetch_pan_to_uan", timeline.fake(
+        "fetch_pan_to_uan", pan_to_uan_delay, {"sub_code": "SUCCESS", "data": {"uan_number": uan_number}}
+    ))
+    monkeypatch.setattr(module, "fetch_uan_employment_history", timeline.fake(
+        "fetch_uan_employment_history", STEP, {"sub_code": "SUCCESS", "data": {"employment_history": []}}
+    ))
+
+    data = getattr(module, model)(name="Ravi Kumar", mobile_number="9999999999", pan_number="ABCDE1234F")
+    request = Request({"type": "http", "method": "POST", "path": f"/verification-{route}",
+                       "query_string": b"", "headers": []})
+    start = time.perf_counter()
+    profile = asyncio.run(getattr(module, handler)(request, data))
+    return profile, timeline, time.perf_counter() - start
+
+
+@pytest.mark.parametrize("route", sorted(ROUTES))
+def test_calls_overlap_and_history_waits_for_uan(route, monkeypatch):
+    """Independent lookups start together; employment history starts once PAN to UAN has its UAN."""
+    profile, timeline, elapsed = _run_route(route, monkeypatch)
+
+    independent = [name for name in timeline.started if name != "fetch_uan_employment_history"]
+    print(f"{route}: {len(timeline.started)} calls in {elapsed * 1000:.0f}ms")
+    assert len(independent) == len(ROUTES[route][4]) + 1
+    assert max(timeline.started[name] for name in independent) < STEP / 2
+    assert timeline.started["fetch_uan_employment_history"] >= timeline.finished["fetch_pan_to_uan"]
+    assert timeline.args["fetch_uan_employment_history"][0] == UAN
+    # Critical path is PAN to UAN then employment history, not the sum of every call
+    assert elapsed < 5 * STEP
+    assert profile["processingInfo"]["skippedApis"] == []
+    assert profile["processingInfo"]["timedOutApis"] == []
+
+
+@pytest.mark.parametrize("route", sorted(ROUTES))
+def test_history_is_skipped_without_uan(route, monkeypatch):
+    """No UAN from PAN to UAN means employment history is never called."""
+    profile, timeline, _ = _run_route(route, monkeypatch, uan_number=None)
+
+    assert "fetch_uan_employment_history" not in timeline.started
+    assert profile["processingInfo"]["skippedApis"] == ["UAN Employment History"]
+
+
+@pytest.mark.parametrize("route", sorted(ROUTES))
+def test_history_is_skipped_when_budget_runs_out(route, monkeypatch):
+    """Employment history is not started when PAN to UAN leaves less than its minimum budget."""
+    module = ROUTES[route][0]
+    budget_key = "ADDITIONAL_MIN_BUDGET" if route == "advanced" else "CONDITIONAL_MIN_BUDGET"
+    monkeypatch.setitem(module.PRODUCTION_LIMITS, "TOTAL_TIMEOUT", 10 * STEP * 1000)
+    monkeypatch.setitem(module.PRODUCTION_LIMITS, budget_key, 8 * STEP * 1000)
+
+    profile, timeline, _ = _run_route(route, monkeypatch, pan_to_uan_delay=3 * STEP)
+
+    assert "fetch_uan_employment_history" not in timeline.started
+    assert profile["processingInfo"]["skippedApis"] == ["UAN Employment History"]
+    # The other lookups were not held back by the budget
+    assert len(timeline.finished) == len(ROUTES[route][4]) + 1
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
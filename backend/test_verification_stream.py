@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Test the streaming (NDJSON/SSE) mode of the verification endpoints.
+
+Authentication and the upstream lookups are replaced with fakes that answer
+after fixed delays, one of them slow. The test reads the streamed body as it
+is produced and checks that fast sections arrive long before the slow
+upstream finishes, that the stream ends with the metadata block, and that
+merging the streamed sections gives the same response as the regular JSON
+mode.
+"""
+
+import json
+import time
+import asyncio
+
+from starlette.requests import Request
+
+import routes.verification_mini as verification_mini
+import routes.verification_advanced as verification_advanced
+from routes.verification_mini import VerificationMiniRequest
+from routes.verification_advanced import VerificationRequest
+
+SLOW = 0.6  # seconds for the slow upstream
+FAST = 0.05
+
+
+def _request(query: str = "", accept: str = "application/json") -> Request:
+    return Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/verification",
+        "query_string": query.encode(),
+        "headers": [(b"accept", accept.encode())],
+    })
+
+
+def _fake(delay: float, payload: dict):
+    async def _call(*args):
+        await asyncio.sleep(delay)
+        return payload
+    return _call
+
+
+async def _fake_user(request):
+    return {"userId": 1, "username": "tester", "role": "user"}
+
+
+def _patch(module, **fakes):
+    originals = {name: getattr(module, name) for name in fakes}
+    for name, fake in fakes.items():
+        setattr(module, name, fake)
+    return originals
+
+
+async def _read_stream(response):
+    """Collect (arrival seconds, event) pairs from a streamed NDJSON response."""
+    start = time.perf_counter()
+    events = []
+    async for chunk in response.body_iterator:
+        for line in chunk.splitlines():
+            if line.strip():
+                events.append((time.perf_counter() - start, json.loads(line)))
+    return events
+
+
+def _merge(events):
+    merged = {}
+    for _, event in events:
+        if event["event"] in ("section", "metadata"):
+            merged[event["section"]] = event["data"]
+    return merged
+
+
+def _strip_timing(value):
+    """Drop fields that legitimately differ between two runs."""
+    if isinstance(value, dict):
+        return {
+            k: _strip_timing(v) for k, v in value.items()
+            if k not in ("verifiedAt", "processingTimeMs", "generatedAt")
+        }
+    if isinstance(value, list):
+        return [_strip_timing(v) for v in value]
+    return value
+
+
+def test_mini_verification_streams_sections_early():
+    """Fast mini checks are streamed before the slow one; merged stream equals the JSON response."""
+    originals = _patch(
+        verification_mini,
+        get_authenticated_user=_fake_user,
+        has_verification_mini_access=lambda user: True,
+        verify_aadhaar=_fake(FAST, {"data": {"age_range": "30-40", "state": "MH", "gender": "M"}}),
+        verify_pan=_fake(FAST, {"data": {"full_name": "RAVI KUMAR", "status": "valid"}}),
+        verify_mnrl=_fake(SLOW, {"sub_code": "NO_MNRL_RECORD_FOUND", "data": {"mnrl_record_found": False}}),
+    )
+    data = VerificationMiniRequest(
+        name="Ravi Kumar", dob="12/04/1985", mobile="9999999999", aadhaar_number="123412341234",
+        pan_number="ABCDE1234F", verifications=["aadhaar", "pan", "mnrl"],
+    )
+
+    async def _run():
+        streamed = await verification_mini.verification_mini(_request("stream=ndjson"), data)
+        events = await _read_stream(streamed)
+        regular = await verification_mini.verification_mini(_request(), data)
+        return streamed, events, regular
+
+    try:
+        streamed, events, regular = asyncio.run(_run())
+    finally:
+        _patch(verification_mini, **originals)
+
+    arrivals = {event.get("section"): at for at, event in events}
+    print(f"mini arrivals: { {k: round(v, 3) for k, v in arrivals.items()} }")
+
+    assert streamed.media_type == "application/x-ndjson"
+    assert arrivals["personalInfo"] < FAST
+    assert arrivals["aadhaarVerification"] < SLOW / 2
+    assert arrivals["panVerification"] < SLOW / 2
+    assert arrivals["mnrlVerification"] >= SLOW
+    assert events[-1][1]["event"] == "metadata"
+    assert _strip_timing(_merge(events)) == _strip_timing(regular)
+
+
+def test_advanced_verification_streams_sections_early():
+    """Advanced sections go out as their calls finish; processingInfo closes the stream."""
+    originals = _patch(
+        verification_advanced,
+        get_authenticated_user=_fake_user,
+        has_verification_advanced_access=lambda user: True,
+        fetch_pan_plus=_fake(FAST, {"data": {"full_name": "RAVI KUMAR", "gender": "M", "address": {"city": "Pune"}}}),
+        fetch_mobile_to_name=_fake(FAST, {"data": {"name": "Ravi"}}),
+        fetch_mobile_network_details=_fake(FAST, {"data": {"currentNetworkName": "Jio"}}),
+        fetch_pan_to_father_name=_fake(FAST, {"data": {"father_name": "Mohan Kumar"}}),
+        fetch_pan_to_uan=_fake(FAST, {"data": {"uan_number": "100200300400"}}),
+        fetch_uan_employment_history=_fake(FAST, {"data": {"employment_history": [{"establishment_name": "ACME"}]}}),
+        fetch_pan_msme_check=_fake(FAST, {"data": {"udyam_exists": False}}),
+        fetch_credit_score=_fake(SLOW, {"data": {"credit_score": 780}}),
+    )
+    data = VerificationRequest(name="Ravi Kumar", mobile_number="9999999999", pan_number="ABCDE1234F")
+
+    async def _run():
+        streamed = await verification_advanced.verification_advanced(
+            _request(accept="application/x-ndjson"), data
+        )
+        events = await _read_stream(streamed)
+        regular = await verification_advanced.verification_advanced(_request(), data)
+        return events, regular
+
+    try:
+        events, regular = asyncio.run(_run())
+    finally:
+        _patch(verification_advanced, **originals)
+
+    arrivals = {event.get("section"): at for at, event in events}
+    print(f"advanced arrivals: { {k: round(v, 3) for k, v in arrivals.items()} }")
+
+    assert arrivals["input"] < FAST
+    assert arrivals["personalInfo"] < SLOW / 2
+    assert arrivals["employmentInfo"] < SLOW / 2
+    assert arrivals["creditInfo"] >= SLOW
+    assert events[-1][1]["event"] == "metadata"
+    assert events[-1][1]["section"] == "processingInfo"
+    # Each section is sent once its inputs are complete, so nothing is re-sent here
+    sections = [event["section"] for _, event in events]
+    assert len(sections) == len(set(sections))
+    assert _strip_timing(_merge(events)) == _strip_timing(regular)
+
+
+def test_sse_format_and_errors():
+    """SSE frames carry the event name; a failure mid-stream ends with an error event."""
+    from utils.verification_stream import encode_event, get_stream_format
+
+    assert get_stream_format(_request("stream=sse")) == "sse"
+    assert get_stream_format(_request(accept="text/event-stream")) == "sse"
+    assert get_stream_format(_request()) is None
+    assert encode_event("sse", "section", {"section": "a", "data": 1}) == \
+        'event: section\ndata: {"section": "a", "data": 1}\n\n'
+
+    def _broken(*args):
+        raise RuntimeError("boom")
+
+    originals = _patch(
+        verification_mini,
+        get_authenticated_user=_fake_user,
+        has_verification_mini_access=lambda user: True,
+        finalize_uan_results=_broken,
+    )
+    data = VerificationMiniRequest(name="Ravi Kumar", dob="1985-04-12", mobile="9999999999", verifications=[])
+
+    async def _run():
+        streamed = await verification_mini.verification_mini(_request("stream=ndjson"), data)
+        return await _read_stream(streamed)
+
+    try:
+        events = asyncio.run(_run())
+    finally:
+        _patch(verification_mini, **originals)
+
+    assert events[-1][1]["event"] == "error"
+
+
+if __name__ == "__main__":
+    import sys
+    import pytest
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
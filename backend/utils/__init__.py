@@ -6,7 +6,16 @@ This package contains various utility modules:
 - jwt_parser: JWT token parsing and validation
 - permissions: Permission bits checking utilities
 - api_tracking: API call tracking and analytics
+- analytics_writer: Background batched writer for analytics rows
+- result_cache: TTL cache for paid upstream verification results
+- http_client: Shared pooled async HTTP client for upstream calls
+- upstream_resilience: Per-upstream rate limits and circuit breakers
+- verification_stream: NDJSON/SSE streaming mode for the verification endpoints
+- async_jobs: Shared poller for upstream async verification jobs (DL, voter ID)
+- verification_batches: Worker pool for bulk verification batches
 - gstin_verification: GSTIN verification services
+- template_engine: Compiled Jinja2 templates for the PDF reports and emails
+- mail_attachments: Email attachments from uploads, cached reports or base64, spooled to disk
 - common: Common constants and configurations
 - api_analytics: Legacy API analytics functions
 """
@@ -0,0 +1,206 @@
+"""
+Background writer for API analytics rows.
+
+Upstream call tracking hands rows to a bounded in-memory queue instead of
+inserting them inline. A single worker task flushes the queue with COPY
+whenever a batch fills up or the flush interval elapses, so request handlers
+no longer wait on a database round-trip per upstream call. When the queue is
+full, callers wait briefly for space and the row is dropped (and counted)
+if none frees up.
+"""
+
+import os
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple
+
+from utils.dbCalls.analytics_db import build_api_call_record, insert_api_call_records
+
+# Maximum number of rows waiting to be written
+ANALYTICS_QUEUE_SIZE = int(os.getenv("ANALYTICS_QUEUE_SIZE", "10000"))
+# Rows per COPY
+ANALYTICS_BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", "500"))
+# Longest a row waits in the queue before being flushed (milliseconds)
+ANALYTICS_FLUSH_INTERVAL_MS = int(os.getenv("ANALYTICS_FLUSH_INTERVAL_MS", "1000"))
+# How long a caller waits for queue space before the row is dropped (milliseconds)
+ANALYTICS_ENQUEUE_TIMEOUT_MS = int(os.getenv("ANALYTICS_ENQUEUE_TIMEOUT_MS", "50"))
+# Longest shutdown waits for the queue to drain (milliseconds)
+ANALYTICS_SHUTDOWN_TIMEOUT_MS = int(os.getenv("ANALYTICS_SHUTDOWN_TIMEOUT_MS", "10000"))
+
+# Marks the end of the queue on shutdown
+_STOP = object()
+
+
+class AnalyticsWriter:
+    """Bounded queue of analytics rows flushed in batches by one worker task."""
+
+    def __init__(
+        self,
+        queue_size: int = ANALYTICS_QUEUE_SIZE,
+        batch_size: int = ANALYTICS_BATCH_SIZE,
+        flush_interval_ms: int = ANALYTICS_FLUSH_INTERVAL_MS,
+        enqueue_timeout_ms: int = ANALYTICS_ENQUEUE_TIMEOUT_MS
+    ):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval_ms = flush_interval_ms
+        self.enqueue_timeout_ms = enqueue_timeout_ms
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._closing = False
+        self.stats: Dict[str, int] = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "failed": 0,
+            "batches": 0,
+        }
+
+    def _ensure_started(self):
+        """Start the worker on the running loop if it is not already running."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._worker = None
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run(), name="analytics-writer")
+
+    async def enqueue(self, log_data: Dict[str, Any]) -> bool:
+        """
+        Queue an API call log entry for writing.
+
+        Args:
+            log_data: Same keys as analytics_db.log_api_call
+
+        Returns:
+            True if the row was queued, False if it was dropped
+        """
+        if self._closing:
+            self.stats["dropped"] += 1
+            return False
+
+        self._ensure_started()
+        # Build now so created_at reflects the call, not the flush
+        record = build_api_call_record(log_data)
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            # Backpressure: give the worker a moment to make room
+            try:
+                await asyncio.wait_for(self._queue.put(record), timeout=self.enqueue_timeout_ms / 1000)
+            except asyncio.TimeoutError:
+                self.stats["dropped"] += 1
+                if self.stats["dropped"] == 1 or self.stats["dropped"] % 1000 == 0:
+                    print(f"Analytics queue full, dropped {self.stats['dropped']} rows so far")
+                return False
+
+        self.stats["enqueued"] += 1
+        return True
+
+    async def _next_batch(self) -> Tuple[List[Tuple[Any, ...]], bool]:
+        """
+        Wait for the next batch of rows.
+
+        Returns:
+            Tuple of (rows, stop) where stop is True once shutdown was requested
+        """
+        item = await self._queue.get()
+        if item is _STOP:
+            return [], True
+
+        batch = [item]
+        deadline = self._loop.time() + self.flush_interval_ms / 1000
+        while len(batch) < self.batch_size:
+            if self._queue.empty():
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self._queue.get_nowait()
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self):
+        """Worker loop: flush batches until the stop marker is reached."""
+        while True:
+            batch, stop = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+            if stop:
+                break
+
+        # Rows from callers that were already waiting for space when the
+        # stop marker went in
+        remaining = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                remaining.append(item)
+        for start in range(0, len(remaining), self.batch_size):
+            await self._flush(remaining[start:start + self.batch_size])
+
+    async def _flush(self, batch: List[Tuple[Any, ...]]):
+        """Write one batch, falling back to row-by-row if the COPY fails."""
+        try:
+            self.stats["written"] += await insert_api_call_records(batch)
+            self.stats["batches"] += 1
+            return
+        except Exception as e:
+            print(f"Error writing {len(batch)} analytics rows in batch: {e}")
+
+        # One bad row (e.g. an unknown user_id) should not lose the whole batch
+        for record in batch:
+            try:
+                self.stats["written"] += await insert_api_call_records([record])
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"Error writing analytics row: {e}")
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get writer counters.
+
+        Returns:
+            Dictionary of enqueued/written/dropped/failed/batches counts and
+            the current queue depth
+        """
+        return {
+            **self.stats,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+    async def close(self, timeout_ms: int = ANALYTICS_SHUTDOWN_TIMEOUT_MS):
+        """
+        Stop accepting rows and flush everything still queued.
+
+        Args:
+            timeout_ms: Longest to wait for the queue to drain
+        """
+        self._closing = True
+        worker = self._worker
+        if worker is None or worker.done():
+            return
+
+        deadline = self._loop.time() + timeout_ms / 1000
+        try:
+            await asyncio.wait_for(self._queue.put(_STOP), timeout=timeout_ms / 1000)
+            await asyncio.wait_for(asyncio.shield(worker), timeout=max(deadline - self._loop.time(), 0))
+        except asyncio.TimeoutError:
+            worker.cancel()
+            await asyncio.gather(worker, return_exceptions=True)
+            lost = self._queue.qsize()
+            self.stats["dropped"] += lost
+            print(f"Analytics writer did not drain in time, dropped {lost} rows")
+
+        print(f"Analytics writer stopped: {self.get_stats()}")
+
+
+# Create a singleton instance
+analytics_writer = AnalyticsWriter()
@@ -1,7 +1,9 @@
 import os
 from datetime import datetime
 from typing import Dict, Any, Callable, Awaitable, Optional
-from models.api_analytics import ApiAnalytics
+from utils.analytics_writer import analytics_writer
+from utils.result_cache import result_cache, upstream_call_name, CachedUpstreamError, RESULT_CACHE_ENABLED
+from utils.http_client import track_coalescing
 
 ENABLE_ANALYTICS_TRACKING = os.getenv("ENABLE_ANALYTICS_TRACKING", "true").lower() == "true"
 
@@ -62,6 +64,10 @@ async def track_external_api_call(
     """
     Track external API calls with analytics.
 
+    Repeat lookups of cacheable services are answered from the result cache,
+    and concurrent identical lookups share one upstream request. Either way
+    the caller is logged with cost 0 and the cache flag set.
+
     Args:
         user_id: User ID
         username: Username
@@ -76,57 +82,120 @@ async def track_external_api_call(
     """
     start_time = datetime.now()
 
+    cache_key = None
+    if RESULT_CACHE_ENABLED:
+        cache_key = result_cache.make_key(service, args, kwargs, upstream=upstream_call_name(api_function))
+    if cache_key is not None:
+        cached = await result_cache.get(cache_key)
+        if cached is not None:
+            result, error = cached
+            response_time = (datetime.now() - start_time).total_seconds() * 1000
+            # Cache hits cost nothing upstream
+            await _record_call(
+                user_id, username, user_role, service, args,
+                status_code=500 if error is not None else 200,
+                cost=0.0,
+                response_time=response_time,
+                response_data={"error": error} if error is not None else result,
+                cache_hit=True,
+            )
+            if error is not None:
+                raise CachedUpstreamError(error)
+            return result
+
+    # Callers that share another caller's in-flight upstream request are
+    # logged like cache hits: they did not pay for a call of their own
+    coalescing = track_coalescing()
+
     try:
         result = await api_function(*args, **kwargs)
         response_time = (datetime.now() - start_time).total_seconds() * 1000  # Convert to ms
-        cost = API_COSTS.get(service, API_COSTS["default"])
-
-        # Log successful API call if analytics tracking is enabled
-        if ENABLE_ANALYTICS_TRACKING:
-            user_id_value = _normalize_user_id(user_id)
-            await ApiAnalytics.log_api_call({
-                "userId": user_id_value,
-                "username": username,
-                "userRole": user_role,
-                "service": service,
-                "endpoint": service,
-                "apiVersion": "v1",
-                "cost": cost,
-                "statusCode": 200,
-                "responseTime": response_time,
-                "profileType": _get_profile_type_from_service(service),
-                "requestData": _format_request_data(service, args),
-                "responseData": result,
-                "businessId": None,
-            })
+        shared = coalescing["coalesced"]
+        cost = 0.0 if shared else API_COSTS.get(service, API_COSTS["default"])
+
+        if cache_key is not None:
+            await result_cache.set(cache_key, service, result)
+
+        # Queue successful API call for the background analytics writer
+        await _record_call(
+            user_id, username, user_role, service, args,
+            status_code=200,
+            cost=cost,
+            response_time=response_time,
+            response_data=result,
+            cache_hit=shared,
+        )
 
         return result
 
     except Exception as error:
         response_time = (datetime.now() - start_time).total_seconds() * 1000
 
-        # Log failed API call if analytics tracking is enabled
-        if ENABLE_ANALYTICS_TRACKING:
-            user_id_value = _normalize_user_id(user_id)
-            await ApiAnalytics.log_api_call({
-                "userId": user_id_value,
-                "username": username,
-                "userRole": user_role,
-                "service": service,
-                "endpoint": service,
-                "apiVersion": "v1",
-                "cost": API_COSTS.get(service, API_COSTS["default"]),
-                "statusCode": 500,
-                "responseTime": response_time,
-                "profileType": _get_profile_type_from_service(service),
-                "requestData": _format_request_data(service, args),
-                "responseData": {"error": str(error)},
-                "businessId": None,
-            })
+        if cache_key is not None:
+            await result_cache.set_error(cache_key, service, error)
+
+        # Queue failed API call for the background analytics writer
+        await _record_call(
+            user_id, username, user_role, service, args,
+            status_code=500,
+            cost=0.0 if coalescing["coalesced"] else API_COSTS.get(service, API_COSTS["default"]),
+            response_time=response_time,
+            response_data={"error": str(error)},
+            cache_hit=coalescing["coalesced"],
+        )
 
         raise error
 
 
+async def _record_call(
+    user_id: str,
+    username: str,
+    user_role: str,
+    service: str,
+    args: tuple,
+    status_code: int,
+    cost: float,
+    response_time: float,
+    response_data: Any,
+    cache_hit: bool = False
+):
+    """
+    Queue an analytics row for a tracked call.
+
+    Args:
+        user_id: User ID
+        username: Username
+        user_role: User role
+        service: Service name
+        args: Arguments passed to the API function
+        status_code: 200 for success, 500 for failure
+        cost: Cost charged for the call
+        response_time: Response time in milliseconds
+        response_data: Response (or error) payload
+        cache_hit: Whether the result came from the result cache or a shared
+            in-flight request
+    """
+    if not ENABLE_ANALYTICS_TRACKING:
+        return
+
+    await analytics_writer.enqueue({
+        "userId": _normalize_user_id(user_id),
+        "username": username,
+        "userRole": user_role,
+        "service": service,
+        "endpoint": service,
+        "apiVersion": "v1",
+        "cost": cost,
+        "statusCode": status_code,
+        "responseTime": response_time,
+        "profileType": _get_profile_type_from_service(service),
+        "requestData": _format_request_data(service, args),
+        "responseData": response_data,
+        "businessId": None,
+        "cacheHit": cache_hit,
+    })
+
+
 def _normalize_user_id(user_id: Any) -> Optional[int]:
     """Convert user ID to integer when possible."""
     try:
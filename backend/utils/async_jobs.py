@@ -0,0 +1,579 @@
+"""
+Async job subsystem for upstream verifications that complete later.
+
+DL and voter ID verifications are submitted upstream and return a
+request_id whose result has to be fetched later. Instead of every request
+sleeping in its own fixed 2 second loop while holding the client
+connection, jobs are handed to one AsyncJobManager:
+
+- a single poller task polls every pending job when it is due, with
+  per-job exponential backoff (quick first polls, slower as the job ages,
+  Retry-After respected) and one cap on concurrent polls for all jobs;
+- an upstream webhook can resolve a job held by this worker immediately;
+- pending jobs are persisted to async_verification_jobs and resumed on
+  startup, so a restart does not lose them;
+- callers either wait for the result or hand the job_id to the client,
+  who fetches it later from /async-jobs/{job_id}.
+
+Each job is still logged as one tracked call of its kind's poll service,
+however many polls it takes.
+"""
+
+import os
+import time
+import uuid
+import heapq
+import random
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from utils.upstream_resilience import CircuitOpenError
+from utils.api_tracking import track_external_api_call
+from utils.dbCalls.async_jobs_db import (
+    insert_async_job,
+    update_async_job,
+    get_async_job,
+    get_pending_async_jobs,
+    delete_finished_async_jobs,
+)
+
+# Persist pending jobs so they survive a restart
+ASYNC_JOBS_PERSIST = os.getenv("ASYNC_JOBS_PERSIST", "true").lower() == "true"
+# Delay before the first poll of a new job (milliseconds)
+ASYNC_JOB_INITIAL_DELAY_MS = int(os.getenv("ASYNC_JOB_INITIAL_DELAY_MS", "1000"))
+# Longest delay between two polls of a job (milliseconds)
+ASYNC_JOB_MAX_DELAY_MS = int(os.getenv("ASYNC_JOB_MAX_DELAY_MS", "8000"))
+# Growth of the poll delay after every unfinished poll
+ASYNC_JOB_BACKOFF_FACTOR = float(os.getenv("ASYNC_JOB_BACKOFF_FACTOR", "1.5"))
+# How long a job is polled before it expires (milliseconds)
+ASYNC_JOB_TIMEOUT_MS = int(os.getenv("ASYNC_JOB_TIMEOUT_MS", "120000"))
+# Upstream polls in flight at once, across all jobs
+ASYNC_JOB_MAX_CONCURRENT_POLLS = int(os.getenv("ASYNC_JOB_MAX_CONCURRENT_POLLS", "10"))
+# How long finished jobs stay retrievable (seconds)
+ASYNC_JOB_RETENTION_SECONDS = int(os.getenv("ASYNC_JOB_RETENTION_SECONDS", "3600"))
+
+JOB_PENDING = "pending"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_EXPIRED = "expired"
+
+# Upstream statuses that will not change by polling again
+PERMANENT_POLL_ERROR_STATUSES = {400, 404, 422}
+
+
+class AsyncJobError(Exception):
+    """Raised when waiting on a job that failed or expired."""
+
+
+class AsyncJobKind:
+    """How to poll (and present) one kind of upstream async job."""
+
+    def __init__(
+        self,
+        name: str,
+        poll_service: str,
+        poll: Callable[[str], Awaitable[Any]],
+        format_result: Optional[Callable[["AsyncJob"], Dict[str, Any]]] = None
+    ):
+        self.name = name
+        self.poll_service = poll_service
+        self.poll = poll
+        self.format_result = format_result
+
+
+class AsyncJob:
+    """One upstream request being tracked until it completes."""
+
+    def __init__(
+        self,
+        kind: str,
+        request_id: str,
+        user_id: Optional[str] = None,
+        username: Optional[str] = None,
+        user_role: Optional[str] = None,
+        context: Optional[Dict[str, Any]] = None,
+        timeout_ms: int = ASYNC_JOB_TIMEOUT_MS,
+        job_id: Optional[str] = None
+    ):
+        self.job_id = job_id or str(uuid.uuid4())
+        self.kind = kind
+        self.request_id = request_id
+        self.user_id = str(user_id) if user_id is not None else None
+        self.username = username
+        self.user_role = user_role
+        self.context = context or {}
+        self.status = JOB_PENDING
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.attempts = 0
+        self.created_at = time.time()
+        self.expires_at = self.created_at + timeout_ms / 1000
+        self.finished_at: Optional[float] = None
+        self.next_poll_at: Optional[float] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "AsyncJob":
+        """Rebuild a job from its async_verification_jobs row."""
+        job = cls(
+            row["kind"], row["request_id"],
+            user_id=row.get("user_id"), username=row.get("username"), user_role=row.get("user_role"),
+            context=row.get("context"), job_id=row["job_id"],
+        )
+        job.status = row["status"]
+        job.result = row.get("result")
+        job.error = row.get("error")
+        job.attempts = row.get("attempts") or 0
+        if row.get("created_at"):
+            job.created_at = row["created_at"].timestamp()
+        job.expires_at = row["expires_at"].timestamp()
+        if job.status != JOB_PENDING and row.get("updated_at"):
+            job.finished_at = row["updated_at"].timestamp()
+        return job
+
+    @property
+    def done(self) -> bool:
+        return self.status != JOB_PENDING
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Client-facing view of the job (the raw upstream result is not included)."""
+        return {
+            "jobId": self.job_id,
+            "kind": self.kind,
+            "requestId": self.request_id,
+            "status": self.status,
+            "error": self.error,
+            "attempts": self.attempts,
+            "createdAt": datetime.fromtimestamp(self.created_at, timezone.utc).isoformat(),
+            "expiresAt": datetime.fromtimestamp(self.expires_at, timezone.utc).isoformat(),
+            "finishedAt": datetime.fromtimestamp(self.finished_at, timezone.utc).isoformat() if self.finished_at else None,
+        }
+
+
+def get_response_state(response: Any) -> Tuple[str, Optional[str]]:
+    """
+    Classify an upstream async poll (or webhook) response.
+
+    Args:
+        response: List of task entries as returned by the get-* endpoints
+
+    Returns:
+        Tuple of (job status, error message)
+    """
+    if isinstance(response, dict):
+        response = [response]
+    if not response or not isinstance(response, list) or not isinstance(response[0], dict):
+        return JOB_PENDING, None
+    status = response[0].get("status")
+    if status == "completed":
+        return JOB_COMPLETED, None
+    if status == "failed":
+        return JOB_FAILED, response[0].get("error") or "Upstream verification failed"
+    return JOB_PENDING, None
+
+
+class AsyncJobManager:
+    """Tracks upstream async jobs and polls them from one background task."""
+
+    def __init__(
+        self,
+        persist: bool = ASYNC_JOBS_PERSIST,
+        initial_delay_ms: int = ASYNC_JOB_INITIAL_DELAY_MS,
+        max_delay_ms: int = ASYNC_JOB_MAX_DELAY_MS,
+        backoff_factor: float = ASYNC_JOB_BACKOFF_FACTOR,
+        timeout_ms: int = ASYNC_JOB_TIMEOUT_MS,
+        max_concurrent_polls: int = ASYNC_JOB_MAX_CONCURRENT_POLLS,
+        retention_seconds: int = ASYNC_JOB_RETENTION_SECONDS
+    ):
+        self.persist = persist
+        self.initial_delay_ms = initial_delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.backoff_factor = backoff_factor
+        self.timeout_ms = timeout_ms
+        self.max_concurrent_polls = max_concurrent_polls
+        self.retention_seconds = retention_seconds
+        self._kinds: Dict[str, AsyncJobKind] = {}
+        self._jobs: Dict[str, AsyncJob] = {}
+        # (kind, request_id, user_id) -> job_id
+        self._by_request: Dict[Tuple[str, str, Optional[str]], str] = {}
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._schedule: List[Tuple[float, int, str]] = []
+        self._sequence = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._poll_slots: Optional[asyncio.Semaphore] = None
+        self._poller: Optional[asyncio.Task] = None
+        self._tasks: set = set()
+        self._last_purge = 0.0
+        self.stats: Dict[str, int] = {
+            "submitted": 0,
+            "resumed": 0,
+            "polls": 0,
+            "completed": 0,
+            "failed": 0,
+            "expired": 0,
+            "webhooks": 0,
+        }
+
+    def register_kind(
+        self,
+        name: str,
+        poll_service: str,
+        poll: Callable[[str], Awaitable[Any]],
+        format_result: Optional[Callable[[AsyncJob], Dict[str, Any]]] = None
+    ):
+        """
+        Register a kind of job.
+
+        Args:
+            name: Job kind (e.g. "dl")
+            poll_service: Service name the job is tracked and billed under
+            poll: Async function making one upstream poll for a request_id
+            format_result: Builds the client-facing section of a completed job
+        """
+        self._kinds[name] = AsyncJobKind(name, poll_service, poll, format_result)
+
+    def _ensure_started(self):
+        """Start the poller on the running loop if it is not already running."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._poll_slots = asyncio.Semaphore(self.max_concurrent_polls)
+            self._poller = None
+        if self._poller is None or self._poller.done():
+            self._poller = loop.create_task(self._run(), name="async-job-poller")
+
+    def _spawn(self, coro, name: str):
+        task = asyncio.get_running_loop().create_task(coro, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def start(self):
+        """Start polling and resume persisted pending jobs."""
+        self._ensure_started()
+        if not self.persist:
+            return
+        try:
+            rows = await get_pending_async_jobs()
+        except Exception as e:
+            print(f"Error loading pending async jobs: {e}")
+            return
+        for row in rows:
+            job = AsyncJob.from_row(row)
+            if job.kind not in self._kinds or job.job_id in self._jobs:
+                continue
+            self._add(job)
+            self.stats["resumed"] += 1
+        if rows:
+            print(f"Resumed {self.stats['resumed']} pending async jobs")
+
+    async def stop(self):
+        """Stop polling. Pending jobs stay persisted and are resumed on the next start."""
+        tasks = [task for task in [self._poller, *self._tasks] if task is not None and not task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._poller = None
+
+    async def submit(
+        self,
+        kind: str,
+        request_id: str,
+        user_id: Optional[str] = None,
+        username: Optional[str] = None,
+        user_role: Optional[str] = None,
+        context: Optional[Dict[str, Any]] = None
+    ) -> AsyncJob:
+        """
+        Start tracking an upstream request.
+
+        Submitting a request_id the same user already has tracked returns
+        the existing job. Another user submitting the same request_id gets a
+        job (and a tracked call) of their own.
+
+        Args:
+            kind: Registered job kind
+            request_id: Upstream request id returned by the initiation call
+            user_id: ID of the user who submitted the job
+            username: Username of the user who submitted the job
+            user_role: Role of the user who submitted the job
+            context: JSON-serializable inputs needed to format the result
+
+        Returns:
+            The job
+        """
+        if kind not in self._kinds:
+            raise ValueError(f"Unknown async job kind: {kind}")
+        self._ensure_started()
+
+        job = AsyncJob(kind, request_id, user_id, username, user_role, context, self.timeout_ms)
+        existing = self._by_request.get((kind, request_id, job.user_id))
+        if existing in self._jobs:
+            return self._jobs[existing]
+
+        if self.persist:
+            try:
+                job.job_id = await insert_async_job(
+                    job.job_id, kind, request_id, job.user_id, username, user_role, job.context,
+                    datetime.fromtimestamp(job.expires_at, timezone.utc)
+                ) or job.job_id
+            except Exception as e:
+                # Keep going in memory; the job just won't survive a restart
+                print(f"Error persisting async job {kind}/{request_id}: {e}")
+
+        self._add(job)
+        self.stats["submitted"] += 1
+        return job
+
+    def _add(self, job: AsyncJob):
+        """Index a pending job, schedule its first poll and start its tracked call."""
+        self._jobs[job.job_id] = job
+        self._by_request[(job.kind, job.request_id, job.user_id)] = job.job_id
+        self._schedule_poll(job, self.initial_delay_ms / 1000)
+        self._spawn(self._track(job), name=f"async-job-track:{job.job_id}")
+
+    async def _track(self, job: AsyncJob):
+        """Log the whole job as one tracked call of its poll service."""
+        kind = self._kinds[job.kind]
+
+        async def _await_result(request_id: str):
+            return await self.wait(job.job_id)
+
+        try:
+            await track_external_api_call(
+                job.user_id, job.username, job.user_role, kind.poll_service, _await_result, job.request_id
+            )
+        except AsyncJobError:
+            pass  # already logged as a failed call
+
+    def _schedule_poll(self, job: AsyncJob, delay: float):
+        job.next_poll_at = time.monotonic() + delay
+        self._sequence += 1
+        heapq.heappush(self._schedule, (job.next_poll_at, self._sequence, job.job_id))
+        self._wakeup.set()
+
+    def _next_delay(self, job: AsyncJob) -> float:
+        """Exponential backoff on the number of polls so far, with a little jitter."""
+        delay_ms = min(self.initial_delay_ms * self.backoff_factor ** job.attempts, self.max_delay_ms)
+        return delay_ms / 1000 * random.uniform(0.9, 1.1)
+
+    async def _run(self):
+        """Poller loop: start the polls that are due, then sleep until the next one."""
+        while True:
+            now = time.monotonic()
+            while self._schedule and self._schedule[0][0] <= now:
+                due_at, _, job_id = heapq.heappop(self._schedule)
+                job = self._jobs.get(job_id)
+                # Skip entries superseded by a reschedule or a finished job
+                if job is None or job.done or job.next_poll_at != due_at:
+                    continue
+                job.next_poll_at = None
+                self._spawn(self._poll(job), name=f"async-job-poll:{job_id}")
+
+            self._evict_finished()
+
+            timeout = self._schedule[0][0] - now if self._schedule else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, job: AsyncJob):
+        """Poll one job once and finish or reschedule it."""
+        kind = self._kinds[job.kind]
+        retry_after = 0.0
+        async with self._poll_slots:
+            if job.done:
+                return
+            job.attempts += 1
+            self.stats["polls"] += 1
+            try:
+                response = await kind.poll(job.request_id)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code in PERMANENT_POLL_ERROR_STATUSES:
+                    await self._finish(job, JOB_FAILED, error=f"Upstream returned {e.response.status_code}")
+                    return
+                retry_after = _retry_after_seconds(e.response)
+                print(f"Transient error polling {job.kind} job {job.request_id}: {e}")
+            except CircuitOpenError as e:
+                # Don't poll again before the upstream's circuit probes
+                retry_after = e.retry_after
+            except Exception as e:
+                print(f"Transient error polling {job.kind} job {job.request_id}: {e}")
+            else:
+                status, error = get_response_state(response)
+                if status != JOB_PENDING:
+                    await self._finish(job, status, result=response if status == JOB_COMPLETED else None, error=error)
+                    return
+
+        if job.done:
+            return  # resolved by a webhook while this poll was in flight
+        delay = max(self._next_delay(job), retry_after)
+        if time.time() + delay > job.expires_at:
+            await self._finish(job, JOB_EXPIRED, error=f"{job.kind} verification polling timed out")
+        else:
+            self._schedule_poll(job, delay)
+
+    async def _finish(self, job: AsyncJob, status: str, result: Any = None, error: Optional[str] = None):
+        """Record a job's final state and wake everyone waiting on it."""
+        if job.done:
+            return
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        self.stats[status] += 1
+
+        for waiter in self._waiters.pop(job.job_id, []):
+            if not waiter.done():
+                waiter.set_result(None)
+
+        if self.persist:
+            try:
+                await update_async_job(job.job_id, status, job.attempts, result, error)
+            except Exception as e:
+                print(f"Error persisting async job {job.job_id} result: {e}")
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Any:
+        """
+        Wait for a job's upstream result.
+
+        The job keeps being polled if the wait times out, so it can still be
+        fetched later by its job_id.
+
+        Args:
+            job_id: Job handle
+            timeout: Seconds to wait (None to wait until the job finishes)
+
+        Returns:
+            The upstream result of the completed job
+
+        Raises:
+            AsyncJobError: The job failed or expired
+            asyncio.TimeoutError: The job did not finish in time
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise AsyncJobError(f"Unknown async job: {job_id}")
+        if not job.done:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.setdefault(job_id, []).append(waiter)
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter), timeout=timeout)
+            finally:
+                if not waiter.done():
+                    waiter.cancel()
+                    if waiter in self._waiters.get(job_id, []):
+                        self._waiters[job_id].remove(waiter)
+        if job.status != JOB_COMPLETED:
+            raise AsyncJobError(job.error or f"Async job {job.status}")
+        return job.result
+
+    async def resolve_request(self, request_id: str, response: Any) -> bool:
+        """
+        Resolve a job from an upstream webhook delivery.
+
+        Every user's job for the request is finished. Jobs held by other
+        workers are left to their pollers.
+
+        Args:
+            request_id: Upstream request id
+            response: Delivered payload, in the same shape as a poll response
+
+        Returns:
+            True if a pending job on this worker was finished
+        """
+        self.stats["webhooks"] += 1
+        jobs = [
+            self._jobs[job_id] for (kind, rid, user_id), job_id in self._by_request.items()
+            if rid == request_id and job_id in self._jobs and not self._jobs[job_id].done
+        ]
+        if not jobs:
+            return False
+        status, error = get_response_state(response)
+        if status == JOB_PENDING:
+            return False
+        for job in jobs:
+            await self._finish(job, status, result=response if status == JOB_COMPLETED else None, error=error)
+        return True
+
+    async def get_job(self, job_id: str) -> Optional[AsyncJob]:
+        """
+        Look up a job by its handle, falling back to the database.
+
+        Args:
+            job_id: Job handle
+
+        Returns:
+            The job, or None if it is unknown
+        """
+        job = self._jobs.get(job_id)
+        if job is not None or not self.persist:
+            return job
+        try:
+            row = await get_async_job(job_id)
+        except Exception as e:
+            print(f"Error loading async job {job_id}: {e}")
+            return None
+        return AsyncJob.from_row(row) if row else None
+
+    def format_result(self, job: AsyncJob) -> Optional[Dict[str, Any]]:
+        """Client-facing section of a completed job, if its kind defines one."""
+        kind = self._kinds.get(job.kind)
+        if job.status != JOB_COMPLETED or kind is None or kind.format_result is None:
+            return None
+        return kind.format_result(job)
+
+    def _evict_finished(self):
+        """Forget finished jobs past retention and purge old rows now and then."""
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.done and now - job.finished_at > self.retention_seconds
+        ]
+        for job_id in expired:
+            job = self._jobs.pop(job_id)
+            self._by_request.pop((job.kind, job.request_id, job.user_id), None)
+
+        if self.persist and now - self._last_purge > self.retention_seconds:
+            self._last_purge = now
+            self._spawn(self._purge(), name="async-job-purge")
+
+    async def _purge(self):
+        try:
+            deleted = await delete_finished_async_jobs(self.retention_seconds)
+            if deleted:
+                print(f"Deleted {deleted} finished async jobs")
+        except Exception as e:
+            print(f"Error deleting finished async jobs: {e}")
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get job counters.
+
+        Returns:
+            Dictionary of submitted/resumed/polls/completed/failed/expired/
+            webhooks counts and the number of pending jobs
+        """
+        return {
+            **self.stats,
+            "pending": sum(1 for job in self._jobs.values() if not job.done),
+        }
+
+
+def _retry_after_seconds(response: httpx.Response) -> float:
+    """Seconds requested by a Retry-After header (0 if absent or not a number)."""
+    try:
+        return max(float(response.headers.get("retry-after", 0)), 0.0)
+    except ValueError:
+        return 0.0
+
+
+# Global manager instance
+async_job_manager = AsyncJobManager()
@@ -9,6 +9,10 @@ reusability, and testing.
 from .user_db import *
 from .analytics_db import *
 from .auth_db import *
+from .result_cache_db import *
+from .async_jobs_db import *
+from .verification_batches_db import *
+from .mail_outbox_db import *
 from .common import *
 
 __all__ = [
@@ -38,9 +42,14 @@ __all__ = [
     'get_analytics_user_usage',
     'get_analytics_profile_type_counts',
     'get_analytics_top_endpoints',
+    'get_analytics_dashboard',
     'get_analytics_logs_paginated',
     'count_analytics_logs',
+    'encode_logs_cursor',
+    'decode_logs_cursor',
     'log_api_call',
+    'build_api_call_record',
+    'insert_api_call_records',
     'create_analytics_entry',
     'build_analytics_filter',
     'format_analytics_logs_for_response',
@@ -52,6 +61,37 @@ __all__ = [
     'check_user_exists_by_username',
     'insert_new_user',
     
+    # Result cache operations
+    'get_cached_result',
+    'store_cached_result',
+    'delete_expired_cached_results',
+    
+    # Async verification job operations
+    'insert_async_job',
+    'update_async_job',
+    'get_async_job',
+    'get_pending_async_jobs',
+    'delete_finished_async_jobs',
+    
+    # Bulk verification batch operations
+    'create_verification_batch',
+    'claim_batch_items',
+    'finish_batch_item',
+    'release_batch_items',
+    'get_verification_batch',
+    'get_verification_batch_items',
+    
+    # Outbound mail queue operations
+    'enqueue_mail',
+    'claim_mail',
+    'get_mail_attachments',
+    'read_mail_attachment_chunk',
+    'mark_mail_sent',
+    'mark_mail_retry',
+    'mark_mail_failed',
+    'release_mail',
+    'get_mail_status',
+    
     # Common utilities
     'parse_date_with_fallback',
     'format_end_date',
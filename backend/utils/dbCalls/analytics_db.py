@@ -6,8 +6,18 @@ This module contains all database operations related to API analytics and tracki
 
 from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
+from decimal import Decimal
+import base64
+import binascii
 import json
-from config.db import get_db_pool
+from config.db import get_db_pool, ANALYTICS_ROLLUP_TABLES
+
+# Column order of the records produced by build_api_call_record
+API_CALL_RECORD_COLUMNS = [
+    "user_id", "username", "service", "endpoint", "method", "status_code",
+    "response_time", "cost", "ip_address", "user_agent", "request_data",
+    "response_data", "created_at", "cache_hit",
+]
 
 
 def _build_where_clause(filter_conditions: Dict[str, Any]) -> Tuple[str, List[Any]]:
@@ -56,6 +66,102 @@ def _build_where_clause(filter_conditions: Dict[str, Any]) -> Tuple[str, List[An
     return "", []
 
 
+# Filter keys that are also rollup key columns
+_ROLLUP_FILTER_KEYS = ("user_id", "service", "endpoint", "username", "status_code")
+
+# Raw rows in the same shape as rollup rows (one call each)
+_RAW_SOURCE_COLUMNS = """
+            DATE(created_at) AS day, service, endpoint, user_id, username,
+            request_data->>'profileType' AS profile_type, 1 AS calls, cost,
+            response_time AS response_time_sum
+"""
+
+# Rollup rows with the '' / 0 placeholders turned back into NULL
+_ROLLUP_SOURCE_COLUMNS = """
+            {day} AS day, NULLIF(service, '') AS service, NULLIF(endpoint, '') AS endpoint,
+            NULLIF(user_id, 0) AS user_id, NULLIF(username, '') AS username,
+            NULLIF(profile_type, '') AS profile_type, calls, cost, response_time_sum
+"""
+
+# Whole hours and whole days inside a [start, end] range, in the session time zone
+_ROLLUP_BOUNDS_QUERY = """
+    SELECT
+        range_start,
+        range_end,
+        CASE WHEN date_trunc('hour', range_start) = range_start THEN range_start
+             ELSE date_trunc('hour', range_start) + interval '1 hour' END AS hour_start,
+        date_trunc('hour', range_end) AS hour_end,
+        CASE WHEN date_trunc('day', range_start) = range_start THEN range_start
+             ELSE date_trunc('day', range_start) + interval '1 day' END AS day_start,
+        date_trunc('day', range_end) AS day_end
+    FROM (
+        SELECT $1::timestamptz AS range_start,
+               $2::timestamptz + interval '1 microsecond' AS range_end
+    ) r
+"""
+
+
+async def _get_usage_source(conn, filter_conditions: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """
+    Build the row source for usage aggregations.
+
+    Whole days are read from api_analytics_daily, the remaining whole hours
+    from api_analytics_hourly, and only the partial hours at the edges of
+    the range from raw api_analytics rows. Every source row carries a calls
+    count, so aggregations use SUM(calls) rather than COUNT(*). Filters the
+    rollups cannot answer (e.g. method) fall back to raw rows.
+
+    Args:
+        conn: Database connection
+        filter_conditions: Dictionary containing filter conditions
+
+    Returns:
+        Tuple of (source_query, values_list)
+    """
+    date_range = (filter_conditions or {}).get("created_at")
+    use_rollups = (
+        isinstance(date_range, dict)
+        and "$gte" in date_range
+        and "$lte" in date_range
+        and all(key in ("created_at", "profile_type") + _ROLLUP_FILTER_KEYS for key in filter_conditions)
+    )
+    if not use_rollups:
+        where_clause, values = _build_where_clause(filter_conditions)
+        return f"SELECT {_RAW_SOURCE_COLUMNS} FROM api_analytics {where_clause}", values
+
+    bounds = await conn.fetchrow(_ROLLUP_BOUNDS_QUERY, date_range["$gte"], date_range["$lte"])
+    range_start, range_end = bounds["range_start"], bounds["range_end"]
+    hour_start, hour_end = bounds["hour_start"], bounds["hour_end"]
+    day_start, day_end = bounds["day_start"], bounds["day_end"]
+    if hour_start >= hour_end:
+        # No whole hour in range: everything comes from raw rows
+        hour_start = hour_end = range_end
+    if day_start >= day_end:
+        day_start = day_end = hour_start
+
+    values = [range_start, range_end, hour_start, hour_end, day_start, day_end]
+    dimension_filter = ""
+    for key in _ROLLUP_FILTER_KEYS:
+        if key in filter_conditions:
+            values.append(filter_conditions[key])
+            dimension_filter += f" AND {key} = ${len(values)}"
+
+    source = f"""
+        SELECT {_ROLLUP_SOURCE_COLUMNS.format(day="bucket")}
+        FROM api_analytics_daily
+        WHERE bucket >= ($5::timestamptz)::date AND bucket < ($6::timestamptz)::date{dimension_filter}
+        UNION ALL
+        SELECT {_ROLLUP_SOURCE_COLUMNS.format(day="DATE(bucket)")}
+        FROM api_analytics_hourly
+        WHERE ((bucket >= $3 AND bucket < $5) OR (bucket >= $6 AND bucket < $4)){dimension_filter}
+        UNION ALL
+        SELECT {_RAW_SOURCE_COLUMNS}
+        FROM api_analytics
+        WHERE ((created_at >= $1 AND created_at < $3) OR (created_at >= $4 AND created_at < $2)){dimension_filter}
+    """
+    return source, values
+
+
 async def get_analytics_total_usage(filter_conditions: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
     Get total usage analytics with aggregation.
@@ -67,19 +173,18 @@ async def get_analytics_total_usage(filter_conditions: Dict[str, Any]) -> List[D
         List containing aggregated total usage data
     """
     try:
-        where_clause, values = _build_where_clause(filter_conditions)
-        
-        query = f"""
-        SELECT 
-            COUNT(*) as totalCalls,
-            COALESCE(SUM(cost), 0) as totalCost,
-            COALESCE(AVG(response_time), 0) as avgResponseTime
-        FROM api_analytics
-        {where_clause}
-        """
-        
         pool = await get_db_pool()
         async with pool.acquire() as conn:
+            source, values = await _get_usage_source(conn, filter_conditions)
+
+            query = f"""
+            SELECT 
+                COALESCE(SUM(calls), 0)::bigint as totalCalls,
+                COALESCE(SUM(cost), 0) as totalCost,
+                COALESCE(SUM(response_time_sum) / NULLIF(SUM(calls), 0), 0) as avgResponseTime
+            FROM ({source}) s
+            """
+
             row = await conn.fetchrow(query, *values)
             if row:
                 return [dict(row)]
@@ -99,21 +204,20 @@ async def get_analytics_daily_usage(filter_conditions: Dict[str, Any]) -> List[D
         List containing daily usage data
     """
     try:
-        where_clause, values = _build_where_clause(filter_conditions)
-        
-        query = f"""
-        SELECT 
-            DATE(created_at) as _id,
-            COUNT(*) as calls,
-            COALESCE(SUM(cost), 0) as cost
-        FROM api_analytics
-        {where_clause}
-        GROUP BY DATE(created_at)
-        ORDER BY DATE(created_at)
-        """
-        
         pool = await get_db_pool()
         async with pool.acquire() as conn:
+            source, values = await _get_usage_source(conn, filter_conditions)
+
+            query = f"""
+            SELECT 
+                day as _id,
+                SUM(calls)::bigint as calls,
+                COALESCE(SUM(cost), 0) as cost
+            FROM ({source}) s
+            GROUP BY day
+            ORDER BY day
+            """
+
             rows = await conn.fetch(query, *values)
             return [dict(row) for row in rows]
     except Exception:
@@ -131,21 +235,20 @@ async def get_analytics_service_breakdown(filter_conditions: Dict[str, Any]) ->
         List containing service breakdown data
     """
     try:
-        where_clause, values = _build_where_clause(filter_conditions)
-        
-        query = f"""
-        SELECT 
-            service as _id,
-            COUNT(*) as calls,
-            COALESCE(SUM(cost), 0) as cost
-        FROM api_analytics
-        {where_clause}
-        GROUP BY service
-        ORDER BY calls DESC
-        """
-        
         pool = await get_db_pool()
         async with pool.acquire() as conn:
+            source, values = await _get_usage_source(conn, filter_conditions)
+
+            query = f"""
+            SELECT 
+                service as _id,
+                SUM(calls)::bigint as calls,
+                COALESCE(SUM(cost), 0) as cost
+            FROM ({source}) s
+            GROUP BY service
+            ORDER BY calls DESC
+            """
+
             rows = await conn.fetch(query, *values)
             return [dict(row) for row in rows]
     except Exception:
@@ -164,23 +267,22 @@ async def get_analytics_user_usage(filter_conditions: Dict[str, Any], limit: int
         List containing user usage data
     """
     try:
-        where_clause, values = _build_where_clause(filter_conditions)
-        
-        query = f"""
-        SELECT 
-            user_id,
-            username,
-            COUNT(*) as calls,
-            COALESCE(SUM(cost), 0) as cost
-        FROM api_analytics
-        {where_clause}
-        GROUP BY user_id, username
-        ORDER BY cost DESC
-        LIMIT ${"" if not values else len(values) + 1}
-        """
-        
         pool = await get_db_pool()
         async with pool.acquire() as conn:
+            source, values = await _get_usage_source(conn, filter_conditions)
+
+            query = f"""
+            SELECT 
+                user_id,
+                username,
+                SUM(calls)::bigint as calls,
+                COALESCE(SUM(cost), 0) as cost
+            FROM ({source}) s
+            GROUP BY user_id, username
+            ORDER BY cost DESC
+            LIMIT ${len(values) + 1}
+            """
+
             rows = await conn.fetch(query, *values, limit)
             result = []
             for row in rows:
@@ -205,26 +307,21 @@ async def get_analytics_profile_type_counts(filter_conditions: Dict[str, Any]) -
         List containing profile type counts data
     """
     try:
-        where_clause, values = _build_where_clause(filter_conditions)
-        # Add condition for profile type being not null
-        if where_clause:
-            where_clause += " AND request_data->>'profileType' IS NOT NULL"
-        else:
-            where_clause = "WHERE request_data->>'profileType' IS NOT NULL"
-        
-        query = f"""
-        SELECT 
-            request_data->>'profileType' as _id,
-            COUNT(*) as count,
-            COALESCE(SUM(cost), 0) as cost
-        FROM api_analytics
-        {where_clause}
-        GROUP BY request_data->>'profileType'
-        ORDER BY count DESC
-        """
-        
         pool = await get_db_pool()
         async with pool.acquire() as conn:
+            source, values = await _get_usage_source(conn, filter_conditions)
+
+            query = f"""
+            SELECT 
+                profile_type as _id,
+                SUM(calls)::bigint as count,
+                COALESCE(SUM(cost), 0) as cost
+            FROM ({source}) s
+            WHERE profile_type IS NOT NULL
+            GROUP BY profile_type
+            ORDER BY count DESC
+            """
+
             rows = await conn.fetch(query, *values)
             return [dict(row) for row in rows]
     except Exception:
@@ -243,57 +340,215 @@ async def get_analytics_top_endpoints(filter_conditions: Dict[str, Any], limit:
         List containing top endpoints data
     """
     try:
-        where_clause, values = _build_where_clause(filter_conditions)
-        
-        query = f"""
-        SELECT 
-            endpoint as _id,
-            COUNT(*) as calls,
-            COALESCE(SUM(cost), 0) as cost,
-            COALESCE(AVG(response_time), 0) as avgResponseTime
-        FROM api_analytics
-        {where_clause}
-        GROUP BY endpoint
-        ORDER BY calls DESC
-        LIMIT ${"" if not values else len(values) + 1}
-        """
-        
         pool = await get_db_pool()
         async with pool.acquire() as conn:
+            source, values = await _get_usage_source(conn, filter_conditions)
+
+            query = f"""
+            SELECT 
+                endpoint as _id,
+                SUM(calls)::bigint as calls,
+                COALESCE(SUM(cost), 0) as cost,
+                COALESCE(SUM(response_time_sum) / NULLIF(SUM(calls), 0), 0) as avgResponseTime
+            FROM ({source}) s
+            GROUP BY endpoint
+            ORDER BY calls DESC
+            LIMIT ${len(values) + 1}
+            """
+
             rows = await conn.fetch(query, *values, limit)
             return [dict(row) for row in rows]
     except Exception:
         return []
 
 
+def _empty_dashboard() -> Dict[str, Any]:
+    """Dashboard facets for a range with no data."""
+    return {
+        "overview": {"totalCalls": 0, "totalCost": 0, "avgResponseTime": 0},
+        "dailyUsage": [],
+        "serviceBreakdown": [],
+        "userUsage": [],
+        "profileTypeCounts": [],
+        "topEndpoints": [],
+    }
+
+
+async def get_analytics_dashboard(
+    filter_conditions: Dict[str, Any],
+    user_limit: int = 10,
+    endpoint_limit: int = 15
+) -> Dict[str, Any]:
+    """
+    Get every analytics dashboard facet from a single scan.
+
+    Computes the totals plus the daily, service, user, profile type and
+    endpoint breakdowns with one GROUPING SETS query instead of six separate
+    aggregate queries over the same range, reading from the rollup tables
+    where the range covers whole hours or days.
+
+    Args:
+        filter_conditions: Dictionary containing filter conditions
+        user_limit: Maximum number of users to return
+        endpoint_limit: Maximum number of endpoints to return
+
+    Returns:
+        Dictionary with overview, dailyUsage, serviceBreakdown, userUsage,
+        profileTypeCounts and topEndpoints
+    """
+    try:
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            source, values = await _get_usage_source(conn, filter_conditions)
+
+            query = f"""
+            SELECT
+                GROUPING(day) AS g_day,
+                GROUPING(service) AS g_service,
+                GROUPING(user_id) AS g_user,
+                GROUPING(profile_type) AS g_profile,
+                GROUPING(endpoint) AS g_endpoint,
+                day, service, user_id, username, profile_type, endpoint,
+                COALESCE(SUM(calls), 0)::bigint AS calls,
+                COALESCE(SUM(cost), 0) AS cost,
+                COALESCE(SUM(response_time_sum) / NULLIF(SUM(calls), 0), 0) AS avg_response_time
+            FROM ({source}) s
+            GROUP BY GROUPING SETS (
+                (),
+                (day),
+                (service),
+                (user_id, username),
+                (profile_type),
+                (endpoint)
+            )
+            """
+
+            rows = await conn.fetch(query, *values)
+    except Exception as e:
+        print(f"Error fetching analytics dashboard: {e}")
+        return _empty_dashboard()
+
+    dashboard = _empty_dashboard()
+    services, users, profiles, endpoints = [], [], [], []
+
+    # Each row belongs to exactly one grouping set; the grouped column has GROUPING() = 0
+    for row in rows:
+        calls = row["calls"]
+        cost = float(row["cost"])
+        if not row["g_day"]:
+            dashboard["dailyUsage"].append({"_id": row["day"], "calls": calls, "cost": cost})
+        elif not row["g_service"]:
+            services.append({"_id": row["service"], "calls": calls, "cost": cost})
+        elif not row["g_user"]:
+            users.append({
+                "_id": {"userId": row["user_id"], "username": row["username"]},
+                "calls": calls,
+                "cost": cost
+            })
+        elif not row["g_profile"]:
+            if row["profile_type"] is not None:
+                profiles.append({"_id": row["profile_type"], "count": calls, "cost": cost})
+        elif not row["g_endpoint"]:
+            endpoints.append({
+                "_id": row["endpoint"],
+                "calls": calls,
+                "cost": cost,
+                "avgResponseTime": float(row["avg_response_time"])
+            })
+        else:
+            dashboard["overview"] = {
+                "totalCalls": calls,
+                "totalCost": cost,
+                "avgResponseTime": float(row["avg_response_time"]),
+            }
+
+    dashboard["dailyUsage"].sort(key=lambda item: item["_id"])
+    dashboard["serviceBreakdown"] = sorted(services, key=lambda item: item["calls"], reverse=True)
+    dashboard["userUsage"] = sorted(users, key=lambda item: item["cost"], reverse=True)[:user_limit]
+    dashboard["profileTypeCounts"] = sorted(profiles, key=lambda item: item["count"], reverse=True)
+    dashboard["topEndpoints"] = sorted(endpoints, key=lambda item: item["calls"], reverse=True)[:endpoint_limit]
+    return dashboard
+
+
+def encode_logs_cursor(log: Dict[str, Any]) -> str:
+    """
+    Build an opaque keyset cursor pointing just past a log row.
+
+    Args:
+        log: Last row of the current page (needs created_at and id)
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps({"t": log["created_at"].isoformat(), "id": log["id"]})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_logs_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_logs_cursor.
+
+    Args:
+        cursor: Cursor string from a previous page
+
+    Returns:
+        Tuple of (created_at, id) of the last row already returned
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), int(payload["id"])
+    except (binascii.Error, json.JSONDecodeError, KeyError, TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
 async def get_analytics_logs_paginated(
     filter_conditions: Dict[str, Any], 
     page: int = 1, 
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """
     Get analytics logs with pagination.
+
+    With a cursor the page is fetched by keyset on (created_at, id), which
+    costs the same at any depth; without one, page/limit offsets are used.
     
     Args:
         filter_conditions: Dictionary containing filter conditions
-        page: Page number (1-based)
+        page: Page number (1-based), ignored when a cursor is given
         limit: Number of records per page
+        cursor: Cursor from the previous page (see encode_logs_cursor)
         
     Returns:
         List containing paginated log data
+
+    Raises:
+        ValueError: If the cursor is malformed
     """
-    try:
+    where_clause, values = _build_where_clause(filter_conditions)
+
+    if cursor:
+        cursor_created_at, cursor_id = decode_logs_cursor(cursor)
+        values += [cursor_created_at, cursor_id]
+        keyset_condition = f"(created_at, id) < (${len(values) - 1}, ${len(values)})"
+        where_clause = f"{where_clause} AND {keyset_condition}" if where_clause else f"WHERE {keyset_condition}"
+        offset = 0
+    else:
         offset = (page - 1) * limit
-        where_clause, values = _build_where_clause(filter_conditions)
-        
+
+    try:
         query = f"""
         SELECT id, user_id, username, service, endpoint, method, status_code, 
                response_time, cost, ip_address, user_agent, request_data, 
-               response_data, created_at
+               response_data, created_at, cache_hit
         FROM api_analytics
         {where_clause}
-        ORDER BY created_at DESC
-        LIMIT ${"" if not values else len(values) + 1} OFFSET ${"" if not values else len(values) + 2}
+        ORDER BY created_at DESC, id DESC
+        LIMIT ${len(values) + 1} OFFSET ${len(values) + 2}
         """
         
         pool = await get_db_pool()
@@ -304,24 +559,32 @@ async def get_analytics_logs_paginated(
         return []
 
 
-async def count_analytics_logs(filter_conditions: Dict[str, Any]) -> int:
+async def count_analytics_logs(filter_conditions: Dict[str, Any], estimate: bool = False) -> int:
     """
     Count analytics logs matching the filter.
     
     Args:
         filter_conditions: Dictionary containing filter conditions
+        estimate: Return the planner's row estimate instead of an exact
+            COUNT(*), which avoids scanning large ranges
         
     Returns:
-        Total count of matching documents
+        Total (or estimated) count of matching documents
     """
     try:
         where_clause, values = _build_where_clause(filter_conditions)
         
-        query = f"SELECT COUNT(*) FROM api_analytics {where_clause}"
-        
         pool = await get_db_pool()
         async with pool.acquire() as conn:
-            count = await conn.fetchval(query, *values)
+            if estimate:
+                plan = await conn.fetchval(
+                    f"EXPLAIN (FORMAT JSON) SELECT 1 FROM api_analytics {where_clause}", *values
+                )
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]["Plan"]["Plan Rows"])
+
+            count = await conn.fetchval(f"SELECT COUNT(*) FROM api_analytics {where_clause}", *values)
             return count or 0
     except Exception:
         return 0
@@ -338,50 +601,157 @@ async def log_api_call(log_data: Dict[str, Any]) -> Dict[str, Any]:
         Inserted document with id
     """
     try:
-        now = datetime.now()
-        
-        # Convert dictionaries to JSON strings if they exist
-        request_data = log_data.get("request_data") or log_data.get("requestData")
-        response_data = log_data.get("response_data") or log_data.get("responseData")
-        
-        if isinstance(request_data, dict):
-            request_data = json.dumps(request_data)
-        if isinstance(response_data, dict):
-            response_data = json.dumps(response_data)
-        
+        record = build_api_call_record(log_data)
+
         pool = await get_db_pool()
         async with pool.acquire() as conn:
-            row = await conn.fetchrow(
-                """
-                INSERT INTO api_analytics (
-                    user_id, username, service, endpoint, method, status_code,
-                    response_time, cost, ip_address, user_agent, request_data,
-                    response_data, created_at
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
-                RETURNING id, user_id, username, service, endpoint, method, status_code,
-                          response_time, cost, ip_address, user_agent, request_data,
-                          response_data, created_at
-                """,
-                log_data.get("user_id") or log_data.get("userId"),
-                log_data.get("username"),
-                log_data.get("service"),
-                log_data.get("endpoint"),
-                log_data.get("method", "GET"),
-                log_data.get("status_code") or log_data.get("statusCode", 200),
-                log_data.get("response_time") or log_data.get("responseTime", 0.0),
-                log_data.get("cost", 0.0),
-                log_data.get("ip_address") or log_data.get("ipAddress"),
-                log_data.get("user_agent") or log_data.get("userAgent"),
-                request_data,
-                response_data,
-                log_data.get("created_at") or log_data.get("createdAt") or now
-            )
+            async with conn.transaction():
+                row = await conn.fetchrow(
+                    """
+                    INSERT INTO api_analytics (
+                        user_id, username, service, endpoint, method, status_code,
+                        response_time, cost, ip_address, user_agent, request_data,
+                        response_data, created_at, cache_hit
+                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14)
+                    RETURNING id, user_id, username, service, endpoint, method, status_code,
+                              response_time, cost, ip_address, user_agent, request_data,
+                              response_data, created_at, cache_hit
+                    """,
+                    *record
+                )
+                await _apply_rollups(conn, [record])
             return dict(row)
     except Exception as e:
         print(f"Error logging API call: {e}")
         return {}
 
 
+def build_api_call_record(log_data: Dict[str, Any]) -> Tuple[Any, ...]:
+    """
+    Convert log data into a row tuple for bulk insertion.
+
+    Accepts the same keys as log_api_call. Values are coerced to the column
+    types so a single bad entry cannot fail a whole COPY batch on encoding.
+
+    Args:
+        log_data: Dictionary containing log data
+
+    Returns:
+        Tuple of values in API_CALL_RECORD_COLUMNS order
+    """
+    request_data = log_data.get("request_data") or log_data.get("requestData")
+    response_data = log_data.get("response_data") or log_data.get("responseData")
+
+    if request_data is not None and not isinstance(request_data, str):
+        request_data = json.dumps(request_data, default=str)
+    if response_data is not None and not isinstance(response_data, str):
+        response_data = json.dumps(response_data, default=str)
+
+    user_id = log_data.get("user_id") or log_data.get("userId")
+    try:
+        user_id = int(user_id) if user_id is not None else None
+    except (TypeError, ValueError):
+        user_id = None
+
+    return (
+        user_id,
+        log_data.get("username"),
+        log_data.get("service"),
+        log_data.get("endpoint"),
+        log_data.get("method", "GET"),
+        int(log_data.get("status_code") or log_data.get("statusCode", 200)),
+        float(log_data.get("response_time") or log_data.get("responseTime", 0.0)),
+        Decimal(str(log_data.get("cost", 0.0))),
+        log_data.get("ip_address") or log_data.get("ipAddress"),
+        log_data.get("user_agent") or log_data.get("userAgent"),
+        request_data,
+        response_data,
+        log_data.get("created_at") or log_data.get("createdAt") or datetime.now(),
+        bool(log_data.get("cache_hit") or log_data.get("cacheHit")),
+    )
+
+
+async def insert_api_call_records(records: List[Tuple[Any, ...]]) -> int:
+    """
+    Bulk insert API call log rows with COPY.
+
+    Args:
+        records: Row tuples built with build_api_call_record
+
+    Returns:
+        Number of rows written
+    """
+    if not records:
+        return 0
+
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.copy_records_to_table(
+                "api_analytics",
+                records=records,
+                columns=API_CALL_RECORD_COLUMNS,
+            )
+            await _apply_rollups(conn, records)
+    return len(records)
+
+
+
+async def _apply_rollups(conn, records: List[Tuple[Any, ...]]):
+    """
+    Add freshly inserted rows to the hourly and daily rollup tables.
+
+    Must run in the same transaction as the raw insert so the rollups never
+    drift from api_analytics.
+
+    Args:
+        conn: Connection with an open transaction
+        records: Row tuples built with build_api_call_record
+    """
+    column = {name: index for index, name in enumerate(API_CALL_RECORD_COLUMNS)}
+    arrays = [
+        [record[column[name]] for record in records]
+        for name in ("created_at", "user_id", "username", "service", "endpoint",
+                     "status_code", "cost", "response_time", "request_data")
+    ]
+
+    for table, (_, bucket_expression) in ANALYTICS_ROLLUP_TABLES.items():
+        # Rows are upserted in key order so concurrent writers lock rollup
+        # rows in the same order
+        await conn.execute(
+            f"""
+            INSERT INTO {table} (
+                bucket, user_id, username, service, endpoint, status_code,
+                profile_type, calls, cost, response_time_sum
+            )
+            SELECT
+                {bucket_expression},
+                COALESCE(user_id, 0),
+                COALESCE(username, ''),
+                COALESCE(service, ''),
+                COALESCE(endpoint, ''),
+                COALESCE(status_code, 0),
+                COALESCE(request_data->>'profileType', ''),
+                COUNT(*),
+                COALESCE(SUM(cost), 0),
+                COALESCE(SUM(response_time), 0)
+            FROM unnest(
+                $1::timestamptz[], $2::integer[], $3::text[], $4::text[], $5::text[],
+                $6::integer[], $7::numeric[], $8::float8[], $9::jsonb[]
+            ) AS batch(created_at, user_id, username, service, endpoint,
+                       status_code, cost, response_time, request_data)
+            GROUP BY 1, 2, 3, 4, 5, 6, 7
+            ORDER BY 1, 2, 3, 4, 5, 6, 7
+            ON CONFLICT (bucket, user_id, username, service, endpoint, status_code, profile_type)
+            DO UPDATE SET
+                calls = {table}.calls + EXCLUDED.calls,
+                cost = {table}.cost + EXCLUDED.cost,
+                response_time_sum = {table}.response_time_sum + EXCLUDED.response_time_sum
+            """,
+            *arrays
+        )
+
+
 async def create_analytics_entry(
     user_id: int,
     username: str,
@@ -509,5 +879,6 @@ def format_analytics_logs_for_response(logs_list: List[Dict[str, Any]]) -> List[
             "statusCode": log.get("status_code", 0),
             "responseTime": log.get("response_time", 0.0),
             "profileType": request_data.get("profileType"),
+            "cacheHit": log.get("cache_hit", False),
         })
     return formatted_logs
\ No newline at end of file
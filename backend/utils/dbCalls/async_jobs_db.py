@@ -0,0 +1,150 @@
+"""
+Database operations for persisted upstream async verification jobs.
+"""
+
+import json
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from config.db import get_db_pool
+
+
+def _row_to_job(row) -> Dict[str, Any]:
+    job = dict(row)
+    for key in ("context", "result"):
+        if isinstance(job.get(key), str):
+            job[key] = json.loads(job[key])
+    return job
+
+
+async def insert_async_job(
+    job_id: str,
+    kind: str,
+    request_id: str,
+    user_id: Optional[str],
+    username: Optional[str],
+    user_role: Optional[str],
+    context: Dict[str, Any],
+    expires_at: datetime
+) -> Optional[str]:
+    """
+    Persist a new pending job.
+
+    Args:
+        job_id: Job handle returned to clients
+        kind: Job kind (e.g. "dl", "voter-id")
+        request_id: Upstream request id being polled
+        user_id: ID of the user who submitted the job
+        username: Username of the user who submitted the job
+        user_role: Role of the user who submitted the job
+        context: JSON-serializable inputs needed to format the result
+        expires_at: When polling gives up
+
+    Returns:
+        The job_id of the stored row, which is the existing job's id if the
+        same user already persisted the same upstream request
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        return await conn.fetchval(
+            """
+            INSERT INTO async_verification_jobs (
+                job_id, kind, request_id, user_id, username, user_role, context, expires_at
+            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+            ON CONFLICT (kind, request_id, (COALESCE(user_id, 0))) DO UPDATE SET updated_at = NOW()
+            RETURNING job_id
+            """,
+            job_id,
+            kind,
+            request_id,
+            int(user_id) if user_id and str(user_id).isdigit() else None,
+            username,
+            user_role,
+            json.dumps(context, default=str),
+            expires_at
+        )
+
+
+async def update_async_job(
+    job_id: str,
+    status: str,
+    attempts: int,
+    result: Any = None,
+    error: Optional[str] = None
+):
+    """
+    Record a job's progress or final state.
+
+    Args:
+        job_id: Job handle
+        status: "pending", "completed", "failed" or "expired"
+        attempts: Number of polls made so far
+        result: Upstream result of a completed job
+        error: Error message of a failed or expired job
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        await conn.execute(
+            """
+            UPDATE async_verification_jobs
+            SET status = $2, attempts = $3, result = $4, error = $5, updated_at = NOW()
+            WHERE job_id = $1
+            """,
+            job_id,
+            status,
+            attempts,
+            json.dumps(result, default=str) if result is not None else None,
+            error
+        )
+
+
+async def get_async_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a job by its handle.
+
+    Args:
+        job_id: Job handle
+
+    Returns:
+        Job row as a dictionary, or None if it does not exist
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow("SELECT * FROM async_verification_jobs WHERE job_id = $1", job_id)
+    return _row_to_job(row) if row else None
+
+
+async def get_pending_async_jobs() -> List[Dict[str, Any]]:
+    """
+    Get every job that is still being polled.
+
+    Returns:
+        List of pending job rows, oldest first
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            "SELECT * FROM async_verification_jobs WHERE status = 'pending' ORDER BY created_at"
+        )
+    return [_row_to_job(row) for row in rows]
+
+
+async def delete_finished_async_jobs(retention_seconds: float) -> int:
+    """
+    Delete finished jobs that are older than the retention period.
+
+    Args:
+        retention_seconds: How long finished jobs stay retrievable
+
+    Returns:
+        Number of jobs deleted
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        status = await conn.execute(
+            """
+            DELETE FROM async_verification_jobs
+            WHERE status <> 'pending' AND updated_at < NOW() - make_interval(secs => $1)
+            """,
+            float(retention_seconds)
+        )
+    return int(status.split()[-1])
@@ -0,0 +1,309 @@
+"""
+Database operations for the outbound mail queue.
+"""
+
+import os
+import json
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple, BinaryIO
+from config.db import get_db_pool
+
+MAIL_STATUSES = ("pending", "sending", "sent", "failed")
+# Attachments are stored and read back in chunks of this many bytes
+MAIL_ATTACHMENT_CHUNK_BYTES = int(os.getenv("MAIL_ATTACHMENT_CHUNK_BYTES", str(256 * 1024)))
+
+
+def _decode(row) -> Dict[str, Any]:
+    data = dict(row)
+    if isinstance(data.get("recipients"), str):
+        data["recipients"] = json.loads(data["recipients"])
+    return data
+
+
+async def enqueue_mail(
+    message_id: str,
+    kind: str,
+    user_id: Optional[str],
+    subject: str,
+    recipients: List[str],
+    body: str,
+    html_body: Optional[str] = None,
+    attachments: Optional[List[Tuple[str, str, BinaryIO]]] = None
+):
+    """
+    Store a message for the background sender.
+
+    Attachment files are copied in MAIL_ATTACHMENT_CHUNK_BYTES chunks, so
+    memory use does not grow with their size.
+
+    Args:
+        message_id: Message handle returned to the client
+        kind: What the message is (e.g. "profile-report"), for reporting
+        user_id: ID of the user who requested the message
+        subject: Subject line
+        recipients: Recipient addresses
+        body: Plain-text body
+        html_body: HTML body
+        attachments: (filename, content_type, file) tuples; files are read from
+            their current position to the end
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.execute(
+                """
+                INSERT INTO mail_outbox (message_id, kind, user_id, subject, recipients, body, html_body)
+                VALUES ($1, $2, $3, $4, $5, $6, $7)
+                """,
+                message_id,
+                kind,
+                int(user_id) if user_id and str(user_id).isdigit() else None,
+                subject,
+                json.dumps(recipients),
+                body,
+                html_body
+            )
+            for position, (filename, content_type, stream) in enumerate(attachments or []):
+                size = 0
+                chunk_index = 0
+                while True:
+                    chunk = await asyncio.to_thread(stream.read, MAIL_ATTACHMENT_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    await conn.execute(
+                        """
+                        INSERT INTO mail_outbox_attachment_chunks (message_id, position, chunk_index, content)
+                        VALUES ($1, $2, $3, $4)
+                        """,
+                        message_id,
+                        position,
+                        chunk_index,
+                        chunk
+                    )
+                    size += len(chunk)
+                    chunk_index += 1
+                await conn.execute(
+                    """
+                    INSERT INTO mail_outbox_attachments (message_id, position, filename, content_type, size)
+                    VALUES ($1, $2, $3, $4, $5)
+                    """,
+                    message_id,
+                    position,
+                    filename,
+                    content_type,
+                    size
+                )
+
+
+async def claim_mail(limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+    """
+    Claim messages that are due for a send attempt.
+
+    Messages left "sending" by a process that died are reclaimed once their
+    lease expires. SKIP LOCKED lets several processes claim concurrently.
+
+    Args:
+        limit: Maximum number of messages to claim
+        lease_seconds: Seconds after which a message being sent is considered abandoned
+
+    Returns:
+        Claimed messages, oldest first
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            WITH due AS (
+                SELECT message_id
+                FROM mail_outbox
+                WHERE (status = 'pending' AND next_attempt_at <= NOW())
+                   OR (status = 'sending' AND started_at < NOW() - make_interval(secs => $2))
+                ORDER BY next_attempt_at
+                LIMIT $1
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE mail_outbox AS m
+            SET status = 'sending', started_at = NOW(), attempts = m.attempts + 1
+            FROM due
+            WHERE m.message_id = due.message_id
+            RETURNING m.message_id, m.kind, m.subject, m.recipients, m.body, m.html_body, m.attempts, m.created_at
+            """,
+            limit,
+            float(lease_seconds)
+        )
+    return sorted((_decode(row) for row in rows), key=lambda row: row["created_at"])
+
+
+async def get_mail_attachments(message_id: str) -> List[Dict[str, Any]]:
+    """
+    Get the attachments of a message in order, without their content.
+
+    Args:
+        message_id: Message handle
+
+    Returns:
+        List of {"position", "filename", "content_type", "size"}
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT position, filename, content_type, size
+            FROM mail_outbox_attachments
+            WHERE message_id = $1
+            ORDER BY position
+            """,
+            message_id
+        )
+    return [dict(row) for row in rows]
+
+
+async def read_mail_attachment_chunk(message_id: str, position: int, chunk_index: int) -> Optional[bytes]:
+    """
+    Read one stored chunk of an attachment.
+
+    Args:
+        message_id: Message handle
+        position: Attachment position from get_mail_attachments
+        chunk_index: Chunk number, from 0
+
+    Returns:
+        Chunk content, or None past the last chunk
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        return await conn.fetchval(
+            """
+            SELECT content
+            FROM mail_outbox_attachment_chunks
+            WHERE message_id = $1 AND position = $2 AND chunk_index = $3
+            """,
+            message_id,
+            position,
+            chunk_index
+        )
+
+
+async def mark_mail_sent(message_ids: List[str]):
+    """
+    Record messages as delivered to the SMTP server.
+
+    Attachments are deleted with the send; they are not needed any more.
+
+    Args:
+        message_ids: Handles of the sent messages
+    """
+    if not message_ids:
+        return
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.execute(
+                """
+                UPDATE mail_outbox
+                SET status = 'sent', sent_at = NOW(), last_error = NULL
+                WHERE message_id = ANY($1::VARCHAR[])
+                """,
+                message_ids
+            )
+            await conn.execute(
+                "DELETE FROM mail_outbox_attachment_chunks WHERE message_id = ANY($1::VARCHAR[])",
+                message_ids
+            )
+            await conn.execute(
+                "DELETE FROM mail_outbox_attachments WHERE message_id = ANY($1::VARCHAR[])",
+                message_ids
+            )
+
+
+async def mark_mail_retry(message_id: str, error: str, delay_seconds: float):
+    """
+    Put a message back in the queue after a failed attempt.
+
+    Args:
+        message_id: Message handle
+        error: Error of the failed attempt
+        delay_seconds: Seconds until the next attempt
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        await conn.execute(
+            """
+            UPDATE mail_outbox
+            SET status = 'pending', started_at = NULL, last_error = $2,
+                next_attempt_at = NOW() + make_interval(secs => $3)
+            WHERE message_id = $1
+            """,
+            message_id,
+            error,
+            float(delay_seconds)
+        )
+
+
+async def mark_mail_failed(message_id: str, error: str):
+    """
+    Give up on a message.
+
+    Args:
+        message_id: Message handle
+        error: Error of the last attempt
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.execute(
+                """
+                UPDATE mail_outbox
+                SET status = 'failed', started_at = NULL, last_error = $2
+                WHERE message_id = $1
+                """,
+                message_id,
+                error
+            )
+            await conn.execute("DELETE FROM mail_outbox_attachment_chunks WHERE message_id = $1", message_id)
+            await conn.execute("DELETE FROM mail_outbox_attachments WHERE message_id = $1", message_id)
+
+
+async def release_mail(message_ids: List[str]):
+    """
+    Return claimed messages to the queue (e.g. on shutdown) without counting the attempt.
+
+    Args:
+        message_ids: Handles of the claimed messages
+    """
+    if not message_ids:
+        return
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        await conn.execute(
+            """
+            UPDATE mail_outbox
+            SET status = 'pending', started_at = NULL, attempts = GREATEST(attempts - 1, 0)
+            WHERE message_id = ANY($1::VARCHAR[]) AND status = 'sending'
+            """,
+            message_ids
+        )
+
+
+async def get_mail_status(message_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the delivery status of a message.
+
+    Args:
+        message_id: Message handle
+
+    Returns:
+        Message row without bodies or attachments, or None
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow(
+            """
+            SELECT message_id, kind, user_id, subject, recipients, status, attempts,
+                   last_error, next_attempt_at, sent_at, created_at
+            FROM mail_outbox
+            WHERE message_id = $1
+            """,
+            message_id
+        )
+    return _decode(row) if row else None
@@ -0,0 +1,90 @@
+"""
+Database operations for the shared tier of the upstream result cache.
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional
+from config.db import get_db_pool
+
+
+async def get_cached_result(cache_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Get an unexpired cached upstream result.
+
+    Args:
+        cache_key: Hashed cache key
+
+    Returns:
+        Dictionary with result, error and expires_at, or None if there is no
+        unexpired entry
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow(
+            """
+            SELECT result, error, expires_at
+            FROM api_result_cache
+            WHERE cache_key = $1 AND expires_at > NOW()
+            """,
+            cache_key
+        )
+
+    if row is None:
+        return None
+
+    result = row["result"]
+    if isinstance(result, str):
+        result = json.loads(result)
+    return {"result": result, "error": row["error"], "expires_at": row["expires_at"]}
+
+
+async def store_cached_result(
+    cache_key: str,
+    service: str,
+    result: Any,
+    error: Optional[str],
+    ttl_seconds: float
+):
+    """
+    Insert or replace a cached upstream result.
+
+    Args:
+        cache_key: Hashed cache key
+        service: Upstream service the result belongs to
+        result: JSON-serializable upstream response (None for a failure)
+        error: Error message of a failed call (None for a success)
+        ttl_seconds: Seconds until the entry expires
+    """
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        await conn.execute(
+            """
+            INSERT INTO api_result_cache (cache_key, service, result, error, expires_at)
+            VALUES ($1, $2, $3, $4, $5)
+            ON CONFLICT (cache_key) DO UPDATE
+            SET service = EXCLUDED.service,
+                result = EXCLUDED.result,
+                error = EXCLUDED.error,
+                expires_at = EXCLUDED.expires_at
+            """,
+            cache_key,
+            service,
+            json.dumps(result, default=str) if result is not None else None,
+            error,
+            expires_at
+        )
+
+
+async def delete_expired_cached_results() -> int:
+    """
+    Delete expired cache entries.
+
+    Returns:
+        Number of entries deleted
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        status = await conn.execute("DELETE FROM api_result_cache WHERE expires_at <= NOW()")
+    return int(status.split()[-1])
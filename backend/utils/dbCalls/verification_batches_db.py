@@ -0,0 +1,234 @@
+"""
+Database operations for bulk verification batches and their items.
+"""
+
+import json
+from typing import Dict, Any, List, Optional, Tuple
+from config.db import get_db_pool
+
+BATCH_ITEM_STATUSES = ("pending", "running", "completed", "failed")
+
+
+def _decode(row, *keys) -> Dict[str, Any]:
+    data = dict(row)
+    for key in keys:
+        if isinstance(data.get(key), str):
+            data[key] = json.loads(data[key])
+    return data
+
+
+async def create_verification_batch(
+    batch_id: str,
+    batch_type: str,
+    user_id: Optional[str],
+    username: Optional[str],
+    user_role: Optional[str],
+    options: Dict[str, Any],
+    subjects: List[Dict[str, Any]]
+) -> int:
+    """
+    Store a batch and all of its subjects as pending items.
+
+    Args:
+        batch_id: Batch handle returned to the client
+        batch_type: Registered batch type (e.g. "mini", "business")
+        user_id: ID of the submitting user
+        username: Username of the submitting user
+        user_role: Role of the submitting user
+        options: Options applied to every subject (e.g. the verifications to run)
+        subjects: One dict per subject, in submission order
+
+    Returns:
+        Number of items stored
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.execute(
+                """
+                INSERT INTO verification_batches (
+                    batch_id, batch_type, user_id, username, user_role, options, total_items
+                ) VALUES ($1, $2, $3, $4, $5, $6, $7)
+                """,
+                batch_id,
+                batch_type,
+                int(user_id) if user_id and str(user_id).isdigit() else None,
+                username,
+                user_role,
+                json.dumps(options, default=str),
+                len(subjects)
+            )
+            await conn.copy_records_to_table(
+                "verification_batch_items",
+                records=[
+                    (batch_id, index, json.dumps(subject, default=str))
+                    for index, subject in enumerate(subjects)
+                ],
+                columns=["batch_id", "item_index", "subject"],
+            )
+    return len(subjects)
+
+
+async def claim_batch_items(limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+    """
+    Claim pending items for processing.
+
+    Items are taken round-robin across batches (lowest item_index first), so
+    a large batch does not starve batches submitted after it. Items left
+    running by a worker that died are reclaimed once their lease expires.
+    SKIP LOCKED lets several processes claim concurrently.
+
+    Args:
+        limit: Maximum number of items to claim
+        lease_seconds: Seconds after which a running item is considered abandoned
+
+    Returns:
+        Claimed items with their batch's type, user and options
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            WITH claimable AS (
+                SELECT i.batch_id, i.item_index
+                FROM verification_batch_items i
+                JOIN verification_batches b ON b.batch_id = i.batch_id
+                WHERE i.status = 'pending'
+                   OR (i.status = 'running' AND i.started_at < NOW() - make_interval(secs => $2))
+                ORDER BY i.item_index, b.created_at
+                LIMIT $1
+                FOR UPDATE OF i SKIP LOCKED
+            )
+            UPDATE verification_batch_items AS i
+            SET status = 'running', started_at = NOW(), attempts = i.attempts + 1
+            FROM claimable c, verification_batches b
+            WHERE i.batch_id = c.batch_id AND i.item_index = c.item_index AND b.batch_id = i.batch_id
+            RETURNING i.batch_id, i.item_index, i.subject, i.attempts,
+                      b.batch_type, b.user_id, b.username, b.user_role, b.options
+            """,
+            limit,
+            float(lease_seconds)
+        )
+    return [_decode(row, "subject", "options") for row in rows]
+
+
+async def finish_batch_item(
+    batch_id: str,
+    item_index: int,
+    status: str,
+    result: Any = None,
+    error: Optional[str] = None
+):
+    """
+    Record the outcome of an item.
+
+    Args:
+        batch_id: Batch handle
+        item_index: Position of the item in its batch
+        status: "completed" or "failed"
+        result: Verification result of a completed item
+        error: Error message of a failed item
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        await conn.execute(
+            """
+            UPDATE verification_batch_items
+            SET status = $3, result = $4, error = $5, finished_at = NOW()
+            WHERE batch_id = $1 AND item_index = $2
+            """,
+            batch_id,
+            item_index,
+            status,
+            json.dumps(result, default=str) if result is not None else None,
+            error
+        )
+
+
+async def release_batch_items(items: List[Tuple[str, int]]):
+    """
+    Return claimed items to the queue (e.g. on shutdown).
+
+    Args:
+        items: (batch_id, item_index) pairs
+    """
+    if not items:
+        return
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        await conn.executemany(
+            """
+            UPDATE verification_batch_items
+            SET status = 'pending', started_at = NULL
+            WHERE batch_id = $1 AND item_index = $2 AND status = 'running'
+            """,
+            items
+        )
+
+
+async def get_verification_batch(batch_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a batch with its per-status item counts.
+
+    Args:
+        batch_id: Batch handle
+
+    Returns:
+        Batch row plus pending/running/completed/failed counts, or None
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow(
+            """
+            SELECT b.*,
+                   COUNT(*) FILTER (WHERE i.status = 'pending') AS pending,
+                   COUNT(*) FILTER (WHERE i.status = 'running') AS running,
+                   COUNT(*) FILTER (WHERE i.status = 'completed') AS completed,
+                   COUNT(*) FILTER (WHERE i.status = 'failed') AS failed,
+                   MAX(i.finished_at) AS last_finished_at
+            FROM verification_batches b
+            LEFT JOIN verification_batch_items i ON i.batch_id = b.batch_id
+            WHERE b.batch_id = $1
+            GROUP BY b.batch_id
+            """,
+            batch_id
+        )
+    return _decode(row, "options") if row else None
+
+
+async def get_verification_batch_items(
+    batch_id: str,
+    after_index: Optional[int] = None,
+    limit: int = 50,
+    status: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Get one page of a batch's items in submission order (keyset pagination).
+
+    Args:
+        batch_id: Batch handle
+        after_index: Return items after this item_index (None for the first page)
+        limit: Page size
+        status: Only items with this status
+
+    Returns:
+        List of item rows
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT item_index, subject, status, result, error, attempts, started_at, finished_at
+            FROM verification_batch_items
+            WHERE batch_id = $1
+              AND ($2::INTEGER IS NULL OR item_index > $2)
+              AND ($3::VARCHAR IS NULL OR status = $3)
+            ORDER BY item_index
+            LIMIT $4
+            """,
+            batch_id,
+            after_index,
+            status,
+            limit
+        )
+    return [_decode(row, "subject", "result") for row in rows]
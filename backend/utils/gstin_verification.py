@@ -1,10 +1,12 @@
 import os
-import requests
+import httpx
 from typing import Dict, Any
 from fastapi import HTTPException
 from services.authService import auth_service
+from utils.http_client import request as upstream_request
 
 BASE_URL = "https://production.deepvue.tech/v1"
+GSTIN_API_TIMEOUT = 30000  # 30 second timeout (milliseconds)
 
 async def verify_gstin_advanced(gstin_number: str) -> Dict[str, Any]:
     """
@@ -28,14 +30,14 @@ async def verify_gstin_advanced(gstin_number: str) -> Dict[str, Any]:
             "x-api-key": os.getenv("CLIENT_SECRET", ""),
         }
 
-        response = requests.get(url, headers=headers, timeout=30)
+        response = await upstream_request("GET", url, headers=headers, timeout=GSTIN_API_TIMEOUT)
 
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"GSTIN advanced verification failed: {response.status_code} - {response.text}")
 
         return response.json()
 
-    except requests.exceptions.RequestException as req_error:
+    except httpx.RequestError as req_error:
         raise Exception(f"Network error during GSTIN verification: {str(req_error)}")
     except Exception as error:
         raise Exception(f"GSTIN verification error: {str(error)}")
@@ -59,14 +61,14 @@ async def verify_gstin_lite(gstin_number: str) -> Dict[str, Any]:
             "x-api-key": os.getenv("CLIENT_SECRET", ""),
         }
 
-        response = requests.get(url, headers=headers, timeout=30)
+        response = await upstream_request("GET", url, headers=headers, timeout=GSTIN_API_TIMEOUT)
 
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"GSTIN lite verification failed: {response.status_code} - {response.text}")
 
         return response.json()
 
-    except requests.exceptions.RequestException as req_error:
+    except httpx.RequestError as req_error:
         raise Exception(f"Network error during GSTIN lite verification: {str(req_error)}")
     except Exception as error:
         raise Exception(f"GSTIN lite verification error: {str(error)}")
@@ -90,14 +92,14 @@ async def verify_gstin_mini(gstin_number: str) -> Dict[str, Any]:
             "x-api-key": os.getenv("CLIENT_SECRET", ""),
         }
 
-        response = requests.get(url, headers=headers, timeout=30)
+        response = await upstream_request("GET", url, headers=headers, timeout=GSTIN_API_TIMEOUT)
 
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"GSTIN mini verification failed: {response.status_code} - {response.text}")
 
         return response.json()
 
-    except requests.exceptions.RequestException as req_error:
+    except httpx.RequestError as req_error:
         raise Exception(f"Network error during GSTIN mini verification: {str(req_error)}")
     except Exception as error:
         raise Exception(f"GSTIN mini verification error: {str(error)}")
@@ -0,0 +1,323 @@
+"""
+Shared async HTTP client for upstream API calls.
+
+Keeps one pooled, keep-alive httpx.AsyncClient per upstream host and caps the
+number of in-flight requests per host with a semaphore, so verification
+routes reuse TLS connections instead of opening a new one per call.
+Hosts can register an unauthorized handler so a 401 is retried once with
+refreshed credentials. Identical GETs already in flight, and POST lookups
+that opt in, are shared rather than sent twice. Every request is admitted by the per-upstream rate
+limits and circuit breakers in utils.upstream_resilience.
+"""
+
+import os
+import json
+import asyncio
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import httpx
+
+from utils.upstream_resilience import upstream_resilience
+
+# Default timeout for individual upstream calls (milliseconds)
+DEFAULT_TIMEOUT_MS = 8000
+
+# Pool and concurrency limits applied to every upstream host
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE_PER_HOST = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "10"))
+KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30"))
+MAX_CONCURRENCY_PER_HOST = int(os.getenv("UPSTREAM_MAX_CONCURRENCY", "16"))
+
+# Per-host overrides for the in-flight request cap
+HOST_CONCURRENCY_LIMITS: Dict[str, int] = {
+    "production.deepvue.tech": int(os.getenv("DEEPVUE_MAX_CONCURRENCY", str(MAX_CONCURRENCY_PER_HOST))),
+}
+
+# host -> async handler(headers) returning headers for a single retry after a
+# 401, or None to give up
+UNAUTHORIZED_HANDLERS: Dict[str, Callable[[Dict[str, str]], Awaitable[Optional[Dict[str, str]]]]] = {}
+
+# Join identical in-flight requests instead of sending them again
+COALESCE_REQUESTS = os.getenv("UPSTREAM_COALESCE_REQUESTS", "true").lower() == "true"
+# Request arguments that can be compared when looking for an identical request
+COALESCABLE_ARGUMENTS = {"params", "json", "data"}
+
+# host -> (event loop, client, semaphore)
+_clients: Dict[str, Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient, asyncio.Semaphore]] = {}
+
+# coalesce key -> task sending the request
+_inflight: Dict[Tuple[str, str, str], asyncio.Task] = {}
+
+# Marker set by track_coalescing() for the current task
+_coalesce_marker: ContextVar[Optional[Dict[str, bool]]] = ContextVar("upstream_coalesce_marker", default=None)
+
+
+def _get_host(url: str) -> str:
+    """Return the host[:port] part of a URL, used as the pool key."""
+    return urlsplit(url).netloc
+
+
+def _get_client(host: str) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+    """
+    Get (or lazily create) the pooled client and concurrency semaphore for a host.
+
+    Clients are bound to the running event loop; a new one is created if the
+    loop has changed (e.g. between test runs).
+    """
+    loop = asyncio.get_running_loop()
+    entry = _clients.get(host)
+    if entry and entry[0] is loop and not entry[1].is_closed:
+        return entry[1], entry[2]
+
+    client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=MAX_KEEPALIVE_PER_HOST,
+            keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=DEFAULT_TIMEOUT_MS / 1000,
+    )
+    semaphore = asyncio.Semaphore(HOST_CONCURRENCY_LIMITS.get(host, MAX_CONCURRENCY_PER_HOST))
+    _clients[host] = (loop, client, semaphore)
+    return client, semaphore
+
+
+def register_unauthorized_handler(
+    host: str,
+    handler: Callable[[Dict[str, str]], Awaitable[Optional[Dict[str, str]]]]
+):
+    """
+    Register a handler that refreshes credentials when a host answers 401.
+
+    Args:
+        host: Upstream host[:port]
+        handler: Async callable receiving the original request headers and
+            returning headers for one retry, or None to return the 401 as is
+    """
+    UNAUTHORIZED_HANDLERS[host] = handler
+
+
+async def request(
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: int = DEFAULT_TIMEOUT_MS,
+    coalesce: Optional[bool] = None,
+    **kwargs
+) -> httpx.Response:
+    """
+    Send a request through the shared pool for the URL's host.
+
+    Identical requests (same method, URL, query parameters, body and headers)
+    that are already in flight are joined instead of sent again, so every
+    caller gets the one upstream response.
+
+    Args:
+        method: HTTP method
+        url: Full request URL
+        headers: Request headers
+        timeout: Timeout in milliseconds
+        coalesce: Share identical in-flight requests; defaults to True for GET
+            only, since other methods may not be safe to merge
+        **kwargs: Extra httpx request arguments (params, json, data, ...)
+
+    Returns:
+        The httpx response (status is not checked)
+    """
+    if coalesce is None:
+        coalesce = method.upper() == "GET" and COALESCE_REQUESTS
+    key = _coalesce_key(method, url, headers, kwargs) if coalesce else None
+    if key is None:
+        return await _send(method, url, headers, timeout, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    task = _inflight.get(key)
+    if task is not None and task.get_loop() is loop:
+        marker = _coalesce_marker.get()
+        if marker is not None:
+            marker["coalesced"] = True
+    else:
+        task = loop.create_task(_send(method, url, headers, timeout, **kwargs))
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _forget_inflight(key, done))
+
+    # Shield so a caller hitting its own deadline does not cancel the request
+    # for everyone else sharing it
+    return await asyncio.shield(task)
+
+
+def _forget_inflight(key: Tuple[str, str, str], task: asyncio.Task):
+    """Drop a finished request from the in-flight map."""
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    # Every caller may have given up on the request; don't warn about an
+    # exception nobody was left to see
+    if not task.cancelled():
+        task.exception()
+
+
+async def _send(
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]],
+    timeout: int,
+    **kwargs
+) -> httpx.Response:
+    """Send one request, retrying a 401 once with refreshed credentials."""
+    host = _get_host(url)
+    client, semaphore = _get_client(host)
+    response = await _send_guarded(client, semaphore, method, url, headers, timeout, **kwargs)
+
+    # Retry a 401 once with refreshed credentials. The handler runs outside
+    # the semaphore since it may itself call the same host.
+    handler = UNAUTHORIZED_HANDLERS.get(host)
+    if response.status_code == 401 and handler is not None:
+        retry_headers = await handler(headers)
+        if retry_headers is not None:
+            response = await _send_guarded(client, semaphore, method, url, retry_headers, timeout, **kwargs)
+    return response
+
+
+async def _send_guarded(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]],
+    timeout: int,
+    **kwargs
+) -> httpx.Response:
+    """Send one request once the upstream's rate limit and circuit breaker admit it."""
+    # Waiting for a rate-limit token happens before taking a connection slot
+    permit = await upstream_resilience.acquire(url, timeout)
+    try:
+        async with semaphore:
+            response = await client.request(method, url, headers=headers, timeout=timeout / 1000, **kwargs)
+    except httpx.RequestError as e:
+        if permit is not None:
+            permit.failure(type(e).__name__)
+        raise
+    except BaseException:
+        if permit is not None:
+            permit.release()
+        raise
+    if permit is not None:
+        permit.finish(response.status_code)
+    return response
+
+
+def _coalesce_key(
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]],
+    kwargs: Dict[str, Any]
+) -> Optional[Tuple[str, str, str]]:
+    """
+    Build the in-flight key for a request.
+
+    Query parameters are sorted (whether in the URL or in params) and JSON
+    bodies serialized with sorted keys, so parameter order does not matter.
+
+    Returns:
+        Hashable key, or None if the request carries something that cannot be
+        compared (files, streams, ...)
+    """
+    if any(name not in COALESCABLE_ARGUMENTS for name in kwargs):
+        return None
+
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    params = kwargs.get("params") or {}
+    if isinstance(params, str):
+        query += parse_qsl(params, keep_blank_values=True)
+    else:
+        items = params.items() if isinstance(params, dict) else params
+        query += [(str(name), str(value)) for name, value in items]
+    try:
+        body = json.dumps(
+            {"json": kwargs.get("json"), "data": kwargs.get("data"), "headers": headers or {}},
+            sort_keys=True,
+            default=str,
+        )
+    except (TypeError, ValueError):
+        return None
+
+    target = urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, urlencode(sorted(query)), ""))
+    return method.upper(), target, body
+
+
+def track_coalescing() -> Dict[str, bool]:
+    """
+    Record whether the current task's upstream requests join another caller's.
+
+    Returns:
+        Marker whose "coalesced" entry becomes True once a request made from
+        this task is served by an identical request already in flight
+    """
+    marker = {"coalesced": False}
+    _coalesce_marker.set(marker)
+    return marker
+
+
+async def fetch_with_timeout(url: str, headers: dict, timeout: int = DEFAULT_TIMEOUT_MS) -> Any:
+    """
+    GET a JSON resource with timeout protection.
+
+    Args:
+        url: Full request URL
+        headers: Request headers
+        timeout: Timeout in milliseconds
+
+    Returns:
+        Parsed JSON response
+
+    Raises:
+        httpx.HTTPStatusError: If the upstream returns an error status
+    """
+    response = await request("GET", url, headers=headers, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+async def post_with_timeout(
+    url: str,
+    headers: dict,
+    data: dict = None,
+    timeout: int = DEFAULT_TIMEOUT_MS,
+    coalesce: bool = False
+) -> Any:
+    """
+    POST a JSON body and return the JSON response, with timeout protection.
+
+    Args:
+        url: Full request URL
+        headers: Request headers
+        data: JSON body (optional)
+        timeout: Timeout in milliseconds
+        coalesce: Share an identical in-flight request. Only for idempotent
+            lookups; a POST that starts something (e.g. an async job) must
+            be sent once per caller
+
+    Returns:
+        Parsed JSON response
+
+    Raises:
+        httpx.HTTPStatusError: If the upstream returns an error status
+    """
+    response = await request("POST", url, headers=headers, json=data, timeout=timeout,
+                             coalesce=coalesce and COALESCE_REQUESTS)
+    response.raise_for_status()
+    return response.json()
+
+
+async def close_http_clients():
+    """Close all pooled upstream clients (called on application shutdown)."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for _, client, _ in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            print(f"Error closing upstream HTTP client: {e}")
@@ -0,0 +1,155 @@
+"""
+Attachments for the email endpoints, read without holding them in memory.
+
+An endpoint gets its PDF in one of three ways:
+- a multipart/form-data upload: the request fields as JSON in a "payload"
+  form field and the file in a "pdf" part. Starlette spools the upload to a
+  temporary file past 1 MiB.
+- a pdfCacheKey: the key or ETag of a report from /generate-pdf or
+  /generate-puppeteer-pdf, read from the PDF cache instead of being
+  uploaded again.
+- base64 content in the JSON body (the original format), decoded in chunks
+  into a spool file.
+
+Each gives a binary file that mail_queue.enqueue copies into the outbox one
+chunk at a time.
+"""
+
+import os
+import json
+import base64
+import binascii
+import tempfile
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from starlette.datastructures import UploadFile
+
+from services.pdfCache import pdf_cache
+
+# Largest attachment accepted (most SMTP servers reject bigger messages)
+MAIL_ATTACHMENT_MAX_BYTES = int(os.getenv("MAIL_ATTACHMENT_MAX_BYTES", str(25 * 1024 * 1024)))
+# Largest "payload" form field of a multipart request
+MAIL_PAYLOAD_MAX_BYTES = int(os.getenv("MAIL_PAYLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+# Bytes of a decoded base64 attachment kept in memory before it spools to disk
+ATTACHMENT_SPOOL_MEMORY_BYTES = 1024 * 1024
+# Base64 characters decoded at a time; a multiple of 4
+BASE64_DECODE_CHUNK = 256 * 1024
+
+Attachment = Tuple[str, str, BinaryIO]
+
+
+async def read_email_request(request: Request) -> Tuple[Dict[str, Any], Optional[UploadFile]]:
+    """
+    Read the fields and uploaded PDF of an email request.
+
+    Args:
+        request: FastAPI request object, JSON or multipart/form-data
+
+    Returns:
+        Tuple of (request fields, uploaded "pdf" file or None)
+
+    Raises:
+        HTTPException(400): If the body cannot be parsed
+    """
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form(max_files=1, max_part_size=MAIL_PAYLOAD_MAX_BYTES)
+            payload = form.get("payload")
+            upload = form.get("pdf")
+            fields = json.loads(payload) if isinstance(payload, str) and payload else {}
+            return fields, upload if isinstance(upload, UploadFile) else None
+        return await request.json(), None
+    except HTTPException:
+        raise
+    except (ValueError, UnicodeDecodeError) as error:
+        raise HTTPException(status_code=400, detail=f"Invalid email request: {error}")
+
+
+def _checked(stream: BinaryIO) -> BinaryIO:
+    """Reject an oversized attachment and rewind it."""
+    size = stream.seek(0, os.SEEK_END)
+    if size > MAIL_ATTACHMENT_MAX_BYTES:
+        stream.close()
+        raise HTTPException(
+            status_code=413,
+            detail=f"Attachment is larger than {MAIL_ATTACHMENT_MAX_BYTES // (1024 * 1024)} MB"
+        )
+    stream.seek(0)
+    return stream
+
+
+def spool_base64(content: str) -> BinaryIO:
+    """
+    Decode base64 content into a spool file, a chunk at a time.
+
+    Args:
+        content: Base64 string without line breaks
+
+    Returns:
+        Spool file positioned at the start
+
+    Raises:
+        HTTPException(400): If the content is not valid base64
+        HTTPException(413): If the decoded content is too large
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=ATTACHMENT_SPOOL_MEMORY_BYTES)
+    try:
+        for start in range(0, len(content), BASE64_DECODE_CHUNK):
+            spool.write(base64.b64decode(content[start:start + BASE64_DECODE_CHUNK], validate=True))
+            if spool.tell() > MAIL_ATTACHMENT_MAX_BYTES:
+                break
+    except (binascii.Error, ValueError):
+        spool.close()
+        raise HTTPException(status_code=400, detail="Attachment content is not valid base64")
+    return _checked(spool)
+
+
+def email_attachment(
+    default_filename: str,
+    upload: Optional[UploadFile] = None,
+    pdf_cache_key: Optional[str] = None,
+    base64_content: Optional[str] = None,
+    filename: Optional[str] = None,
+    content_type: Optional[str] = None
+) -> Optional[Attachment]:
+    """
+    Get the PDF to attach from whichever source the request used.
+
+    An upload wins over a cache reference, which wins over base64 content.
+
+    Args:
+        default_filename: Filename when the request does not give one
+        upload: Uploaded "pdf" file of a multipart request
+        pdf_cache_key: Key or ETag of a cached report
+        base64_content: Base64 content from the JSON body
+        filename: Filename from the request
+        content_type: Content type from the request
+
+    Returns:
+        (filename, content_type, file) tuple for mail_queue.enqueue, or None
+
+    Raises:
+        HTTPException(404): If the referenced report is no longer cached
+    """
+    if upload is not None:
+        return (
+            filename or upload.filename or default_filename,
+            content_type or upload.content_type or "application/pdf",
+            _checked(upload.file),
+        )
+    if pdf_cache_key:
+        stream = pdf_cache.open(pdf_cache_key)
+        if stream is None:
+            raise HTTPException(status_code=404, detail="Report not found in the PDF cache; generate it again")
+        return filename or default_filename, "application/pdf", _checked(stream)
+    if base64_content:
+        return filename or default_filename, content_type or "application/pdf", spool_base64(base64_content)
+    return None
+
+
+def close_attachments(attachments: List[Attachment]):
+    """Close the files of attachments once they are queued."""
+    for _, _, stream in attachments:
+        stream.close()
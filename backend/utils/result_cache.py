@@ -0,0 +1,293 @@
+"""
+Result cache for paid upstream verification lookups.
+
+The same PAN, mobile number, GSTIN or RC number is often verified again
+within hours, and every repeat is a billed upstream call. Results are cached
+per (service, upstream call, normalized arguments) in an in-process LRU
+and, optionally, in a Postgres table shared by all workers. Each service has
+its own TTL; services without one (async job initiation and polling) are
+never cached. Upstream error responses, and replies that found nothing for
+the identifier (a sub_code other than SUCCESS), are cached for a short time
+so a bad identifier is not retried in a loop.
+"""
+
+import os
+import re
+import json
+import time
+import copy
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+import httpx
+
+from utils.dbCalls.result_cache_db import get_cached_result, store_cached_result, delete_expired_cached_results
+
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+# Also share results across workers through the api_result_cache table
+RESULT_CACHE_DB_ENABLED = os.getenv("RESULT_CACHE_DB_ENABLED", "false").lower() == "true"
+# Entries kept in the in-process LRU
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "5000"))
+# Seconds an upstream error response is cached
+RESULT_CACHE_NEGATIVE_TTL = int(os.getenv("RESULT_CACHE_NEGATIVE_TTL", "60"))
+# Seconds between purges of expired api_result_cache rows
+RESULT_CACHE_DB_PURGE_INTERVAL = 60 * 60
+
+HOUR = 60 * 60
+
+# Seconds a successful result stays cached, per service
+RESULT_CACHE_TTLS: Dict[str, int] = {
+    # Identity records rarely change
+    "verification/aadhaar": 24 * HOUR,
+    "verification/panbasic": 24 * HOUR,
+    "verification/pan-plus": 24 * HOUR,
+    "verification/pan-to-fathername": 24 * HOUR,
+    "verification/passport": 24 * HOUR,
+    "verification/mca/cin": 24 * HOUR,
+    "verification/mca/din": 24 * HOUR,
+    "business-compliance/pan-to-din": 24 * HOUR,
+    # Registrations and linkages
+    "verification/gstin-advanced": 12 * HOUR,
+    "verification/gstin-lite": 12 * HOUR,
+    "verification/gstin-mini": 12 * HOUR,
+    "verification/gstinlite": 12 * HOUR,
+    "verification/pan-kra-status": 12 * HOUR,
+    "verification/pan-msme-check": 12 * HOUR,
+    "verification/epfo/pan-to-uan": 12 * HOUR,
+    "verification/epfo/aadhaar-to-uan": 12 * HOUR,
+    "verification/epfo/uan-to-employment-history": 12 * HOUR,
+    "verification/rc-advanced": 12 * HOUR,
+    "verification/bankaccount": 12 * HOUR,
+    "verification/upi": 12 * HOUR,
+    "business-compliance/fssai-verification": 12 * HOUR,
+    "business-compliance/shop-establishment-certificate": 12 * HOUR,
+    "mobile-intelligence/mobile-to-name": 12 * HOUR,
+    "mobile-intelligence/mobile-to-pan": 12 * HOUR,
+    "mobile-intelligence/mobile-to-dl-details": 12 * HOUR,
+    "mobile-intelligence/mobile-to-multiple-upi": 12 * HOUR,
+    "mobile-intelligence/mobile-to-digital-age": 12 * HOUR,
+    # Can change day to day
+    "mobile-intelligence/mobile-to-network-details": 6 * HOUR,
+    "verification/mnrl": 6 * HOUR,
+    "financial-services/credit-bureau/credit-report": 6 * HOUR,
+    "verification/rc-challan-details": 1 * HOUR,
+}
+
+# Upstream statuses that say nothing about the identifier itself
+UNCACHEABLE_ERROR_STATUSES = {401, 403, 408, 429}
+# sub_code of an upstream reply that found the identifier
+SUCCESS_SUB_CODE = "SUCCESS"
+
+
+class CachedUpstreamError(Exception):
+    """Raised when a lookup hits a cached upstream error response."""
+
+
+class ResultCache:
+    """In-process LRU of upstream results with an optional Postgres tier."""
+
+    def __init__(
+        self,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+        db_enabled: bool = RESULT_CACHE_DB_ENABLED,
+        negative_ttl: int = RESULT_CACHE_NEGATIVE_TTL
+    ):
+        self.max_entries = max_entries
+        self.db_enabled = db_enabled
+        self.negative_ttl = negative_ttl
+        # cache_key -> (expires_at, result, error)
+        self._entries: "OrderedDict[str, Tuple[float, Any, Optional[str]]]" = OrderedDict()
+        self._last_db_purge = time.time()
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "negativeHits": 0,
+            "dbHits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+    def make_key(
+        self,
+        service: str,
+        args: tuple = (),
+        kwargs: Optional[Dict[str, Any]] = None,
+        upstream: str = ""
+    ) -> Optional[str]:
+        """
+        Build the cache key for a call.
+
+        Identifiers are compared without whitespace and case, so
+        "abcde1234f" and "ABCDE 1234F" share an entry. Routes that log the
+        same service through different upstream calls (another API version,
+        GET vs POST, their own handling of a 404) pass different `upstream`
+        names and so never read each other's responses.
+
+        Args:
+            service: Service name
+            args: Positional arguments of the API function
+            kwargs: Keyword arguments of the API function
+            upstream: Name of the function making the upstream call (see upstream_call_name)
+
+        Returns:
+            Hex digest key, or None if the service is not cacheable
+        """
+        if service not in RESULT_CACHE_TTLS:
+            return None
+        payload = json.dumps(
+            [service, upstream, _normalize(list(args)), _normalize(kwargs or {})],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get(self, cache_key: str) -> Optional[Tuple[Any, Optional[str]]]:
+        """
+        Look up a cached result.
+
+        Args:
+            cache_key: Key from make_key
+
+        Returns:
+            Tuple of (result, error) - error is set for a cached failure -
+            or None on a miss
+        """
+        now = time.time()
+        entry = self._entries.get(cache_key)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(cache_key)
+                return self._hit(entry[1], entry[2])
+            del self._entries[cache_key]
+
+        if self.db_enabled:
+            try:
+                row = await get_cached_result(cache_key)
+            except Exception as e:
+                print(f"Error reading result cache: {e}")
+                row = None
+            if row is not None:
+                self.stats["dbHits"] += 1
+                self._put(cache_key, row["expires_at"].timestamp(), row["result"], row["error"])
+                return self._hit(row["result"], row["error"])
+
+        self.stats["misses"] += 1
+        return None
+
+    def _hit(self, result: Any, error: Optional[str]) -> Tuple[Any, Optional[str]]:
+        """Count a hit and return a copy the caller is free to modify."""
+        self.stats["negativeHits" if error is not None else "hits"] += 1
+        return copy.deepcopy(result), error
+
+    async def set(self, cache_key: str, service: str, result: Any):
+        """
+        Cache a result: for the service's TTL if the upstream found the
+        identifier, otherwise (a sub_code other than SUCCESS, e.g. NO_DATA)
+        for the negative TTL.
+
+        Args:
+            cache_key: Key from make_key
+            service: Service name
+            result: Upstream response
+        """
+        if is_negative_result(result):
+            if self.negative_ttl <= 0:
+                return
+            ttl = self.negative_ttl
+        else:
+            ttl = RESULT_CACHE_TTLS[service]
+        await self._store(cache_key, service, copy.deepcopy(result), None, ttl)
+
+    async def set_error(self, cache_key: str, service: str, error: Exception):
+        """
+        Cache a failed call for the negative TTL.
+
+        Only upstream error responses are cached; timeouts, connection errors
+        and auth/rate-limit statuses are left to be retried.
+
+        Args:
+            cache_key: Key from make_key
+            service: Service name
+            error: Exception raised by the API function
+        """
+        if self.negative_ttl <= 0 or not isinstance(error, httpx.HTTPStatusError):
+            return
+        if error.response.status_code in UNCACHEABLE_ERROR_STATUSES:
+            return
+        await self._store(cache_key, service, None, str(error), self.negative_ttl)
+
+    async def _store(self, cache_key: str, service: str, result: Any, error: Optional[str], ttl: int):
+        """Write an entry to the LRU and, if enabled, the shared tier."""
+        self._put(cache_key, time.time() + ttl, result, error)
+        self.stats["stores"] += 1
+        if not self.db_enabled:
+            return
+
+        try:
+            await store_cached_result(cache_key, service, result, error, ttl)
+            if time.time() - self._last_db_purge >= RESULT_CACHE_DB_PURGE_INTERVAL:
+                self._last_db_purge = time.time()
+                deleted = await delete_expired_cached_results()
+                print(f"Purged {deleted} expired result cache entries")
+        except Exception as e:
+            print(f"Error writing result cache: {e}")
+
+    def _put(self, cache_key: str, expires_at: float, result: Any, error: Optional[str]):
+        """Insert into the LRU, evicting the least recently used entries."""
+        self._entries[cache_key] = (expires_at, result, error)
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        """Drop every in-process entry."""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary of hit/miss/store/eviction counts, the number of
+            in-process entries and whether the shared tier is enabled
+        """
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "dbEnabled": self.db_enabled,
+        }
+
+
+def upstream_call_name(api_function: Any) -> str:
+    """
+    Name an API function for use in a cache key.
+
+    The module-qualified name identifies the upstream call (URL, version,
+    method and response handling) and is the same in every worker.
+    """
+    func = getattr(api_function, "func", api_function)  # functools.partial
+    name = getattr(func, "__qualname__", None) or type(func).__qualname__
+    module = getattr(func, "__module__", None) or type(func).__module__
+    return f"{module}.{name}"
+
+
+def is_negative_result(result: Any) -> bool:
+    """Whether a reply says the upstream found nothing for the identifier."""
+    return isinstance(result, dict) and "sub_code" in result and result["sub_code"] != SUCCESS_SUB_CODE
+
+
+def _normalize(value: Any) -> Any:
+    """Normalize identifiers for use in a cache key."""
+    if isinstance(value, str):
+        return re.sub(r"\s+", "", value).upper()
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+
+# Create a singleton instance
+result_cache = ResultCache()
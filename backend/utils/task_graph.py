@@ -0,0 +1,239 @@
+"""
+Dependency-graph executor for concurrent upstream calls.
+
+Nodes are declared with the names of the nodes they depend on. Every node
+starts as soon as all of its dependencies have finished, so independent
+calls overlap and the total wall time approaches the critical path instead
+of the sum of all calls. An optional overall deadline cancels whatever is
+still running when it expires, and nodes can require a minimum remaining
+budget before they are admitted. A completion callback lets callers report
+progress (e.g. stream sections) while the rest of the graph is still running.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class SkipTask(Exception):
+    """Raised by (or on behalf of) a node that should not run."""
+
+
+class TaskGraphResult:
+    """Outcome of a TaskGraph run."""
+
+    def __init__(self):
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, BaseException] = {}
+        self.timed_out: List[str] = []
+        self.skipped: Dict[str, str] = {}
+        self.elapsed_ms: float = 0.0
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Return the result of a node, or `default` if it failed or never ran."""
+        return self.results.get(name, default)
+
+
+class TaskGraph:
+    """
+    Declarative set of async nodes with dependencies.
+
+    Each node function receives a dict mapping its dependency names to their
+    results. A dependency that raised is passed as the exception instance,
+    so the dependent node can decide whether to fall back or give up.
+    """
+
+    def __init__(self):
+        self._nodes: Dict[str, Dict[str, Any]] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], Awaitable[Any]],
+        depends_on: Iterable[str] = (),
+        min_budget_ms: Optional[float] = None
+    ) -> "TaskGraph":
+        """
+        Register a node.
+
+        Args:
+            name: Unique node name
+            func: Async callable taking the dependency results dict
+            depends_on: Names of nodes that must finish first
+            min_budget_ms: Skip the node if less than this much of the run
+                deadline remains once its dependencies have finished
+
+        Returns:
+            The graph, for chaining
+        """
+        if name in self._nodes:
+            raise ValueError(f"Duplicate task graph node: {name}")
+        self._nodes[name] = {
+            "func": func,
+            "depends_on": list(depends_on),
+            "min_budget_ms": min_budget_ms,
+        }
+        return self
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._nodes
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def _validate(self):
+        """Reject unknown dependencies and cycles."""
+        for name, node in self._nodes.items():
+            for dep in node["depends_on"]:
+                if dep not in self._nodes:
+                    raise ValueError(f"Node '{name}' depends on unknown node '{dep}'")
+
+        visiting, visited = set(), set()
+
+        def _visit(name: str):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle detected at node '{name}'")
+            visiting.add(name)
+            for dep in self._nodes[name]["depends_on"]:
+                _visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self._nodes:
+            _visit(name)
+
+    async def run(
+        self,
+        deadline_ms: Optional[float] = None,
+        on_complete: Optional[Callable[[str], None]] = None
+    ) -> TaskGraphResult:
+        """
+        Execute all nodes, each as soon as its dependencies have finished.
+
+        Args:
+            deadline_ms: Overall time budget in milliseconds (None for no limit)
+            on_complete: Called with the node name whenever a node finishes,
+                fails, is skipped or is cancelled at the deadline
+
+        Returns:
+            TaskGraphResult with per-node results, errors, skipped and
+            timed-out nodes
+        """
+        self._validate()
+        outcome = TaskGraphResult()
+        start = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        def _remaining_ms() -> Optional[float]:
+            if deadline_ms is None:
+                return None
+            return deadline_ms - (time.perf_counter() - start) * 1000
+
+        async def _run_node(name: str):
+            node = self._nodes[name]
+            deps = node["depends_on"]
+            if deps:
+                await asyncio.wait([tasks[dep] for dep in deps])
+            dep_results = {}
+            for dep in deps:
+                task = tasks[dep]
+                if task.cancelled():
+                    dep_results[dep] = asyncio.CancelledError()
+                elif task.exception() is not None:
+                    dep_results[dep] = task.exception()
+                else:
+                    dep_results[dep] = task.result()
+
+            # Budget-aware admission for expensive nodes
+            remaining = _remaining_ms()
+            if node["min_budget_ms"] is not None and remaining is not None and remaining < node["min_budget_ms"]:
+                raise SkipTask(f"insufficient budget ({remaining:.0f}ms left, needs {node['min_budget_ms']}ms)")
+
+            return await node["func"](dep_results)
+
+        # Create every task up front; dependents simply wait on their inputs
+        for name in self._nodes:
+            tasks[name] = asyncio.create_task(_run_node(name), name=f"task-graph:{name}")
+            if on_complete is not None:
+                tasks[name].add_done_callback(lambda task, name=name: on_complete(name))
+
+        if tasks:
+            timeout = deadline_ms / 1000 if deadline_ms is not None else None
+            try:
+                _, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+            except asyncio.CancelledError:
+                # The caller gave up on the run (e.g. a closed stream); stop the nodes too
+                for task in tasks.values():
+                    task.cancel()
+                await asyncio.gather(*tasks.values(), return_exceptions=True)
+                raise
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        for name, task in tasks.items():
+            if task.cancelled():
+                outcome.timed_out.append(name)
+            elif isinstance(task.exception(), SkipTask):
+                outcome.skipped[name] = str(task.exception())
+            elif task.exception() is not None:
+                outcome.errors[name] = task.exception()
+            else:
+                outcome.results[name] = task.result()
+
+        outcome.elapsed_ms = (time.perf_counter() - start) * 1000
+        return outcome
+
+
+async def run_api_call_graph(
+    api_calls: List[Dict[str, Any]],
+    deadline_ms: Optional[float] = None,
+    on_complete: Optional[Callable[[str], None]] = None
+) -> Tuple[Dict[str, Dict[str, Any]], TaskGraphResult]:
+    """
+    Run a list of API call specs through a TaskGraph.
+
+    Each spec is a dict with "name", "endpoint" and "call". Optional keys:
+    "dependsOn" (names of other specs; "call" then receives the dependency
+    results dict, otherwise it takes no arguments) and "minBudgetMs" for
+    budget-aware admission. A call may raise SkipTask when it has nothing
+    to do (e.g. a missing input from its dependency).
+
+    Args:
+        api_calls: API call specs
+        deadline_ms: Overall time budget in milliseconds
+        on_complete: Called with the call name as each call finishes
+
+    Returns:
+        Tuple of (name -> {"name", "endpoint", "response" | "error"} for every
+        call that ran, TaskGraphResult)
+    """
+    graph = TaskGraph()
+    for api in api_calls:
+        depends_on = api.get("dependsOn", [])
+        if depends_on:
+            func = lambda deps, api=api: api["call"](deps)
+        else:
+            func = lambda deps, api=api: api["call"]()
+        graph.add(api["name"], func, depends_on, min_budget_ms=api.get("minBudgetMs"))
+
+    outcome = await graph.run(deadline_ms, on_complete=on_complete)
+
+    responses: Dict[str, Dict[str, Any]] = {}
+    for api in api_calls:
+        name = api["name"]
+        entry = {"name": name, "endpoint": api["endpoint"]}
+        if name in outcome.results:
+            entry["response"] = outcome.results[name]
+        elif name in outcome.errors:
+            entry["error"] = str(outcome.errors[name])
+        elif name in outcome.timed_out:
+            entry["error"] = "Deadline exceeded"
+        else:
+            continue  # skipped, never called
+        responses[name] = entry
+
+    return responses, outcome
@@ -0,0 +1,82 @@
+"""
+Jinja2 template engine for the HTML reports and emails.
+
+Every template under backend/templates is compiled once by
+warm_templates() at startup and kept in the environment's cache; with
+auto_reload off, a render never touches the filesystem again. Reports and
+emails share the macros in templates/partials, so a row or section looks
+the same in a PDF and in the email that carries it.
+
+Values are HTML-escaped unless a template marks them safe, so data from
+upstream providers cannot break the report markup.
+"""
+
+import os
+import time
+from typing import Any, Iterator
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+# Template pieces joined into each chunk yielded by stream_template
+TEMPLATE_STREAM_BUFFER = 32
+
+template_env = Environment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    autoescape=select_autoescape(["html"]),
+    # Compiled templates stay cached; they only change with a deploy
+    auto_reload=False,
+    cache_size=-1,
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
+
+
+def warm_templates() -> int:
+    """
+    Compile every template so the first request does not pay for it.
+
+    Returns:
+        Number of templates compiled
+    """
+    start = time.perf_counter()
+    names = template_env.list_templates(extensions=["html", "css", "txt"])
+    for name in names:
+        template_env.get_template(name)
+    print(f"Compiled {len(names)} templates in {(time.perf_counter() - start) * 1000:.1f}ms")
+    return len(names)
+
+
+def render_template(name: str, /, **context: Any) -> str:
+    """
+    Render a template to a string.
+
+    Args:
+        name: Template path relative to the templates directory
+        **context: Template variables
+
+    Returns:
+        Rendered text
+    """
+    return template_env.get_template(name).render(**context)
+
+
+def stream_template(name: str, /, buffer_size: int = TEMPLATE_STREAM_BUFFER, **context: Any) -> Iterator[str]:
+    """
+    Render a template piece by piece.
+
+    The first chunk is available as soon as the top of the template has
+    been rendered, so a response can start before a long report is done.
+
+    Args:
+        name: Template path relative to the templates directory
+        buffer_size: Template pieces joined into each yielded chunk
+        **context: Template variables
+
+    Returns:
+        Iterator of rendered text chunks
+    """
+    stream = template_env.get_template(name).stream(**context)
+    if buffer_size > 1:
+        stream.enable_buffering(buffer_size)
+    return iter(stream)
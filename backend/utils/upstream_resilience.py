@@ -0,0 +1,369 @@
+"""
+Rate limits and circuit breakers for upstream APIs.
+
+Every request sent through utils.http_client passes through here first:
+
+- Token buckets cap the request rate per upstream host, with optional
+  tighter buckets for individual endpoints. A request waits for a token, or
+  fails at once if the wait would exceed UPSTREAM_RATE_LIMIT_MAX_WAIT_MS.
+- A circuit breaker per endpoint (host plus path, with IDs in the path
+  collapsed) opens after UPSTREAM_BREAKER_FAILURE_THRESHOLD consecutive
+  failures (transport errors, timeouts, 429 and 5xx answers). While open,
+  calls fail immediately instead of waiting out a long timeout. After
+  UPSTREAM_BREAKER_OPEN_SECONDS a limited number of probe requests are let
+  through (half-open); a successful probe closes the circuit, a failed one
+  opens it again.
+
+Rejected calls raise UpstreamUnavailableError, an httpx.RequestError, so
+callers' existing handling of unreachable upstreams (fallbacks, retries,
+error responses) applies unchanged.
+"""
+
+import os
+import re
+import time
+import asyncio
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+ENABLE_UPSTREAM_RESILIENCE = os.getenv("UPSTREAM_RESILIENCE_ENABLED", "true").lower() == "true"
+
+# Consecutive failures that open an endpoint's circuit
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("UPSTREAM_BREAKER_FAILURE_THRESHOLD", "5"))
+# Seconds an open circuit rejects calls before probing the upstream again
+BREAKER_OPEN_SECONDS = float(os.getenv("UPSTREAM_BREAKER_OPEN_SECONDS", "30"))
+# Probe requests allowed at once while half-open
+BREAKER_HALF_OPEN_PROBES = int(os.getenv("UPSTREAM_BREAKER_HALF_OPEN_PROBES", "1"))
+
+# Longest a request may wait for a rate-limit token (milliseconds)
+RATE_LIMIT_MAX_WAIT_MS = int(os.getenv("UPSTREAM_RATE_LIMIT_MAX_WAIT_MS", "5000"))
+# Default (requests per second, burst) for hosts without their own limit;
+# a rate of 0 means unlimited
+DEFAULT_RATE_LIMIT = (float(os.getenv("UPSTREAM_RATE_LIMIT", "0")), int(os.getenv("UPSTREAM_RATE_BURST", "20")))
+
+# Per-host (requests per second, burst)
+HOST_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "production.deepvue.tech": (float(os.getenv("DEEPVUE_RATE_LIMIT", "20")), int(os.getenv("DEEPVUE_RATE_BURST", "40"))),
+    "lexient.one": (float(os.getenv("LEXIENT_RATE_LIMIT", "5")), int(os.getenv("LEXIENT_RATE_BURST", "10"))),
+    "instafinancials.com": (float(os.getenv("INSTA_RATE_LIMIT", "5")), int(os.getenv("INSTA_RATE_BURST", "10"))),
+    "newsapi.org": (float(os.getenv("NEWS_API_RATE_LIMIT", "2")), int(os.getenv("NEWS_API_RATE_BURST", "5"))),
+}
+
+# Per-endpoint (requests per second, burst), applied on top of the host limit
+ENDPOINT_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "production.deepvue.tech/v1/financial-services/credit-bureau/credit-report": (
+        float(os.getenv("DEEPVUE_CREDIT_REPORT_RATE_LIMIT", "2")),
+        int(os.getenv("DEEPVUE_CREDIT_REPORT_RATE_BURST", "4")),
+    ),
+}
+
+# Answers that count as the upstream failing (client errors do not)
+FAILURE_STATUS_CODES = {429}
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+# Path segments that are IDs (CINs, numbers) rather than part of the route
+_ID_SEGMENT = re.compile(r"^\d+$|^(?=.*\d)[A-Za-z0-9_-]{9,}$")
+
+
+class UpstreamUnavailableError(httpx.RequestError):
+    """Raised instead of sending a request the upstream is not expected to serve."""
+
+
+class CircuitOpenError(UpstreamUnavailableError):
+    """The endpoint's circuit is open; `retry_after` is the seconds until it probes again."""
+
+    def __init__(self, message: str, retry_after: float, request: Optional[httpx.Request] = None):
+        super().__init__(message, request=request)
+        self.retry_after = retry_after
+
+
+class RateLimitedError(UpstreamUnavailableError):
+    """No rate-limit token would be available within the allowed wait."""
+
+
+def get_endpoint_key(url: str) -> Tuple[str, str]:
+    """
+    Return (host, endpoint) for a URL.
+
+    The endpoint is host plus path with ID segments replaced by "{id}", so
+    e.g. every InstaFinancials CIN lookup shares one circuit.
+    """
+    parts = urlsplit(url)
+    segments = ["{id}" if _ID_SEGMENT.match(segment) else segment for segment in parts.path.split("/")]
+    return parts.netloc, parts.netloc + "/".join(segments).rstrip("/")
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        """Take a token, going into debt if the caller has waited for it."""
+        self._refill()
+        self.tokens -= 1
+
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with half-open probing."""
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+        half_open_probes: int = BREAKER_HALF_OPEN_PROBES
+    ):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CIRCUIT_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+
+    def allow(self) -> Optional[bool]:
+        """
+        Decide whether a call may go through.
+
+        Returns:
+            False for a normal call, True for a half-open probe, or None if
+            the call must be rejected
+        """
+        if self.state == CIRCUIT_OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                return None
+            self.state = CIRCUIT_HALF_OPEN
+        if self.state == CIRCUIT_HALF_OPEN:
+            if self.probes_in_flight >= self.half_open_probes:
+                return None
+            self.probes_in_flight += 1
+            return True
+        return False
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a probe through."""
+        return max(0.0, self.open_seconds - (time.monotonic() - self.opened_at))
+
+    def record_success(self, probe: bool):
+        if probe:
+            self.probes_in_flight -= 1
+        self.state = CIRCUIT_CLOSED
+        self.consecutive_failures = 0
+
+    def record_failure(self, probe: bool) -> bool:
+        """Record a failed call; returns True if this opened the circuit."""
+        if probe:
+            self.probes_in_flight -= 1
+        self.consecutive_failures += 1
+        if probe or (self.state == CIRCUIT_CLOSED and self.consecutive_failures >= self.failure_threshold):
+            self.state = CIRCUIT_OPEN
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def release(self, probe: bool):
+        """Forget a call that was cancelled before it had an outcome."""
+        if probe:
+            self.probes_in_flight -= 1
+
+
+class UpstreamPermit:
+    """An admitted call; report its outcome with finish(), failure() or release()."""
+
+    def __init__(self, endpoint: "EndpointState", probe: bool):
+        self.endpoint = endpoint
+        self.probe = probe
+
+    def finish(self, status_code: int):
+        """Record the outcome of a call that got an HTTP answer."""
+        if status_code >= 500 or status_code in FAILURE_STATUS_CODES:
+            self.failure(f"HTTP {status_code}")
+        else:
+            self.success()
+
+    def success(self):
+        self.endpoint.breaker.record_success(self.probe)
+
+    def failure(self, reason: str):
+        self.endpoint.stats["failures"] += 1
+        if self.endpoint.breaker.record_failure(self.probe):
+            self.endpoint.stats["opened"] += 1
+            print(f"Circuit opened for {self.endpoint.key} after {self.endpoint.breaker.consecutive_failures} "
+                  f"consecutive failures (last: {reason}); failing fast for {self.endpoint.breaker.open_seconds}s")
+
+    def release(self):
+        self.endpoint.breaker.release(self.probe)
+
+
+class EndpointState:
+    """Circuit breaker and counters of one upstream endpoint."""
+
+    def __init__(self, key: str, breaker: CircuitBreaker):
+        self.key = key
+        self.breaker = breaker
+        self.stats: Dict[str, int] = {
+            "requests": 0,
+            "failures": 0,
+            "opened": 0,
+            "rejected": 0,
+            "rate_limited": 0,
+            "throttled": 0,
+        }
+
+
+class UpstreamResilience:
+    """Registry of token buckets and circuit breakers for every upstream."""
+
+    def __init__(
+        self,
+        enabled: bool = ENABLE_UPSTREAM_RESILIENCE,
+        max_wait_ms: int = RATE_LIMIT_MAX_WAIT_MS,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+        half_open_probes: int = BREAKER_HALF_OPEN_PROBES
+    ):
+        self.enabled = enabled
+        self.max_wait_ms = max_wait_ms
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.host_limits = dict(HOST_RATE_LIMITS)
+        self.endpoint_limits = dict(ENDPOINT_RATE_LIMITS)
+        self._endpoints: Dict[str, EndpointState] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def _get_endpoint(self, key: str) -> EndpointState:
+        endpoint = self._endpoints.get(key)
+        if endpoint is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.open_seconds, self.half_open_probes)
+            endpoint = self._endpoints[key] = EndpointState(key, breaker)
+        return endpoint
+
+    def _get_bucket(self, key: str, limit: Optional[Tuple[float, int]]) -> Optional[TokenBucket]:
+        if not limit or limit[0] <= 0:
+            return None
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(*limit)
+        return bucket
+
+    async def acquire(self, url: str, timeout_ms: Optional[int] = None) -> Optional[UpstreamPermit]:
+        """
+        Admit a call to `url`, waiting for rate-limit tokens if needed.
+
+        Args:
+            url: Full request URL
+            timeout_ms: The call's own timeout; the token wait never exceeds it
+
+        Returns:
+            Permit to report the outcome to, or None when disabled
+
+        Raises:
+            CircuitOpenError: If the endpoint's circuit is open
+            RateLimitedError: If no token is available within the allowed wait
+        """
+        if not self.enabled:
+            return None
+
+        host, key = get_endpoint_key(url)
+        endpoint = self._get_endpoint(key)
+        endpoint.stats["requests"] += 1
+        probe = endpoint.breaker.allow()
+        if probe is None:
+            endpoint.stats["rejected"] += 1
+            retry_after = endpoint.breaker.retry_in()
+            raise CircuitOpenError(
+                f"Upstream {key} is unavailable (circuit open, retry in {retry_after:.0f}s)",
+                retry_after,
+                request=httpx.Request("GET", url)
+            )
+
+        buckets = [
+            bucket for bucket in (
+                self._get_bucket(host, self.host_limits.get(host, DEFAULT_RATE_LIMIT)),
+                self._get_bucket(key, self.endpoint_limits.get(key)),
+            )
+            if bucket is not None
+        ]
+        wait = max((bucket.wait_time() for bucket in buckets), default=0.0)
+        max_wait = min(self.max_wait_ms, timeout_ms if timeout_ms is not None else self.max_wait_ms) / 1000
+        if wait > max_wait:
+            endpoint.breaker.release(probe)
+            endpoint.stats["rate_limited"] += 1
+            raise RateLimitedError(
+                f"Upstream {key} rate limit exceeded (next slot in {wait:.1f}s)",
+                request=httpx.Request("GET", url)
+            )
+
+        # Take the tokens now so concurrent callers queue behind each other
+        for bucket in buckets:
+            bucket.take()
+        if wait > 0:
+            endpoint.stats["throttled"] += 1
+            try:
+                await asyncio.sleep(wait)
+            except BaseException:
+                endpoint.breaker.release(probe)
+                raise
+        return UpstreamPermit(endpoint, probe)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get breaker state and counters per endpoint and tokens per bucket.
+
+        Returns:
+            {"endpoints": {key: {...}}, "buckets": {key: {...}}}
+        """
+        return {
+            "enabled": self.enabled,
+            "endpoints": {
+                key: {
+                    **endpoint.stats,
+                    "state": endpoint.breaker.state,
+                    "consecutiveFailures": endpoint.breaker.consecutive_failures,
+                    "retryInSeconds": round(endpoint.breaker.retry_in(), 1)
+                    if endpoint.breaker.state == CIRCUIT_OPEN else None,
+                }
+                for key, endpoint in self._endpoints.items()
+            },
+            "buckets": {
+                key: {
+                    "rate": bucket.rate,
+                    "burst": bucket.burst,
+                    "available": round(bucket.available(), 2),
+                }
+                for key, bucket in self._buckets.items()
+            },
+        }
+
+    def reset(self):
+        """Forget all breakers and buckets."""
+        self._endpoints.clear()
+        self._buckets.clear()
+
+
+# Global registry used by utils.http_client
+upstream_resilience = UpstreamResilience()
@@ -0,0 +1,183 @@
+"""
+Worker pool for bulk verification batches.
+
+Batches submitted through /verification-batches are stored as one row per
+subject in verification_batch_items. A dispatcher task claims pending items
+from Postgres (SKIP LOCKED, so several processes can share the queue) and
+runs at most BATCH_WORKERS of them at a time through the processor
+registered for the batch type. Throughput is therefore set by the worker
+count and the upstream limits applied to every call, not by how fast a
+browser can post rows one at a time.
+
+Items left running by a process that died are reclaimed after
+BATCH_ITEM_LEASE_SECONDS; on a clean shutdown they are released at once.
+"""
+
+import os
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from utils.dbCalls.verification_batches_db import claim_batch_items, finish_batch_item, release_batch_items
+
+# Items processed at once by this process
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+# How often an idle dispatcher checks for new items (milliseconds)
+BATCH_POLL_INTERVAL_MS = int(os.getenv("BATCH_POLL_INTERVAL_MS", "2000"))
+# Seconds after which a running item is considered abandoned and retried
+BATCH_ITEM_LEASE_SECONDS = int(os.getenv("BATCH_ITEM_LEASE_SECONDS", "300"))
+# Longest one item may take (milliseconds)
+BATCH_ITEM_TIMEOUT_MS = int(os.getenv("BATCH_ITEM_TIMEOUT_MS", "120000"))
+# Claims of one item (including reclaims after a crash) before it is failed
+BATCH_MAX_ATTEMPTS = int(os.getenv("BATCH_MAX_ATTEMPTS", "3"))
+
+# (subject, options, user_id, username, user_role) -> JSON-serializable result
+BatchProcessor = Callable[[Dict[str, Any], Dict[str, Any], str, str, str], Awaitable[Any]]
+
+
+class BatchWorkerPool:
+    """Claims batch items from Postgres and processes a bounded number at a time."""
+
+    def __init__(
+        self,
+        workers: int = BATCH_WORKERS,
+        poll_interval_ms: int = BATCH_POLL_INTERVAL_MS,
+        lease_seconds: int = BATCH_ITEM_LEASE_SECONDS,
+        item_timeout_ms: int = BATCH_ITEM_TIMEOUT_MS,
+        max_attempts: int = BATCH_MAX_ATTEMPTS
+    ):
+        self.workers = workers
+        self.poll_interval_ms = poll_interval_ms
+        self.lease_seconds = lease_seconds
+        self.item_timeout_ms = item_timeout_ms
+        self.max_attempts = max_attempts
+        self._processors: Dict[str, BatchProcessor] = {}
+        self._running: Dict[asyncio.Task, Tuple[str, int]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.stats: Dict[str, int] = {
+            "claimed": 0,
+            "completed": 0,
+            "failed": 0,
+            "released": 0,
+        }
+
+    def register_processor(self, batch_type: str, processor: BatchProcessor):
+        """
+        Register how items of a batch type are processed.
+
+        Args:
+            batch_type: Batch type name (e.g. "mini")
+            processor: Async function taking (subject, options, user_id,
+                username, user_role) and returning the item's result
+        """
+        self._processors[batch_type] = processor
+
+    @property
+    def batch_types(self) -> Set[str]:
+        return set(self._processors)
+
+    def start(self):
+        """Start the dispatcher on the running loop if it is not already running."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._dispatcher = None
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = loop.create_task(self._run(), name="batch-dispatcher")
+
+    def notify(self):
+        """Wake the dispatcher after a new batch was stored."""
+        self.start()
+        self._wakeup.set()
+
+    async def stop(self):
+        """Stop claiming, cancel running items and return them to the queue."""
+        tasks = [task for task in [self._dispatcher, *self._running] if task is not None and not task.done()]
+        claimed = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._dispatcher = None
+        self._running.clear()
+        try:
+            await release_batch_items(claimed)
+            self.stats["released"] += len(claimed)
+        except Exception as e:
+            print(f"Error releasing {len(claimed)} batch items: {e}")
+
+    async def _run(self):
+        """Dispatcher loop: keep up to `workers` items in flight."""
+        while True:
+            free = self.workers - len(self._running)
+            claimed = []
+            if free > 0:
+                try:
+                    claimed = await claim_batch_items(free, self.lease_seconds)
+                except Exception as e:
+                    print(f"Error claiming batch items: {e}")
+                for item in claimed:
+                    self.stats["claimed"] += 1
+                    task = self._loop.create_task(
+                        self._process(item), name=f"batch-item:{item['batch_id']}:{item['item_index']}"
+                    )
+                    self._running[task] = (item["batch_id"], item["item_index"])
+                    task.add_done_callback(lambda task: self._running.pop(task, None))
+
+            # Claim again when a worker frees up, a batch is submitted or the
+            # poll interval passes (for batches stored by other processes)
+            self._wakeup.clear()
+            waits = [asyncio.ensure_future(self._wakeup.wait()), *self._running]
+            await asyncio.wait(waits, timeout=self.poll_interval_ms / 1000, return_when=asyncio.FIRST_COMPLETED)
+            waits[0].cancel()
+
+    async def _process(self, item: Dict[str, Any]):
+        """Run one item through its batch type's processor and store the outcome."""
+        batch_id, item_index = item["batch_id"], item["item_index"]
+        processor = self._processors.get(item["batch_type"])
+
+        if processor is None:
+            status, result, error = "failed", None, f"Unknown batch type: {item['batch_type']}"
+        elif item["attempts"] > self.max_attempts:
+            status, result, error = "failed", None, f"Gave up after {self.max_attempts} attempts"
+        else:
+            try:
+                result = await asyncio.wait_for(
+                    processor(
+                        item["subject"],
+                        item.get("options") or {},
+                        str(item["user_id"]) if item.get("user_id") is not None else "",
+                        item.get("username") or "Unknown",
+                        item.get("user_role") or "user",
+                    ),
+                    timeout=self.item_timeout_ms / 1000
+                )
+                status, error = "completed", None
+            except asyncio.TimeoutError:
+                status, result, error = "failed", None, "Verification timed out"
+            except Exception as e:
+                print(f"Batch item {batch_id}/{item_index} failed: {e}")
+                status, result, error = "failed", None, str(e)
+
+        self.stats[status] += 1
+        try:
+            await finish_batch_item(batch_id, item_index, status, result, error)
+        except Exception as e:
+            # The lease expires and the item is retried
+            print(f"Error storing result of batch item {batch_id}/{item_index}: {e}")
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get pool counters.
+
+        Returns:
+            Dictionary of claimed/completed/failed/released counts and the
+            number of items in flight
+        """
+        return {**self.stats, "running": len(self._running), "workers": self.workers}
+
+
+# Global pool instance
+batch_worker_pool = BatchWorkerPool()
@@ -0,0 +1,156 @@
+"""
+Streaming response mode for the verification endpoints.
+
+Clients opt in with `?stream=ndjson` / `?stream=sse` (or an Accept header of
+application/x-ndjson / text/event-stream). The endpoint then answers
+immediately and emits each top-level section of the usual JSON response as
+soon as the upstream calls feeding it have finished, instead of waiting for
+the slowest one. A section may be emitted again if a later call changes it;
+the last emission wins, so merging all "section" events in order rebuilds
+exactly the non-streaming response. The stream always ends with a
+"metadata" event carrying the usual metadata block (or an "error" event).
+
+NDJSON lines look like {"event": "section", "section": "panVerification",
+"data": {...}}; SSE frames carry the same JSON in `data:` with the event
+name in `event:`.
+"""
+
+import json
+import copy
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+# Stream format -> media type
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def get_stream_format(request: Request) -> Optional[str]:
+    """
+    Return the requested stream format, or None for a regular JSON response.
+
+    Args:
+        request: Incoming request
+
+    Returns:
+        "ndjson", "sse" or None
+    """
+    requested = (request.query_params.get("stream") or "").strip().lower()
+    if requested in STREAM_FORMATS:
+        return requested
+    if requested in ("1", "true", "yes"):
+        return "ndjson"
+
+    accept = request.headers.get("accept", "").lower()
+    if "text/event-stream" in accept:
+        return "sse"
+    if "application/x-ndjson" in accept:
+        return "ndjson"
+    return None
+
+
+def encode_event(stream_format: str, event: str, payload: Dict[str, Any]) -> str:
+    """
+    Serialize one stream event.
+
+    Args:
+        stream_format: "ndjson" or "sse"
+        event: Event name ("section", "metadata" or "error")
+        payload: Event body
+
+    Returns:
+        The encoded line (NDJSON) or frame (SSE)
+    """
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+    return json.dumps({"event": event, **payload}, default=str) + "\n"
+
+
+def streaming_response(stream_format: str, events: AsyncIterator[Tuple[str, Dict[str, Any]]]) -> StreamingResponse:
+    """
+    Wrap an async iterator of (event, payload) pairs in a StreamingResponse.
+
+    Args:
+        stream_format: "ndjson" or "sse"
+        events: Async iterator of (event name, payload)
+
+    Returns:
+        StreamingResponse with proxy buffering disabled
+    """
+    async def _body():
+        async for event, payload in events:
+            yield encode_event(stream_format, event, payload)
+
+    return StreamingResponse(
+        _body(),
+        media_type=STREAM_FORMATS[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def run_with_progress(
+    run: Callable[[Callable[[str], None]], Awaitable[Any]]
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Run a task graph and yield its progress.
+
+    Args:
+        run: Coroutine function taking an on_complete callback (see
+            TaskGraph.run) and returning the run's result
+
+    Yields:
+        ("complete", node name) as each node finishes, then ("result", the
+        return value of `run`). The run is cancelled if the consumer stops
+        early (e.g. the client disconnected).
+    """
+    completed: asyncio.Queue = asyncio.Queue()
+    run_task = asyncio.create_task(run(completed.put_nowait))
+    try:
+        while not run_task.done():
+            next_completion = asyncio.ensure_future(completed.get())
+            await asyncio.wait([next_completion, run_task], return_when=asyncio.FIRST_COMPLETED)
+            if next_completion.done():
+                yield "complete", next_completion.result()
+            else:
+                next_completion.cancel()
+        while not completed.empty():
+            yield "complete", completed.get_nowait()
+        yield "result", run_task.result()
+    finally:
+        if not run_task.done():
+            run_task.cancel()
+            await asyncio.gather(run_task, return_exceptions=True)
+
+
+class SectionTracker:
+    """Remembers what was last emitted per section so only changes are re-sent."""
+
+    def __init__(self):
+        self._emitted: Dict[str, Any] = {}
+
+    def changed(self, sections: Dict[str, Any], names: Optional[List[str]] = None) -> List[Tuple[str, Any]]:
+        """
+        Return the sections that were never emitted or changed since.
+
+        Args:
+            sections: Current response sections
+            names: Restrict the check to these sections (default: all)
+
+        Returns:
+            List of (section name, value) to emit, in response order
+        """
+        updates = []
+        for name in (names if names is not None else list(sections)):
+            if name not in sections:
+                continue
+            value = sections[name]
+            if name not in self._emitted or self._emitted[name] != value:
+                # Sections are mutated in place, so keep a snapshot to compare against
+                self._emitted[name] = copy.deepcopy(value)
+                updates.append((name, value))
+        return updates
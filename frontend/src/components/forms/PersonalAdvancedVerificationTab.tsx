@@ -847,40 +847,31 @@ export default function PersonalProfilePage() {
           if (pdfResponse.ok) {
             const pdfBlob = await pdfResponse.blob();
 
-            // Convert PDF to base64
-            const arrayBuffer = await pdfBlob.arrayBuffer();
-            const base64String = btoa(
-              new Uint8Array(arrayBuffer).reduce(
-                (data, byte) => data + String.fromCharCode(byte),
-                ""
-              )
-            );
-
             const fullName =
               profileData.personalInfo?.full_name ||
               profileData.personalInfo?.fullName ||
               name;
 
+            // Upload the PDF as a file part rather than base64 in the JSON body
+            const formData = new FormData();
+            formData.append(
+              "payload",
+              JSON.stringify({ name: fullName, profileData: profileData })
+            );
+            formData.append(
+              "pdf",
+              pdfBlob,
+              `argus-verification-report-${fullName.replace(/\s+/g, "-")}.pdf`
+            );
+
             // Send email WITH PDF attachment
             const emailResponse = await fetch(`${API_URL}/send-profile-email`, {
               method: "POST",
               headers: {
-                "Content-Type": "application/json",
                 "x-user-email": userEmail,
                 "x-user-username": userUsername || "User",
               },
-              body: JSON.stringify({
-                name: fullName,
-                profileData: profileData,
-                pdfAttachment: {
-                  content: base64String,
-                  filename: `argus-verification-report-${fullName.replace(
-                    /\s+/g,
-                    "-"
-                  )}.pdf`,
-                  contentType: "application/pdf",
-                },
-              }),
+              body: formData,
               credentials: "include",
             });
 
@@ -991,40 +982,29 @@ export default function PersonalProfilePage() {
 
       if (userEmail) {
         try {
-          console.log("📧 Converting PDF to base64 and sending email...");
-
-          // Convert blob to base64 for email attachment
-          const arrayBuffer = await pdfBlob.arrayBuffer();
-          const base64String = btoa(
-            new Uint8Array(arrayBuffer).reduce(
-              (data, byte) => data + String.fromCharCode(byte),
-              ""
-            )
-          );
+          console.log("📧 Uploading PDF and sending email...", pdfBlob.size);
 
-          console.log("PDF converted to base64, size:", base64String.length);
+          // Upload the PDF as a file part rather than base64 in the JSON body
+          const formData = new FormData();
+          formData.append(
+            "payload",
+            JSON.stringify({ name: fullName, profileData: profileData })
+          );
+          formData.append(
+            "pdf",
+            pdfBlob,
+            `argus-verification-report-${fullName.replace(/\s+/g, "-")}.pdf`
+          );
 
           // Send email with PDF attachment
           const emailResponse = await fetch(`${API_URL}/send-profile-email`, {
             method: "POST",
             headers: {
-              "Content-Type": "application/json",
               "x-user-email": userEmail,
               "x-user-username": userUsername || "User",
             },
             credentials: "include",
-            body: JSON.stringify({
-              name: fullName,
-              profileData: profileData,
-              pdfAttachment: {
-                content: base64String,
-                filename: `argus-verification-report-${fullName.replace(
-                  /\s+/g,
-                  "-"
-                )}.pdf`,
-                contentType: "application/pdf",
-              },
-            }),
+            body: formData,
           });
 
           if (emailResponse.ok) {